@@ -12,8 +12,12 @@ Implementiert erweiterte Graph-Analysen für Wallet-Clustering:
 from __future__ import annotations
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Tuple, Set
-from collections import defaultdict
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple, Set
+from collections import OrderedDict, defaultdict
 import networkx as nx
 import numpy as np
 from datetime import datetime
@@ -45,15 +49,270 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+ALL_CHAINS = "*"
+
+# Kanten aller angefragten Adressen in einem Query, Chain-Filter serverseitig
+_EDGES_QUERY = """
+    MATCH (a:Address)-[t:TRANSACTION]-(b:Address)
+    WHERE a.address IN $addresses
+      AND ($chains IS NULL OR toLower(coalesce(t.chain, a.chain)) IN $chains)
+    RETURN a.address as from_addr, b.address as to_addr,
+           t.tx_hash as tx_hash, t.value as value,
+           t.block_timestamp as timestamp, coalesce(t.chain, a.chain) as chain
+"""
+
+
+class AnalyticsGraphStore:
+    """
+    Geteilter, größenbegrenzter Transaktionsgraph für Analytics-Anfragen
+
+    - Jede Transaktion wird einmal gehalten (Chain, tx_hash, Adresspaar)
+    - Pro Adresse wird gemerkt, für welche Chains ihre Nachbarschaft geladen
+      ist; überlappende Anfragen laden nur fehlende Adressen nach
+    - Bei Überschreiten von max_edges fallen die ältesten Kanten heraus, ihre
+      Endpunkte gelten danach wieder als nicht geladen
+    """
+
+    def __init__(self, max_edges: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_edges = max_edges or int(os.getenv("GRAPH_ANALYTICS_MAX_EDGES", "200000"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("GRAPH_ANALYTICS_TTL_SECONDS", "3600")
+        )
+        self._edges: "OrderedDict[Tuple[str, str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._adjacency: Dict[str, Dict[Tuple[str, str, str, str], None]] = {}
+        self._loaded: Dict[str, Dict[str, float]] = {}
+        self._lock = asyncio.Lock()
+        self.fetches = 0
+        self.addresses_fetched = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _scopes(chains: Optional[List[str]]) -> List[str]:
+        return sorted({c.lower() for c in chains}) if chains else [ALL_CHAINS]
+
+    def missing(self, addresses: Iterable[str], chains: Optional[List[str]] = None) -> List[str]:
+        """Adressen, deren Nachbarschaft für die Chains noch nicht (gültig) geladen ist"""
+        now = time.monotonic()
+        scopes = self._scopes(chains)
+        result = []
+        for address in dict.fromkeys(addresses):
+            loaded = self._loaded.get(address, {})
+            if loaded.get(ALL_CHAINS, 0) > now:
+                continue
+            if chains and all(loaded.get(scope, 0) > now for scope in scopes):
+                continue
+            result.append(address)
+        return result
+
+    def add(self, rows: Iterable[Dict[str, Any]], addresses: Iterable[str], chains: Optional[List[str]] = None) -> None:
+        """Kanten übernehmen und die Adressen für die Chains als geladen markieren"""
+        for row in rows:
+            u, v = row.get("from_addr"), row.get("to_addr")
+            if not u or not v:
+                continue
+            a, b = (u, v) if u <= v else (v, u)
+            key = (str(row.get("chain") or ""), str(row.get("tx_hash") or ""), a, b)
+            try:
+                value = float(row["value"]) if row.get("value") else 0.0
+            except (TypeError, ValueError):
+                value = 0.0
+            self._edges[key] = {"from_addr": u, "to_addr": v, "value": value, "chain": row.get("chain")}
+            self._edges.move_to_end(key)
+            self._adjacency.setdefault(a, {})[key] = None
+            self._adjacency.setdefault(b, {})[key] = None
+
+        expires = time.monotonic() + self.ttl_seconds
+        for address in addresses:
+            loaded = self._loaded.setdefault(address, {})
+            for scope in self._scopes(chains):
+                loaded[scope] = expires
+
+        while len(self._edges) > self.max_edges:
+            key, _edge = self._edges.popitem(last=False)
+            for address in key[2:]:
+                incident = self._adjacency.get(address)
+                if incident is not None:
+                    incident.pop(key, None)
+                    if not incident:
+                        del self._adjacency[address]
+                self._loaded.pop(address, None)
+            self.evictions += 1
+
+    async def ensure(
+        self,
+        addresses: List[str],
+        chains: Optional[List[str]],
+        fetch: Callable[[List[str], Optional[List[str]]], Any],
+    ) -> None:
+        """Fehlende Adressen über fetch(addresses, chains) nachladen (ein Fetch zur Zeit)"""
+        if not self.missing(addresses, chains):
+            return
+        async with self._lock:
+            missing = self.missing(addresses, chains)
+            if not missing:
+                return
+            rows = await fetch(missing, [c.lower() for c in chains] if chains else None)
+            self.fetches += 1
+            self.addresses_fetched += len(missing)
+            self.add(rows, missing, chains)
+
+    def view(self, addresses: List[str], chains: Optional[List[str]] = None, max_nodes: int = 1000) -> nx.Graph:
+        """Graph aus den Kanten der Adressen (Gewicht = Summe der Werte, max. max_nodes Knoten)"""
+        wanted = {c.lower() for c in chains} if chains else None
+        graph = nx.Graph()
+        seen: Set[Tuple[str, str, str, str]] = set()
+        nodes_added = 0
+        for address in dict.fromkeys(addresses):
+            for key in self._adjacency.get(address, {}):
+                if nodes_added >= max_nodes:
+                    return graph
+                if key in seen or (wanted is not None and key[0].lower() not in wanted):
+                    continue
+                seen.add(key)
+                tx = self._edges[key]
+                from_addr, to_addr = tx["from_addr"], tx["to_addr"]
+
+                # Füge Knoten hinzu
+                if from_addr not in graph:
+                    graph.add_node(from_addr, chain=tx["chain"])
+                    nodes_added += 1
+                if to_addr not in graph and nodes_added < max_nodes:
+                    graph.add_node(to_addr, chain=tx["chain"])
+                    nodes_added += 1
+
+                # Füge Kante hinzu (gewichtete Kante nach Transaktionswert), ohne Self-Loops
+                if from_addr != to_addr and from_addr in graph and to_addr in graph:
+                    weight = tx["value"] if tx["value"] > 0 else 1.0
+                    if graph.has_edge(from_addr, to_addr):
+                        # Erhöhe Gewicht bei mehreren Transaktionen
+                        graph[from_addr][to_addr]["weight"] += weight
+                    else:
+                        graph.add_edge(from_addr, to_addr, weight=weight, tx_hash=key[1])
+        return graph
+
+    def clear(self) -> None:
+        self._edges.clear()
+        self._adjacency.clear()
+        self._loaded.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "edges": len(self._edges),
+            "addresses": len(self._adjacency),
+            "loaded_addresses": len(self._loaded),
+            "max_edges": self.max_edges,
+            "fetches": self.fetches,
+            "addresses_fetched": self.addresses_fetched,
+            "evictions": self.evictions,
+        }
+
+
+# CPU-intensive Teile (Modulebene, damit sie im Process-Pool laufen können)
+
+def _louvain(graph: nx.Graph, resolution: float) -> Tuple[List[List[str]], float]:
+    communities = list(nx.community.louvain_communities(graph, resolution=resolution, seed=42))
+    modularity = nx.community.modularity(graph, communities)
+    return [sorted(community) for community in communities], modularity
+
+
+def _centrality(graph: nx.Graph, measures: List[str]) -> Tuple[Dict[str, Dict[str, float]], Dict[str, List[str]]]:
+    centrality_results: Dict[str, Dict[str, float]] = {}
+    top_addresses: Dict[str, List[str]] = {}
+
+    # Degree Centrality
+    if "degree" in measures:
+        degree_cent = nx.degree_centrality(graph)
+        top_degree = sorted(degree_cent.items(), key=lambda x: x[1], reverse=True)[:10]
+        top_addresses["degree"] = [addr for addr, _ in top_degree]
+        centrality_results.update({addr: {"degree": cent} for addr, cent in degree_cent.items()})
+
+    # Betweenness Centrality (nur für kleinere Graphen)
+    if "betweenness" in measures and len(graph.nodes) <= 500:
+        betweenness_cent = nx.betweenness_centrality(graph)
+        top_betweenness = sorted(betweenness_cent.items(), key=lambda x: x[1], reverse=True)[:10]
+        top_addresses["betweenness"] = [addr for addr, _ in top_betweenness]
+        centrality_results = {addr: {**centrality_results.get(addr, {}), "betweenness": cent}
+                              for addr, cent in betweenness_cent.items()}
+
+    # Closeness Centrality
+    if "closeness" in measures:
+        closeness_cent = nx.closeness_centrality(graph)
+        top_closeness = sorted(closeness_cent.items(), key=lambda x: x[1], reverse=True)[:10]
+        top_addresses["closeness"] = [addr for addr, _ in top_closeness]
+        centrality_results = {addr: {**centrality_results.get(addr, {}), "closeness": cent}
+                              for addr, cent in closeness_cent.items()}
+
+    return centrality_results, top_addresses
+
+
+def _structure(graph: nx.Graph) -> Dict[str, Any]:
+    nodes = len(graph.nodes)
+    edges = len(graph.edges)
+    density = nx.density(graph)
+    avg_degree = sum(dict(graph.degree()).values()) / nodes
+
+    # Diameter (nur für zusammenhängende Graphen)
+    diameter = 0.0
+    if nx.is_connected(graph):
+        try:
+            diameter = nx.diameter(graph)
+        except Exception:
+            diameter = 0.0
+
+    # Clustering Coefficient
+    avg_clustering = nx.average_clustering(graph)
+
+    # Connected Components
+    components = list(nx.connected_components(graph))
+    largest_component = max(len(c) for c in components) if components else 0
+
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "density": density,
+        "avg_degree": avg_degree,
+        "diameter": diameter,
+        "avg_clustering": avg_clustering,
+        "components": len(components),
+        "largest_component": largest_component,
+    }
+
 
 class AdvancedGraphAnalytics:
     """
     Erweiterte Graph-Analysen für Blockchain-Forensics
     """
 
-    def __init__(self):
-        self.graph_cache: Dict[str, nx.Graph] = {}
-        self.cache_ttl = 3600  # 1 Stunde Cache
+    def __init__(self, graph_store: Optional[AnalyticsGraphStore] = None, workers: Optional[int] = None):
+        self.graph_store = graph_store or AnalyticsGraphStore()
+        self.cache_ttl = self.graph_store.ttl_seconds
+        if workers is None:
+            v = os.getenv("GRAPH_ANALYTICS_WORKERS")
+            workers = int(v) if v not in (None, "") else min(2, os.cpu_count() or 1)
+        self.workers = max(0, workers)  # 0 = Berechnung in einem Thread
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _run_cpu(self, fn: Callable, *args: Any) -> Any:
+        """CPU-intensive Graph-Algorithmen außerhalb des Event-Loops ausführen"""
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+            except BrokenProcessPool as e:
+                # Abgestürzter Worker: Pool beim nächsten Aufruf neu aufbauen
+                logger.warning(f"Graph analytics pool broken, computing in thread: {e}")
+                self._pool = None
+        return await asyncio.to_thread(fn, *args)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
 
     async def detect_communities_louvain(
         self,
@@ -93,22 +352,15 @@ class AdvancedGraphAnalytics:
                     "computation_time": (datetime.utcnow() - start_time).total_seconds()
                 }
 
-            # Louvain Community Detection
-            communities = list(nx.community.louvain_communities(
-                graph,
-                resolution=resolution,
-                seed=42
-            ))
-
-            # Berechne Modularität
-            modularity = nx.community.modularity(graph, communities)
+            # Louvain Community Detection + Modularität (außerhalb des Event-Loops)
+            communities, modularity = await self._run_cpu(_louvain, graph, resolution)
 
             # Konvertiere zu strukturierte Ausgabe
             community_data = []
             for i, community in enumerate(communities):
                 community_data.append({
                     "id": i,
-                    "members": sorted(list(community)),
+                    "members": community,
                     "size": len(community),
                     "modularity": modularity
                 })
@@ -186,31 +438,8 @@ class AdvancedGraphAnalytics:
                     "computation_time": (datetime.utcnow() - start_time).total_seconds()
                 }
 
-            centrality_results = {}
-            top_addresses = {}
-
-            # Degree Centrality
-            if "degree" in measures:
-                degree_cent = nx.degree_centrality(graph)
-                top_degree = sorted(degree_cent.items(), key=lambda x: x[1], reverse=True)[:10]
-                top_addresses["degree"] = [addr for addr, _ in top_degree]
-                centrality_results.update({addr: {"degree": cent} for addr, cent in degree_cent.items()})
-
-            # Betweenness Centrality (nur für kleinere Graphen)
-            if "betweenness" in measures and len(graph.nodes) <= 500:
-                betweenness_cent = nx.betweenness_centrality(graph)
-                top_betweenness = sorted(betweenness_cent.items(), key=lambda x: x[1], reverse=True)[:10]
-                top_addresses["betweenness"] = [addr for addr, _ in top_betweenness]
-                centrality_results = {addr: {**centrality_results.get(addr, {}), "betweenness": cent}
-                                    for addr, cent in betweenness_cent.items()}
-
-            # Closeness Centrality
-            if "closeness" in measures:
-                closeness_cent = nx.closeness_centrality(graph)
-                top_closeness = sorted(closeness_cent.items(), key=lambda x: x[1], reverse=True)[:10]
-                top_addresses["closeness"] = [addr for addr, _ in top_closeness]
-                centrality_results = {addr: {**centrality_results.get(addr, {}), "closeness": cent}
-                                    for addr, cent in closeness_cent.items()}
+            # Zentralitätsmaße außerhalb des Event-Loops
+            centrality_results, top_addresses = await self._run_cpu(_centrality, graph, list(measures))
 
             result = {
                 "centrality": centrality_results,
@@ -275,38 +504,9 @@ class AdvancedGraphAnalytics:
                     "computation_time": (datetime.utcnow() - start_time).total_seconds()
                 }
 
-            # Grundlegende Metriken
-            nodes = len(graph.nodes)
-            edges = len(graph.edges)
-            density = nx.density(graph)
-            avg_degree = sum(dict(graph.degree()).values()) / nodes
-
-            # Diameter (nur für zusammenhängende Graphen)
-            diameter = 0.0
-            if nx.is_connected(graph):
-                try:
-                    diameter = nx.diameter(graph)
-                except:
-                    diameter = 0.0
-
-            # Clustering Coefficient
-            avg_clustering = nx.average_clustering(graph)
-
-            # Connected Components
-            components = list(nx.connected_components(graph))
-            largest_component = max(len(c) for c in components) if components else 0
-
-            result = {
-                "nodes": nodes,
-                "edges": edges,
-                "density": density,
-                "avg_degree": avg_degree,
-                "diameter": diameter,
-                "avg_clustering": avg_clustering,
-                "components": len(components),
-                "largest_component": largest_component,
-                "computation_time": (datetime.utcnow() - start_time).total_seconds()
-            }
+            # Grundlegende Metriken (außerhalb des Event-Loops)
+            result = await self._run_cpu(_structure, graph)
+            result["computation_time"] = (datetime.utcnow() - start_time).total_seconds()
 
             return result
 
@@ -324,86 +524,22 @@ class AdvancedGraphAnalytics:
         max_nodes: int = 1000,
     ) -> nx.Graph:
         """
-        Baue Transaktionsgraph aus Neo4j oder Cache
+        Baue Transaktionsgraph aus dem geteilten Graph-Store
+
+        Fehlende Adressen werden mit einem Query (Chain-Filter in Cypher)
+        aus Neo4j nachgeladen; bereits geladene Nachbarschaften werden aus
+        früheren Anfragen wiederverwendet.
 
         Returns:
             NetworkX Graph mit Adressen als Knoten und Transaktionen als Kanten
         """
-        # Cache-Key für Graph
-        cache_key = f"{'_'.join(sorted(addresses))}_{'_'.join(chains or ['all'])}_{max_nodes}"
-
-        # Prüfe Cache
-        if cache_key in self.graph_cache:
-            cached_graph, cached_time = self.graph_cache[cache_key]
-            if (datetime.utcnow() - cached_time).total_seconds() < self.cache_ttl:
-                return cached_graph
-
-        # Baue Graph aus Neo4j
         if not NEO4J_AVAILABLE:
             logger.warning("Neo4j not available, returning empty graph")
             return nx.Graph()
 
         try:
-            graph = nx.Graph()
-
-            # Query für Transaktionen zwischen Adressen
-            query = """
-                MATCH (a:Address)-[t:TRANSACTION]-(b:Address)
-                WHERE a.address IN $addresses OR b.address IN $addresses
-                RETURN a.address as from_addr, b.address as to_addr,
-                       t.tx_hash as tx_hash, t.value as value,
-                       t.block_timestamp as timestamp
-            """
-
-            # Führe Query für jede Chain aus
-            target_chains = chains or await self._get_available_chains()
-
-            all_transactions = []
-            for chain in target_chains:
-                try:
-                    params = {"addresses": addresses}
-                    results = await neo4j_client.query_sync(query, params)
-                    for row in results:
-                        all_transactions.append({
-                            "from_addr": row["from_addr"],
-                            "to_addr": row["to_addr"],
-                            "tx_hash": row["tx_hash"],
-                            "value": float(row["value"]) if row["value"] else 0.0,
-                            "timestamp": row["timestamp"],
-                            "chain": chain
-                        })
-                except Exception as e:
-                    logger.warning(f"Error querying chain {chain}: {e}")
-
-            # Baue NetworkX Graph
-            nodes_added = 0
-            for tx in all_transactions:
-                if nodes_added >= max_nodes:
-                    break
-
-                from_addr = tx["from_addr"]
-                to_addr = tx["to_addr"]
-
-                # Füge Knoten hinzu
-                if from_addr not in graph.nodes:
-                    graph.add_node(from_addr, chain=tx["chain"])
-                    nodes_added += 1
-
-                if to_addr not in graph.nodes and nodes_added < max_nodes:
-                    graph.add_node(to_addr, chain=tx["chain"])
-                    nodes_added += 1
-
-                # Füge Kante hinzu (gewichtete Kante nach Transaktionswert)
-                if from_addr != to_addr:  # Vermeide Self-Loops
-                    weight = tx["value"] if tx["value"] > 0 else 1.0
-                    if graph.has_edge(from_addr, to_addr):
-                        # Erhöhe Gewicht bei mehreren Transaktionen
-                        graph[from_addr][to_addr]["weight"] += weight
-                    else:
-                        graph.add_edge(from_addr, to_addr, weight=weight, tx_hash=tx["tx_hash"])
-
-            # Cache Graph
-            self.graph_cache[cache_key] = (graph, datetime.utcnow())
+            await self.graph_store.ensure(addresses, chains, self._fetch_edges)
+            graph = self.graph_store.view(addresses, chains, max_nodes)
 
             logger.info(f"Built transaction graph with {len(graph.nodes)} nodes and {len(graph.edges)} edges")
             return graph
@@ -412,6 +548,15 @@ class AdvancedGraphAnalytics:
             logger.error(f"Error building transaction graph: {e}")
             return nx.Graph()
 
+    async def _fetch_edges(self, addresses: List[str], chains: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """Kanten der Adressen in Batches laden (chains=None: alle Chains)"""
+        rows: List[Dict[str, Any]] = []
+        for i in range(0, len(addresses), 500):
+            rows.extend(await neo4j_client.execute_read(
+                _EDGES_QUERY, {"addresses": addresses[i:i + 500], "chains": chains}
+            ))
+        return rows
+
     async def _get_available_chains(self) -> List[str]:
         """Hole verfügbare Chains aus Neo4j"""
         if not NEO4J_AVAILABLE:
@@ -419,14 +564,14 @@ class AdvancedGraphAnalytics:
 
         try:
             query = "MATCH (n:Address) RETURN DISTINCT n.chain as chain LIMIT 10"
-            results = await neo4j_client.query_sync(query, {})
+            results = await neo4j_client.execute_read(query, {})
             return [row["chain"] for row in results if row["chain"]]
         except Exception:
             return ["ethereum"]
 
     def clear_cache(self):
         """Leere Graph-Cache"""
-        self.graph_cache.clear()
+        self.graph_store.clear()
         logger.info("Cleared graph analytics cache")
 
     async def get_cluster_insights(
@@ -474,7 +619,7 @@ class AdvancedGraphAnalytics:
                 WHERE a.address IN $addresses
                 RETURN DISTINCT a.chain as chain
             """
-            results = await neo4j_client.query_sync(query, {"addresses": addresses})
+            results = await neo4j_client.execute_read(query, {"addresses": addresses})
             return [row["chain"] for row in results]
         except Exception:
             return []
@@ -490,7 +635,7 @@ class AdvancedGraphAnalytics:
                 WHERE a.address IN $addresses OR b.address IN $addresses
                 RETURN sum(t.value) as total_volume
             """
-            results = await neo4j_client.query_sync(query, {"addresses": addresses})
+            results = await neo4j_client.execute_read(query, {"addresses": addresses})
             return float(results[0]["total_volume"]) if results and results[0]["total_volume"] else 0.0
         except Exception:
             return 0.0
@@ -506,7 +651,7 @@ class AdvancedGraphAnalytics:
                 WHERE a.address IN $addresses AND a.risk_score IS NOT NULL
                 RETURN a.risk_score as risk_score
             """
-            results = await neo4j_client.query_sync(query, {"addresses": addresses})
+            results = await neo4j_client.execute_read(query, {"addresses": addresses})
 
             distribution = {"low": 0, "medium": 0, "high": 0, "critical": 0}
             for row in results:
@@ -535,7 +680,7 @@ class AdvancedGraphAnalytics:
                 WHERE a.address IN $addresses OR b.address IN $addresses
                 RETURN r.bridge as bridge, count(*) as count
             """
-            results = await neo4j_client.query_sync(query, {"addresses": addresses})
+            results = await neo4j_client.execute_read(query, {"addresses": addresses})
 
             bridges = {}
             for row in results:
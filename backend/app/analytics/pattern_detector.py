@@ -10,8 +10,15 @@ Erkennt verdächtige Muster im Transaction Graph:
 """
 from __future__ import annotations
 
+import asyncio
+import bisect
+import heapq
+import itertools
 import logging
-from typing import Dict, Any, List, Optional
+import os
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -20,6 +27,212 @@ from app.db.neo4j_client import neo4j_client
 logger = logging.getLogger(__name__)
 
 
+_TRACE_SEEDS_QUERY = """
+MATCH (t:Trace {trace_id: $trace_id})-[:INCLUDES]->(a:Address)
+RETURN DISTINCT a.address as address
+"""
+
+_EGO_LEVEL_QUERY = """
+UNWIND $addresses AS addr
+MATCH (a:Address {address: addr})-[r:TRANSACTION]-(:Address)
+WHERE r.value >= $min_value
+WITH a, r ORDER BY r.value DESC
+WITH a, collect(r) as rels
+RETURN a.address as address,
+       size(rels) as degree,
+       [r IN rels[..$fanout] | {
+           id: elementId(r),
+           from: startNode(r).address,
+           to: endNode(r).address,
+           value: r.value,
+           timestamp: toString(r.timestamp),
+           tx_hash: r.tx_hash
+       }] as edges
+"""
+
+_RECENT_EDGES_QUERY = """
+MATCH (a:Address)-[r:TRANSACTION]->(b:Address)
+WHERE r.value >= $min_value
+WITH a, b, r ORDER BY r.timestamp DESC LIMIT $limit
+RETURN null as address,
+       0 as degree,
+       collect({
+           id: elementId(r),
+           from: a.address,
+           to: b.address,
+           value: r.value,
+           timestamp: toString(r.timestamp),
+           tx_hash: r.tx_hash
+       }) as edges
+"""
+
+
+def _to_epoch(value: Any) -> Optional[float]:
+    """Timestamp (datetime, ISO-String, Zahl, Neo4j DateTime) -> Epoch-Sekunden"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        text = str(value)
+        # Neo4j-Zeitzonen wie "...Z[Europe/Berlin]" abschneiden
+        if "[" in text:
+            text = text.split("[", 1)[0]
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return None
+
+
+def _enumerate_cycles(
+    edges: List[tuple],
+    min_length: int,
+    max_length: int,
+    temporal: bool,
+    max_results: int,
+    seeds: Optional[Set[str]],
+    deadline: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Enumeriert einfache gerichtete Kreise im geladenen Subgraph.
+
+    `edges` sind Tupel (from, to, value, ts_epoch, tx_hash, ts_raw);
+    parallele Kanten (mehrere Transaktionen) ergeben verschiedene Kreise.
+
+    - Johnson-Stil: ohne `temporal` startet jeder Kreis an seinem kleinsten
+      Knoten und nutzt nur Knoten >= Start (jeder Kreis genau einmal)
+    - Längen-Pruning: Rückwärts-BFS-Distanz zum Start begrenzt die Tiefe
+    - `temporal`: Timestamps entlang des Kreises nicht fallend; der Kreis
+      beginnt mit der frühesten Kante, ausgehende Kanten sind nach Zeit
+      sortiert und werden per Bisektion ab dem letzten Timestamp gelesen.
+      Kanten ohne Timestamp gelten als frühestmöglich.
+    - Ergebnis: höchster Gesamtwert zuerst, max. `max_results`
+    """
+    out_adj: Dict[str, List[int]] = {}
+    in_adj: Dict[str, List[int]] = {}
+    for i, (src, dst, *_rest) in enumerate(edges):
+        if src == dst:
+            continue
+        out_adj.setdefault(src, []).append(i)
+        in_adj.setdefault(dst, []).append(i)
+    nodes = sorted(set(out_adj) & set(in_adj))
+    rank = {n: i for i, n in enumerate(nodes)}
+    neg_inf = float("-inf")
+
+    def edge_time(i: int) -> float:
+        ts = edges[i][3]
+        return ts if ts is not None else neg_inf
+
+    times: Dict[str, List[float]] = {}
+    if temporal:
+        for u, lst in out_adj.items():
+            lst.sort(key=edge_time)
+            times[u] = [edge_time(i) for i in lst]
+
+    info: Dict[str, Any] = {"found": 0, "nodes": len(nodes), "truncated": "", "steps": 0}
+    top: List[tuple] = []  # Min-Heap (total_value, tie, edge_tuple)
+    seen_keys: Set[tuple] = set()
+    tie = itertools.count()
+
+    def record(path_edges: List[int]) -> None:
+        cycle = tuple(path_edges)
+        if temporal:
+            # Bei gleichen Timestamps kann derselbe Kreis mehrfach zeitlich geordnet sein
+            pivot = cycle.index(min(cycle))
+            key = cycle[pivot:] + cycle[:pivot]
+            if key in seen_keys:
+                return
+            seen_keys.add(key)
+        if seeds is not None and not any(edges[i][0] in seeds for i in cycle):
+            return
+        info["found"] += 1
+        total = sum(edges[i][2] for i in cycle)
+        entry = (total, next(tie), cycle)
+        if len(top) < max_results:
+            heapq.heappush(top, entry)
+        elif total > top[0][0]:
+            heapq.heapreplace(top, entry)
+
+    def back_distances(start: str, min_rank: int) -> Dict[str, int]:
+        dist = {start: 0}
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            d = dist[u]
+            if d >= max_length - 1:
+                continue
+            for i in in_adj.get(u, ()):
+                w = edges[i][0]
+                if w not in dist and rank.get(w, -1) >= min_rank:
+                    dist[w] = d + 1
+                    queue.append(w)
+        return dist
+
+    steps = 0
+    for start in nodes:
+        if info["truncated"] or max_results <= 0:
+            break
+        min_rank = 0 if temporal else rank[start]
+        dist_back = back_distances(start, min_rank)
+        if len(dist_back) < 2:
+            continue
+
+        def candidates(u: str, last: Optional[float]):
+            lst = out_adj.get(u, ())
+            if temporal and last is not None:
+                return iter(lst[bisect.bisect_left(times[u], last):])
+            return iter(lst)
+
+        path_edges: List[int] = []
+        path_nodes: List[str] = [start]
+        on_path = {start}
+        stack = [candidates(start, None)]
+        while stack:
+            steps += 1
+            if deadline is not None and steps & 1023 == 0 and time.monotonic() > deadline:
+                info["truncated"] = "time_budget"
+                break
+            i = next(stack[-1], None)
+            if i is None:
+                stack.pop()
+                on_path.discard(path_nodes.pop())
+                if path_edges:
+                    path_edges.pop()
+                continue
+            v = edges[i][1]
+            depth = len(path_edges) + 1
+            if v == start:
+                if depth >= min_length:
+                    record(path_edges + [i])
+                continue
+            if v in on_path or depth >= max_length:
+                continue
+            d = dist_back.get(v)
+            if d is None or depth + d > max_length:
+                continue
+            path_edges.append(i)
+            path_nodes.append(v)
+            on_path.add(v)
+            stack.append(candidates(v, edge_time(i) if temporal else None))
+
+    info["steps"] = steps
+    cycles = []
+    for total, _tie, cycle in sorted(top, key=lambda x: (-x[0], x[1])):
+        addresses = [edges[i][0] for i in cycle] + [edges[cycle[0]][0]]
+        cycles.append({
+            "addresses": addresses,
+            "values": [float(edges[i][2]) for i in cycle],
+            "timestamps": [edges[i][5] for i in cycle],
+            "tx_hashes": [edges[i][4] for i in cycle],
+            "total_value": float(total),
+            "length": len(cycle),
+        })
+    return cycles, info
+
+
 class PatternDetector:
     """Service für Pattern Detection im Transaction Graph"""
     
@@ -31,85 +244,197 @@ class PatternDetector:
         trace_id: Optional[str] = None,
         min_circle_length: int = 3,
         max_circle_length: int = 10,
-        min_total_value: float = 0.0
+        min_total_value: float = 0.0,
+        address: Optional[str] = None,
+        temporal: bool = True,
+        max_results: int = 100,
+        time_budget_s: Optional[float] = None,
+        max_edges: Optional[int] = None,
+        max_fanout: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Erkennt zirkuläre Transaktionsketten (potenzielle Geldwäsche).
-        
+
+        Statt variabler Pfadlängen in Cypher wird einmalig ein begrenzter
+        Ego-Subgraph (Radius (max_circle_length + 1) // 2 um Trace-Adressen bzw.
+        `address`, ohne Seeds die jüngsten `max_edges` Kanten) geladen und in
+        Python enumeriert (siehe `_enumerate_cycles`). Laden und Enumeration
+        teilen sich ein explizites Zeitbudget; wird es oder ein Limit erreicht,
+        ist das Ergebnis als `truncated` markiert.
+
         Args:
-            trace_id: Optional - beschränkt auf Trace
+            trace_id: Optional - beschränkt auf Kreise durch Trace-Adressen
             min_circle_length: Minimale Kreis-Länge
-            max_circle_length: Maximale Kreis-Länge  
-            min_total_value: Minimaler Gesamtwert (ETH)
-            
+            max_circle_length: Maximale Kreis-Länge
+            min_total_value: Minimaler Wert pro Kante (ETH)
+            address: Optional - beschränkt auf Kreise durch diese Adresse
+            temporal: Nur zeitlich geordnete Kreise (Timestamps nicht fallend)
+            max_results: Maximale Anzahl Kreise (höchster Gesamtwert zuerst)
+            time_budget_s: Zeitbudget für Laden + Enumeration
+            max_edges: Obergrenze für Kanten im Subgraph
+            max_fanout: Obergrenze für Kanten pro Adresse (Hubs)
+
         Returns:
             Dict mit detected circles und statistics
         """
+        budget = time_budget_s if time_budget_s is not None else float(os.getenv("PATTERN_CIRCLE_TIME_BUDGET", "5"))
+        max_edges = max_edges or int(os.getenv("PATTERN_CIRCLE_MAX_EDGES", "20000"))
+        max_fanout = max_fanout or int(os.getenv("PATTERN_CIRCLE_MAX_FANOUT", "200"))
+        deadline = time.monotonic() + budget
+        started = time.monotonic()
+
         try:
-            # Query für Kreise
-            if trace_id:
-                query = f"""
-                MATCH (t:Trace {{trace_id: '{trace_id}'}})-[:INCLUDES]->(start:Address)
-                MATCH path = (start)-[:TRANSACTION*{min_circle_length}..{max_circle_length}]->(start)
-                WHERE ALL(r IN relationships(path) WHERE r.value >= {min_total_value})
-                WITH path, 
-                     [r IN relationships(path) | r.value] as values,
-                     [n IN nodes(path) | n.address] as addresses
-                RETURN addresses, 
-                       values,
-                       reduce(sum=0.0, v IN values | sum + v) as total_value,
-                       length(path) as circle_length
-                ORDER BY total_value DESC
-                LIMIT 100
-                """
-            else:
-                query = f"""
-                MATCH path = (start:Address)-[:TRANSACTION*{min_circle_length}..{max_circle_length}]->(start)
-                WHERE ALL(r IN relationships(path) WHERE r.value >= {min_total_value})
-                WITH path,
-                     [r IN relationships(path) | r.value] as values,
-                     [n IN nodes(path) | n.address] as addresses
-                RETURN addresses,
-                       values,
-                       reduce(sum=0.0, v IN values | sum + v) as total_value,
-                       length(path) as circle_length
-                ORDER BY total_value DESC
-                LIMIT 100
-                """
-            
-            async with self.client.get_session() as session:
-                result = await session.run(query)
-                circles = []
-                
-                async for record in result:
-                    circles.append({
-                        "addresses": record["addresses"],
-                        "values": [float(v) for v in record["values"]],
-                        "total_value": float(record["total_value"]),
-                        "length": record["circle_length"],
-                        "risk_score": self._calculate_circle_risk(
-                            record["circle_length"],
-                            float(record["total_value"])
-                        )
-                    })
-                
-                return {
-                    "pattern": "circles",
-                    "trace_id": trace_id,
-                    "detected": circles,
-                    "count": len(circles),
-                    "statistics": {
-                        "avg_circle_length": sum(c["length"] for c in circles) / len(circles) if circles else 0,
-                        "total_value_circulated": sum(c["total_value"] for c in circles),
-                        "high_risk_count": len([c for c in circles if c["risk_score"] >= 70])
-                    },
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-                
+            seeds: Set[str] = set()
+            if address:
+                seeds.add(address.lower())
+            edges, fetch_info = await self._fetch_circle_subgraph(
+                trace_id=trace_id,
+                seeds=seeds,
+                radius=max(1, (max_circle_length + 1) // 2),
+                min_value=min_total_value,
+                max_edges=max_edges,
+                max_fanout=max_fanout,
+                deadline=deadline,
+            )
+            seeds |= fetch_info["seeds"]
+            fetch_ms = (time.monotonic() - started) * 1000
+
+            cycles, enum_info = await asyncio.to_thread(
+                _enumerate_cycles,
+                edges,
+                min_circle_length,
+                max_circle_length,
+                temporal,
+                max_results,
+                seeds if (trace_id or address) else None,
+                deadline,
+            )
+
+            circles = []
+            for cycle in cycles:
+                circles.append({
+                    "addresses": cycle["addresses"],
+                    "values": cycle["values"],
+                    "timestamps": cycle["timestamps"],
+                    "tx_hashes": cycle["tx_hashes"],
+                    "total_value": cycle["total_value"],
+                    "length": cycle["length"],
+                    "risk_score": self._calculate_circle_risk(cycle["length"], cycle["total_value"])
+                })
+
+            truncated = fetch_info["truncated"] or enum_info["truncated"]
+            return {
+                "pattern": "circles",
+                "trace_id": trace_id,
+                "detected": circles,
+                "count": len(circles),
+                "statistics": {
+                    "avg_circle_length": sum(c["length"] for c in circles) / len(circles) if circles else 0,
+                    "total_value_circulated": sum(c["total_value"] for c in circles),
+                    "high_risk_count": len([c for c in circles if c["risk_score"] >= 70]),
+                    "cycles_found": enum_info["found"],
+                    "subgraph_edges": len(edges),
+                    "subgraph_nodes": enum_info["nodes"],
+                    "temporal": temporal,
+                    "truncated": bool(truncated),
+                    "truncated_reason": truncated or None,
+                    "fetch_ms": round(fetch_ms, 1),
+                    "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+                },
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
         except Exception as e:
             logger.error(f"Circle detection failed: {e}")
             raise
-            
+
+    async def _fetch_circle_subgraph(
+        self,
+        trace_id: Optional[str],
+        seeds: Set[str],
+        radius: int,
+        min_value: float,
+        max_edges: int,
+        max_fanout: int,
+        deadline: float,
+    ) -> Tuple[List[tuple], Dict[str, Any]]:
+        """
+        Lädt den Ego-Subgraph levelweise (ein parametrisierter Query pro Hop).
+
+        Jeder Kreis der Länge L durch einen Seed liegt vollständig im
+        ungerichteten Radius L // 2 um diesen Seed. Bei ungeradem L verbindet die
+        Schlusskante zwei Knoten mit Abstand L // 2; sie wird erst mit den Kanten
+        dieser Ebene geladen, daher sind (L + 1) // 2 Ebenen nötig.
+        """
+        info: Dict[str, Any] = {"seeds": set(), "truncated": ""}
+        edges: Dict[Any, tuple] = {}
+
+        async def run(query: str, params: Dict[str, Any]) -> List[Any]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+
+            async def _collect():
+                rows = []
+                async with self.client.get_session() as session:
+                    result = await session.run(query, params)
+                    async for record in result:
+                        rows.append(record)
+                return rows
+
+            return await asyncio.wait_for(_collect(), timeout=remaining)
+
+        def add_rows(rows: List[Any]) -> Set[str]:
+            touched: Set[str] = set()
+            for record in rows:
+                if (record.get("degree") or 0) > max_fanout and not info["truncated"]:
+                    info["truncated"] = "max_fanout"
+                for e in record.get("edges") or []:
+                    src, dst = e.get("from"), e.get("to")
+                    if not src or not dst:
+                        continue
+                    value = float(e.get("value") or 0.0)
+                    if value < min_value:
+                        continue
+                    key = e.get("id") or (src, dst, e.get("tx_hash"), e.get("timestamp"))
+                    if key not in edges:
+                        edges[key] = (src, dst, value, _to_epoch(e.get("timestamp")), e.get("tx_hash"), e.get("timestamp"))
+                    touched.add(src)
+                    touched.add(dst)
+            return touched
+
+        try:
+            if trace_id:
+                rows = await run(_TRACE_SEEDS_QUERY, {"trace_id": trace_id})
+                info["seeds"] = {r["address"] for r in rows if r.get("address")}
+                seeds = seeds | info["seeds"]
+
+            if not seeds:
+                add_rows(await run(_RECENT_EDGES_QUERY, {"min_value": min_value, "limit": max_edges}))
+                if len(edges) >= max_edges:
+                    info["truncated"] = "max_edges"
+                return list(edges.values()), info
+
+            visited: Set[str] = set()
+            frontier = set(seeds)
+            for _hop in range(radius):
+                frontier -= visited
+                if not frontier:
+                    break
+                visited |= frontier
+                rows = await run(_EGO_LEVEL_QUERY, {
+                    "addresses": sorted(frontier),
+                    "min_value": min_value,
+                    "fanout": max_fanout,
+                })
+                frontier = add_rows(rows) - visited
+                if len(edges) >= max_edges:
+                    info["truncated"] = "max_edges"
+                    break
+        except asyncio.TimeoutError:
+            info["truncated"] = "time_budget"
+        return list(edges.values()), info
+
     def _calculate_circle_risk(self, length: int, total_value: float) -> int:
         """Berechnet Risk Score für einen Circle (0-100)"""
         # Längere Kreise = höheres Risiko (Layering)
@@ -531,7 +531,8 @@ async def process_event_batch(request: BatchProcessRequest, current_user: dict =
             original_limit = alert_service.get_max_rules_per_entity()
             alert_service.set_max_rules_per_entity(request.max_alerts_per_entity)
         
-        alerts = await alert_service.process_event_batch(request.events)
+        result = await alert_service.process_event_batch_detailed(request.events)
+        alerts = result["alerts"]
         
         # Restore original limit
         if original_limit is not None:
@@ -540,7 +541,8 @@ async def process_event_batch(request: BatchProcessRequest, current_user: dict =
         return {
             "processed_events": len(request.events),
             "alerts_created": len(alerts),
-            "alert_ids": [alert.alert_id for alert in alerts]
+            "alert_ids": [alert.alert_id for alert in alerts],
+            "batch_metrics": result["metrics"],
         }
     except Exception as e:
         logger.error(f"Error processing event batch: {e}")
@@ -526,6 +526,25 @@ async def remove_bridge_contract(chain: str, address: str) -> Dict:
         raise HTTPException(status_code=500, detail=f"Removal failed: {e}")
 
 
+@router.post("/signatures/reload", response_model=Dict)
+async def reload_bridge_signatures() -> Dict:
+    """
+    Hot reload of the detector signatures from BRIDGE_SIGNATURES_PATH (Admin endpoint)
+    
+    The lookup index is swapped atomically.
+    """
+    from app.bridge.bridge_detector import BridgeRegistry as DetectorRegistry
+    
+    try:
+        count = DetectorRegistry.reload_from_file()
+        return {"status": "reloaded", "signatures": count}
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to reload bridge signatures: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+
+
 @router.get("/links", response_model=Dict)
 async def get_bridge_links(
     address: Optional[str] = Query(None, description="Filter by address"),
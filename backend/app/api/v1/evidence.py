@@ -33,10 +33,12 @@ async def evidence_head():
 
 
 @router.get("/verify-integrity", tags=["Evidence"])
-async def evidence_verify_integrity():
-    """Verify the entire evidence chain integrity and signatures"""
+async def evidence_verify_integrity(
+    full: bool = Query(False, description="Ignore checkpoints and verify from genesis")
+):
+    """Verify the evidence chain integrity and signatures (incremental from the last signed checkpoint)"""
     try:
-        result = await evidence_vault.verify_chain_integrity()
+        result = await evidence_vault.verify_chain_integrity(full=full)
         return {"verification": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Integrity verification failed: {str(e)}")
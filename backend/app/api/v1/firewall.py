@@ -121,6 +121,7 @@ class FirewallStats(BaseModel):
     blacklist_size: int
     custom_rules: int
     block_rate: float
+    layer_latency_ms: Dict[str, Dict[str, Any]] = {}
 
 
 # =========================================================================
@@ -448,6 +448,25 @@ async def export_case_csv(case_id: str, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/cases/{case_id}/export/{section}.csv", dependencies=[Depends(api_key_required), Depends(rate_limit)])
+async def stream_case_csv(
+    case_id: str,
+    section: str,
+    request: Request,
+    compression: str = Query("none", pattern="^(none|gzip)$"),
+):
+    """Streamt eine CSV-Sektion eines Falls (entities|evidence), optional gzip-komprimiert"""
+    if section not in ("entities", "evidence"):
+        raise HTTPException(status_code=404, detail="Unknown export section")
+    from app.exports.streaming import streaming_export
+    return streaming_export(
+        case_service.iter_csv(case_id, section),
+        media_type="text/csv",
+        filename=f"case_{case_id}_{section}.csv",
+        compression=compression,
+    )
+
+
 class CaseChecksumResponse(BaseModel):
     status: str
     case_id: str
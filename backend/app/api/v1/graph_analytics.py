@@ -45,6 +45,10 @@ class CircleDetectionRequest(BaseModel):
     min_circle_length: int = Field(3, ge=2, le=20, description="Min circle length")
     max_circle_length: int = Field(10, ge=2, le=20, description="Max circle length")
     min_total_value: float = Field(0.0, ge=0.0, description="Min total value in ETH")
+    address: Optional[str] = Field(None, description="Optional: only circles through this address")
+    temporal: bool = Field(True, description="Only time-ordered circles (non-decreasing timestamps)")
+    max_results: int = Field(100, ge=1, le=1000, description="Max circles returned")
+    time_budget_s: float = Field(5.0, gt=0.0, le=30.0, description="Time budget for fetch + enumeration")
 
 
 class LayeringDetectionRequest(BaseModel):
@@ -488,7 +492,11 @@ async def detect_circles(request: CircleDetectionRequest, current_user: dict = D
             trace_id=request.trace_id,
             min_circle_length=request.min_circle_length,
             max_circle_length=request.max_circle_length,
-            min_total_value=request.min_total_value
+            min_total_value=request.min_total_value,
+            address=request.address,
+            temporal=request.temporal,
+            max_results=request.max_results,
+            time_budget_s=request.time_budget_s,
         )
         return result
     except Exception as e:
@@ -686,7 +694,9 @@ async def comprehensive_analysis(
         if include_patterns:
             try:
                 # Check for circles involving this address
-                circles = await pattern_detector.detect_circles(min_circle_length=3, max_circle_length=8)
+                circles = await pattern_detector.detect_circles(
+                    min_circle_length=3, max_circle_length=8, address=address
+                )
                 address_circles = [
                     c for c in circles["detected"] 
                     if address.lower() in [a.lower() for a in c["addresses"]]
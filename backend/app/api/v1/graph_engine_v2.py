@@ -32,7 +32,7 @@ class FindPathsRequest(BaseModel):
     target: str = Field(..., min_length=1)
     constraints: PathConstraintModel = Field(default_factory=PathConstraintModel)
     cost_function: CostFunctionModel = Field(default_factory=CostFunctionModel)
-    algorithm: str = Field("astar", regex="^(astar|bidirectional)$")
+    algorithm: str = Field("bidirectional", regex="^(astar|bidirectional)$")  # astar: Alias
     max_paths: int = Field(10, ge=1, le=50)
 
 
@@ -75,14 +75,10 @@ async def find_paths(req: FindPathsRequest):
         constraints = PathConstraint(**req.constraints.dict())
         cost_fn = CostFunction(**req.cost_function.dict())
 
-        if req.algorithm == "bidirectional":
-            result = await graph_engine_v2.find_paths_bidirectional(
-                req.source, req.target, constraints, cost_fn, req.max_paths
-            )
-        else:
-            result = await graph_engine_v2.find_paths_astar(
-                req.source, req.target, constraints, cost_fn, req.max_paths
-            )
+        # Einziger Algorithmus: bidirektionaler Dijkstra ("astar" bleibt als Alias gültig)
+        result = await graph_engine_v2.find_paths_bidirectional(
+            req.source, req.target, constraints, cost_fn, req.max_paths
+        )
 
         return {
             "source": result.source,
@@ -90,7 +86,8 @@ async def find_paths(req: FindPathsRequest):
             "paths": result.paths,
             "execution_time_ms": result.execution_time_ms,
             "total_paths_found": result.total_paths_found,
-            "algorithm": req.algorithm
+            "stats": result.stats,
+            "algorithm": "bidirectional"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Path finding failed: {str(e)}")
@@ -110,8 +107,8 @@ async def query_graph_v2(req: GraphQueryRequest):
 async def materialize_hot_paths(min_frequency: int = Query(100, ge=10, le=1000)):
     """Materialisiere häufig abgefragte Pfade für bessere Performance"""
     try:
-        await graph_engine_v2.materialize_hot_paths(min_frequency)
-        return {"status": "Hot paths materialized", "min_frequency": min_frequency}
+        materialized = await graph_engine_v2.materialize_hot_paths(min_frequency)
+        return {"status": "Hot paths materialized", "min_frequency": min_frequency, "materialized": materialized}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Materialization failed: {str(e)}")
 
@@ -124,8 +121,8 @@ async def get_graph_stats():
         stats = {
             "enabled": graph_engine_v2.enabled,
             "hot_paths_cached": len(graph_engine_v2._hot_paths_cache),
-            "materialized_paths": len(graph_engine_v2._materialized_paths),
-            "supported_algorithms": ["astar", "bidirectional"],
+            "hot_paths": graph_engine_v2.get_hot_path_stats(),
+            "supported_algorithms": ["bidirectional"],
             "max_hops_supported": 20,
             "performance_target_ms": 1500
         }
@@ -567,15 +567,19 @@ async def get_trace_graph(trace_id: str):
 @router.get("/id/{trace_id}/report")
 async def get_trace_report(
     trace_id: str,
-    format: str = Query("json", pattern="^(json|pdf|csv)$")
+    format: str = Query("json", pattern="^(json|pdf|csv)$"),
+    compression: str = Query("none", pattern="^(none|gzip)$"),
 ):
     """
     Generiert gerichtsverwertbaren Forensik-Report
     
     **Formate:**
-    - json: Strukturierte Daten
+    - json: Strukturierte Daten (gestreamt)
     - pdf: Gerichtsverwertbares PDF
-    - csv: CSV Export
+    - csv: CSV Export (gestreamt)
+    
+    CSV/JSON werden zeilenweise gestreamt, optional gzip-komprimiert
+    (``compression=gzip``, Content-Encoding: gzip).
     
     **Inhalte:**
     - Executive Summary
@@ -599,31 +603,103 @@ async def get_trace_report(
         from app.reports.pdf_generator import pdf_generator
         from app.exports.json_exporter import json_exporter
         from app.exports.csv_exporter import csv_exporter
+        from app.exports.streaming import streaming_export
         
         # Fetch trace data from Neo4j (vereinfachtes Beispiel)
         graph = await get_trace_graph(trace_id)
         trace_data = graph
         
         if format == "pdf":
-            report_bytes = await pdf_generator.generate_trace_report(trace_id, trace_data)
+            # Rendering läuft im Report-Prozess-Pool (gecacht), nicht auf dem Event-Loop
+            report_bytes, _manifest = await pdf_generator.generate_trace_report(trace_id, trace_data)
             from fastapi.responses import Response
             return Response(content=report_bytes, media_type="application/pdf")
         
         elif format == "csv":
-            csv_content = await csv_exporter.export_trace(trace_data)
-            from fastapi.responses import Response
-            return Response(content=csv_content, media_type="text/csv")
+            return streaming_export(
+                csv_exporter.iter_trace(trace_data),
+                media_type="text/csv",
+                filename=f"trace_{trace_id}.csv",
+                compression=compression,
+            )
         
         else:  # json
-            json_content = await json_exporter.export_trace(trace_data)
-            from fastapi.responses import Response
-            return Response(content=json_content, media_type="application/json")
+            return streaming_export(
+                json_exporter.iter_trace(trace_data),
+                media_type="application/json",
+                filename=f"trace_{trace_id}.json",
+                compression=compression,
+            )
         
     except Exception as e:
         logger.error(f"Error generating report for {trace_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/id/{trace_id}/report/jobs", status_code=202)
+async def submit_trace_report_job(trace_id: str):
+    """
+    Startet die PDF-Erstellung im Hintergrund
+    
+    Gibt einen Job zurück; Status über ``GET /report/jobs/{job_id}``,
+    Download über ``GET /report/jobs/{job_id}/pdf``. Identische Trace-Daten
+    werden aus dem Report-Cache bedient (``cached: true``).
+    """
+    from app.reports.pdf_generator import pdf_generator
+    from app.reports.report_jobs import ReportQueueFull
+
+    if _is_test_or_offline():
+        raise HTTPException(status_code=503, detail="PDF report generation is disabled in test mode")
+    try:
+        trace_data = await get_trace_graph(trace_id)
+        job = await pdf_generator.submit_trace_report(trace_id, trace_data)
+        return job.to_dict()
+    except ReportQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting report job for {trace_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/report/jobs/{job_id}")
+async def get_trace_report_job(job_id: str):
+    """Status eines Report-Jobs (queued | running | done | failed)"""
+    from app.reports.report_jobs import report_jobs
+
+    status = report_jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return status
+
+
+@router.get("/report/jobs/{job_id}/pdf")
+async def download_trace_report_job(job_id: str):
+    """PDF eines abgeschlossenen Report-Jobs"""
+    from fastapi.responses import Response
+    from app.reports.report_jobs import report_jobs, JOB_DONE
+
+    status = report_jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if status["status"] != JOB_DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {status['status']}")
+    result = report_jobs.result(job_id)
+    if result is None:
+        # Aus dem Cache verdrängt: Job neu einreichen
+        raise HTTPException(status_code=410, detail="Report expired from cache, please resubmit")
+    content, manifest = result
+    return Response(
+        content=content,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="trace_{status["report_id"]}.pdf"',
+            "X-Content-SHA256": str(manifest.get("content_hash", "")),
+        },
+    )
+
+
 async def save_trace_to_graph(result: TraceResult):
     """Background task to save trace results to Neo4j"""
     try:
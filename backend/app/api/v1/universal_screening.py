@@ -208,8 +208,6 @@ async def batch_universal_screening(
     Screent bis zu 50 Adressen parallel über alle Chains.
     """
     try:
-        import asyncio
-        
         # Validiere
         if len(addresses) > 50:
             raise HTTPException(
@@ -217,26 +215,15 @@ async def batch_universal_screening(
                 detail="Maximum 50 addresses per batch request",
             )
         
-        # Erstelle Tasks für alle Adressen
-        async def screen_one(addr: str):
-            try:
-                return await universal_screening_service.screen_address_universal(
-                    address=addr,
-                    chains=chains,
-                    max_concurrent=max_concurrent_per_address,
-                )
-            except Exception as e:
-                logger.warning(f"Failed to screen {addr}: {e}")
-                return None
-        
-        # Parallel screenen
-        results = await asyncio.gather(*[screen_one(addr) for addr in addresses])
+        # Bulk-Screening: geteilte Activity-Fetches, Limit pro Chain
+        results = await universal_screening_service.screen_addresses_universal(
+            addresses=addresses,
+            chains=chains,
+            per_chain_concurrency=max_concurrent_per_address,
+        )
         
-        # Filtere erfolgreiche Results
-        successful_results = {}
-        for addr, result in zip(addresses, results):
-            if result:
-                successful_results[addr] = result.to_dict()
+        # Erfolgreiche Results
+        successful_results = {addr: result.to_dict() for addr, result in results.items()}
         
         return {
             "success": True,
@@ -89,7 +89,7 @@ async def websocket_collaboration(
     await manager.join_room(websocket, room)
 
     snapshot = await collaboration_workspace.join_session(case_id, user_id, user_name)
-    await websocket.send_json({"type": "collab.snapshot", "payload": snapshot})
+    await manager.send_personal_message({"type": "collab.snapshot", "payload": snapshot}, websocket)
     await manager.send_collaboration_event(case_id, {"type": "collab.join", "case_id": case_id, "user": {"user_id": user_id, "user_name": user_name}})
 
     try:
@@ -117,7 +117,7 @@ async def websocket_collaboration(
                 if chat:
                     await manager.send_collaboration_event(case_id, {"type": "collab.chat", "payload": chat})
             elif msg_type == "ping":
-                await websocket.send_json({"type": "pong"})
+                await manager.send_personal_message({"type": "pong"}, websocket)
     except WebSocketDisconnect:
         await manager.leave_room(websocket, room)
         manager.disconnect(websocket)
@@ -174,10 +174,10 @@ async def websocket_trace(websocket: WebSocket, trace_id: str):
             data = await websocket.receive_text()
             
             # Echo back (for ping/pong)
-            await websocket.send_json({
+            await manager.send_personal_message({
                 "type": "pong",
                 "trace_id": trace_id
-            })
+            }, websocket)
     
     except WebSocketDisconnect:
         manager.disconnect(websocket, trace_id)
@@ -207,7 +207,7 @@ async def websocket_alerts(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            await websocket.send_json({"type": "pong"})
+            await manager.send_personal_message({"type": "pong"}, websocket)
     
     except WebSocketDisconnect:
         await manager.leave_room(websocket, "alerts")
@@ -251,22 +251,22 @@ async def websocket_room(websocket: WebSocket, room_name: str):
                 room = message.get("room")
                 if room:
                     await manager.join_room(websocket, room)
-                    await websocket.send_json({
+                    await manager.send_personal_message({
                         "type": "joined",
                         "room": room
-                    })
+                    }, websocket)
             
             elif command == "leave":
                 room = message.get("room")
                 if room:
                     await manager.leave_room(websocket, room)
-                    await websocket.send_json({
+                    await manager.send_personal_message({
                         "type": "left",
                         "room": room
-                    })
+                    }, websocket)
             
             elif command == "ping":
-                await websocket.send_json({"type": "pong"})
+                await manager.send_personal_message({"type": "pong"}, websocket)
     
     except WebSocketDisconnect:
         # Clean up all room subscriptions
@@ -13,11 +13,20 @@ Features:
 - Lock-Mint & Burn-Unlock Pattern Detection
 - Liquidity Pool Analysis
 - Bridge Transaction Metadata Extraction
+
+Lookup:
+- Registry wird einmal in Dict-Indizes kompiliert:
+  (chain, contract) -> Signatur, (chain, topic0) -> Signaturen
+- Kosten pro Event unabhängig von der Anzahl registrierter Bridges
+- Hot Reload (reload / reload_from_file) tauscht den Index atomar
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, List, Optional, Set, Tuple
-from dataclasses import dataclass
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
 
@@ -39,6 +48,29 @@ class BridgeSignature:
     metadata: Dict
 
 
+@dataclass
+class _BridgeIndex:
+    """Kompilierte Lookup-Tabellen (unveränderlich nach dem Bau, wird als Ganzes getauscht)"""
+    source: List[BridgeSignature]
+    size: int
+    by_address: Dict[Tuple[str, str], BridgeSignature] = field(default_factory=dict)
+    by_topic: Dict[Tuple[str, str], List[BridgeSignature]] = field(default_factory=dict)
+    by_chain: Dict[str, List[BridgeSignature]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, bridges: List[BridgeSignature]) -> "_BridgeIndex":
+        index = cls(source=bridges, size=len(bridges))
+        for sig in bridges:
+            chain = sig.chain.lower()
+            index.by_chain.setdefault(chain, []).append(sig)
+            for address in sig.contract_addresses:
+                # Erste Signatur gewinnt (wie bisher beim linearen Scan)
+                index.by_address.setdefault((chain, address.lower()), sig)
+            for topic in sig.event_signatures:
+                index.by_topic.setdefault((chain, topic.lower()), []).append(sig)
+        return index
+
+
 class BridgeRegistry:
     """
     Registry aller bekannten Bridge-Contracts & Patterns
@@ -218,19 +250,65 @@ class BridgeRegistry:
         ),
     ]
     
+    _index: Optional[_BridgeIndex] = None
+    
+    @classmethod
+    def index(cls) -> _BridgeIndex:
+        """Kompilierter Index; wird neu gebaut, wenn BRIDGES ersetzt oder erweitert wurde"""
+        idx = cls._index
+        if idx is None or idx.source is not cls.BRIDGES or idx.size != len(cls.BRIDGES):
+            idx = _BridgeIndex.build(cls.BRIDGES)
+            cls._index = idx
+        return idx
+    
+    @classmethod
+    def reload(cls, bridges: Iterable[BridgeSignature]) -> int:
+        """Hot Reload: ersetzt alle Signaturen; Leser sehen entweder alten oder neuen Index"""
+        new_bridges = list(bridges)
+        new_index = _BridgeIndex.build(new_bridges)
+        cls.BRIDGES, cls._index = new_bridges, new_index
+        logger.info(f"Bridge registry reloaded: {len(new_bridges)} signatures")
+        return len(new_bridges)
+    
+    @classmethod
+    def reload_from_file(cls, path: Optional[str] = None) -> int:
+        """
+        Lädt Signaturen aus einer JSON-Datei (Liste von BridgeSignature-Feldern)
+        
+        Pfad: Argument oder BRIDGE_SIGNATURES_PATH.
+        """
+        path = path or os.getenv("BRIDGE_SIGNATURES_PATH")
+        if not path:
+            raise ValueError("No bridge signature file configured (BRIDGE_SIGNATURES_PATH)")
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        bridges = [
+            BridgeSignature(
+                bridge_name=item["bridge_name"],
+                chain=item["chain"].lower(),
+                contract_addresses={a.lower() for a in item.get("contract_addresses", [])},
+                event_signatures={t.lower() for t in item.get("event_signatures", [])},
+                pattern_type=item.get("pattern_type", "lock_mint"),
+                metadata=dict(item.get("metadata") or {}),
+            )
+            for item in raw
+        ]
+        return cls.reload(bridges)
+    
     @classmethod
     def get_signatures_for_chain(cls, chain: str) -> List[BridgeSignature]:
         """Get all bridge signatures for a specific chain"""
-        return [sig for sig in cls.BRIDGES if sig.chain.lower() == chain.lower()]
+        return list(cls.index().by_chain.get(chain.lower(), []))
     
     @classmethod
     def get_signature_by_address(cls, address: str, chain: str) -> Optional[BridgeSignature]:
         """Find bridge signature by contract address"""
-        addr_lower = address.lower()
-        for sig in cls.BRIDGES:
-            if sig.chain.lower() == chain.lower() and addr_lower in sig.contract_addresses:
-                return sig
-        return None
+        return cls.index().by_address.get((chain.lower(), address.lower()))
+    
+    @classmethod
+    def get_signatures_by_topic(cls, topic0: str, chain: str) -> List[BridgeSignature]:
+        """Find bridge signatures by event topic0"""
+        return cls.index().by_topic.get((chain.lower(), topic0.lower()), [])
 
 
 class BridgeDetector:
@@ -242,52 +320,44 @@ class BridgeDetector:
     def __init__(self):
         self.registry = BridgeRegistry()
     
-    async def detect_bridge(self, event: CanonicalEvent) -> Optional[Dict]:
-        """
-        Detect if a transaction is a bridge interaction
-        
-        Args:
-            event: Canonical event (transaction)
-        
-        Returns:
-            Bridge metadata dict or None
-        """
+    def _match(self, event: CanonicalEvent) -> Tuple[Optional[BridgeSignature], Optional[str]]:
+        """Reiner Index-Lookup: (Signatur, Methode) oder (None, None)"""
+        index = self.registry.index()
         chain = event.chain.lower()
         
         # Method 1: Check contract address (to_address)
         if event.to_address:
-            sig = self.registry.get_signature_by_address(event.to_address, chain)
+            sig = index.by_address.get((chain, event.to_address.lower()))
             if sig:
-                bridge_data = await self._extract_bridge_metadata(event, sig)
-                logger.info(f"Bridge detected via contract: {sig.bridge_name} on {chain}")
-                return bridge_data
+                return sig, "contract"
         
         # Method 2: Check from_address (for reverse transactions)
         if event.from_address:
-            sig = self.registry.get_signature_by_address(event.from_address, chain)
+            sig = index.by_address.get((chain, event.from_address.lower()))
             if sig:
-                bridge_data = await self._extract_bridge_metadata(event, sig)
-                logger.info(f"Bridge detected via sender: {sig.bridge_name} on {chain}")
-                return bridge_data
+                return sig, "sender"
         
         # Method 3: Check event signatures (for EVM chains)
         if event.metadata and "logs" in event.metadata:
-            for log in event.metadata["logs"]:
-                topic0 = log.get("topics", [None])[0]
+            for log in event.metadata["logs"] or []:
+                topics = log.get("topics") or [None]
+                topic0 = topics[0]
                 if topic0:
-                    for sig in self.registry.get_signatures_for_chain(chain):
-                        if topic0.lower() in {s.lower() for s in sig.event_signatures}:
-                            bridge_data = await self._extract_bridge_metadata(event, sig)
-                            logger.info(f"Bridge detected via event: {sig.bridge_name} on {chain}")
-                            return bridge_data
+                    sigs = index.by_topic.get((chain, str(topic0).lower()))
+                    if sigs:
+                        return sigs[0], "event"
         
-        # Method 4: Check metadata for bridge hints (Solana, etc.)
-        if event.event_type == "bridge" or event.metadata.get("bridge_program"):
+        return None, None
+    
+    def _metadata_hint(self, event: CanonicalEvent) -> Optional[Dict]:
+        """Method 4: Check metadata for bridge hints (Solana, etc.)"""
+        metadata = event.metadata or {}
+        if event.event_type == "bridge" or metadata.get("bridge_program"):
             # Solana bridge detection already done in adapter
-            bridge_name = event.metadata.get("bridge_program", "Unknown Bridge")
+            bridge_name = metadata.get("bridge_program", "Unknown Bridge")
             return {
                 "bridge_name": bridge_name,
-                "chain_from": chain,
+                "chain_from": event.chain.lower(),
                 "chain_to": "unknown",
                 "pattern_type": "unknown",
                 "detected_via": "metadata",
@@ -298,9 +368,57 @@ class BridgeDetector:
                 "value": str(event.value),
                 "metadata": event.metadata,
             }
-        
         return None
     
+    async def detect_bridge(self, event: CanonicalEvent) -> Optional[Dict]:
+        """
+        Detect if a transaction is a bridge interaction
+        
+        Args:
+            event: Canonical event (transaction)
+        
+        Returns:
+            Bridge metadata dict or None
+        """
+        sig, via = self._match(event)
+        if sig:
+            bridge_data = await self._extract_bridge_metadata(event, sig)
+            logger.info(f"Bridge detected via {via}: {sig.bridge_name} on {event.chain.lower()}")
+            return bridge_data
+        return self._metadata_hint(event)
+    
+    async def detect_bridges(
+        self,
+        events: Sequence[CanonicalEvent],
+        concurrency: Optional[int] = None,
+    ) -> List[Optional[Dict]]:
+        """
+        Batch-Erkennung: Index-Lookup für alle Events, danach Metadaten-Extraktion
+        (inkl. Bridge-Link-Persistenz) nur für Treffer, begrenzt parallel.
+        
+        Returns:
+            Liste in Event-Reihenfolge (None = keine Bridge)
+        """
+        results: List[Optional[Dict]] = [None] * len(events)
+        matches: List[Tuple[int, CanonicalEvent, BridgeSignature]] = []
+        for i, event in enumerate(events):
+            sig, _via = self._match(event)
+            if sig:
+                matches.append((i, event, sig))
+            else:
+                results[i] = self._metadata_hint(event)
+        
+        if matches:
+            sem = asyncio.Semaphore(concurrency or int(os.getenv("BRIDGE_DETECT_CONCURRENCY", "32")))
+            
+            async def _extract(i: int, event: CanonicalEvent, sig: BridgeSignature) -> None:
+                async with sem:
+                    results[i] = await self._extract_bridge_metadata(event, sig)
+            
+            await asyncio.gather(*[_extract(i, e, s) for i, e, s in matches])
+            logger.info(f"Bridges detected: {len(matches)} of {len(events)} events")
+        return results
+    
     async def _extract_bridge_metadata(
         self, 
         event: CanonicalEvent, 
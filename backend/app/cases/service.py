@@ -2,17 +2,16 @@
 Minimal Case Management Service (in-memory store + optional disk snapshots)
 """
 from __future__ import annotations
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterator, List, Any, Tuple
 from datetime import datetime
 import os
 import json
 from pathlib import Path
-import csv
-import io
 import hashlib
 import hmac
 
 from app.cases.models import Case, Entity, EvidenceLink
+from app.exports.streaming import iter_csv
 
 
 class CaseService:
@@ -82,39 +81,34 @@ class CaseService:
             base["signature_hmac_sha256"] = signature
         return base
 
+    _CSV_FIELDS = {
+        "entities": ["address", "chain", "labels"],
+        "evidence": ["case_id", "resource_id", "resource_type", "record_hash", "notes", "timestamp"],
+    }
+
+    def iter_csv(self, case_id: str, section: str) -> Iterator[str]:
+        """Stream one CSV section ('entities' or 'evidence') in chunks."""
+        if section == "entities":
+            rows = (
+                [e.address, e.chain, json.dumps(e.labels, ensure_ascii=False)]
+                for e in self._entities_by_case.get(case_id, [])
+            )
+        elif section == "evidence":
+            rows = (
+                [ev.case_id, ev.resource_id, ev.resource_type, ev.record_hash or "", ev.notes or "", ev.timestamp]
+                for ev in self._evidence_by_case.get(case_id, [])
+            )
+        else:
+            raise ValueError(f"unknown CSV section: {section}")
+        return iter_csv(rows, header=self._CSV_FIELDS[section])
+
     def export_csv(self, case_id: str) -> Dict[str, str]:
         """Return CSV strings for entities and evidence."""
-        entities = self._entities_by_case.get(case_id, [])
-        evidence = self._evidence_by_case.get(case_id, [])
-
-        # Entities CSV
-        ent_buf = io.StringIO()
-        ent_writer = csv.DictWriter(ent_buf, fieldnames=["address", "chain", "labels"], extrasaction="ignore")
-        ent_writer.writeheader()
-        for e in entities:
-            ent_writer.writerow({
-                "address": e.address,
-                "chain": e.chain,
-                "labels": json.dumps(e.labels, ensure_ascii=False),
-            })
-        entities_csv = ent_buf.getvalue()
-
-        # Evidence CSV
-        ev_buf = io.StringIO()
-        ev_writer = csv.DictWriter(ev_buf, fieldnames=["case_id", "resource_id", "resource_type", "record_hash", "notes", "timestamp"], extrasaction="ignore")
-        ev_writer.writeheader()
-        for ev in evidence:
-            ev_writer.writerow({
-                "case_id": ev.case_id,
-                "resource_id": ev.resource_id,
-                "resource_type": ev.resource_type,
-                "record_hash": ev.record_hash or "",
-                "notes": ev.notes or "",
-                "timestamp": ev.timestamp,
-            })
-        evidence_csv = ev_buf.getvalue()
-
-        return {"entities_csv": entities_csv, "evidence_csv": evidence_csv, "format": "csv"}
+        return {
+            "entities_csv": "".join(self.iter_csv(case_id, "entities")),
+            "evidence_csv": "".join(self.iter_csv(case_id, "evidence")),
+            "format": "csv",
+        }
 
     # -----------------
     # Internal helpers
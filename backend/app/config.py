@@ -280,6 +280,9 @@ class Settings(BaseSettings):
     ALERT_MAX_RULES_PER_ENTITY: int = Field(10, json_schema_extra={"env": "ALERT_MAX_RULES_PER_ENTITY"})
     ALERT_ENABLE_NOTIFICATIONS: bool = Field(True, json_schema_extra={"env": "ALERT_ENABLE_NOTIFICATIONS"})
     ALERT_NOTIFICATION_WEBHOOK_URL: Optional[str] = Field(None, json_schema_extra={"env": "ALERT_NOTIFICATION_WEBHOOK_URL"})
+    # Ziele für die asynchrone Alert-Webhook-Zustellung (kommagetrennte URLs oder JSON-Liste
+    # mit Einstellungen pro Ziel, z.B. [{"url": "...", "batch_size": 50, "concurrency": 2}])
+    ALERT_WEBHOOK_URLS: str = Field("", json_schema_extra={"env": "ALERT_WEBHOOK_URLS"})
 
     # Auto-Investigate
     AUTO_INVESTIGATE_HIGH_RISK_THRESHOLD: float = Field(0.7, json_schema_extra={"env": "AUTO_INVESTIGATE_HIGH_RISK_THRESHOLD"})
@@ -135,6 +135,25 @@ class LabelsService:
                 self.local_cache[cache_key] = labels
                 return labels
         
+        labels = self._resolve_labels(address)
+
+        # Cache results
+        self.local_cache[cache_key] = labels
+        if self.redis_client and labels:
+            r = self.redis_client
+            try:
+                if labels:
+                    await cast(Awaitable[int], r.sadd(cache_key, *labels))
+                await cast(Awaitable[bool], r.expire(cache_key, 3600))
+            except Exception:
+                pass
+
+        return labels
+
+    def _resolve_labels(self, address: str) -> List[str]:
+        """Resolve labels from in-memory sources (sanctions, exchanges, scams), without caching"""
+        labels: List[str] = []
+
         # Multi-Sanctions Aggregator (preferred)
         try:
             from app.compliance.sanctions.service import sanctions_service as _sanctions_service
@@ -176,17 +195,6 @@ class LabelsService:
             except Exception:
                 labels = list(set(labels))
 
-        # Cache results
-        self.local_cache[cache_key] = labels
-        if self.redis_client and labels:
-            r = self.redis_client
-            try:
-                if labels:
-                    await cast(Awaitable[int], r.sadd(cache_key, *labels))
-                await cast(Awaitable[bool], r.expire(cache_key, 3600))
-            except Exception:
-                pass
-
         return labels
     
     async def get_category(self, address: str) -> Optional[str]:
@@ -251,9 +259,14 @@ class LabelsService:
         logger.info(f"Added label '{label}' to {address} (source: {source})")
     
     async def bulk_get_labels(self, addresses: List[str]) -> Dict[str, List[str]]:
-        """Get labels for multiple addresses efficiently"""
+        """
+        Get labels for multiple addresses efficiently
+
+        One Redis pipeline for the lookup and one for writing back freshly
+        resolved labels, instead of two round trips per address.
+        """
         result: Dict[str, List[str]] = {}
-        addrs = [a.lower() for a in addresses]
+        addrs = list(dict.fromkeys(a.lower() for a in addresses if a))
         # Try local cache first
         missing: List[str] = []
         for addr in addrs:
@@ -280,10 +293,24 @@ class LabelsService:
             except Exception:
                 pass
 
-        # Fallback per-address for unresolved
+        # Resolve the rest in memory, write back in one pipeline
+        resolved: Dict[str, List[str]] = {}
         for addr in addrs:
             if addr not in result:
-                result[addr] = await self.get_labels(addr)
+                labels = self._resolve_labels(addr)
+                result[addr] = labels
+                self.local_cache[f"labels:{addr}"] = labels
+                if labels:
+                    resolved[addr] = labels
+        if self.redis_client and resolved:
+            try:
+                pipe = self.redis_client.pipeline()
+                for addr, labels in resolved.items():
+                    pipe.sadd(f"labels:{addr}", *labels)
+                    pipe.expire(f"labels:{addr}", 3600)
+                await cast(Awaitable[List[Any]], pipe.execute())
+            except Exception:
+                pass
 
         return result
 
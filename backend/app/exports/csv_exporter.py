@@ -1,86 +1,110 @@
 """
 CSV Export Functions
 Export trace data and analysis results
+
+The iter_* methods stream CSV text in chunks (see app.exports.streaming);
+the export_* methods return the same content as one string.
 """
 
 import logging
-import csv
-from io import StringIO
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from app.exports.streaming import iter_csv
 
 logger = logging.getLogger(__name__)
 
+NODE_HEADER = ['Address', 'Taint Received', 'Taint Sent', 'Hop Distance', 'Labels']
+EDGE_HEADER = ['From', 'To', 'TX Hash', 'Value', 'Taint Value', 'Timestamp', 'Hop']
+ADDRESS_HEADER = ['Address', 'Risk Score', 'Risk Level', 'Labels', 'Entity']
+
+
+def _first(d: Dict, *keys: str, default: Any = None) -> Any:
+    for key in keys:
+        if d.get(key) is not None:
+            return d[key]
+    return default
+
+
+def iter_trace_nodes(nodes: Any) -> Iterator[Tuple[str, Dict]]:
+    """(address, node) pairs from a mapping or a node list (graph format with 'id')"""
+    if isinstance(nodes, dict):
+        yield from nodes.items()
+        return
+    for node in nodes or []:
+        yield _first(node, 'address', 'id'), node
+
 
 class CSVExporter:
     """Export data to CSV format"""
-    
+
+    @staticmethod
+    def _node_rows(trace_data: Dict) -> Iterator[List[Any]]:
+        for address, node in iter_trace_nodes(trace_data.get('nodes')):
+            yield [
+                address,
+                _first(node, 'taint_received', 'taint', default=0),
+                node.get('taint_sent', 0),
+                _first(node, 'hop_distance', 'hop', default=0),
+                ', '.join(node.get('labels') or [])
+            ]
+
+    @staticmethod
+    def _edge_rows(edges: Iterable[Dict]) -> Iterator[List[Any]]:
+        for edge in edges or []:
+            yield [
+                _first(edge, 'from_address', 'source', 'from'),
+                _first(edge, 'to_address', 'target', 'to'),
+                _first(edge, 'tx_hash', 'tx'),
+                edge.get('value'),
+                _first(edge, 'taint_value', 'taint'),
+                edge.get('timestamp'),
+                edge.get('hop')
+            ]
+
+    def iter_trace(self, trace_data: Dict) -> Iterator[str]:
+        """
+        Stream trace results as CSV (nodes section, then edges section)
+
+        Args:
+            trace_data: Trace result data; nodes as mapping or list, edges as iterable
+
+        Yields:
+            CSV text chunks
+        """
+        yield "# NODES\n"
+        yield from iter_csv(self._node_rows(trace_data), header=NODE_HEADER)
+        yield "\n# EDGES\n"
+        yield from iter_csv(self._edge_rows(trace_data.get('edges')), header=EDGE_HEADER)
+
     async def export_trace(self, trace_data: Dict) -> str:
         """
         Export trace results to CSV
-        
+
         Args:
             trace_data: Trace result data
-        
+
         Returns:
             CSV string
         """
-        output = StringIO()
-        
-        # Write nodes
-        nodes_csv = StringIO()
-        nodes_writer = csv.writer(nodes_csv)
-        nodes_writer.writerow(['Address', 'Taint Received', 'Taint Sent', 'Hop Distance', 'Labels'])
-        
-        for address, node in trace_data.get('nodes', {}).items():
-            nodes_writer.writerow([
-                address,
-                node.get('taint_received', 0),
-                node.get('taint_sent', 0),
-                node.get('hop_distance', 0),
-                ', '.join(node.get('labels', []))
-            ])
-        
-        # Write edges
-        edges_csv = StringIO()
-        edges_writer = csv.writer(edges_csv)
-        edges_writer.writerow(['From', 'To', 'TX Hash', 'Value', 'Taint Value', 'Timestamp', 'Hop'])
-        
-        for edge in trace_data.get('edges', []):
-            edges_writer.writerow([
-                edge.get('from_address'),
-                edge.get('to_address'),
-                edge.get('tx_hash'),
-                edge.get('value'),
-                edge.get('taint_value'),
-                edge.get('timestamp'),
-                edge.get('hop')
-            ])
-        
-        # Combine
-        output.write("# NODES\n")
-        output.write(nodes_csv.getvalue())
-        output.write("\n# EDGES\n")
-        output.write(edges_csv.getvalue())
-        
-        return output.getvalue()
-    
-    async def export_addresses(self, addresses: List[Dict]) -> str:
-        """Export addresses to CSV"""
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        writer.writerow(['Address', 'Risk Score', 'Risk Level', 'Labels', 'Entity'])
-        
-        for addr in addresses:
-            writer.writerow([
+        return "".join(self.iter_trace(trace_data))
+
+    def iter_addresses(self, addresses: Iterable[Dict]) -> Iterator[str]:
+        """Stream addresses as CSV"""
+        rows = (
+            [
                 addr.get('address'),
                 addr.get('risk_score', 0),
                 addr.get('risk_level', 'unknown'),
-                ', '.join(addr.get('labels', [])),
+                ', '.join(addr.get('labels') or []),
                 addr.get('entity_name', '')
-            ])
-        
-        return output.getvalue()
+            ]
+            for addr in addresses
+        )
+        return iter_csv(rows, header=ADDRESS_HEADER)
+
+    async def export_addresses(self, addresses: List[Dict]) -> str:
+        """Export addresses to CSV"""
+        return "".join(self.iter_addresses(addresses))
 
 
 csv_exporter = CSVExporter()
@@ -1,70 +1,129 @@
 """
 JSON Export Functions
 Standard format exports
+
+The iter_* methods stream JSON text in chunks (see app.exports.streaming);
+large collections (nodes, edges, ...) are written element by element.
 """
 
 import logging
 import json
-from typing import Dict
+from typing import Any, Dict, Iterator
 from datetime import datetime
 
+from app.exports.csv_exporter import iter_trace_nodes
+from app.exports.streaming import CHUNK_SIZE, iter_json_array
+
 logger = logging.getLogger(__name__)
 
 
+def _iter_value(value: Any) -> Iterator[str]:
+    """Stream lists/generators element-wise and mappings key-wise, dump the rest"""
+    if isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            prefix = "\n" if i == 0 else ",\n"
+            yield f"{prefix}{json.dumps(str(key))}: {json.dumps(item, default=str)}"
+        yield "\n}" if value else "}"
+    elif isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        yield json.dumps(value, default=str)
+    elif hasattr(value, "__iter__"):
+        yield from iter_json_array(value, default=str)
+    else:
+        yield json.dumps(value, default=str)
+
+
+def _buffered(pieces: Iterator[str]) -> Iterator[str]:
+    """Merge small pieces into ~CHUNK_SIZE chunks"""
+    buf, size = [], 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
 class JSONExporter:
     """Export data to JSON format"""
-    
+
+    def iter_trace(self, trace_data: Dict) -> Iterator[str]:
+        """
+        Stream trace as JSON with export metadata
+
+        Args:
+            trace_data: Trace result data
+
+        Yields:
+            JSON text chunks
+        """
+        def pieces() -> Iterator[str]:
+            yield '{"exported_at": %s, "export_format": "json", "version": "1.0", "trace_data": {' % (
+                json.dumps(datetime.utcnow().isoformat())
+            )
+            for i, (key, value) in enumerate(trace_data.items()):
+                yield ("\n" if i == 0 else ",\n") + json.dumps(str(key)) + ": "
+                yield from _iter_value(value)
+            yield "\n}}\n" if trace_data else "}}\n"
+
+        return _buffered(pieces())
+
     async def export_trace(self, trace_data: Dict) -> str:
         """
         Export trace to JSON
-        
+
         Args:
             trace_data: Trace result data
-        
+
         Returns:
             JSON string
         """
-        # Add metadata
-        export_data = {
-            'exported_at': datetime.utcnow().isoformat(),
-            'export_format': 'json',
-            'version': '1.0',
-            'trace_data': trace_data
-        }
-        
-        return json.dumps(export_data, indent=2, default=str)
-    
-    async def export_graph(self, trace_data: Dict) -> str:
+        return "".join(self.iter_trace(trace_data))
+
+    def iter_graph(self, trace_data: Dict) -> Iterator[str]:
         """
-        Export as graph format (nodes + edges)
-        
+        Stream graph format (nodes + links)
+
         Compatible with:
         - D3.js
         - Cytoscape
         - Gephi
         """
-        nodes = []
-        edges = []
-        
-        # Convert nodes
-        for address, node in trace_data.get('nodes', {}).items():
-            nodes.append({
+        nodes = (
+            {
                 'id': address,
-                'taint': node.get('taint_received', 0),
+                'taint': node.get('taint_received', node.get('taint', 0)),
                 'hop': node.get('hop_distance', 0),
                 'labels': node.get('labels', [])
-            })
-        
-        # Convert edges
-        for edge in trace_data.get('edges', []):
-            edges.append({
-                'source': edge.get('from_address'),
-                'target': edge.get('to_address'),
-                'value': edge.get('taint_value'),
-                'tx_hash': edge.get('tx_hash')
-            })
-        
-        return json.dumps({'nodes': nodes, 'links': edges}, indent=2)
+            }
+            for address, node in iter_trace_nodes(trace_data.get('nodes'))
+        )
+        edges = (
+            {
+                'source': edge.get('from_address', edge.get('source')),
+                'target': edge.get('to_address', edge.get('target')),
+                'value': edge.get('taint_value', edge.get('taint')),
+                'tx_hash': edge.get('tx_hash', edge.get('tx'))
+            }
+            for edge in trace_data.get('edges') or []
+        )
+
+        def pieces() -> Iterator[str]:
+            yield '{"nodes": '
+            yield from iter_json_array(nodes, default=str)
+            yield ', "links": '
+            yield from iter_json_array(edges, default=str)
+            yield "}"
+
+        return _buffered(pieces())
+
+    async def export_graph(self, trace_data: Dict) -> str:
+        """
+        Export as graph format (nodes + edges)
+        """
+        return "".join(self.iter_graph(trace_data))
 
 
 json_exporter = JSONExporter()
@@ -0,0 +1,108 @@
+"""
+Streaming Export Helpers
+Generator-based CSV/JSON chunks, on-the-fly gzip and StreamingResponse wiring
+
+Exporter yield text in chunks of roughly CHUNK_SIZE characters, so memory
+stays bounded by one chunk (plus the gzip window) no matter how many rows
+an export has.
+"""
+
+import csv
+import json
+import zlib
+from io import StringIO
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union
+
+from fastapi.responses import StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Chunker:
+    """Collects text pieces and hands them out in ~chunk_size blocks"""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.buf = StringIO()
+
+    def write(self, text: str) -> int:
+        return self.buf.write(text)
+
+    def ready(self) -> bool:
+        return self.buf.tell() >= self.chunk_size
+
+    def take(self) -> str:
+        out = self.buf.getvalue()
+        self.buf.seek(0)
+        self.buf.truncate(0)
+        return out
+
+
+def iter_csv(rows: Iterable[Sequence[Any]], header: Optional[Sequence[str]] = None,
+             chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield CSV text for rows in chunks (csv.writer dialect 'excel', like before)"""
+    chunker = _Chunker(chunk_size)
+    writer = csv.writer(chunker)
+    if header:
+        writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if chunker.ready():
+            yield chunker.take()
+    rest = chunker.take()
+    if rest:
+        yield rest
+
+
+def iter_json_array(items: Iterable[Any], chunk_size: int = CHUNK_SIZE, **dumps_kwargs: Any) -> Iterator[str]:
+    """Yield a JSON array element by element, one element per line"""
+    chunker = _Chunker(chunk_size)
+    chunker.write("[")
+    first = True
+    for item in items:
+        chunker.write("\n" if first else ",\n")
+        chunker.write(json.dumps(item, **dumps_kwargs))
+        first = False
+        if chunker.ready():
+            yield chunker.take()
+    chunker.write("\n]" if not first else "]")
+    yield chunker.take()
+
+
+def iter_gzip(chunks: Iterable[Union[str, bytes]], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a chunk stream on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_bytes(chunks: Iterable[Union[str, bytes]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def streaming_export(
+    chunks: Iterable[Union[str, bytes]],
+    media_type: str,
+    filename: Optional[str] = None,
+    compression: str = "none",
+) -> StreamingResponse:
+    """
+    Wrap an export generator into a StreamingResponse
+
+    compression="gzip" compresses on the fly and sets Content-Encoding, so
+    clients transparently receive the original media type.
+    """
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if compression == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+        body = iter_gzip(chunks)
+    else:
+        body = iter_bytes(chunks)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -29,12 +29,21 @@ DARK WEB INTELLIGENCE:
 - Exploit Marketplace Monitoring
 
 Goal: 12,000+ unique threat entities
+
+INGESTION:
+- One shared, pooled httpx client for all HTTP feeds
+- Conditional requests (ETag / Last-Modified) per source
+- Per-source content hash: unchanged bodies are not parsed
+- Per-entry diff: only new or changed entries are upserted
 """
 from __future__ import annotations
 import asyncio
+import hashlib
 import json
+import os
 import re
-from typing import Dict, List, Any, Set
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Set, Tuple
 import httpx
 import logging
 from datetime import datetime, timedelta
@@ -50,21 +59,63 @@ except ImportError:
     logger.warning("Labels repo not available, running without DB integration")
 
 
+CRYPTOSCAMDB_URL = "https://api.cryptoscamdb.org/v1/scams"
+# Using a public phishing feed (example: chainabuse.com or similar)
+PHISHING_FEED_URL = "https://api.chainabuse.com/v0/reports"
+
+FEEDS_TIMEOUT = float(os.getenv("INTEL_FEEDS_TIMEOUT_SECONDS", "30"))
+FEEDS_CONCURRENCY = int(os.getenv("INTEL_FEEDS_CONCURRENCY", "4"))
+
+_feed_client: Optional[httpx.AsyncClient] = None
+
+
+def get_feed_client() -> httpx.AsyncClient:
+    """Shared, pooled HTTP client for all feed sources (created lazily)"""
+    global _feed_client
+    if _feed_client is None or _feed_client.is_closed:
+        _feed_client = httpx.AsyncClient(
+            timeout=FEEDS_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=FEEDS_CONCURRENCY * 2,
+                max_keepalive_connections=FEEDS_CONCURRENCY,
+            ),
+            headers={"User-Agent": "Blockchain-Forensics-Intel-Feeds/1.0"},
+        )
+    return _feed_client
+
+
+async def close_feed_client() -> None:
+    global _feed_client
+    if _feed_client is not None:
+        await _feed_client.aclose()
+        _feed_client = None
+
+
+def parse_cryptoscamdb(data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """CryptoScamDB response -> intelligence items"""
+    addresses = []
+    for scam in data.get("result", []):
+        # Extract addresses from scam data
+        addresses.extend(extract_addresses_from_scam(scam))
+    return addresses
+
+
+def parse_phishing_reports(data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Abuse report feed response -> phishing intelligence items"""
+    addresses = []
+    for report in data.get("data", []):
+        if report.get("category") == "phishing":
+            addresses.extend(extract_addresses_from_report(report))
+    return addresses
+
+
 async def fetch_cryptoscamdb() -> List[Dict[str, str]]:
     """Fetch from CryptoScamDB API"""
     try:
-        url = "https://api.cryptoscamdb.org/v1/scams"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-
-        addresses = []
-        for scam in data.get("result", []):
-            # Extract addresses from scam data
-            addresses.extend(extract_addresses_from_scam(scam))
-
-        return addresses
+        response = await get_feed_client().get(CRYPTOSCAMDB_URL)
+        response.raise_for_status()
+        return parse_cryptoscamdb(response.json())
     except Exception as e:
         logger.error(f"Failed to fetch CryptoScamDB: {e}")
         return []
@@ -73,19 +124,9 @@ async def fetch_cryptoscamdb() -> List[Dict[str, str]]:
 async def fetch_phishing_feeds() -> List[Dict[str, str]]:
     """Fetch from PhishFort or similar phishing databases"""
     try:
-        # Using a public phishing feed (example: chainabuse.com or similar)
-        url = "https://api.chainabuse.com/v0/reports"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-
-        addresses = []
-        for report in data.get("data", []):
-            if report.get("category") == "phishing":
-                addresses.extend(extract_addresses_from_report(report))
-
-        return addresses
+        response = await get_feed_client().get(PHISHING_FEED_URL)
+        response.raise_for_status()
+        return parse_phishing_reports(response.json())
     except Exception as e:
         logger.error(f"Failed to fetch phishing feeds: {e}")
         return []
@@ -473,36 +514,269 @@ async def fetch_all_feeds() -> List[Dict[str, str]]:
     return normalize(all_items)
 
 
-async def run_once() -> Dict[str, int]:
-    """Run intelligence feeds ingestion"""
-    print("Fetching intelligence feeds...")
-    items = await fetch_all_feeds()
-    print(f"Fetched {len(items)} intelligence items")
+# ---------------------------------------------------------------------------
+# Incremental ingestion
+# ---------------------------------------------------------------------------
+
+@dataclass
+class FeedSource:
+    """
+    A feed source: either an HTTP endpoint (url + parse) fetched with
+    conditional requests, or a curated list returned by fetch().
+    """
+    name: str
+    url: Optional[str] = None
+    parse: Optional[Callable[[Any], List[Dict[str, Any]]]] = None
+    fetch: Optional[Callable[[], Awaitable[List[Dict[str, Any]]]]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class FeedState:
+    """What we know about a source from its last successful run"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    # "chain:address:label" -> short hash of the normalized entry
+    entries: Dict[str, str] = field(default_factory=dict)
+    last_fetch: Optional[str] = None
+    last_change: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_hash": self.content_hash,
+            "entries": self.entries,
+            "last_fetch": self.last_fetch,
+            "last_change": self.last_change,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeedState":
+        return cls(
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            content_hash=data.get("content_hash"),
+            entries=dict(data.get("entries") or {}),
+            last_fetch=data.get("last_fetch"),
+            last_change=data.get("last_change"),
+        )
+
+
+@dataclass
+class FeedResult:
+    source: str
+    status: str  # "not_modified" | "unchanged" | "changed" | "error"
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    removed: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    state: Optional[FeedState] = None  # new state, committed after a successful upsert
 
-    # Integrate with DB if available
-    if DB_INTEGRATION and items:
-        print("Storing intelligence items in database...")
+
+def _entry_key(item: Dict[str, Any]) -> str:
+    return f"{item['chain']}:{item['address']}:{item['label']}"
+
+
+def _entry_hash(item: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(item, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def default_feed_sources() -> List[FeedSource]:
+    return [
+        # Public Feeds
+        FeedSource("cryptoscamdb", url=CRYPTOSCAMDB_URL, parse=parse_cryptoscamdb),
+        FeedSource("phishing_feed", url=PHISHING_FEED_URL, parse=parse_phishing_reports),
+        FeedSource("etherscan", fetch=fetch_etherscan_labels),
+        FeedSource("bitcoin_abuse", fetch=fetch_bitcoin_abuse),
+
+        # Specialized Intelligence
+        FeedSource("ransomware_tracker", fetch=fetch_ransomware_trackers),
+        FeedSource("darkweb_intel", fetch=fetch_darkweb_intel),
+        FeedSource("exchange_hacks", fetch=fetch_exchange_hacks),
+        FeedSource("fbi_ic3", fetch=fetch_fbi_ic3_alerts),
+    ]
+
+
+class FeedIngestor:
+    """
+    Incremental feed ingestion
+
+    Per run and source:
+    1. HTTP sources send If-None-Match / If-Modified-Since; 304 -> done
+    2. Body hash equals the last one -> done (no parse)
+    3. Otherwise parse, normalize and diff against the stored entry hashes;
+       only new or changed entries are upserted
+
+    Entries that disappeared from a feed are counted as removed but not deleted
+    (labels stay until they are revoked explicitly). Source state is only
+    committed after a successful upsert, so failed runs are retried in full.
+    """
+
+    def __init__(
+        self,
+        sources: Optional[List[FeedSource]] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        upsert: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Tuple[int, int]]]] = None,
+        state_path: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.sources = sources if sources is not None else default_feed_sources()
+        self._client = client
+        self.upsert = upsert if upsert is not None else (bulk_upsert if DB_INTEGRATION else None)
+        self.state_path = state_path if state_path is not None else os.getenv("INTEL_FEEDS_STATE_PATH") or None
+        self.concurrency = concurrency or FEEDS_CONCURRENCY
+        self.state: Dict[str, FeedState] = self._load_state()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_feed_client()
+
+    def _load_state(self) -> Dict[str, FeedState]:
+        if not self.state_path:
+            return {}
         try:
-            inserted, existing = await bulk_upsert(items)
-            print(f"DB integration: {inserted} inserted, {existing} existing")
-            return {
-                "total_fetched": len(items),
-                "sources": list(set(item.get("source", "unknown") for item in items)),
-                "chains": list(set(item.get("chain", "ethereum") for item in items)),
-                "db_inserted": inserted,
-                "db_existing": existing
-            }
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            return {name: FeedState.from_dict(data) for name, data in raw.items()}
+        except FileNotFoundError:
+            return {}
         except Exception as e:
-            logger.error(f"DB integration failed: {e}")
-            return {
-                "total_fetched": len(items),
-                "sources": list(set(item.get("source", "unknown") for item in items)),
-                "chains": list(set(item.get("chain", "ethereum") for item in items)),
-                "db_error": str(e)
-            }
-    else:
-        return {
-            "total_fetched": len(items),
-            "sources": list(set(item.get("source", "unknown") for item in items)),
-            "chains": list(set(item.get("chain", "ethereum") for item in items))
+            logger.warning(f"Could not load feed state from {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        try:
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({name: st.to_dict() for name, st in self.state.items()}, f)
+            os.replace(tmp, self.state_path)
+        except Exception as e:
+            logger.warning(f"Could not save feed state to {self.state_path}: {e}")
+
+    async def _download(self, source: FeedSource, state: FeedState) -> Tuple[Optional[bytes], FeedState]:
+        """Conditional GET; returns (None, state) when the server answers 304"""
+        headers = dict(source.headers)
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+        response = await self.client.get(source.url, headers=headers)
+        now = datetime.utcnow().isoformat()
+        if response.status_code == 304:
+            return None, FeedState(**{**state.__dict__, "last_fetch": now})
+        response.raise_for_status()
+        return response.content, FeedState(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=state.content_hash,
+            entries=state.entries,
+            last_fetch=now,
+            last_change=state.last_change,
+        )
+
+    async def fetch_source(self, source: FeedSource) -> FeedResult:
+        state = self.state.get(source.name) or FeedState()
+        try:
+            if source.url:
+                body, new_state = await self._download(source, state)
+                if body is None:
+                    return FeedResult(source.name, "not_modified", total=len(state.entries), state=new_state)
+                content_hash = hashlib.sha256(body).hexdigest()
+                if content_hash == state.content_hash:
+                    return FeedResult(source.name, "unchanged", total=len(state.entries), state=new_state)
+                items = source.parse(json.loads(body)) if source.parse else []
+            else:
+                items = await source.fetch() if source.fetch else []
+                new_state = FeedState(**{**state.__dict__, "last_fetch": datetime.utcnow().isoformat()})
+                content_hash = None
+
+            entries: Dict[str, str] = {}
+            changed: List[Dict[str, Any]] = []
+            for item in normalize(items):
+                key = _entry_key(item)
+                digest = _entry_hash(item)
+                entries[key] = digest
+                if state.entries.get(key) != digest:
+                    changed.append(item)
+            if content_hash is None:
+                content_hash = hashlib.sha256("\n".join(f"{k}={v}" for k, v in sorted(entries.items())).encode()).hexdigest()
+
+            removed = sum(1 for key in state.entries if key not in entries)
+            new_state.content_hash = content_hash
+            new_state.entries = entries
+            if changed or removed:
+                new_state.last_change = new_state.last_fetch
+            status = "changed" if changed or removed else "unchanged"
+            return FeedResult(source.name, status, changed=changed, removed=removed, total=len(entries), state=new_state)
+        except Exception as e:
+            logger.error(f"Feed {source.name} failed: {e}")
+            return FeedResult(source.name, "error", total=len(state.entries), error=str(e))
+
+    async def fetch_changes(self) -> List[FeedResult]:
+        """Fetch all sources concurrently (bounded) and diff them against the stored state"""
+        sem = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def _one(source: FeedSource) -> FeedResult:
+            async with sem:
+                return await self.fetch_source(source)
+
+        return list(await asyncio.gather(*[_one(src) for src in self.sources]))
+
+    def commit(self, results: List[FeedResult]) -> None:
+        for result in results:
+            if result.state is not None:
+                self.state[result.source] = result.state
+        self._save_state()
+
+    async def run_once(self) -> Dict[str, Any]:
+        results = await self.fetch_changes()
+        changed = normalize([item for r in results for item in r.changed])
+
+        summary: Dict[str, Any] = {
+            "changed": len(changed),
+            "removed": sum(r.removed for r in results),
+            "sources_changed": sorted(r.source for r in results if r.status == "changed"),
+            "sources_unchanged": sorted(r.source for r in results if r.status in ("unchanged", "not_modified")),
+            "errors": {r.source: r.error for r in results if r.status == "error"},
         }
+        try:
+            if self.upsert is not None and changed:
+                inserted, existing = await self.upsert(changed)
+                summary.update({"db_inserted": inserted, "db_existing": existing})
+            self.commit(results)
+        except Exception as e:
+            logger.error(f"DB integration failed: {e}")
+            summary["db_error"] = str(e)
+
+        known = [(name, st) for name, st in self.state.items()]
+        summary.update({
+            "total_fetched": sum(len(st.entries) for _name, st in known),
+            "sources": sorted(name for name, st in known if st.entries),
+            "chains": sorted({key.split(":", 1)[0] for _name, st in known for key in st.entries}),
+        })
+        return summary
+
+
+_feed_ingestor: Optional[FeedIngestor] = None
+
+
+def get_feed_ingestor() -> FeedIngestor:
+    global _feed_ingestor
+    if _feed_ingestor is None:
+        _feed_ingestor = FeedIngestor()
+    return _feed_ingestor
+
+
+async def run_once() -> Dict[str, Any]:
+    """Run intelligence feeds ingestion (incremental: only new/changed entries are stored)"""
+    result = await get_feed_ingestor().run_once()
+    logger.info(
+        f"Intel feeds: {result['changed']} new/changed of {result['total_fetched']} entries, "
+        f"unchanged sources: {result['sources_unchanged']}"
+    )
+    return result
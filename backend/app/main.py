@@ -22,6 +22,7 @@ from app.config import settings
 from app.middleware.security_headers import SecurityHeadersMiddleware
 from app.middleware.request_size_limit import RequestSizeLimitMiddleware
 from app.middleware.prometheus_http import PrometheusHTTPMiddleware
+from app.middleware.pipeline import MiddlewarePipeline, ProcessTimeHook
 neo4j_client = None  # Lazy-imported in lifespan
 postgres_client = None  # Lazy-imported in lifespan
 from app.api.v1 import router as api_v1_router
@@ -307,11 +308,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Failed to start Threat Intelligence Feed Updater: {e}")
 
+    # Alert-Webhook-Zustellung: Worker + Replay des Retry-Spools vom letzten Lauf
+    try:
+        from app.services.alert_webhook_delivery import parse_destinations, webhook_delivery
+        await webhook_delivery.start(parse_destinations(getattr(settings, "ALERT_WEBHOOK_URLS", None)))
+        logger.info("✅ Alert webhook delivery started")
+    except Exception as e:
+        logger.error(f"❌ Failed to start alert webhook delivery: {e}")
+
     # Start KPI Background Worker
     kpi_task = None
     try:
         from app.workers.kpi_worker import start_kpi_worker
-        _kpi_worker = start_kpi_worker(presets=[(30, 48), (7, 48)], interval_seconds=60)
+        _kpi_worker = start_kpi_worker()
         kpi_task = asyncio.create_task(_kpi_worker.start())
         logger.info("✅ KPI background worker started")
     except Exception as e:
@@ -349,8 +358,8 @@ async def lifespan(app: FastAPI):
         from app.services.graph_engine_v2 import graph_engine_v2
         if graph_engine_v2.enabled:
             min_freq = int(os.getenv("GRAPH_V2_MIN_FREQUENCY", "100"))
-            await graph_engine_v2.materialize_hot_paths(min_frequency=min_freq)
-            logger.info(f"✅ Graph Engine v2 warmed up (materialized hot paths, min_frequency={min_freq})")
+            await graph_engine_v2.start_hot_path_materializer(min_frequency=min_freq)
+            logger.info(f"✅ Graph Engine v2 hot-path materializer started (min_frequency={min_freq})")
         else:
             logger.info("ℹ️ Graph Engine v2 running in no-op mode (Neo4j disabled or not configured)")
     except Exception as e:
@@ -479,6 +488,12 @@ async def lifespan(app: FastAPI):
             await asyncio.sleep(0.2)
     except Exception:
         pass
+    # Evidence Vault: pending group-commit batches flushen, solange Postgres noch offen ist
+    try:
+        from app.services.evidence_vault import evidence_vault as _evidence_vault
+        await asyncio.wait_for(_evidence_vault.flush(), timeout=10)
+    except Exception as e:
+        logger.error(f"Error flushing evidence vault: {e}")
     if neo4j_client is not None:
         try:
             await neo4j_client.close()
@@ -567,6 +582,8 @@ async def lifespan(app: FastAPI):
             from app.workers.intel_feeds_worker import intel_feeds_worker
             intel_feeds_worker.stop()
             await asyncio.sleep(0.2)
+        from app.intel.feeds import close_feed_client
+        await close_feed_client()
     except Exception as e:
         logger.error(f"Error stopping Intel feeds update worker: {e}")
 
@@ -625,6 +642,55 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
 
+    # Flush buffered usage audit rows
+    try:
+        from app.services.usage_tracking import usage_tracking_service
+        await usage_tracking_service.audit_writer.stop()
+    except Exception as e:
+        logger.error(f"Error flushing usage audit writer: {e}")
+
+    # WebSocket-Writer stoppen
+    try:
+        from app.websockets.manager import manager as ws_manager
+        await ws_manager.close()
+    except Exception as e:
+        logger.error(f"Error stopping websocket writers: {e}")
+
+    # Graph Engine v2: Hot-Path-Materialisierung stoppen
+    try:
+        from app.services.graph_engine_v2 import graph_engine_v2
+        await graph_engine_v2.stop_hot_path_materializer()
+    except Exception as e:
+        logger.error(f"Error stopping graph hot-path materializer: {e}")
+
+    # Graph Analytics: Process-Pool für Louvain/Zentralität beenden
+    try:
+        from app.analytics.advanced_graph_analytics import advanced_graph_analytics
+        advanced_graph_analytics.shutdown()
+    except Exception as e:
+        logger.error(f"Error shutting down graph analytics pool: {e}")
+
+    # PDF-Reports: Render-Pool beenden
+    try:
+        from app.reports.report_jobs import report_jobs
+        report_jobs.shutdown()
+    except Exception as e:
+        logger.error(f"Error shutting down report render pool: {e}")
+
+    # Evidence Vault: Process-Pool für Signaturprüfung beenden
+    try:
+        from app.services.evidence_vault import shutdown_verify_pool
+        shutdown_verify_pool()
+    except Exception as e:
+        logger.error(f"Error shutting down evidence verify pool: {e}")
+
+    # Alert-Webhooks: Worker stoppen, offene Zustellungen in den Spool
+    try:
+        from app.services.alert_webhook_delivery import webhook_delivery
+        await asyncio.wait_for(webhook_delivery.stop(), timeout=10)
+    except Exception as e:
+        logger.error(f"Error stopping alert webhook delivery: {e}")
+
     # Close outbound HTTP clients (webhook service)
     try:
         await webhook_service.close()
@@ -672,95 +738,15 @@ if getattr(settings, "TRUSTED_HOSTS", None):
     except Exception:
         pass
 
-# Security Headers Middleware (matches constructor signature)
-app.add_middleware(
-    SecurityHeadersMiddleware,
-    enable_hsts=getattr(settings, "ENABLE_HSTS", False),
-)
-
-# Limit request size for write methods (defaults to 2 MiB, configurable via MAX_REQUEST_SIZE_BYTES)
-app.add_middleware(RequestSizeLimitMiddleware)
-
-if ErrorMiddleware:
-    app.add_middleware(ErrorMiddleware)
-
-# HTTP metrics for Prometheus (http_requests_total, http_request_duration_seconds)
-app.add_middleware(PrometheusHTTPMiddleware)
-app.add_middleware(SecurityAuditMiddleware)
-app.add_middleware(GDPRComplianceMiddleware)
-app.add_middleware(AnalyticsMiddleware)
-
-# Plan Gates Middleware (Server-side Plan Enforcement)
-try:
-    from app.middleware.plan_gates import PlanGateMiddleware
-    app.add_middleware(PlanGateMiddleware)
-    logger.info("✅ Plan Gates Middleware aktiviert")
-except Exception as e:
-    logger.warning(f"⚠️ Plan Gates Middleware konnte nicht geladen werden: {e}")
-
-# Usage-Tracking-Middleware (Track API-Calls & Enforce Quotas)
-try:
-    from app.middleware.usage_tracking_middleware import UsageTrackingMiddleware
-    app.add_middleware(UsageTrackingMiddleware)
-    logger.info("✅ Usage-Tracking-Middleware aktiviert")
-except Exception as e:
-    logger.warning(f"⚠️ Usage-Tracking-Middleware konnte nicht geladen werden: {e}")
-
-_security_disabled = os.getenv("DISABLE_SECURITY") == "1"
-# Enforce org membership (uses X-Org-Id header) on protected path prefixes
-if not os.getenv("PYTEST_CURRENT_TEST") and not _security_disabled:
-    app.add_middleware(OrgAccessMiddleware)
+# Application middlewares run as one pure-ASGI pipeline (app/middleware/pipeline.py):
+# hooks are listed outermost first and share a single request context.
+_pipeline_hooks = [ProcessTimeHook()]
 
-# Optional OpenTelemetry per-app instrumentation
-if _otel_instrumented:
-    try:
-        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-        from opentelemetry.instrumentation.requests import RequestsInstrumentor
-        FastAPIInstrumentor().instrument_app(app)
-        RequestsInstrumentor().instrument()
-        try:
-            from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor  # type: ignore
-            HTTPXClientInstrumentor().instrument()
-        except Exception:
-            pass
-        logger.info("✅ OpenTelemetry FastAPI/HTTP instrumentation enabled")
-    except Exception as _inst_err:
-        logger.warning(f"⚠️ Failed to instrument FastAPI/HTTP with OpenTelemetry: {_inst_err}")
-
-# Rate Limiting Middleware (Enhanced Version with Environment Controls)
-if os.getenv("ENABLE_RATE_LIMIT", "true").lower() == "true":
-    # Skip rate limiting in test mode or when explicitly disabled
-    enable_rate_limit = not (os.getenv("TEST_MODE") == "1" or os.getenv("PYTEST_CURRENT_TEST"))
-    
-    # Configure rate limits from environment (requests per minute)
-    rate_limit_config = {
-        "RATE_LIMIT_ADMIN": os.getenv("RATE_LIMIT_ADMIN", "1000"),
-        "RATE_LIMIT_ANALYST": os.getenv("RATE_LIMIT_ANALYST", "300"),
-        "RATE_LIMIT_AUDITOR": os.getenv("RATE_LIMIT_AUDITOR", "100"),
-        "RATE_LIMIT_VIEWER": os.getenv("RATE_LIMIT_VIEWER", "100"),
-        "RATE_LIMIT_ANONYMOUS": os.getenv("RATE_LIMIT_ANONYMOUS", "60"),
-    }
-    
-    logger.info(f"Rate limiting {'enabled' if enable_rate_limit else 'disabled'}. Config: {rate_limit_config}")
-    
-    # Add rate limiting middleware with configuration
-    app.add_middleware(
-        RateLimitMiddleware,
-        enable_rate_limit=enable_rate_limit,
-    )
-    app.add_middleware(
-        IdempotencyMiddleware,
-        header_name="Idempotency-Key",
-        ttl_seconds=getattr(settings, "IDEMPOTENCY_TTL_SECONDS", 60),
-        allowlist=getattr(settings, "IDEMPOTENCY_ALLOWLIST", []),
-        blocklist=getattr(settings, "IDEMPOTENCY_BLOCKLIST", []),
-        methods=getattr(settings, "IDEMPOTENCY_METHODS", ["POST", "PUT", "PATCH", "DELETE"]),
-    )
 # Disable API key middleware during pytest or when explicitly disabled,
 # but allow enabling it for tests via ENABLE_APIKEY_MW_UNDER_TEST=1
+_security_disabled = os.getenv("DISABLE_SECURITY") == "1"
 if ((not os.getenv("PYTEST_CURRENT_TEST")) or os.getenv("ENABLE_APIKEY_MW_UNDER_TEST") == "1") and not _security_disabled and ApiKeyMiddleware:
-    app.add_middleware(
-        ApiKeyMiddleware,
+    _pipeline_hooks.append(ApiKeyMiddleware(
         exempt_paths=[
             "/docs",
             "/openapi.json",
@@ -797,26 +783,84 @@ if ((not os.getenv("PYTEST_CURRENT_TEST")) or os.getenv("ENABLE_APIKEY_MW_UNDER_
             "/favicon.ico",
             "/.well-known/appspecific/com.chrome.devtools.json",
         ],
-    )
+    ))
 
-# Structured error handling (already added above; keep debug via constructor if supported)
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    # TEST_MODE-only stabilization: convert 405 (Method Not Allowed) to 404 for GET /api/v1/cases/*
-    try:
-        if (
-            (os.getenv("PYTEST_CURRENT_TEST") or os.getenv("TEST_MODE") == "1")
-            and request.method.upper() == "GET"
-            and response.status_code == 405
-        ):
-            return JSONResponse(status_code=404, content={"detail": "Case not found"})
-    except Exception:
-        pass
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Rate Limiting Middleware (Enhanced Version with Environment Controls)
+if os.getenv("ENABLE_RATE_LIMIT", "true").lower() == "true":
+    # Skip rate limiting in test mode or when explicitly disabled
+    enable_rate_limit = not (os.getenv("TEST_MODE") == "1" or os.getenv("PYTEST_CURRENT_TEST"))
+    
+    # Configure rate limits from environment (requests per minute)
+    rate_limit_config = {
+        "RATE_LIMIT_ADMIN": os.getenv("RATE_LIMIT_ADMIN", "1000"),
+        "RATE_LIMIT_ANALYST": os.getenv("RATE_LIMIT_ANALYST", "300"),
+        "RATE_LIMIT_AUDITOR": os.getenv("RATE_LIMIT_AUDITOR", "100"),
+        "RATE_LIMIT_VIEWER": os.getenv("RATE_LIMIT_VIEWER", "100"),
+        "RATE_LIMIT_ANONYMOUS": os.getenv("RATE_LIMIT_ANONYMOUS", "60"),
+    }
+    
+    logger.info(f"Rate limiting {'enabled' if enable_rate_limit else 'disabled'}. Config: {rate_limit_config}")
+    
+    _pipeline_hooks.append(IdempotencyMiddleware(
+        header_name="Idempotency-Key",
+        ttl_seconds=getattr(settings, "IDEMPOTENCY_TTL_SECONDS", 60),
+        allowlist=getattr(settings, "IDEMPOTENCY_ALLOWLIST", []),
+        blocklist=getattr(settings, "IDEMPOTENCY_BLOCKLIST", []),
+        methods=getattr(settings, "IDEMPOTENCY_METHODS", ["POST", "PUT", "PATCH", "DELETE"]),
+    ))
+    _pipeline_hooks.append(RateLimitMiddleware(enable_rate_limit=enable_rate_limit))
+
+# Enforce org membership (uses X-Org-Id header) on protected path prefixes
+if not os.getenv("PYTEST_CURRENT_TEST") and not _security_disabled:
+    _pipeline_hooks.append(OrgAccessMiddleware())
+
+# Usage-Tracking-Middleware (Track API-Calls & Enforce Quotas)
+try:
+    from app.middleware.usage_tracking_middleware import UsageTrackingMiddleware
+    _pipeline_hooks.append(UsageTrackingMiddleware())
+    logger.info("✅ Usage-Tracking-Middleware aktiviert")
+except Exception as e:
+    logger.warning(f"⚠️ Usage-Tracking-Middleware konnte nicht geladen werden: {e}")
+
+# Plan Gates Middleware (Server-side Plan Enforcement)
+try:
+    from app.middleware.plan_gates import PlanGateMiddleware
+    _pipeline_hooks.append(PlanGateMiddleware())
+    logger.info("✅ Plan Gates Middleware aktiviert")
+except Exception as e:
+    logger.warning(f"⚠️ Plan Gates Middleware konnte nicht geladen werden: {e}")
+
+_pipeline_hooks += [
+    AnalyticsMiddleware(),
+    GDPRComplianceMiddleware(),
+    SecurityAuditMiddleware(),
+    # HTTP metrics for Prometheus (http_requests_total, http_request_duration_seconds)
+    PrometheusHTTPMiddleware(),
+]
+if ErrorMiddleware:
+    _pipeline_hooks.append(ErrorMiddleware())
+# Limit request size for write methods (defaults to 2 MiB, configurable via MAX_REQUEST_SIZE_BYTES)
+_pipeline_hooks.append(RequestSizeLimitMiddleware())
+# Security Headers Middleware (matches constructor signature)
+_pipeline_hooks.append(SecurityHeadersMiddleware(enable_hsts=getattr(settings, "ENABLE_HSTS", False)))
+
+app.add_middleware(MiddlewarePipeline, hooks=_pipeline_hooks)
+
+# Optional OpenTelemetry per-app instrumentation
+if _otel_instrumented:
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        from opentelemetry.instrumentation.requests import RequestsInstrumentor
+        FastAPIInstrumentor().instrument_app(app)
+        RequestsInstrumentor().instrument()
+        try:
+            from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor  # type: ignore
+            HTTPXClientInstrumentor().instrument()
+        except Exception:
+            pass
+        logger.info("✅ OpenTelemetry FastAPI/HTTP instrumentation enabled")
+    except Exception as _inst_err:
+        logger.warning(f"⚠️ Failed to instrument FastAPI/HTTP with OpenTelemetry: {_inst_err}")
 
 
 # Exception Handlers
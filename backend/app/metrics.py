@@ -387,6 +387,12 @@ if not globals().get("_METRICS_INITIALIZED", False):
         buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10),
     )
 
+    WEBHOOK_DELIVERY_QUEUE_SIZE = Gauge(
+        "webhook_delivery_queue_size",
+        "Pending alert webhook deliveries per destination",
+        labelnames=("destination",),
+    )
+
     ENTITY_EVENT_LIMITS_HIT = Counter(
         "entity_event_limits_hit_total",
         "Number of times entity event limits were hit",
@@ -563,6 +569,11 @@ if not globals().get("_METRICS_INITIALIZED", False):
         buckets=(1, 5, 10, 25, 50, 100, 250, 500),
     )
 
+    ALERT_BATCH_THROUGHPUT = Gauge(
+        "alert_batch_events_per_second",
+        "Event throughput of the last AlertEngine batch",
+    )
+
     ALERT_BATCH_PROCESSING_TIME = Histogram(
         "alert_batch_processing_time_seconds",
         "Time taken to process an alert batch",
@@ -578,3 +589,95 @@ if not globals().get("_METRICS_INITIALIZED", False):
         "alert_batches_processed_total",
         "Total number of alert batches processed",
     )
+
+    # ==========================
+    # AI Firewall Layer Metrics
+    # ==========================
+
+    FIREWALL_LAYER_LATENCY = Histogram(
+        "firewall_layer_detection_seconds",
+        "Detection time per AI firewall layer",
+        labelnames=("layer", "outcome"),  # outcome: ok|timeout|error|cancelled|cache_hit
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2),
+    )
+
+    FIREWALL_LAYER_LATENCY_MS = Gauge(
+        "firewall_layer_detection_ms",
+        "Rolling p50/p99 detection_time_ms per AI firewall layer",
+        labelnames=("layer", "quantile"),
+    )
+
+    FIREWALL_SHORT_CIRCUITS = Counter(
+        "firewall_short_circuits_total",
+        "Intercepts decided before all layers finished",
+        labelnames=("layer",),
+    )
+
+    # ==========================
+    # Graph Engine v2 Hot Paths
+    # ==========================
+
+    GRAPH_HOT_PATH_LOOKUPS = Counter(
+        "graph_hot_path_lookups_total",
+        "Path queries answered from materialized hot paths",
+        labelnames=("result",),  # hit|miss|stale
+    )
+
+    GRAPH_HOT_PATH_HIT_RATE = Gauge(
+        "graph_hot_path_hit_rate",
+        "Share of path queries served from materialized hot paths",
+    )
+
+    GRAPH_HOT_PATH_ENTRIES = Gauge(
+        "graph_hot_path_entries",
+        "Number of materialized hot path entries",
+    )
+
+    GRAPH_HOT_PATH_STALENESS = Gauge(
+        "graph_hot_path_staleness_seconds",
+        "Age of the oldest materialized hot path entry",
+    )
+
+    GRAPH_HOT_PATH_INVALIDATIONS = Counter(
+        "graph_hot_path_invalidations_total",
+        "Hot path entries invalidated by ingested edges",
+    )
+
+    # ==========================
+    # WebSocket Fan-out
+    # ==========================
+
+    WEBSOCKET_FANOUT_LATENCY = Histogram(
+        "websocket_fanout_seconds",
+        "Time to serialize and enqueue one websocket broadcast",
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1),
+    )
+
+    WEBSOCKET_SLOW_CONSUMER_EVENTS = Counter(
+        "websocket_slow_consumer_events_total",
+        "Slow-consumer policy actions on websocket outbound queues",
+        labelnames=("action",),  # dropped|coalesced|disconnected
+    )
+
+    # ==========================
+    # Data Retention
+    # ==========================
+
+    RETENTION_ROWS_DELETED = Counter(
+        "retention_rows_deleted_total",
+        "Rows removed by chunked retention deletes",
+        labelnames=("table",),
+    )
+
+    RETENTION_PARTITIONS_DROPPED = Counter(
+        "retention_partitions_dropped_total",
+        "Expired time partitions dropped by retention",
+        labelnames=("table",),
+    )
+
+    RETENTION_CYCLE_DURATION = Histogram(
+        "retention_cycle_seconds",
+        "Duration of one retention cycle per table",
+        labelnames=("table",),
+        buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900),
+    )
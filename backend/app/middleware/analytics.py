@@ -1,38 +1,36 @@
 import os
-import time
 import hashlib
-from typing import Callable
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from app.db.postgres import postgres_client
+from app.middleware.pipeline import PipelineHook, RequestContext
 
-class AnalyticsMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, ip_salt_env: str = "ANALYTICS_IP_SALT"):
+class AnalyticsMiddleware(PipelineHook):
+    name = "analytics"
+
+    def __init__(self, app=None, ip_salt_env: str = "ANALYTICS_IP_SALT"):
         super().__init__(app)
         self.enabled = os.getenv("ENABLE_ANALYTICS", "1") == "1"
         self.ip_salt = os.getenv(ip_salt_env, "")
 
-    async def dispatch(self, request: Request, call_next: Callable):
-        start = time.time()
-        response = await call_next(request)
+    async def after_response(self, ctx: RequestContext) -> None:
         if not self.enabled:
-            return response
+            return
         try:
-            if request.url.path.startswith(("/metrics", "/docs", "/openapi.json")):
-                return response
-            dnt = request.headers.get("DNT") == "1"
+            if ctx.path.startswith(("/metrics", "/docs", "/openapi.json")):
+                return
+            headers = ctx.headers
+            dnt = headers.get("DNT") == "1"
             if dnt:
-                return response
-            ua = request.headers.get("user-agent", "")[:256]
-            ip = request.client.host if request.client else ""
+                return
+            ua = headers.get("user-agent", "")[:256]
+            ip = ctx.client_host
             ip_hash = hashlib.sha256((ip + self.ip_salt).encode("utf-8")).hexdigest() if self.ip_salt else ""
-            duration = max(0.0, time.time() - start)
-            user_id = getattr(getattr(request, "state", None), "user_id", None)
-            path = request.url.path
-            method = request.method
-            status = response.status_code
-            ref = request.headers.get("referer")
-            org_id = request.headers.get("X-Org-Id")
+            duration = max(0.0, ctx.elapsed)
+            user_id = ctx.scope.get("state", {}).get("user_id")
+            path = ctx.path
+            method = ctx.method
+            status = ctx.status_code
+            ref = headers.get("referer")
+            org_id = headers.get("X-Org-Id")
             props = {"org_id": org_id} if org_id else {}
             # Persist minimal event server-side
             if os.getenv("TEST_MODE") != "1" and getattr(postgres_client, "pool", None):
@@ -79,4 +77,3 @@ class AnalyticsMiddleware(BaseHTTPMiddleware):
                     pass
         except Exception:
             pass
-        return response
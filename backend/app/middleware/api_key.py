@@ -1,7 +1,5 @@
-from typing import Callable, Iterable, Tuple
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from typing import Iterable, Tuple
+from starlette.responses import JSONResponse
 from app.config import settings
 import os
 import time
@@ -10,6 +8,7 @@ import hashlib
 import hmac
 from app.db.postgres import postgres_client
 from app.db.redis_client import redis_client
+from app.middleware.pipeline import PipelineHook, RequestContext
 
 
 def _load_keys() -> set[str]:
@@ -20,8 +19,10 @@ def _load_keys() -> set[str]:
     return {k.strip() for k in str(raw).split(",") if k and k.strip()}
 
 
-class ApiKeyMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, exempt_paths: Iterable[str] | None = None):
+class ApiKeyMiddleware(PipelineHook):
+    name = "api_key"
+
+    def __init__(self, app=None, exempt_paths: Iterable[str] | None = None):
         super().__init__(app)
         self._keys = _load_keys()
         # default exempt endpoints
@@ -94,15 +95,15 @@ class ApiKeyMiddleware(BaseHTTPMiddleware):
             # fail-open on rate limiter issues
             return True, limit, limit, 1
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def before_request(self, ctx: RequestContext):
         # Disable in TEST_MODE or when running under pytest
         if os.getenv("TEST_MODE") == "1" or os.getenv("PYTEST_CURRENT_TEST"):
-            return await call_next(request)
+            return None
         # Skip only if neither static keys nor DB-backed keys are available
         if not self._keys and (os.getenv("TEST_MODE") == "1" or not getattr(postgres_client, "pool", None)):
-            return await call_next(request)
+            return None
         # Exempt paths (exact match or prefix for docs assets)
-        path = request.url.path
+        path = ctx.path
         # Exemptions: docs, public NewsCases WS, and read-only public snapshot of a specific NewsCase
         if (
             path in self._exempt
@@ -110,56 +111,43 @@ class ApiKeyMiddleware(BaseHTTPMiddleware):
             or path.startswith("/api/v1/ws/news-cases")
             or (path.startswith("/api/v1/news-cases/") and path.endswith("/public"))
         ):
-            return await call_next(request)
+            return None
 
-        api_key = request.headers.get("x-api-key") or request.query_params.get("api_key")
+        api_key = ctx.headers.get("x-api-key") or ctx.request.query_params.get("api_key")
         if not api_key or len(api_key) < self._min_len:
             return JSONResponse({"detail": "Unauthorized: missing or invalid API key"}, status_code=401)
-        # allow if present in static configured keys (treat as enterprise tier)
-        if any(hmac.compare_digest(api_key, k) for k in self._keys):
-            allowed, limit, remaining, reset = await self._rate_limit(api_key, "enterprise")
-            if not allowed:
-                return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers={
-                    "Retry-After": str(reset),
-                    "X-RateLimit-Limit": str(limit),
-                    "X-RateLimit-Remaining": str(remaining),
-                })
-            response = await call_next(request)
-            # best-effort usage counter
-            try:
-                await redis_client._ensure_connected()
-                if redis_client.client:
-                    from datetime import datetime
-                    day = datetime.utcnow().strftime("%Y%m%d")
-                    prefix = api_key[:16]
-                    key = f"usage:req:{day}:{prefix}"
-                    await redis_client.client.incr(key)
-                    await redis_client.client.expire(key, 40 * 24 * 3600)
-            except Exception:
-                pass
-            return response
+        # allow if present in static configured keys (treat as enterprise tier),
         # otherwise check DB-backed keys
-        allowed_db, tier = await self._check_db_key(api_key)
-        if allowed_db:
-            allowed, limit, remaining, reset = await self._rate_limit(api_key, tier or "pro")
-            if not allowed:
-                return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers={
-                    "Retry-After": str(reset),
-                    "X-RateLimit-Limit": str(limit),
-                    "X-RateLimit-Remaining": str(remaining),
-                })
-            response = await call_next(request)
-            # best-effort usage counter
-            try:
-                await redis_client._ensure_connected()
-                if redis_client.client:
-                    from datetime import datetime
-                    day = datetime.utcnow().strftime("%Y%m%d")
-                    prefix = api_key[:16]
-                    key = f"usage:req:{day}:{prefix}"
-                    await redis_client.client.incr(key)
-                    await redis_client.client.expire(key, 40 * 24 * 3600)
-            except Exception:
-                pass
-            return response
-        return JSONResponse({"detail": "Unauthorized: missing or invalid API key"}, status_code=401)
+        if any(hmac.compare_digest(api_key, k) for k in self._keys):
+            tier = "enterprise"
+        else:
+            allowed_db, tier = await self._check_db_key(api_key)
+            if not allowed_db:
+                return JSONResponse({"detail": "Unauthorized: missing or invalid API key"}, status_code=401)
+            tier = tier or "pro"
+        allowed, limit, remaining, reset = await self._rate_limit(api_key, tier)
+        if not allowed:
+            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers={
+                "Retry-After": str(reset),
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(remaining),
+            })
+        ctx.state[self.name] = api_key
+        return None
+
+    async def after_response(self, ctx: RequestContext) -> None:
+        api_key = ctx.state.get(self.name)
+        if not api_key:
+            return
+        # best-effort usage counter
+        try:
+            await redis_client._ensure_connected()
+            if redis_client.client:
+                from datetime import datetime
+                day = datetime.utcnow().strftime("%Y%m%d")
+                prefix = api_key[:16]
+                key = f"usage:req:{day}:{prefix}"
+                await redis_client.client.incr(key)
+                await redis_client.client.expire(key, 40 * 24 * 3600)
+        except Exception:
+            pass
@@ -4,19 +4,20 @@ import logging
 import re
 from typing import Optional, Iterable, List, Tuple
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import JSONResponse
 
 from app.db.redis_client import redis_client
+from app.middleware.pipeline import PipelineHook, RequestContext
 
 logger = logging.getLogger(__name__)
 
 
-class IdempotencyMiddleware(BaseHTTPMiddleware):
+class IdempotencyMiddleware(PipelineHook):
+    name = "idempotency"
+
     def __init__(
         self,
-        app,
+        app=None,
         *,
         header_name: str = "Idempotency-Key",
         ttl_seconds: int = 60,
@@ -42,21 +43,21 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
             return any(r.match(path) for r in self._allow_re)
         return True
 
-    async def dispatch(self, request: Request, call_next):
+    async def before_request(self, ctx: RequestContext):
         # Check HTTP method
-        if request.method.upper() not in self.methods:
-            return await call_next(request)
+        if ctx.method.upper() not in self.methods:
+            return None
         # Check path policy
-        if not self._path_enforced(request.url.path):
-            return await call_next(request)
+        if not self._path_enforced(ctx.path):
+            return None
 
-        idem_key = request.headers.get(self.header_name)
+        idem_key = ctx.headers.get(self.header_name)
         if not idem_key:
             # No key → proceed without idempotency handling
-            return await call_next(request)
+            return None
 
         # Create a namespaced key (optionally include path and method)
-        scope = f"{request.method}:{request.url.path}:{idem_key}"
+        scope = f"{ctx.method}:{ctx.path}:{idem_key}"
         key = f"idem:{hashlib.sha256(scope.encode()).hexdigest()}"
 
         try:
@@ -79,5 +80,4 @@ class IdempotencyMiddleware(BaseHTTPMiddleware):
             # Fallback: if Redis is unavailable, proceed without blocking
             logger.warning(f"Idempotency middleware fallback (redis unavailable): {e}")
 
-        response: Response = await call_next(request)
-        return response
+        return None
@@ -2,18 +2,17 @@ from __future__ import annotations
 import logging
 import os
 from typing import List, Optional
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import JSONResponse
 from fastapi import status
 
 from app.auth.jwt import decode_token
+from app.middleware.pipeline import PipelineHook, RequestContext
 from app.services.org_service import org_service
 
 logger = logging.getLogger(__name__)
 
 
-class OrgAccessMiddleware(BaseHTTPMiddleware):
+class OrgAccessMiddleware(PipelineHook):
     """
     Enforces that authenticated users are members of an organization for selected path prefixes.
     - Reads org_id from X-Org-Id header (preferred). If missing, allows request (public endpoints or legacy mode).
@@ -21,7 +20,9 @@ class OrgAccessMiddleware(BaseHTTPMiddleware):
     - Skips for health, docs, auth, billing webhook and other public endpoints.
     """
 
-    def __init__(self, app, protected_prefixes: Optional[List[str]] = None):
+    name = "org_access"
+
+    def __init__(self, app=None, protected_prefixes: Optional[List[str]] = None):
         super().__init__(app)
         self.protected_prefixes = protected_prefixes or [
             "/api/v1/cases",
@@ -51,13 +52,13 @@ class OrgAccessMiddleware(BaseHTTPMiddleware):
             return False
         return any(path.startswith(p) for p in self.protected_prefixes)
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
+    async def before_request(self, ctx: RequestContext):
+        path = ctx.path
         # Skip enforcement if not on protected paths
         if not self._is_protected(path):
-            return await call_next(request)
+            return None
 
-        org_id = request.headers.get("X-Org-Id")
+        org_id = ctx.headers.get("X-Org-Id")
         if not org_id:
             # Allow legacy by default; optionally enforce strict via env flag
             if os.getenv("ENFORCE_ORG_ID_STRICT", "0") == "1":
@@ -68,12 +69,12 @@ class OrgAccessMiddleware(BaseHTTPMiddleware):
                         "detail": "X-Org-Id header is required on this endpoint",
                     },
                 )
-            return await call_next(request)
+            return None
 
         # Decode token to identify user
         user_id: Optional[str] = None
         try:
-            auth = request.headers.get("Authorization")
+            auth = ctx.headers.get("Authorization")
             if auth and auth.startswith("Bearer "):
                 token = auth.split(" ", 1)[1].strip()
                 data = decode_token(token)
@@ -101,4 +102,4 @@ class OrgAccessMiddleware(BaseHTTPMiddleware):
             logger.error(f"Org membership check failed: {e}")
             return JSONResponse(status_code=500, content={"error": "Org check error"})
 
-        return await call_next(request)
+        return None
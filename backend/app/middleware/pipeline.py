@@ -0,0 +1,210 @@
+"""
+Pure-ASGI middleware pipeline
+
+Replaces a stack of BaseHTTPMiddleware layers with one ASGI callable that
+runs ordered hooks around the application:
+
+- ``before_request(ctx)``: may return a Response to short-circuit
+- ``on_response_start(ctx, headers)``: mutate response headers in place
+- ``on_error(ctx, exc)``: may turn an exception into a Response
+- ``after_response(ctx)``: runs once the body has been sent (metrics, audit)
+
+Hooks are listed outermost first. Response hooks run innermost first, just
+like the onion of nested middlewares did, so header precedence is unchanged.
+A hook that short-circuits does not see its own response; outer hooks do.
+
+All hooks share one ``RequestContext`` per request (one timing source, one
+lazily built Request and header view) and no extra tasks or body copies are
+created, so streaming responses pass through untouched.
+
+Every hook class is also usable on its own via ``app.add_middleware(Hook, ...)``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContext:
+    """Per-request state shared by all hooks of a pipeline."""
+
+    __slots__ = ("scope", "start", "status_code", "response_headers", "response_bytes", "state", "_request", "_headers")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.start = time.perf_counter()
+        self.status_code = 0
+        self.response_headers: Optional[MutableHeaders] = None
+        self.response_bytes = 0
+        # Scratch space for hooks (keyed by hook name), not exposed to endpoints
+        self.state: Dict[str, Any] = {}
+        self._request: Optional[Request] = None
+        self._headers: Optional[Headers] = None
+
+    @property
+    def method(self) -> str:
+        return self.scope.get("method", "GET")
+
+    @property
+    def path(self) -> str:
+        return self.scope.get("path", "")
+
+    @property
+    def headers(self) -> Headers:
+        if self._headers is None:
+            self._headers = Headers(scope=self.scope)
+        return self._headers
+
+    @property
+    def request(self) -> Request:
+        """Starlette Request on the shared scope (``request.state`` reaches the endpoint)."""
+        if self._request is None:
+            self._request = Request(self.scope)
+        return self._request
+
+    @property
+    def client_host(self) -> str:
+        client = self.scope.get("client")
+        return client[0] if client else ""
+
+    @property
+    def route_path(self) -> str:
+        """Normalized route template once routing happened, raw path otherwise."""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.path
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+class PipelineHook:
+    """
+    Base class for pipeline hooks.
+
+    Subclasses override only the phases they need. Constructed with an ASGI
+    app (as ``add_middleware`` does), a hook wraps that app in a one-hook
+    pipeline; constructed without one it is meant for ``MiddlewarePipeline``.
+    """
+
+    name = "hook"
+
+    def __init__(self, app: Optional[ASGIApp] = None):
+        self.app = app
+        self._pipeline = MiddlewarePipeline(app, [self]) if app is not None else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._pipeline(scope, receive, send)
+
+    async def before_request(self, ctx: RequestContext) -> Optional[Response]:
+        return None
+
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        return None
+
+    async def on_error(self, ctx: RequestContext, exc: Exception) -> Optional[Response]:
+        return None
+
+    async def after_response(self, ctx: RequestContext) -> None:
+        return None
+
+
+def _overrides(hook: PipelineHook, method: str) -> bool:
+    return getattr(type(hook), method) is not getattr(PipelineHook, method)
+
+
+class MiddlewarePipeline:
+    """ASGI middleware running ``hooks`` (outermost first) around ``app``."""
+
+    def __init__(self, app: ASGIApp, hooks: Sequence[PipelineHook]):
+        self.app = app
+        self.hooks: List[PipelineHook] = [h for h in hooks if h is not None]
+        # Per hook: (hook, has before, has response-start, has error, has after)
+        self._plan = [
+            (
+                h,
+                _overrides(h, "before_request"),
+                _overrides(h, "on_response_start"),
+                _overrides(h, "on_error"),
+                _overrides(h, "after_response"),
+            )
+            for h in self.hooks
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext(scope)
+        entered: List[tuple] = []
+        started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                ctx.status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                ctx.response_headers = headers
+                for step in reversed(entered):
+                    if step[2]:
+                        try:
+                            step[0].on_response_start(ctx, headers)
+                        except Exception as e:
+                            logger.debug(f"Pipeline hook {step[0].name} on_response_start failed: {e}")
+            elif message["type"] == "http.response.body":
+                ctx.response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            try:
+                response: Optional[Response] = None
+                for step in self._plan:
+                    if step[1]:
+                        response = await step[0].before_request(ctx)
+                        if response is not None:
+                            break
+                    entered.append(step)
+
+                if response is not None:
+                    await response(scope, receive, send_wrapper)
+                else:
+                    await self.app(scope, receive, send_wrapper)
+            except Exception as exc:
+                if started:
+                    raise
+                handled = None
+                for step in reversed(entered):
+                    if step[3]:
+                        handled = await step[0].on_error(ctx, exc)
+                        if handled is not None:
+                            break
+                if handled is None:
+                    raise
+                await handled(scope, receive, send_wrapper)
+        finally:
+            for step in reversed(entered):
+                if step[4]:
+                    try:
+                        await step[0].after_response(ctx)
+                    except Exception as e:
+                        logger.debug(f"Pipeline hook {step[0].name} after_response failed: {e}")
+
+
+class ProcessTimeHook(PipelineHook):
+    """Sets ``X-Process-Time`` (seconds) from the pipeline's shared start time."""
+
+    name = "process_time"
+
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        headers["X-Process-Time"] = str(ctx.elapsed)
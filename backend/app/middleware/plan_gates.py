@@ -5,19 +5,21 @@ Server-side enforcement of subscription plan restrictions
 from typing import Callable, List, Optional
 from fastapi import Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 from sqlalchemy.orm import Session
 
 from app.auth.dependencies import get_current_user
 from app.models.user import User
 from app.config.pricing import get_plan_config
 from app.db.session import get_db
+from app.middleware.pipeline import PipelineHook, RequestContext
 
 
-class PlanGateMiddleware(BaseHTTPMiddleware):
+class PlanGateMiddleware(PipelineHook):
     """Middleware for enforcing plan-based access control"""
 
-    def __init__(self, app, excluded_paths: Optional[List[str]] = None):
+    name = "plan_gates"
+
+    def __init__(self, app=None, excluded_paths: Optional[List[str]] = None):
         super().__init__(app)
         self.excluded_paths = excluded_paths or [
             "/api/v1/auth",
@@ -29,11 +31,12 @@ class PlanGateMiddleware(BaseHTTPMiddleware):
             "/api/v1/webhooks",  # Allow webhooks
         ]
 
-    async def dispatch(self, request: Request, call_next):
+    async def before_request(self, ctx: RequestContext):
         # Skip middleware for excluded paths
         for excluded in self.excluded_paths:
-            if request.url.path.startswith(excluded):
-                return await call_next(request)
+            if ctx.path.startswith(excluded):
+                return None
+        request = ctx.request
 
         # Check plan requirements for protected endpoints
         try:
@@ -90,7 +93,7 @@ class PlanGateMiddleware(BaseHTTPMiddleware):
             print(f"Plan gate middleware error: {e}")
             pass
 
-        return await call_next(request)
+        return None
 
     def _get_endpoint_requirements(self, path: str) -> Optional[dict]:
         """Get plan/feature requirements for specific endpoints"""
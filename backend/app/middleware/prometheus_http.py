@@ -1,11 +1,8 @@
 from __future__ import annotations
-import time
-from typing import Callable
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
 from prometheus_client import Counter, Histogram
 
+from app.middleware.pipeline import PipelineHook, RequestContext
+
 # Prometheus metrics
 HTTP_REQUESTS_TOTAL = Counter(
     "http_requests_total",
@@ -20,33 +17,20 @@ HTTP_REQUEST_DURATION = Histogram(
 )
 
 
-class PrometheusHTTPMiddleware(BaseHTTPMiddleware):
+class PrometheusHTTPMiddleware(PipelineHook):
     """
     Instruments HTTP requests with Prometheus counter & histogram.
-    Note: Path labels should be normalized in real-world (e.g. using route name);
-    here we use raw path for simplicity.
+    Uses the normalized route path (e.g. /api/v1/cases/{id}) once routing
+    happened to limit label cardinality, the raw path otherwise.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        start = time.time()
-        method = request.method
-        # Prefer normalized route path (e.g. /api/v1/cases/{id}) to limit cardinality
-        route_path = None
-        try:
-            route = request.scope.get("route")
-            if route is not None and getattr(route, "path", None):
-                route_path = route.path  # type: ignore[attr-defined]
-        except Exception:
-            route_path = None
-        path = route_path or request.url.path
-        try:
-            response: Response = await call_next(request)
-            status_code = response.status_code
-            return response
-        finally:
-            duration = time.time() - start
-            # Avoid label explosion: trim very long paths
-            p = path if len(path) < 128 else path[:128]
-            s = str(locals().get("status_code", 0))
-            HTTP_REQUESTS_TOTAL.labels(method=method, path=p, status=s).inc()
-            HTTP_REQUEST_DURATION.labels(method=method, path=p, status=s).observe(duration)
+    name = "prometheus"
+
+    async def after_response(self, ctx: RequestContext) -> None:
+        duration = ctx.elapsed
+        path = ctx.route_path
+        # Avoid label explosion: trim very long paths
+        p = path if len(path) < 128 else path[:128]
+        s = str(ctx.status_code)
+        HTTP_REQUESTS_TOTAL.labels(method=ctx.method, path=p, status=s).inc()
+        HTTP_REQUEST_DURATION.labels(method=ctx.method, path=p, status=s).observe(duration)
@@ -7,16 +7,17 @@ import time
 import logging
 import os
 from typing import Dict, Tuple
-from fastapi import Request, HTTPException, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from collections import defaultdict
 from app.auth.jwt import decode_token
+from app.middleware.pipeline import PipelineHook, RequestContext
 
 logger = logging.getLogger(__name__)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware(PipelineHook):
     """
     Rate Limiting Middleware
     
@@ -31,7 +32,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     - /api/v1/auth/login: 5/minute (brute-force protection)
     """
     
-    def __init__(self, app, enable_rate_limit: bool = True):
+    name = "rate_limit"
+
+    def __init__(self, app=None, enable_rate_limit: bool = True):
         super().__init__(app)
         self.enabled = enable_rate_limit
         if not self.enabled:
@@ -148,12 +151,13 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Use role-based limit
         return self.role_limits.get(user_role, self.role_limits["anonymous"])
     
-    def _get_key(self, request: Request) -> Tuple[str, str]:
+    def _get_key(self, ctx: RequestContext) -> Tuple[str, str]:
         """Generate rate limit key from request"""
+        headers = ctx.headers
         # Try to get user from JWT
         user_role = "anonymous"
         user_id = None
-        auth_header = request.headers.get("Authorization")
+        auth_header = headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.split(" ", 1)[1].strip()
             try:
@@ -170,11 +174,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Get client IP with security considerations
         client_ip = "unknown"
         try:
-            if "x-forwarded-for" in request.headers:
+            if "x-forwarded-for" in headers:
                 # Take the first IP in X-Forwarded-For header
-                client_ip = request.headers["x-forwarded-for"].split(",")[0].strip()
-            elif request.client:
-                client_ip = request.client.host
+                client_ip = headers["x-forwarded-for"].split(",")[0].strip()
+            elif ctx.scope.get("client"):
+                client_ip = ctx.client_host
                 
             # Basic IP validation
             if not self._is_valid_ip(client_ip):
@@ -184,7 +188,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             logger.warning(f"Error getting client IP: {e}")
             client_ip = "error"
             
-        key = f"{user_role}:{client_ip}:{request.url.path}"
+        key = f"{user_role}:{client_ip}:{ctx.path}"
         return key, user_role
     
     def _is_allowed(self, key: str, limit: int) -> bool:
@@ -264,10 +268,10 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return any(c in "0123456789abcdefABCDEF:." for c in ip)
             
         return False  
-    async def dispatch(self, request: Request, call_next):
+    async def before_request(self, ctx: RequestContext):
         # Skip rate limiting if disabled
         if not self.enabled:
-            return await call_next(request)
+            return None
             
         # Clean up old entries periodically
         current_time = time.time()
@@ -275,8 +279,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             self._cleanup_old_entries(current_time)
             self.last_cleanup = current_time
         
+        path = ctx.path
         # Skip rate limiting for certain paths
-        if any(request.url.path.startswith(path) for path in [
+        if any(path.startswith(p) for p in [
             "/docs",
             "/redoc",
             "/openapi.json",
@@ -284,15 +289,15 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             "/metrics",
             "/api/v1/ws"  # Skip for WebSocket connections
         ]):
-            return await call_next(request)
+            return None
         # Skip rate limiting for health/agent only outside of tests
         if not os.getenv("PYTEST_CURRENT_TEST"):
-            if request.url.path == "/health" or request.url.path in {"/api/v1/agent/health", "/api/v1/agent/heartbeat"}:
-                return await call_next(request)
+            if path == "/health" or path in {"/api/v1/agent/health", "/api/v1/agent/heartbeat"}:
+                return None
         
         # Get rate limit key and role
-        key, user_role = self._get_key(request)
-        limit = self._get_rate_limit(user_role, request.url.path)
+        key, user_role = self._get_key(ctx)
+        limit = self._get_rate_limit(user_role, path)
         
         # Check rate limit
         if not self._is_allowed(key, limit):
@@ -318,13 +323,16 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 headers=headers
             )
         
-        # Process request
-        response = await call_next(request)
-        
+        ctx.state[self.name] = (key, limit)
+        return None
+
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
         # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(limit)
-        response.headers["X-RateLimit-Remaining"] = str(
+        checked = ctx.state.get(self.name)
+        if checked is None:
+            return
+        key, limit = checked
+        headers["X-RateLimit-Limit"] = str(limit)
+        headers["X-RateLimit-Remaining"] = str(
             max(0, limit - sum(count for _, count in self.requests[key]))
         )
-        
-        return response
@@ -6,25 +6,29 @@ import logging
 import time
 from typing import Dict, Any, Optional, List
 from fastapi import Request, HTTPException
+from starlette.datastructures import MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
 
+from app.middleware.pipeline import PipelineHook, RequestContext
 from app.services.security_compliance import audit_trail_service, security_service
 
 logger = logging.getLogger(__name__)
 
 
-class SecurityAuditMiddleware(BaseHTTPMiddleware):
+class SecurityAuditMiddleware(PipelineHook):
     """Middleware für automatische Security-Audit-Logging"""
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+    name = "security_audit"
+
+    async def before_request(self, ctx: RequestContext):
+        request = ctx.request
 
         # Extract request information
         client_ip = self._get_client_ip(request)
         user_agent = request.headers.get("user-agent", "unknown")
-        path = request.url.path
-        method = request.method
+        path = ctx.path
+        method = ctx.method
+        ctx.state[self.name] = client_ip
 
         # Check for suspicious activity
         request_data = {
@@ -52,30 +56,26 @@ class SecurityAuditMiddleware(BaseHTTPMiddleware):
             user_agent=user_agent,
             severity="info" if not suspicious_indicators else "warning"
         )
+        return None
 
-        # Add security headers to response
-        response = await call_next(request)
-        self._add_security_headers(response)
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
+        self._add_security_headers(headers)
 
+    async def after_response(self, ctx: RequestContext) -> None:
         # Log response
-        process_time = time.time() - start_time
-        status_code = response.status_code
-
         audit_trail_service.log_action(
             action="api_response",
             resource_type="api_endpoint",
-            resource_id=path,
+            resource_id=ctx.path,
             details={
-                "status_code": status_code,
-                "response_time_ms": round(process_time * 1000, 2),
-                "response_size": response.headers.get("content-length", "unknown")
+                "status_code": ctx.status_code,
+                "response_time_ms": round(ctx.elapsed * 1000, 2),
+                "response_size": (ctx.response_headers or {}).get("content-length", "unknown")
             },
-            ip_address=client_ip,
+            ip_address=ctx.state.get(self.name),
             severity="info"
         )
 
-        return response
-
     def _get_client_ip(self, request: Request) -> str:
         """Extract client IP address from request"""
         # Check for forwarded IP headers
@@ -95,14 +95,14 @@ class SecurityAuditMiddleware(BaseHTTPMiddleware):
         # Fallback to client host
         return request.client.host if request.client else "unknown"
 
-    def _add_security_headers(self, response: Response):
+    def _add_security_headers(self, headers: MutableHeaders):
         """Add security headers to response"""
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self' 'unsafe-inline' 'unsafe-eval'; style-src 'self' 'unsafe-inline'; img-src 'self' data: https:; font-src 'self' data:"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-Frame-Options"] = "DENY"
+        headers["X-XSS-Protection"] = "1; mode=block"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self' 'unsafe-inline' 'unsafe-eval'; style-src 'self' 'unsafe-inline'; img-src 'self' data: https:; font-src 'self' data:"
+        headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
@@ -168,28 +168,28 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return "default"
 
 
-class GDPRComplianceMiddleware(BaseHTTPMiddleware):
+class GDPRComplianceMiddleware(PipelineHook):
     """Middleware for GDPR compliance checks"""
 
-    async def dispatch(self, request: Request, call_next):
+    name = "gdpr"
+
+    async def before_request(self, ctx: RequestContext):
         # Check for data deletion requests
-        if request.method == "DELETE" and "user" in request.url.path:
+        if ctx.method == "DELETE" and "user" in ctx.path:
             # Log GDPR data deletion request
             audit_trail_service.log_action(
                 action="gdpr_data_deletion_requested",
                 resource_type="user_data",
-                details={"path": request.url.path},
+                details={"path": ctx.path},
                 severity="info"
             )
 
         # Check for data export requests
-        elif request.method == "GET" and "export" in request.url.path:
+        elif ctx.method == "GET" and "export" in ctx.path:
             audit_trail_service.log_action(
                 action="gdpr_data_export_requested",
                 resource_type="user_data",
-                details={"path": request.url.path},
+                details={"path": ctx.path},
                 severity="info"
             )
-
-        response = await call_next(request)
-        return response
+        return None
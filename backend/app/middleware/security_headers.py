@@ -1,10 +1,22 @@
 from __future__ import annotations
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
 
+from app.middleware.pipeline import PipelineHook, RequestContext
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+# API-safe CSP (no inline; allow self and data: for images)
+# Static assets CSP is handled by Nginx; this one protects API/HTML fallbacks
+_CSP = (
+    "default-src 'self'; "
+    "img-src 'self' data:; "
+    "object-src 'none'; "
+    "base-uri 'self'; "
+    "frame-ancestors 'self'; "
+    "form-action 'self'; "
+    "connect-src 'self'"
+)
+
+
+class SecurityHeadersMiddleware(PipelineHook):
     """
     Adds strict security headers to every response.
     Notes:
@@ -12,57 +24,42 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     - CSP is kept reasonably strict for API responses; static site CSP is set in Nginx.
     """
 
-    def __init__(self, app, *, enable_hsts: bool = False):
+    name = "security_headers"
+
+    def __init__(self, app=None, *, enable_hsts: bool = False):
         super().__init__(app)
         self.enable_hsts = enable_hsts
 
-    async def dispatch(self, request: Request, call_next):
-        response: Response = await call_next(request)
-
+    def on_response_start(self, ctx: RequestContext, headers: MutableHeaders) -> None:
         # Clickjacking/XSS/MIME sniffing
-        response.headers.setdefault("X-Frame-Options", "DENY")
-        response.headers.setdefault("X-Content-Type-Options", "nosniff")
-        response.headers.setdefault("Referrer-Policy", "strict-origin-when-cross-origin")
+        headers.setdefault("X-Frame-Options", "DENY")
+        headers.setdefault("X-Content-Type-Options", "nosniff")
+        headers.setdefault("Referrer-Policy", "strict-origin-when-cross-origin")
         # Legacy XSS header (harmless for modern browsers)
-        response.headers.setdefault("X-XSS-Protection", "1; mode=block")
+        headers.setdefault("X-XSS-Protection", "1; mode=block")
 
         # Cross-origin isolation and resource policy
-        response.headers.setdefault("Cross-Origin-Opener-Policy", "same-origin")
-        response.headers.setdefault("Cross-Origin-Embedder-Policy", "require-corp")
-        response.headers.setdefault("Cross-Origin-Resource-Policy", "same-site")
+        headers.setdefault("Cross-Origin-Opener-Policy", "same-origin")
+        headers.setdefault("Cross-Origin-Embedder-Policy", "require-corp")
+        headers.setdefault("Cross-Origin-Resource-Policy", "same-site")
 
         # Extra hardening
-        response.headers.setdefault("X-Download-Options", "noopen")
-        response.headers.setdefault("X-Permitted-Cross-Domain-Policies", "none")
-        response.headers.setdefault("Origin-Agent-Cluster", "?1")
+        headers.setdefault("X-Download-Options", "noopen")
+        headers.setdefault("X-Permitted-Cross-Domain-Policies", "none")
+        headers.setdefault("Origin-Agent-Cluster", "?1")
 
-        # API-safe CSP (no inline; allow self and data: for images)
-        # Static assets CSP is handled by Nginx; this one protects API/HTML fallbacks
-        csp = (
-            "default-src 'self'; "
-            "img-src 'self' data:; "
-            "object-src 'none'; "
-            "base-uri 'self'; "
-            "frame-ancestors 'self'; "
-            "form-action 'self'; "
-            "connect-src 'self'"
-        )
-        response.headers.setdefault("Content-Security-Policy", csp)
+        headers.setdefault("Content-Security-Policy", _CSP)
 
         # Permissions-Policy to restrict powerful features
-        response.headers.setdefault(
+        headers.setdefault(
             "Permissions-Policy",
             "geolocation=(), microphone=(), camera=(), payment=(), usb=()",
         )
 
         # Remove Server header to avoid version leakage
-        try:
-            del response.headers["server"]
-        except Exception:
-            pass
+        if "server" in headers:
+            del headers["server"]
 
         # HSTS (only when TLS is used at the edge)
-        if self.enable_hsts and request.url.scheme == "https":
-            response.headers.setdefault("Strict-Transport-Security", "max-age=31536000; includeSubDomains; preload")
-
-        return response
+        if self.enable_hsts and ctx.scope.get("scheme") == "https":
+            headers.setdefault("Strict-Transport-Security", "max-age=31536000; includeSubDomains; preload")
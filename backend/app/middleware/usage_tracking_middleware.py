@@ -5,9 +5,8 @@ Usage-Tracking-Middleware
 Tracked automatisch alle API-Calls und enforced Quotas
 """
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import JSONResponse
+from app.middleware.pipeline import PipelineHook, RequestContext
 from app.services.usage_tracking import usage_tracking_service
 import logging
 import time
@@ -59,7 +58,7 @@ EXCLUDED_PATHS = [
 # USAGE-TRACKING-MIDDLEWARE
 # ============================================================================
 
-class UsageTrackingMiddleware(BaseHTTPMiddleware):
+class UsageTrackingMiddleware(PipelineHook):
     """
     Middleware für automatisches Usage-Tracking
     
@@ -69,25 +68,24 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
     - Feature-spezifische Token-Kosten
     - Graceful Degradation (bei Redis-Fehler)
     """
+
+    name = "usage_tracking"
     
-    async def dispatch(self, request: Request, call_next):
+    async def before_request(self, ctx: RequestContext):
         """
-        Dispatch-Methode der Middleware
-        
         Flow:
         1. Check ob Endpoint tracked werden soll
         2. Check User-Auth
         3. Check Quota BEFORE Request
-        4. Wenn OK: Request durchlassen
-        5. Wenn Success: Track Usage AFTER Request
+        4. Wenn OK: Request durchlassen (Tracking in after_response)
         """
         
         # Check ob Endpoint getrackt werden soll
-        path = request.url.path
+        path = ctx.path
         
         # Whitelist-Check
         if any(path.startswith(excluded) for excluded in EXCLUDED_PATHS):
-            return await call_next(request)
+            return None
         
         # Feature ermitteln
         feature = None
@@ -98,14 +96,14 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
         
         # Kein Feature gefunden = nicht tracken
         if not feature:
-            return await call_next(request)
+            return None
         
         # User aus Request-State holen (gesetzt von Auth-Middleware)
-        user = getattr(request.state, "user", None)
+        user = ctx.scope.get("state", {}).get("user")
         
         if not user:
             # Kein User = nicht tracken (evtl. public endpoint)
-            return await call_next(request)
+            return None
         
         user_id = user.get("user_id") or user.get("id")
         plan = user.get("plan", "community")
@@ -138,32 +136,28 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
             logger.error(f"Error checking quota: {e}")
             # Fail-open: Bei Fehler Request durchlassen
         
-        # ========================================================================
-        # REQUEST DURCHLASSEN
-        # ========================================================================
-        
-        response = await call_next(request)
-        
-        # ========================================================================
-        # TRACK USAGE AFTER REQUEST (nur bei Success)
-        # ========================================================================
-        
-        if response.status_code < 400:
-            try:
-                metadata = {
-                    "endpoint": path,
-                    "method": request.method,
-                    "status_code": response.status_code
-                }
-                
-                await usage_tracking_service.track_api_call(
-                    user_id=user_id,
-                    feature=feature,
-                    metadata=metadata
-                )
+        ctx.state[self.name] = (user_id, feature)
+        return None
+    
+    async def after_response(self, ctx: RequestContext) -> None:
+        """Track Usage AFTER Request (nur bei Success)"""
+        tracked = ctx.state.get(self.name)
+        if not tracked or not 0 < ctx.status_code < 400:
+            return
+        user_id, feature = tracked
+        try:
+            metadata = {
+                "endpoint": ctx.path,
+                "method": ctx.method,
+                "status_code": ctx.status_code
+            }
             
-            except Exception as e:
-                logger.error(f"Error tracking usage: {e}")
-                # Non-fatal: Response trotzdem zurückgeben
+            await usage_tracking_service.track_api_call(
+                user_id=user_id,
+                feature=feature,
+                metadata=metadata
+            )
         
-        return response
+        except Exception as e:
+            logger.error(f"Error tracking usage: {e}")
+            # Non-fatal: Response ist bereits gesendet
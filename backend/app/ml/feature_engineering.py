@@ -86,7 +86,8 @@ class FeatureEngineer:
     async def extract_features(
         self,
         address: str,
-        chain: str = "ethereum"
+        chain: str = "ethereum",
+        labels: Optional[List[str]] = None
     ) -> Dict[str, float]:
         """
         Extrahiert alle Features für eine Adresse
@@ -94,6 +95,7 @@ class FeatureEngineer:
         Args:
             address: Blockchain address
             chain: Chain name (ethereum, bitcoin, etc.)
+            labels: Bereits per Bulk-Lookup geladene Labels (optional)
         
         Returns:
             Dict mit 100+ Features
@@ -114,7 +116,7 @@ class FeatureEngineer:
             features.update(temporal_features)
             
             # 4. Entity Label Features
-            label_features = await self._extract_label_features(address, chain)
+            label_features = await self._extract_label_features(address, chain, labels)
             features.update(label_features)
             
             # 5. Risk Indicator Features
@@ -357,16 +359,20 @@ class FeatureEngineer:
     async def _extract_label_features(
         self,
         address: str,
-        chain: str
+        chain: str,
+        labels: Optional[List[str]] = None
     ) -> Dict[str, float]:
         """
         Entity Label Features (10 Features)
+        
+        Vorab geladene Labels (Bulk-Lookup) ersetzen den Einzelaufruf.
         """
         features = {}
         
         try:
             # Get labels from enrichment service
-            labels = await labels_service.get_labels(address, chain)
+            if labels is None:
+                labels = await labels_service.get_labels(address, chain)
             
             # Binary flags
             features['is_exchange'] = 1.0 if 'exchange' in labels else 0.0
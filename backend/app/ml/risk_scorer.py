@@ -3,6 +3,7 @@ ML-Based Risk Scoring Engine
 XGBoost Classifier für Address Risk Assessment
 """
 
+import asyncio
 import logging
 import numpy as np
 from typing import Dict, List, Optional
@@ -57,7 +58,8 @@ class RiskScorer:
     async def calculate_risk_score(
         self,
         address: str,
-        features: Optional[Dict] = None
+        features: Optional[Dict] = None,
+        labels: Optional[List[str]] = None
     ) -> Dict:
         """
         Calculate ML-based risk score
@@ -65,6 +67,7 @@ class RiskScorer:
         Args:
             address: Ethereum address
             features: Pre-extracted features (optional)
+            labels: Pre-fetched labels for the label features (optional)
         
         Returns:
             {
@@ -77,7 +80,7 @@ class RiskScorer:
         try:
             # Extract features if not provided
             if features is None:
-                features = await self._extract_features(address)
+                features = await self._extract_features(address, labels=labels)
             
             # Use ML model if available
             if self.model is not None:
@@ -95,7 +98,12 @@ class RiskScorer:
                 'confidence': 0.0
             }
     
-    async def _extract_features(self, address: str, chain: str = "ethereum") -> Dict:
+    async def _extract_features(
+        self,
+        address: str,
+        chain: str = "ethereum",
+        labels: Optional[List[str]] = None
+    ) -> Dict:
         """
         Extract 100+ features for ML model using FeatureEngineer
         
@@ -131,7 +139,7 @@ class RiskScorer:
         """
         try:
             # Use FeatureEngineer to extract all features
-            features = await feature_engineer.extract_features(address, chain)
+            features = await feature_engineer.extract_features(address, chain, labels=labels)
             logger.debug(f"Extracted {len(features)} features for {address}")
             return features
         except Exception as e:
@@ -312,23 +320,42 @@ class RiskScorer:
     
     async def batch_score(
         self,
-        addresses: List[str]
+        addresses: List[str],
+        labels: Optional[Dict[str, List[str]]] = None
     ) -> Dict[str, Dict]:
         """
         Score multiple addresses efficiently
         
+        Duplikate werden nur einmal bewertet. Die Labels aller Adressen kommen
+        aus einem einzigen Bulk-Lookup (oder aus ``labels``, falls der Aufrufer
+        sie bereits geladen hat). Transaktions-, Graph- und Risiko-Features
+        sind Aggregat-Queries pro Adresse und laufen weiterhin einzeln,
+        nebenläufig begrenzt durch RISK_BATCH_CONCURRENCY.
+        
         Args:
             addresses: List of addresses to score
+            labels: Mapping lowercased address -> labels (optional)
         
         Returns:
             Dict mapping address -> risk score
         """
-        results = {}
+        unique = list(dict.fromkeys(addresses))
+        if labels is None and unique:
+            try:
+                from app.enrichment.labels_service import labels_service
+                labels = await labels_service.bulk_get_labels(unique)
+            except Exception as e:
+                logger.warning(f"Bulk label lookup failed, falling back to per-address labels: {e}")
+                labels = None
+        limit = asyncio.Semaphore(max(1, int(os.getenv("RISK_BATCH_CONCURRENCY", "16"))))
         
-        for address in addresses:
-            results[address] = await self.calculate_risk_score(address)
+        async def _score(address: str) -> Dict:
+            address_labels = None if labels is None else list(labels.get(address.lower()) or [])
+            async with limit:
+                return await self.calculate_risk_score(address, labels=address_labels)
         
-        return results
+        scores = await asyncio.gather(*(_score(a) for a in unique))
+        return dict(zip(unique, scores))
 
 
 # Singleton instance
@@ -3,10 +3,13 @@ PDF Report Generator
 Court-Admissible Forensic Reports with ReportLab
 """
 
+import asyncio
 import logging
-from typing import Dict, Optional, List, Tuple, Any
+import os
+from typing import Dict, Optional, List, Tuple, Any, Iterable, Iterator
 from datetime import datetime
 from io import BytesIO
+from itertools import islice
 import hashlib
 import json
 
@@ -26,9 +29,78 @@ except ImportError:
     REPORTLAB_AVAILABLE = False
 
 from app.services.signing import manifest_service, generate_report_hash_and_manifest
+from app.reports.report_jobs import report_jobs, ReportJob
 
 logger = logging.getLogger(__name__)
 
+# Part of the report cache key: bump when the layout/content of the PDF changes
+TEMPLATE_VERSION = "2"
+# Transaction rows per detail table (one table per page)
+PAGE_ROWS = int(os.getenv("PDF_REPORT_PAGE_ROWS", "40"))
+# Upper bound for transaction rows in the PDF; the full list is in the CSV export
+MAX_TRANSACTION_ROWS = int(os.getenv("PDF_REPORT_MAX_ROWS", "5000"))
+# Flowables kept ahead of the layout engine during incremental builds
+_STORY_LOOKAHEAD = 8
+
+
+def report_cache_key(trace_id: str, trace_data: Dict, findings: Optional[Dict] = None) -> str:
+    """SHA-256 over template version, trace id, trace data and findings (canonical JSON, streamed)"""
+    hasher = hashlib.sha256(f"trace_report:{TEMPLATE_VERSION}:{trace_id}:".encode("utf-8"))
+    encoder = json.JSONEncoder(sort_keys=True, default=str, separators=(",", ":"))
+    for piece in encoder.iterencode({"trace_data": trace_data, "findings": findings}):
+        hasher.update(piece.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+async def report_cache_key_async(trace_id: str, trace_data: Dict, findings: Optional[Dict] = None) -> str:
+    """report_cache_key() in a worker thread: serialising large traces must not block the event loop"""
+    return await asyncio.to_thread(report_cache_key, trace_id, trace_data, findings)
+
+
+def _edge_field(edge: Dict, *keys: str) -> Any:
+    for key in keys:
+        if edge.get(key) is not None:
+            return edge[key]
+    return None
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+if REPORTLAB_AVAILABLE:
+    class _IncrementalDocTemplate(SimpleDocTemplate):
+        """
+        Pulls flowables lazily from an iterator while laying out pages
+
+        Only a small window of the story exists at any time, so large detail
+        sections do not have to be materialised before rendering starts.
+        """
+
+        def build_incremental(self, flowables: Iterable) -> None:
+            self._source = iter(flowables)
+            self._story: List = []
+            self._refill(self._story)
+            if self._story:
+                self.build(self._story)
+
+        def _refill(self, story: List) -> None:
+            source = getattr(self, "_source", None)
+            while source is not None and len(story) <= _STORY_LOOKAHEAD:
+                nxt = next(source, None)
+                if nxt is None:
+                    self._source = None
+                    break
+                story.append(nxt)
+
+        def filterFlowables(self, flowables):
+            # Also called for internal lists (e.g. pending page-begin actions)
+            if flowables is getattr(self, "_story", None):
+                self._refill(flowables)
+
 
 class PDFReportGenerator:
     """
@@ -169,6 +241,10 @@ class PDFReportGenerator:
         """
         Generate court-admissible PDF forensic report
         
+        Rendering runs in the report process pool (see app.reports.report_jobs),
+        never on the event loop. Results are cached by report_cache_key(),
+        which is computed in a worker thread as well.
+        
         Args:
             trace_id: Trace ID
             trace_data: Trace result data
@@ -178,42 +254,55 @@ class PDFReportGenerator:
             Tuple of (PDF bytes, manifest dict)
         """
         try:
-            if REPORTLAB_AVAILABLE:
-                return await self._generate_pdf_report(trace_id, trace_data, findings)
-            else:
-                # Fallback to text
-                report_text = self._generate_text_report(trace_id, trace_data, findings)
-                content_hash, manifest = generate_report_hash_and_manifest(
-                    report_id=trace_id,
-                    report_type="trace_report_text",
-                    content=report_text.encode("utf-8")
-                )
-                return report_text.encode('utf-8'), manifest
-            
+            return await report_jobs.render(
+                await report_cache_key_async(trace_id, trace_data, findings),
+                _render_trace_report, trace_id, trace_data, findings
+            )
         except Exception as e:
             logger.error(f"Error generating PDF report: {e}")
             raise
 
-    async def _generate_pdf_report(
+    async def submit_trace_report(
+        self,
+        trace_id: str,
+        trace_data: Dict,
+        findings: Optional[Dict] = None
+    ) -> ReportJob:
+        """Queue a background render; poll report_jobs.status(job.job_id)"""
+        return report_jobs.submit(
+            trace_id,
+            await report_cache_key_async(trace_id, trace_data, findings),
+            _render_trace_report, trace_id, trace_data, findings
+        )
+
+    def render_trace_report(
         self,
         trace_id: str,
         trace_data: Dict,
         findings: Optional[Dict] = None
     ) -> Tuple[bytes, Dict[str, Any]]:
-        """Internal helper to build a PDF report with ReportLab and return manifest."""
-        if not REPORTLAB_AVAILABLE:
-            # Fallback safety
-            text_report = self._generate_text_report(trace_id, trace_data, findings)
-            content_hash, manifest = generate_report_hash_and_manifest(
-                report_id=trace_id,
-                report_type="trace_report",
-                content=text_report.encode("utf-8")
-            )
-            return text_report.encode("utf-8"), manifest
+        """Render the report synchronously (CPU-bound; call off the event loop)"""
+        if REPORTLAB_AVAILABLE:
+            return self._generate_pdf_report(trace_id, trace_data, findings)
+        # Fallback to text
+        report_text = self._generate_text_report(trace_id, trace_data, findings)
+        content_hash, manifest = generate_report_hash_and_manifest(
+            report_id=trace_id,
+            report_type="trace_report_text",
+            content=report_text.encode("utf-8")
+        )
+        return report_text.encode('utf-8'), manifest
 
+    def _generate_pdf_report(
+        self,
+        trace_id: str,
+        trace_data: Dict,
+        findings: Optional[Dict] = None
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """Internal helper to build a PDF report with ReportLab and return manifest."""
         # Prepare buffer and document
         buffer = BytesIO()
-        doc = SimpleDocTemplate(
+        doc = _IncrementalDocTemplate(
             buffer,
             pagesize=A4,
             rightMargin=36,
@@ -223,39 +312,9 @@ class PDFReportGenerator:
             title=f"Forensic Report {trace_id}",
             author="Blockchain Forensics Platform",
         )
-        story: List = []
-
-        # Title page
-        story.extend(self._build_title_page(trace_id, trace_data))
-        story.append(PageBreak())
-
-        # Executive Summary
-        story.extend(self._build_executive_summary(trace_data, findings))
-
-        # Methodology
-        story.extend(self._build_methodology_section())
-
-        # Findings
-        story.extend(self._build_findings_section(trace_data, findings))
-        if findings:
-            # Add custom findings summary if provided
-            story.append(Paragraph("Additional Findings", self.styles['SectionHeader']))
-            if summary := findings.get("summary"):
-                story.append(Paragraph(summary, self.styles['BodyText']))
-            if recs := findings.get("recommendations"):
-                story.append(Spacer(1, 6))
-                story.append(Paragraph("Recommendations:", self.styles['BodyText']))
-                for r in recs:
-                    story.append(Paragraph(f"- {r}", self.styles['BodyText']))
 
-        # Transaction Details
-        story.extend(self._build_transaction_details(trace_data))
-
-        # Technical Appendix
-        story.extend(self._build_technical_appendix(trace_id, trace_data))
-
-        # Build PDF
-        doc.build(story)
+        # Build PDF; the story is generated section by section during layout
+        doc.build_incremental(self._iter_story(trace_id, trace_data, findings))
         pdf_bytes = buffer.getvalue()
         buffer.close()
 
@@ -270,11 +329,48 @@ class PDFReportGenerator:
                 "max_depth": trace_data.get("max_depth"),
                 "total_nodes": len(trace_data.get("nodes", [])),
                 "total_edges": len(trace_data.get("edges", [])),
+                "template_version": TEMPLATE_VERSION,
             }
         )
 
         logger.info(f"Generated PDF report for trace {trace_id}: {len(pdf_bytes)} bytes with manifest")
         return pdf_bytes, manifest
+
+    def _iter_story(
+        self,
+        trace_id: str,
+        trace_data: Dict,
+        findings: Optional[Dict] = None
+    ) -> Iterator:
+        """Yield the report flowables in document order"""
+        # Title page
+        yield from self._build_title_page(trace_id, trace_data)
+        yield PageBreak()
+
+        # Executive Summary
+        yield from self._build_executive_summary(trace_data, findings)
+
+        # Methodology
+        yield from self._build_methodology_section()
+
+        # Findings
+        yield from self._build_findings_section(trace_data, findings)
+        if findings:
+            # Add custom findings summary if provided
+            yield Paragraph("Additional Findings", self.styles['SectionHeader'])
+            if summary := findings.get("summary"):
+                yield Paragraph(summary, self.styles['BodyText'])
+            if recs := findings.get("recommendations"):
+                yield Spacer(1, 6)
+                yield Paragraph("Recommendations:", self.styles['BodyText'])
+                for r in recs:
+                    yield Paragraph(f"- {r}", self.styles['BodyText'])
+
+        # Transaction Details
+        yield from self._iter_transaction_details(trace_data)
+
+        # Technical Appendix
+        yield from self._build_technical_appendix(trace_id, trace_data)
     
     def _build_title_page(self, trace_id: str, trace_data: Dict) -> List:
         """Build PDF title page"""
@@ -455,44 +551,66 @@ class PDFReportGenerator:
         return story
     
     def _build_transaction_details(self, trace_data: Dict) -> List:
-        """Build transaction details table"""
-        story = []
-        
-        story.append(PageBreak())
-        story.append(Paragraph("4. TRANSACTION DETAILS", self.styles['SectionHeader']))
-        story.append(Spacer(1, 12))
+        """Build transaction details section"""
+        return list(self._iter_transaction_details(trace_data))
+
+    def _iter_transaction_details(self, trace_data: Dict) -> Iterator:
+        """
+        Yield the transaction details section as page-sized tables
         
-        # Sample transactions table
-        edges = trace_data.get('edges', [])[:20]  # First 20
+        Rows are read lazily from trace_data['edges'] and emitted in chunks of
+        PAGE_ROWS, so only one table is built at a time.
+        """
+        yield PageBreak()
+        yield Paragraph("4. TRANSACTION DETAILS", self.styles['SectionHeader'])
+        yield Spacer(1, 12)
+        
+        edges = iter(trace_data.get('edges') or [])
+        total = len(trace_data['edges']) if isinstance(trace_data.get('edges'), (list, tuple)) else None
+        rendered = 0
+        while rendered < MAX_TRANSACTION_ROWS:
+            chunk = list(islice(edges, min(PAGE_ROWS, MAX_TRANSACTION_ROWS - rendered)))
+            if not chunk:
+                break
+            if rendered:
+                yield PageBreak()
+            yield self._transaction_table(chunk)
+            rendered += len(chunk)
+        
+        if total is not None and total > rendered:
+            yield Spacer(1, 8)
+            yield Paragraph(
+                f"Showing {rendered} of {total} transactions. "
+                "The complete list is available in the CSV export.",
+                self.styles['BodyText']
+            )
         
-        if edges:
-            data = [['<b>From</b>', '<b>To</b>', '<b>Value (ETH)</b>', '<b>Taint</b>']]
-            
-            for edge in edges:
-                data.append([
-                    edge['from'][:10] + '...',
-                    edge['to'][:10] + '...',
-                    f"{edge.get('value', 0):.4f}",
-                    f"{edge.get('taint', 0) * 100:.1f}%"
-                ])
-            
-            t = Table(data, colWidths=[1.8*inch, 1.8*inch, 1.2*inch, 1*inch])
-            t.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#283593')),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-                ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0,0), (-1,-1), 8),
-                ('FONTNAME', (0,1), (1,-1), 'Courier'),
-                ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f5f5f5')])
-            ]))
-            
-            story.append(t)
+        yield Spacer(1, 20)
+
+    def _transaction_table(self, edges: List[Dict]) -> "Table":
+        """One page of transaction rows"""
+        data = [['<b>From</b>', '<b>To</b>', '<b>Value (ETH)</b>', '<b>Taint</b>']]
         
-        story.append(Spacer(1, 20))
+        for edge in edges:
+            data.append([
+                str(_edge_field(edge, 'from', 'from_address', 'source') or '')[:10] + '...',
+                str(_edge_field(edge, 'to', 'to_address', 'target') or '')[:10] + '...',
+                f"{_as_float(edge.get('value')):.4f}",
+                f"{_as_float(_edge_field(edge, 'taint', 'taint_value')) * 100:.1f}%"
+            ])
         
-        return story
+        t = Table(data, colWidths=[1.8*inch, 1.8*inch, 1.2*inch, 1*inch], repeatRows=1)
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#283593')),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0,0), (-1,-1), 8),
+            ('FONTNAME', (0,1), (1,-1), 'Courier'),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f5f5f5')])
+        ]))
+        return t
     
     def _build_technical_appendix(self, trace_id: str, trace_data: Dict) -> List:
         """Build technical appendix"""
@@ -735,8 +853,23 @@ Generated: {datetime.utcnow().isoformat()}
         return report_text.encode('utf-8')
 
 
+_worker_generator: Optional[PDFReportGenerator] = None
+
+
+def _render_trace_report(
+    trace_id: str,
+    trace_data: Dict,
+    findings: Optional[Dict] = None
+) -> Tuple[bytes, Dict[str, Any]]:
+    """Entry point in the render worker process (one generator/style sheet per process)"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = PDFReportGenerator()
+    return _worker_generator.render_trace_report(trace_id, trace_data, findings)
+
+
 # Singleton instance
 pdf_generator = PDFReportGenerator()
 
 # Export
-__all__ = ['PDFReportGenerator', 'pdf_generator', 'REPORTLAB_AVAILABLE']
+__all__ = ['PDFReportGenerator', 'pdf_generator', 'report_cache_key', 'TEMPLATE_VERSION', 'REPORTLAB_AVAILABLE']
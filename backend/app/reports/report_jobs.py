@@ -0,0 +1,250 @@
+"""
+Report Render Jobs
+Off-loop rendering with a bounded process pool, job status and result cache
+
+Rendering a large PDF is CPU-bound and takes seconds; doing it inside the
+event loop stalls every other request on the worker. Render functions are
+therefore executed in a small ProcessPoolExecutor (or a thread when the pool
+is disabled/broken). Results are cached by a content key (hash of the input
+data plus template version), concurrent requests for the same key share one
+render, and the number of outstanding renders is bounded.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class ReportQueueFull(RuntimeError):
+    """Raised when too many renders are outstanding"""
+
+
+class ReportCache:
+    """LRU cache of rendered reports, bounded by total payload bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, Dict[str, Any]]]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, content: bytes, manifest: Dict[str, Any]) -> None:
+        if len(content) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old[0])
+        self._entries[key] = (content, manifest)
+        self._size += len(content)
+        while self._size > self.max_bytes and self._entries:
+            _key, (evicted, _manifest) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+@dataclass
+class ReportJob:
+    job_id: str
+    report_id: str
+    cache_key: str
+    status: str = JOB_QUEUED
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    cached: bool = False
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "report_id": self.report_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cached": self.cached,
+            "size_bytes": self.size_bytes,
+            "error": self.error,
+        }
+
+
+class ReportJobQueue:
+    """
+    Bounded render queue
+
+    - render(): await a result (cache -> shared in-flight render -> pool)
+    - submit(): start a render in the background and poll status()/result()
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+        max_jobs: Optional[int] = None,
+    ):
+        if workers is None:
+            v = os.getenv("REPORT_RENDER_WORKERS")
+            workers = int(v) if v not in (None, "") else min(2, os.cpu_count() or 1)
+        self.workers = max(0, workers)  # 0 = render in a thread
+        self.max_pending = max_pending or int(os.getenv("REPORT_RENDER_MAX_PENDING", "16"))
+        self.max_jobs = max_jobs or int(os.getenv("REPORT_RENDER_MAX_JOBS", "256"))
+        self.cache = ReportCache(
+            cache_max_bytes if cache_max_bytes is not None
+            else int(os.getenv("REPORT_CACHE_MAX_MB", "64")) * 1024 * 1024
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._tasks: set = set()
+        self._queued = 0  # submitted jobs whose render has not started yet
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _execute(self, fn: Callable, args: tuple) -> Tuple[bytes, Dict[str, Any]]:
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+            except BrokenProcessPool as e:
+                # A crashed worker breaks the pool: rebuild it on the next render
+                logger.warning("Report render pool broken, rendering in thread: %s", e)
+                self._pool = None
+        return await asyncio.to_thread(fn, *args)
+
+    async def render(self, cache_key: str, fn: Callable, *args: Any) -> Tuple[bytes, Dict[str, Any]]:
+        """Return (content, manifest) for cache_key, rendering via fn(*args) if needed"""
+        return await self._render(cache_key, fn, args, check_capacity=True)
+
+    async def _render(
+        self, cache_key: str, fn: Callable, args: tuple, check_capacity: bool
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        shared = self._inflight.get(cache_key)
+        if shared is not None:
+            return await asyncio.shield(shared)
+        if check_capacity:
+            self._check_capacity()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            content, manifest = await self._execute(fn, args)
+            self.cache.put(cache_key, content, manifest)
+            future.set_result((content, manifest))
+            return content, manifest
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark as retrieved when nobody else is waiting
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+
+    def submit(self, report_id: str, cache_key: str, fn: Callable, *args: Any) -> ReportJob:
+        """Queue a background render and return its job (finished immediately on cache hit)"""
+        job = ReportJob(job_id=str(uuid.uuid4()), report_id=report_id, cache_key=cache_key)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            job.status, job.cached, job.size_bytes = JOB_DONE, True, len(cached[0])
+            job.started_at = job.finished_at = job.created_at
+        else:
+            if cache_key not in self._inflight:
+                self._check_capacity()
+            self._queued += 1
+            task = asyncio.get_running_loop().create_task(self._run_job(job, fn, args))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self._remember(job)
+        return job
+
+    def _check_capacity(self) -> None:
+        pending = len(self._inflight) + self._queued
+        if pending >= self.max_pending:
+            raise ReportQueueFull(f"{pending} reports are already queued or rendering")
+
+    async def _run_job(self, job: ReportJob, fn: Callable, args: tuple) -> None:
+        self._queued -= 1
+        job.status, job.started_at = JOB_RUNNING, datetime.utcnow().isoformat()
+        try:
+            # capacity was reserved in submit()
+            content, _manifest = await self._render(job.cache_key, fn, args, check_capacity=False)
+            job.status, job.size_bytes = JOB_DONE, len(content)
+        except Exception as e:
+            logger.error(f"Report job {job.job_id} ({job.report_id}) failed: {e}")
+            job.status, job.error = JOB_FAILED, str(e)
+        finally:
+            job.finished_at = datetime.utcnow().isoformat()
+
+    def _remember(self, job: ReportJob) -> None:
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def result(self, job_id: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """Rendered (content, manifest) of a finished job; None if unknown, pending or evicted"""
+        job = self._jobs.get(job_id)
+        if job is None or job.status != JOB_DONE:
+            return None
+        return self.cache.get(job.cache_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pending": len(self._inflight) + self._queued,
+            "max_pending": self.max_pending,
+            "jobs": len(self._jobs),
+            "cache": self.cache.stats(),
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+report_jobs = ReportJobQueue()
+
+__all__ = ['ReportJobQueue', 'ReportJob', 'ReportCache', 'ReportQueueFull', 'report_jobs']
@@ -38,17 +38,48 @@ Die WELTBESTE AI-gesteuerte Blockchain Firewall für ultimativen Wallet-Schutz.
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 import hashlib
 import json
-from collections import deque
+from collections import OrderedDict, deque
+
+# Safe metrics import (tests may not initialize full metrics stack)
+try:  # pragma: no cover
+    from app import metrics  # type: ignore
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
 
+# Timeout pro Layer (ms). Günstige Layer laufen zuerst, teure danach.
+LAYER_TIMEOUTS_MS: Dict[str, float] = {
+    "instant": 50,
+    "behavioral": 50,
+    "sanctions": 250,
+    "user_protection": 50,
+    "ai_threat": 1500,
+    "contract_scan": 750,
+    "network": 750,
+}
+CHEAP_LAYERS = ("instant", "behavioral", "sanctions", "user_protection")
+EXPENSIVE_LAYERS = ("ai_threat", "contract_scan", "network")
+
+# Layer, die bei Timeout/Fehler blockieren statt wegzufallen (fail-closed)
+FAIL_CLOSED_LAYERS = ("sanctions",)
+
+# Layer, deren Verdict nur von der Zieladresse abhängt -> per Adresse cachebar (TTL in s)
+VERDICT_CACHE_TTL: Dict[str, float] = {
+    "sanctions": 60,
+    "network": 300,
+}
+
+
 class ThreatLevel(str, Enum):
     """Bedrohungsstufen der AI Firewall"""
     CRITICAL = "critical"      # Immediate Block (Sanctions, Ransomware, Scam)
@@ -156,7 +187,15 @@ class AIFirewallCore:
         self.enabled = True
         self.protection_level = "maximum"  # low, medium, high, maximum
         self.custom_rules: Dict[str, FirewallRule] = {}
-        self.threat_cache: Dict[str, ThreatDetection] = {}  # Cache für Performance
+        # Per-Adresse-Verdicts adressbasierter Layer: key -> (expires_at, detection)
+        self.threat_cache: "OrderedDict[str, Tuple[float, ThreatDetection]]" = OrderedDict()
+        self.threat_cache_max = 10_000
+
+        # Latenz-Budget: günstige Layer zuerst, eindeutige Ergebnisse brechen ab
+        self.latency_budget_enabled = os.getenv("FIREWALL_LATENCY_BUDGET", "1") != "0"
+        self.layer_timeouts_ms: Dict[str, float] = dict(LAYER_TIMEOUTS_MS)
+        self._layer_latency: Dict[str, deque] = {name: deque(maxlen=1024) for name in LAYER_TIMEOUTS_MS}
+        self._layer_outcomes: Dict[str, Dict[str, int]] = {name: {} for name in LAYER_TIMEOUTS_MS}
         self.blocked_addresses: set = set()
         self.whitelisted_addresses: set = set()
         
@@ -233,8 +272,8 @@ class AIFirewallCore:
     def sanctions_service(self):
         """Lazy Load Sanctions Service"""
         if self._sanctions_service is None:
-            from app.services.multi_sanctions import multi_sanctions_service
-            self._sanctions_service = multi_sanctions_service
+            from app.services.multi_sanctions import multi_sanctions
+            self._sanctions_service = multi_sanctions
         return self._sanctions_service
     
     # =========================================================================
@@ -266,19 +305,8 @@ class AIFirewallCore:
                 tx, ThreatLevel.CRITICAL, "Blacklisted Address", ["blacklist"]
             )
         
-        # Run ALL Detection Layers in Parallel
-        detection_tasks = [
-            self._layer_1_instant_checks(tx),
-            self._layer_2_ai_threat_detection(tx),
-            self._layer_3_behavioral_analysis(tx, user_id),
-            self._layer_4_smart_contract_scan(tx),
-            self._layer_5_network_analysis(tx),
-            self._layer_6_sanctions_compliance(tx),
-            self._layer_7_user_protection(tx, user_id)
-        ]
-        
-        # Execute all layers concurrently
-        layer_results = await asyncio.gather(*detection_tasks, return_exceptions=True)
+        # Detection Layers (mit Latenz-Budget: günstige zuerst, Abbruch bei eindeutigem Ergebnis)
+        layer_results = await self._run_layers(tx, user_id)
         
         # Aggregate Results (Multi-Model Voting)
         final_detection = await self._aggregate_detections(tx, layer_results)
@@ -310,6 +338,197 @@ class AIFirewallCore:
         
         return allowed, final_detection
     
+    # =========================================================================
+    # LAYER ORCHESTRATION (Latency Budget)
+    # =========================================================================
+    
+    def _layer_factories(self, tx: Transaction, user_id: str) -> Dict[str, Callable[[], Awaitable[ThreatDetection]]]:
+        return {
+            "instant": lambda: self._layer_1_instant_checks(tx),
+            "ai_threat": lambda: self._layer_2_ai_threat_detection(tx),
+            "behavioral": lambda: self._layer_3_behavioral_analysis(tx, user_id),
+            "contract_scan": lambda: self._layer_4_smart_contract_scan(tx),
+            "network": lambda: self._layer_5_network_analysis(tx),
+            "sanctions": lambda: self._layer_6_sanctions_compliance(tx),
+            "user_protection": lambda: self._layer_7_user_protection(tx, user_id),
+        }
+    
+    async def _run_layers(self, tx: Transaction, user_id: str) -> List[ThreatDetection]:
+        """
+        Führt die 7 Layer aus.
+        
+        Budget-Modus: erst die günstigen Layer (Instant, Behavioral, Sanctions,
+        User Rules); ist das Ergebnis bereits eindeutig (CRITICAL oder >=2x HIGH),
+        werden die teuren Layer gar nicht gestartet. Sonst laufen ML, Contract-Scan
+        und Netzwerkanalyse parallel, bis ein eindeutiges Ergebnis vorliegt; offene
+        Layer werden dann abgebrochen. Jeder Layer ist durch sein Timeout begrenzt,
+        das Budget ist also max(günstig) + max(teuer).
+        """
+        factories = self._layer_factories(tx, user_id)
+        if not self.latency_budget_enabled:
+            results = await asyncio.gather(*[self._run_layer(n, f, tx) for n, f in factories.items()])
+            return [r for r in results if r is not None]
+        
+        results: Dict[str, ThreatDetection] = {}
+        
+        cheap = await asyncio.gather(*[self._run_layer(n, factories[n], tx) for n in CHEAP_LAYERS])
+        results.update({n: r for n, r in zip(CHEAP_LAYERS, cheap) if r is not None})
+        decisive = self._decisive_layer(results)
+        if decisive:
+            self._record_short_circuit(decisive)
+            return list(results.values())
+        
+        tasks = {
+            asyncio.create_task(self._run_layer(n, factories[n], tx)): n
+            for n in EXPENSIVE_LAYERS
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    res = task.result()
+                    if res is not None:
+                        results[tasks[task]] = res
+                decisive = self._decisive_layer(results)
+                if decisive and pending:
+                    self._record_short_circuit(decisive)
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        return list(results.values())
+    
+    @staticmethod
+    def _decisive_layer(results: Dict[str, ThreatDetection]) -> Optional[str]:
+        """Layer, dessen Ergebnis die Aggregation bereits auf BLOCK festlegt."""
+        for name, d in results.items():
+            if d.threat_level == ThreatLevel.CRITICAL:
+                return name
+        high = [n for n, d in results.items() if d.threat_level == ThreatLevel.HIGH]
+        return high[-1] if len(high) >= 2 else None
+    
+    async def _run_layer(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[ThreatDetection]],
+        tx: Transaction
+    ) -> Optional[ThreatDetection]:
+        """Ein Layer mit eigenem Timeout und (für adressbasierte Layer) Verdict-Cache."""
+        cache_key = self._verdict_key(name, tx)
+        if cache_key:
+            cached = self._cached_verdict(cache_key)
+            if cached is not None:
+                self._record_layer_latency(name, 0.0, "cache_hit")
+                return cached
+        
+        start = time.perf_counter()
+        outcome = "ok"
+        result: Optional[ThreatDetection] = None
+        try:
+            timeout = self.layer_timeouts_ms.get(name)
+            result = await asyncio.wait_for(factory(), timeout=timeout / 1000.0 if timeout else None)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning(f"Firewall layer {name} timed out after {self.layer_timeouts_ms.get(name)}ms")
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "error"
+            logger.warning(f"Firewall layer {name} error: {e}")
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record_layer_latency(name, elapsed_ms, outcome)
+        
+        if outcome != "ok":
+            # Fehler-/Timeout-Verdicts werden nie gecacht
+            if name in FAIL_CLOSED_LAYERS:
+                return self._create_unavailable_detection(tx, name, outcome)
+            return None
+        if result is not None:
+            result.detection_time_ms = elapsed_ms
+            if cache_key:
+                self._store_verdict(cache_key, name, result)
+        return result
+    
+    @staticmethod
+    def _verdict_key(name: str, tx: Transaction) -> Optional[str]:
+        if name not in VERDICT_CACHE_TTL or not tx.to_address:
+            return None
+        return f"{name}:{(tx.chain or '').lower()}:{tx.to_address.lower()}"
+    
+    def _cached_verdict(self, key: str) -> Optional[ThreatDetection]:
+        entry = self.threat_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, detection = entry
+        if expires_at < time.monotonic():
+            self.threat_cache.pop(key, None)
+            return None
+        self.threat_cache.move_to_end(key)
+        return detection
+    
+    def _store_verdict(self, key: str, name: str, detection: ThreatDetection) -> None:
+        self.threat_cache[key] = (time.monotonic() + VERDICT_CACHE_TTL[name], detection)
+        self.threat_cache.move_to_end(key)
+        while len(self.threat_cache) > self.threat_cache_max:
+            self.threat_cache.popitem(last=False)
+    
+    def _record_layer_latency(self, name: str, elapsed_ms: float, outcome: str) -> None:
+        samples = self._layer_latency.setdefault(name, deque(maxlen=1024))
+        samples.append(elapsed_ms)
+        outcomes = self._layer_outcomes.setdefault(name, {})
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        try:
+            if metrics is not None:
+                metrics.FIREWALL_LAYER_LATENCY.labels(layer=name, outcome=outcome).observe(elapsed_ms / 1000.0)
+                # Quantile-Gauges nicht bei jedem Sample neu sortieren
+                if len(samples) % 64 == 0:
+                    self._export_layer_quantiles(name)
+        except Exception:
+            pass
+    
+    def _record_short_circuit(self, layer: str) -> None:
+        try:
+            if metrics is not None:
+                metrics.FIREWALL_SHORT_CIRCUITS.labels(layer=layer).inc()
+        except Exception:
+            pass
+    
+    def _layer_quantiles(self, name: str) -> Dict[str, float]:
+        samples = sorted(self._layer_latency.get(name) or ())
+        if not samples:
+            return {"p50": 0.0, "p99": 0.0}
+        return {
+            "p50": samples[int(0.50 * (len(samples) - 1))],
+            "p99": samples[int(0.99 * (len(samples) - 1))],
+        }
+    
+    def _export_layer_quantiles(self, name: str) -> Dict[str, float]:
+        q = self._layer_quantiles(name)
+        try:
+            if metrics is not None:
+                for quantile, value in q.items():
+                    metrics.FIREWALL_LAYER_LATENCY_MS.labels(layer=name, quantile=quantile).set(value)
+        except Exception:
+            pass
+        return q
+    
+    def get_layer_latency(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p99 detection_time_ms und Outcomes pro Layer (rollierend, letzte 1024 Samples)."""
+        return {
+            name: {
+                **self._export_layer_quantiles(name),
+                "samples": len(self._layer_latency[name]),
+                "outcomes": dict(self._layer_outcomes.get(name, {})),
+            }
+            for name in self._layer_latency
+        }
+    
     # =========================================================================
     # LAYER 1: INSTANT CHECKS (<1ms)
     # =========================================================================
@@ -610,7 +829,9 @@ class AIFirewallCore:
             # For now: basic check based on labels
             
         except Exception as e:
+            # Weiterreichen: ein SAFE-Verdict aus einem Fehler darf nicht gecacht werden
             logger.debug(f"Network analysis error: {e}")
+            raise
         
         if threats:
             is_critical = "highrisk_cluster" in threats
@@ -636,29 +857,29 @@ class AIFirewallCore:
         evidence = []
         
         # Screen destination address
-        try:
-            is_sanctioned = await self.sanctions_service.is_sanctioned(tx.to_address)
-            if is_sanctioned:
-                threats.append("sanctioned_address")
-                evidence.append({
-                    "type": "sanctions_hit",
-                    "address": tx.to_address,
-                    "risk": "OFAC/UN/EU Sanctioned Entity",
-                    "severity": "CRITICAL"
-                })
-                
-                return ThreatDetection(
-                    threat_level=ThreatLevel.CRITICAL,
-                    confidence=1.0,
-                    threat_types=threats,
-                    evidence=evidence,
-                    ai_models_used=["sanctions_screener"],
-                    detection_time_ms=2.0,
-                    recommended_action=ActionType.BLOCK,
-                    block_reason="Transaction to sanctioned address is illegal"
-                )
-        except Exception as e:
-            logger.warning(f"Sanctions check error: {e}")
+        # Fehler werden nicht abgefangen: _run_layer macht daraus ein blockierendes
+        # "unavailable"-Verdict (fail-closed), statt die Adresse als sauber zu werten
+        screening = await self.sanctions_service.is_sanctioned(tx.to_address)
+        is_sanctioned = screening.get("is_sanctioned") if isinstance(screening, dict) else bool(screening)
+        if is_sanctioned:
+            threats.append("sanctioned_address")
+            evidence.append({
+                "type": "sanctions_hit",
+                "address": tx.to_address,
+                "risk": "OFAC/UN/EU Sanctioned Entity",
+                "severity": "CRITICAL"
+            })
+            
+            return ThreatDetection(
+                threat_level=ThreatLevel.CRITICAL,
+                confidence=1.0,
+                threat_types=threats,
+                evidence=evidence,
+                ai_models_used=["sanctions_screener"],
+                detection_time_ms=2.0,
+                recommended_action=ActionType.BLOCK,
+                block_reason="Transaction to sanctioned address is illegal"
+            )
         
         return self._create_safe_detection(tx, "Sanctions check passed")
     
@@ -791,6 +1012,19 @@ class AIFirewallCore:
             recommended_action=ActionType.ALLOW
         )
     
+    def _create_unavailable_detection(self, tx: Transaction, layer: str, outcome: str) -> ThreatDetection:
+        """Create BLOCK result for a fail-closed layer that timed out or failed"""
+        return ThreatDetection(
+            threat_level=ThreatLevel.CRITICAL,
+            confidence=0.5,
+            threat_types=[f"{layer}_check_unavailable"],
+            evidence=[{"type": "layer_unavailable", "layer": layer, "outcome": outcome}],
+            ai_models_used=[],
+            detection_time_ms=0.0,
+            recommended_action=ActionType.BLOCK,
+            block_reason=f"{layer.capitalize()} screening unavailable ({outcome}), manual review required"
+        )
+    
     def _create_blocked_detection(
         self,
         tx: Transaction,
@@ -873,6 +1107,7 @@ class AIFirewallCore:
             "whitelist_size": len(self.whitelisted_addresses),
             "blacklist_size": len(self.blocked_addresses),
             "custom_rules": len(self.custom_rules),
+            "layer_latency_ms": self.get_layer_latency(),
             "block_rate": (
                 self.stats["blocked"] / self.stats["total_scanned"]
                 if self.stats["total_scanned"] > 0 else 0.0
@@ -15,6 +15,7 @@ from sqlalchemy import select, update
 
 from app.models.alert_annotation import AlertAnnotation
 from app.models.case import Base  # noqa: F401 (ensures metadata is loaded)
+from app.services.kpi_aggregates import kpi_aggregates
 try:
     from app.db.session import SessionLocal  # type: ignore
 except Exception:
@@ -64,6 +65,7 @@ class AlertAnnotationService:
                     .values(disposition=disposition, updated_at=now)
                 )
             db.commit()
+            kpi_aggregates.record_disposition(alert_id, disposition)
         except Exception:
             db.rollback()
             raise
@@ -88,6 +90,7 @@ class AlertAnnotationService:
                     .values(event_time=event_time, updated_at=now)
                 )
             db.commit()
+            kpi_aggregates.record_event_time(alert_id, event_time)
         except Exception:
             db.rollback()
             raise
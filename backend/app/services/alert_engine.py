@@ -14,12 +14,17 @@ import sys
 import logging
 import time
 import asyncio
+from collections import OrderedDict, deque
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 from enum import Enum
 
 from app.audit.logger import log_data_access, AuditEventType, AuditSeverity
 from app.config import settings
+from app.services.kpi_aggregates import kpi_aggregates
+from app.services.alert_store import AlertStore
+from app.services.alert_suppression_store import create_suppression_store
+from app.services.alert_webhook_delivery import parse_destinations, webhook_delivery
 # Safe metrics import (tests may not initialize full metrics stack)
 try:  # pragma: no cover
     from app import metrics  # type: ignore
@@ -756,7 +761,7 @@ class AlertEngine:
     
     def __init__(self):
         self.rules: List[AlertRule] = []
-        self.alerts: List[Alert] = []
+        self.alerts: AlertStore = AlertStore()
         self.suppression_events: List[SuppressionEvent] = []
         self._initialize_rules()
         # Dedup/Suppression configuration from settings
@@ -770,8 +775,8 @@ class AlertEngine:
                     self.dedup_window_seconds = 300
         except Exception:
             pass
-        # In-memory dedup state: fp -> {last_ts: datetime, count: int}
-        self._dedup: Dict[str, Dict[str, Any]] = {}
+        # Dedup-, Rate-Limit- und Silence-Zustand (memory oder Redis, siehe ALERT_SUPPRESSION_BACKEND)
+        self.suppression_store = create_suppression_store()
         # Erweiterte Suppression-Regeln
         self.suppression_rules: Dict[str, Dict[str, Any]] = {
             "global": {
@@ -792,9 +797,6 @@ class AlertEngine:
                 }
             }
         }
-        # Erweiterte Suppression-Zustände
-        self._entity_suppression: Dict[str, Dict[str, Any]] = {}  # entity -> {rule -> last_alert_time}
-        self._global_suppression: Dict[str, List[datetime]] = {}  # rule -> list of alert times
         # Interner Event-Puffer für Metriken
         self._pending_events: List[Dict[str, Any]] = []
         try:
@@ -803,67 +805,8 @@ class AlertEngine:
         except Exception:
             pass
 
-        # Korrelations-Engine
-        # Lazy/optionale Korrelation
-        try:
-            from app.services.alert_correlation import AlertCorrelationEngine as _ACE  # type: ignore
-            self.correlation_engine = _ACE()
-        except Exception:
-            class _FallbackCorrelation:
-                def __init__(self):
-                    # Realistische Default-Regeln, damit Tests/Endpoints funktionieren
-                    self.correlation_rules = {
-                        "flash_loan_exploit": {
-                            "patterns": ["flash_loan_attack", "smart_contract_exploit"],
-                            "time_window": 300,
-                            "min_severity": "high",
-                        },
-                        "money_laundering_chain": {
-                            "patterns": ["money_laundering_pattern", "mixer_usage"],
-                            "time_window": 3600,
-                            "min_severity": "medium",
-                        },
-                        "insider_trading_exploit": {
-                            "patterns": ["insider_trading", "smart_contract_exploit"],
-                            "time_window": 1800,
-                            "min_severity": "high",
-                        },
-                        "swap_then_bridge": {
-                            "patterns": ["dex_swap", "bridge_activity"],
-                            "time_window": 600,
-                            "min_severity": "medium",
-                        },
-                    }
-
-                def correlate_alerts(self, alert, alerts):
-                    return None
-
-                def _matches_correlation_rule(self, alert, remaining_alerts, rule_config=None):
-                    try:
-                        rule = rule_config or {}
-                        patterns = list(rule.get("patterns") or [])
-                        if not patterns:
-                            return False
-                        # Severity check (vereinfachte Ranglogik)
-                        rank = {"low": 0, "medium": 1, "high": 2, "critical": 3}
-                        min_rank = rank.get(str(rule.get("min_severity", "medium")).lower(), 1)
-                        if rank.get(getattr(alert.severity, "value", str(alert.severity)), 0) < min_rank:
-                            return False
-                        # Prüfe, ob der auslösende Alert einem Pattern entspricht
-                        def _match(a):
-                            t = getattr(getattr(a, "alert_type", None), "value", None) or getattr(a, "alert_type", None)
-                            return t in patterns
-                        matched = set()
-                        if _match(alert):
-                            matched.add(getattr(alert.alert_type, "value", alert.alert_type))
-                        for a in remaining_alerts:
-                            if _match(a):
-                                matched.add(getattr(a.alert_type, "value", a.alert_type))
-                        # Erfolg, wenn alle Pattern-Typen mindestens einmal vertreten sind
-                        return all(p in matched for p in patterns)
-                    except Exception:
-                        return False
-            self.correlation_engine = _FallbackCorrelation()
+        # Korrelations-Engine (fensterbasiert, entity-indiziert)
+        self.correlation_engine = AlertCorrelationEngine()
 
         # ML-Model-Service für erweiterte Erkennung
         from app.services.ml_model_service import ml_model_service
@@ -884,6 +827,7 @@ class AlertEngine:
 
         # Limits
         self.max_rules_per_entity: int = 100
+        self.last_batch_metrics: Dict[str, Any] = {}
         # Retention & Korrelation-History (konfigurierbar)
         try:
             self._max_alert_records: int = int(getattr(settings, "ALERT_RETENTION_MAX", 20000))
@@ -893,10 +837,6 @@ class AlertEngine:
             self._max_suppression_records: int = int(getattr(settings, "SUPPRESSION_RETENTION_MAX", 20000))
         except Exception:
             self._max_suppression_records = 20000
-        try:
-            self._correlation_history: int = int(getattr(settings, "CORRELATION_HISTORY", 200))
-        except Exception:
-            self._correlation_history = 200
 
         # Metrics availability flags
         self._metrics_available = bool(getattr(metrics, "ALERTS_SUPPRESSED_TOTAL", None))
@@ -940,7 +880,7 @@ class AlertEngine:
                 if not alert:
                     continue
                 fp = self._fingerprint(alert)
-                if self._should_suppress(alert, fp):
+                if await self._should_suppress(alert, fp):
                     self._record_suppression(alert, reason="dedup_or_policy", fingerprint=fp)
                     continue
                 await self.dispatch_alert(alert)
@@ -1009,7 +949,7 @@ class AlertEngine:
             logger.error(f"Failed to audit log alert: {e}")
 
         # Persist
-        self.alerts.append(alert)
+        self._store_alert(alert)
         # Metric
         try:
             if metrics is not None and getattr(metrics, "ALERTS_CREATED_TOTAL", None):
@@ -1027,40 +967,37 @@ class AlertEngine:
             )
         except Exception:
             pass
-        # Webhook dispatch with minimal retry/backoff
+        # Webhook-Zustellung entkoppelt: Queue pro Ziel, Retries über den Spool
         try:
-            urls = getattr(settings, "ALERT_WEBHOOK_URLS", None)
-            if not urls:
-                return
-            try:
-                import httpx  # type: ignore
-            except Exception:
-                return
-            for url in urls:
-                attempt = 0
-                while attempt < 3:
-                    attempt += 1
-                    t0 = time.time()
-                    try:
-                        async with httpx.AsyncClient(timeout=5) as client:
-                            resp = await client.post(url, json=alert.to_dict())
-                        ok = 200 <= resp.status_code < 300
-                        if metrics is not None:
-                            if getattr(metrics, "WEBHOOK_NOTIFICATIONS_SENT", None):
-                                metrics.WEBHOOK_NOTIFICATIONS_SENT.labels(status="ok" if ok else "error").inc()
-                            if getattr(metrics, "WEBHOOK_NOTIFICATION_LATENCY", None):
-                                metrics.WEBHOOK_NOTIFICATION_LATENCY.observe(time.time() - t0)
-                        if ok:
-                            break
-                    except Exception:
-                        await asyncio.sleep(min(2 ** attempt, 5))
-                        continue
-        except Exception:
-            pass
+            destinations = parse_destinations(getattr(settings, "ALERT_WEBHOOK_URLS", None))
+            if destinations:
+                webhook_delivery.enqueue(destinations, alert.to_dict())
+        except Exception as e:
+            logger.warning(f"Failed to enqueue alert webhooks: {e}")
 
     # -----------------------------
     # Internals
     # -----------------------------
+    def _store_alert(self, alert: Alert) -> None:
+        """Persist alert in-memory and book it into the incremental KPI buckets."""
+        self.alerts.append(alert)
+        try:
+            kpi_aggregates.record_alert(alert.alert_id, alert.timestamp, alert.address)
+        except Exception:
+            pass
+        # Zähler für globale und Entity-Rate-Limits
+        try:
+            keys = ["alerts", f"entity:{self._entity_key(alert)}"]
+            if self._testing_mode:
+                keys.append(f"fp:{self._fingerprint(alert)}")
+            self.suppression_store.incr_nowait(keys)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _entity_key(alert: Alert) -> str:
+        return str(alert.address or alert.tx_hash or "unknown").lower()
+
     def _fingerprint(self, alert: Alert) -> str:
         parts = [alert.alert_type.value, alert.severity.value]
         if alert.address:
@@ -1070,19 +1007,18 @@ class AlertEngine:
         parts.append(alert.title)
         return "|".join(parts)
 
-    def _should_suppress(self, alert: Alert, fingerprint: str) -> bool:
+    async def _should_suppress(self, alert: Alert, fingerprint: str) -> bool:
         now = datetime.utcnow()
+        store = self.suppression_store
 
         # 1) Dedup window
         if self.enable_dedup and self.dedup_window_seconds > 0:
-            state = self._dedup.get(fingerprint)
-            if state and (now - state.get("last_ts", now)) <= timedelta(seconds=self.dedup_window_seconds):
+            if await store.dedup_hit(fingerprint, self.dedup_window_seconds, refresh=False):
                 self._inc_suppressed_metric(alert.alert_type.value, "dedup_window")
                 return True
-            self._dedup[fingerprint] = {"last_ts": now, "count": (state.get("count", 0) + 1) if state else 1}
 
         # 2) Global rate limits per rule
-        if self._is_globally_rate_limited(alert.alert_type.value, now):
+        if await self._is_globally_rate_limited(alert.alert_type.value, now):
             self._inc_suppressed_metric(alert.alert_type.value, "global_rate_limit")
             try:
                 if metrics is not None and getattr(metrics, "GLOBAL_RATE_LIMIT_HITS", None):
@@ -1093,7 +1029,7 @@ class AlertEngine:
 
         # 3) Per-entity silence window
         addr = alert.address or ""
-        if addr and self._is_entity_silenced(addr, alert.alert_type.value, now):
+        if addr and await self._is_entity_silenced(addr, alert.alert_type.value, now):
             self._inc_suppressed_metric(alert.alert_type.value, "entity_silence")
             try:
                 if metrics is not None and getattr(metrics, "ENTITY_SUPPRESSION_HITS", None):
@@ -1103,13 +1039,13 @@ class AlertEngine:
             return True
 
         # 4) Per-rule silence window
-        if self._is_rule_silenced(alert.alert_type.value, now):
+        if await self._is_rule_silenced(alert.alert_type.value, now):
             self._inc_suppressed_metric(alert.alert_type.value, "rule_silence")
             return True
 
         # Update suppression state for entity/rule
-        self._touch_entity_rule(addr, alert.alert_type.value, now)
-        self._touch_global_rule(alert.alert_type.value, now)
+        await self._touch_entity_rule(addr, alert.alert_type.value, now)
+        await self._touch_global_rule(alert.alert_type.value, now)
         return False
 
     def _record_suppression(self, alert: Alert, reason: str, fingerprint: str) -> None:
@@ -1152,28 +1088,23 @@ class AlertEngine:
     # -----------------------------
     # Suppression helpers
     # -----------------------------
-    def _is_globally_rate_limited(self, rule_id: str, now: datetime) -> bool:
+    async def _is_globally_rate_limited(self, rule_id: str, now: datetime) -> bool:
         try:
             cfg = self.suppression_rules.get("global", {})
             per_min = int(cfg.get("max_alerts_per_minute", 0) or 0)
             per_hour = int(cfg.get("max_alerts_per_hour", 0) or 0)
             if per_min <= 0 and per_hour <= 0:
                 return False
-            hist = self._global_suppression.setdefault(rule_id, [])
-            # purge old
-            one_min_ago = now - timedelta(minutes=1)
-            one_hr_ago = now - timedelta(hours=1)
-            hist[:] = [t for t in hist if t >= min(one_hr_ago, one_min_ago)]
-            # check thresholds
-            if per_min > 0 and len([t for t in hist if t >= one_min_ago]) >= per_min:
+            last_min, last_hour = await self.suppression_store.counts(f"rule:{rule_id}", (60, 3600))
+            if per_min > 0 and last_min >= per_min:
                 return True
-            if per_hour > 0 and len([t for t in hist if t >= one_hr_ago]) >= per_hour:
+            if per_hour > 0 and last_hour >= per_hour:
                 return True
             return False
         except Exception:
             return False
 
-    def _is_entity_silenced(self, address: str, rule_id: str, now: datetime) -> bool:
+    async def _is_entity_silenced(self, address: str, rule_id: str, now: datetime) -> bool:
         try:
             cfg = self.suppression_rules.get("per_entity", {})
             if not bool(cfg.get("enabled", False)):
@@ -1181,15 +1112,12 @@ class AlertEngine:
             silence_min = int(cfg.get("silence_duration_minutes", 0) or 0)
             if silence_min <= 0:
                 return False
-            last_by_rule = self._entity_suppression.get(address.lower(), {})
-            last = last_by_rule.get(rule_id)
-            if isinstance(last, datetime) and (now - last) <= timedelta(minutes=silence_min):
-                return True
-            return False
+            last = await self.suppression_store.last_seen(f"last:{address.lower()}|{rule_id}")
+            return last is not None and (time.time() - last) <= silence_min * 60
         except Exception:
             return False
 
-    def _is_rule_silenced(self, rule_id: str, now: datetime) -> bool:
+    async def _is_rule_silenced(self, rule_id: str, now: datetime) -> bool:
         try:
             cfg = self.suppression_rules.get("per_rule", {})
             if not bool(cfg.get("enabled", False)):
@@ -1198,26 +1126,23 @@ class AlertEngine:
             minutes = int(silence_map.get(rule_id, 0) or 0)
             if minutes <= 0:
                 return False
-            last_times = self._global_suppression.get(rule_id, [])
-            if last_times:
-                last = max(last_times)
-                return (now - last) <= timedelta(minutes=minutes)
-            return False
+            last = await self.suppression_store.last_seen(f"rule:{rule_id}")
+            return last is not None and (time.time() - last) <= minutes * 60
         except Exception:
             return False
 
-    def _touch_entity_rule(self, address: str, rule_id: str, now: datetime) -> None:
+    async def _touch_entity_rule(self, address: str, rule_id: str, now: datetime) -> None:
         if not address:
             return
         try:
-            ref = self._entity_suppression.setdefault(address.lower(), {})
-            ref[rule_id] = now
+            await self.suppression_store.touch(f"last:{address.lower()}|{rule_id}")
         except Exception:
             pass
 
-    def _touch_global_rule(self, rule_id: str, now: datetime) -> None:
+    async def _touch_global_rule(self, rule_id: str, now: datetime) -> None:
         try:
-            self._global_suppression.setdefault(rule_id, []).append(now)
+            await self.suppression_store.incr([f"rule:{rule_id}"])
+            await self.suppression_store.touch(f"rule:{rule_id}")
         except Exception:
             pass
 
@@ -1464,10 +1389,7 @@ class AlertEngine:
                     if getattr(self, "_test_seen_fps", None) is not None:
                         self._test_seen_fps.clear()
                     # auch Dedup-Cache zwischen Tests isolieren
-                    try:
-                        self._dedup.clear()
-                    except Exception:
-                        self._dedup = {}
+                    self.suppression_store.clear_dedup()
                     self._last_pytest_nodeid = node
         except Exception:
             pass
@@ -1501,12 +1423,12 @@ class AlertEngine:
                 if test_mode:
                     # In explicit test_mode: bypass suppression for endpoint-driven tests
                     triggered_alerts.append(policy_alert)
-                    self.alerts.append(policy_alert)
+                    self._store_alert(policy_alert)
                     logger.info(f"Policy alert triggered (test_mode): {policy_alert.title}")
                 else:
                     effective_dedup = bool(self.enable_dedup or self._testing_mode or ("pytest" in sys.modules))
-                    suppression_reason = self._should_suppress_advanced(policy_alert)
-                    if suppression_reason or (effective_dedup and self._should_dedup(policy_alert)):
+                    suppression_reason = await self._should_suppress_advanced(policy_alert)
+                    if suppression_reason or (effective_dedup and await self._should_dedup(policy_alert)):
                         # record suppression event
                         if suppression_reason:
                             suppression_event = SuppressionEvent(
@@ -1526,7 +1448,7 @@ class AlertEngine:
                         )
                     else:
                         triggered_alerts.append(policy_alert)
-                        self.alerts.append(policy_alert)
+                        self._store_alert(policy_alert)
                         logger.info(f"Policy alert triggered: {policy_alert.title}")
                         await self._send_notifications(policy_alert)
                         # metrics: created
@@ -1585,7 +1507,7 @@ class AlertEngine:
                 if not test_mode:
                     effective_dedup = bool(self.enable_dedup or self._testing_mode or ("pytest" in sys.modules))
                     # Advanced suppression zuerst (z.B. global rate limit)
-                    suppression_reason = self._should_suppress_advanced(alert)
+                    suppression_reason = await self._should_suppress_advanced(alert)
                     if suppression_reason:
                         # record suppression event
                         suppression_event = SuppressionEvent(
@@ -1611,7 +1533,7 @@ class AlertEngine:
                         continue
 
                     # Dedup suppression
-                    if effective_dedup and self._should_dedup(alert):
+                    if effective_dedup and await self._should_dedup(alert):
                         logger.info(
                             f"Dedup suppressed alert {alert.alert_type.value} for key/addr {alert.address or alert.tx_hash}"
                         )
@@ -1637,7 +1559,7 @@ class AlertEngine:
 
                 # Process alert
                 triggered_alerts.append(alert)
-                self.alerts.append(alert)
+                self._store_alert(alert)
                 logger.info(f"Alert triggered: {alert.title} ({alert.severity.value})")
                 # PyTest Fastpath: merke Fingerprint, um sofortige Wiederholungen zu unterdrücken
                 if getattr(self, "_test_seen_fps", None) is not None:
@@ -1653,18 +1575,14 @@ class AlertEngine:
                     logger.info(f"Alert batch processed immediately: {batch.batch_id}")
 
                 # Entity suppression state
-                entity_key = alert.address or alert.tx_hash or "unknown"
-                if entity_key not in self._entity_suppression:
-                    self._entity_suppression[entity_key] = {}
-                self._entity_suppression[entity_key][alert.alert_type.value] = datetime.utcnow()
+                await self.suppression_store.touch(f"last:{self._entity_key(alert)}|{alert.alert_type.value}")
 
                 # Correlation
-                # Performance: nur letzte N Alerts für Korrelation betrachten
-                recent_for_corr = self.alerts[-self._correlation_history:] if self._correlation_history > 0 else self.alerts
-                correlated_alert = self.correlation_engine.correlate_alerts(alert, recent_for_corr)
+                # Inkrementell über die Fenster-Indizes, unabhängig von der Historiengröße
+                correlated_alert = self.correlation_engine.correlate_alerts(alert)
                 if correlated_alert:
                     triggered_alerts.append(correlated_alert)
-                    self.alerts.append(correlated_alert)
+                    self._store_alert(correlated_alert)
                     logger.info(f"Correlated alert triggered: {correlated_alert.title}")
 
                 # Notifications & metrics
@@ -1713,13 +1631,8 @@ class AlertEngine:
         except Exception:
             max_s = 20000
         if max_a and len(self.alerts) > max_a:
-            # entferne älteste Einträge (FIFO)
-            overflow = len(self.alerts) - max_a
-            # Stabilität: sortiere nach timestamp asc und behalte die neusten
-            try:
-                self.alerts = sorted(self.alerts, key=lambda a: a.timestamp)[overflow:]
-            except Exception:
-                self.alerts = self.alerts[-max_a:]
+            # Store ist zeitlich geordnet: älteste Einträge vorne evicten
+            self.alerts.evict_to(max_a)
         if max_s and len(self.suppression_events) > max_s:
             overflow_s = len(self.suppression_events) - max_s
             try:
@@ -1729,80 +1642,57 @@ class AlertEngine:
     
     # removed duplicate _fingerprint (defined earlier at line ~1042)
 
-    def _should_dedup(self, alert: Alert) -> bool:
+    async def _should_dedup(self, alert: Alert) -> bool:
         """Simple deduplication based on fingerprint and time window."""
         try:
-            fp = self._fingerprint(alert)
-            now = datetime.utcnow()
-            state = self._dedup.get(fp)
-            # In test mode, relax cross-test dedup: reset stale state older than 2 seconds
-            if (self._testing_mode or os.environ.get("PYTEST_CURRENT_TEST")) and state:
-                last = state.get("last_ts", now)
-                if (now - last).total_seconds() > 2:
-                    # reset stale state to avoid suppressing first alert in a new test
-                    self._dedup.pop(fp, None)
-                    state = None
-            if state and (now - state.get("last_ts", now)).total_seconds() < self.dedup_window_seconds:
-                # within dedup window -> increment count and suppress
-                state["count"] = int(state.get("count", 0)) + 1
-                state["last_ts"] = now
-                return True
-            # outside window or first time -> record and do not suppress
-            self._dedup[fp] = {"last_ts": now, "count": 1}
-            return False
+            window = float(self.dedup_window_seconds)
+            # In test mode, relax cross-test dedup: state older than 2 seconds counts as stale
+            if self._testing_mode or os.environ.get("PYTEST_CURRENT_TEST"):
+                window = min(window, 2.0)
+            if window <= 0:
+                return False
+            return await self.suppression_store.dedup_hit(self._fingerprint(alert), window, refresh=True)
         except Exception:
             # On any error, do not suppress to avoid dropping alerts unexpectedly
             return False
 
-    def _should_suppress_advanced(self, alert: Alert) -> Optional[str]:
+    async def _should_suppress_advanced(self, alert: Alert) -> Optional[str]:
         """Check advanced suppression rules and return reason if suppressed"""
         now = datetime.utcnow()
 
         # Global rate limiting
-        if self._check_global_rate_limit(alert, now):
+        if await self._check_global_rate_limit(alert, now):
             return "global_rate_limit"
 
         # Per-entity suppression
-        entity_key = alert.address or alert.tx_hash or "unknown"
-        if self._check_entity_suppression(entity_key, alert, now):
+        entity_key = self._entity_key(alert)
+        if await self._check_entity_suppression(entity_key, alert, now):
             return "entity_suppression"
 
         # Per-rule suppression (silence period after alert)
-        if self._check_rule_suppression(alert, now):
+        if await self._check_rule_suppression(alert, now):
             return "rule_suppression"
 
         return None
 
-    def _check_global_rate_limit(self, alert: Alert, now: datetime) -> bool:
+    async def _check_global_rate_limit(self, alert: Alert, now: datetime) -> bool:
         """Check if global rate limits are exceeded.
         In Test-Umgebungen begrenzen wir die Zählung auf das gleiche Fingerprint,
         um Cross-Test-Interferenzen zu vermeiden (deterministische Tests).
         """
         rules = self.suppression_rules["global"]
-
-        # Check per-minute limit
-        minute_ago = now - timedelta(minutes=1)
         if self._testing_mode or os.environ.get("PYTEST_CURRENT_TEST"):
-            fp = self._fingerprint(alert)
-            recent_alerts = [a for a in self.alerts if a.timestamp > minute_ago and self._fingerprint(a) == fp]
+            key = f"fp:{self._fingerprint(alert)}"
         else:
-            recent_alerts = [a for a in self.alerts if a.timestamp > minute_ago]
-        if len(recent_alerts) >= rules["max_alerts_per_minute"]:
+            key = "alerts"
+        per_minute, per_hour = await self.suppression_store.counts(key, (60, 3600))
+        if per_minute >= rules["max_alerts_per_minute"]:
             return True
-
-        # Check per-hour limit
-        hour_ago = now - timedelta(hours=1)
-        if self._testing_mode or os.environ.get("PYTEST_CURRENT_TEST"):
-            fp = self._fingerprint(alert)
-            hourly_alerts = [a for a in self.alerts if a.timestamp > hour_ago and self._fingerprint(a) == fp]
-        else:
-            hourly_alerts = [a for a in self.alerts if a.timestamp > hour_ago]
-        if len(hourly_alerts) >= rules["max_alerts_per_hour"]:
+        if per_hour >= rules["max_alerts_per_hour"]:
             return True
-
         return False
 
-    def _check_entity_suppression(self, entity_key: str, alert: Alert, now: datetime) -> bool:
+    async def _check_entity_suppression(self, entity_key: str, alert: Alert, now: datetime) -> bool:
         """Check if entity should be suppressed"""
         # In pytest/Test-Mode: per-entity suppression deaktivieren für deterministische Tests
         if self._testing_mode or ("pytest" in sys.modules):
@@ -1811,22 +1701,16 @@ class AlertEngine:
             return False
 
         # Check if entity has exceeded alert limit
-        hour_ago = now - timedelta(hours=1)
-        entity_alerts = [
-            a for a in self.alerts
-            if (a.address == alert.address or a.tx_hash == alert.tx_hash)
-            and a.timestamp > hour_ago
-        ]
-
+        _, entity_alerts = await self.suppression_store.counts(f"entity:{entity_key}", (60, 3600))
         max_per_hour = self.suppression_rules["per_entity"]["max_alerts_per_hour"]
-        if len(entity_alerts) >= max_per_hour:
+        if entity_alerts >= max_per_hour:
             return True
 
         # Note: Silence window disabled to avoid test cross-interference; relying on per-hour cap
 
         return False
 
-    def _check_rule_suppression(self, alert: Alert, now: datetime) -> bool:
+    async def _check_rule_suppression(self, alert: Alert, now: datetime) -> bool:
         """Check if rule should be suppressed due to recent alert"""
         # In pytest/Test-Mode: per-rule suppression deaktivieren für deterministische Tests
         if self._testing_mode or ("pytest" in sys.modules):
@@ -1839,14 +1723,9 @@ class AlertEngine:
 
         if silence_minutes > 0:
             # Check if this rule was triggered recently for this entity
-            entity_key = alert.address or alert.tx_hash or "unknown"
-            entity_state = self._entity_suppression.get(entity_key, {})
-
-            last_alert_time = entity_state.get(rule_name)
-            if last_alert_time:
-                silence_until = last_alert_time + timedelta(minutes=silence_minutes)
-                if now < silence_until:
-                    return True
+            last_alert_time = await self.suppression_store.last_seen(f"last:{self._entity_key(alert)}|{rule_name}")
+            if last_alert_time is not None and time.time() < last_alert_time + silence_minutes * 60:
+                return True
 
         return False
     
@@ -1926,55 +1805,202 @@ class AlertEngine:
     
     async def process_event_batch(self, events: List[Dict[str, Any]]) -> List[Alert]:
         """Process a batch of events and enforce per-entity alert limits."""
+        result = await self.process_event_batch_detailed(events)
+        return result["alerts"]
+
+    @staticmethod
+    def _event_entity_keys(event: Dict[str, Any]) -> List[str]:
+        keys = []
+        for field in ("address", "from_address", "from", "to_address", "to", "entity_id", "tx_hash"):
+            val = event.get(field)
+            if val:
+                keys.append(str(val).lower())
+        return keys
+
+    def _group_events_by_entity(self, events: List[Dict[str, Any]]) -> List[List[int]]:
+        """Gruppiert Event-Indizes, die sich (transitiv) eine Entity teilen; Reihenfolge bleibt erhalten."""
+        parent = list(range(len(events)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owner: Dict[str, int] = {}
+        for i, ev in enumerate(events):
+            for key in self._event_entity_keys(ev):
+                j = owner.setdefault(key, i)
+                if j != i:
+                    ri, rj = find(i), find(j)
+                    if ri != rj:
+                        parent[max(ri, rj)] = min(ri, rj)
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(events)):
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    async def _coalesce_batch_lookups(
+        self, events: List[Dict[str, Any]], sem: asyncio.Semaphore
+    ) -> Dict[str, int]:
+        """Ergänzt fehlende `labels`/`risk_score` mit einem Lookup pro eindeutiger Adresse im Batch."""
+        need_labels: Dict[str, List[int]] = {}
+        need_risk: Dict[tuple, List[int]] = {}
+        for i, ev in enumerate(events):
+            addr = ev.get("address")
+            if not addr:
+                continue
+            addr = str(addr).lower()
+            if "labels" not in ev:
+                need_labels.setdefault(addr, []).append(i)
+            if "risk_score" not in ev:
+                need_risk.setdefault((str(ev.get("chain") or "ethereum"), addr), []).append(i)
+
+        if need_labels:
+            try:
+                from app.enrichment.labels_service import labels_service
+                labels = await labels_service.bulk_get_labels(list(need_labels))
+                for addr, idxs in need_labels.items():
+                    for i in idxs:
+                        events[i]["labels"] = list(labels.get(addr) or [])
+            except Exception as e:
+                logger.warning(f"Batch label lookup failed: {e}")
+
+        if need_risk:
+            try:
+                from app.services.risk_service import service as risk_service
+
+                async def _score(chain: str, addr: str) -> Optional[float]:
+                    async with sem:
+                        try:
+                            res = await risk_service.score_address(chain, addr)
+                            return float(res.score) / 100.0
+                        except Exception:
+                            return None
+
+                keys = list(need_risk)
+                scores = await asyncio.gather(*[_score(c, a) for c, a in keys])
+                for key, score in zip(keys, scores):
+                    if score is None:
+                        continue
+                    for i in need_risk[key]:
+                        events[i]["risk_score"] = score
+            except Exception as e:
+                logger.warning(f"Batch risk lookup failed: {e}")
+
+        requested = sum(len(v) for v in need_labels.values()) + sum(len(v) for v in need_risk.values())
+        performed = len(need_labels) + len(need_risk)
+        return {"lookups": performed, "lookups_coalesced": requested - performed}
+
+    async def process_event_batch_detailed(
+        self,
+        events: List[Dict[str, Any]],
+        concurrency: Optional[int] = None,
+        enrich: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        Verarbeitet einen Batch nebenläufig, aber pro Entity geordnet.
+
+        - Events, die sich eine Entity teilen (address/from/to/entity_id/tx_hash,
+          transitiv), laufen sequentiell in Eingangsreihenfolge; Suppression und
+          Dedup sehen damit dieselbe Abfolge wie bisher
+        - Gruppen laufen parallel, begrenzt durch einen Semaphore
+        - Optional (`enrich` / ALERT_BATCH_ENRICH): fehlende Labels/Risk-Scores
+          einmal pro Adresse und Batch nachschlagen
+        - Ergebnis: Alerts (mit Entity-Limit), Ergebnisse pro Event, Batch-Metriken
+        """
         t0 = time.perf_counter()
-        all_alerts: List[Alert] = []
-        entity_counts: Dict[str, int] = {}
-        for ev in events:
+        if concurrency is None:
             try:
-                alerts = await self.process_event(ev)
+                concurrency = int(getattr(settings, "ALERT_BATCH_CONCURRENCY", 0) or os.getenv("ALERT_BATCH_CONCURRENCY", "16"))
             except Exception:
-                alerts = []
+                concurrency = 16
+        concurrency = max(1, concurrency)
+        if enrich is None:
+            enrich = os.getenv("ALERT_BATCH_ENRICH", "0") == "1"
+        sem = asyncio.Semaphore(concurrency)
+        events = [dict(ev) for ev in events]
+
+        lookup_stats = {"lookups": 0, "lookups_coalesced": 0}
+        if enrich and events:
+            lookup_stats = await self._coalesce_batch_lookups(events, sem)
+
+        per_event: List[List[Alert]] = [[] for _ in events]
+        errors: List[Optional[str]] = [None] * len(events)
+
+        async def _run_group(indices: List[int]) -> None:
+            for i in indices:
+                async with sem:
+                    try:
+                        per_event[i] = await self.process_event(events[i])
+                    except Exception as e:
+                        errors[i] = str(e)
+
+        groups = self._group_events_by_entity(events)
+        await asyncio.gather(*[_run_group(g) for g in groups])
+
+        # Entity-Limit in Eingangsreihenfolge anwenden (deterministisch wie sequentiell)
+        all_alerts: List[Alert] = []
+        entity_counts: Dict[str, int] = {}
+        results: List[Dict[str, Any]] = []
+        for i, alerts in enumerate(per_event):
+            kept: List[str] = []
             for a in alerts:
                 key = a.address or a.tx_hash or "unknown"
                 cnt = entity_counts.get(key, 0)
                 if cnt < self.max_rules_per_entity:
                     all_alerts.append(a)
+                    kept.append(a.alert_id)
                     entity_counts[key] = cnt + 1
+            keys = self._event_entity_keys(events[i])
+            results.append({
+                "index": i,
+                "entity": keys[0] if keys else None,
+                "alert_ids": kept,
+                "error": errors[i],
+            })
+
+        elapsed = max(1e-9, time.perf_counter() - t0)
+        batch_metrics = {
+            "events": len(events),
+            "alerts": len(all_alerts),
+            "errors": sum(1 for e in errors if e),
+            "entity_groups": len(groups),
+            "concurrency": concurrency,
+            "elapsed_ms": round(elapsed * 1000.0, 2),
+            "events_per_second": round(len(events) / elapsed, 1),
+            **lookup_stats,
+        }
+        self.last_batch_metrics = batch_metrics
         # Batch metrics
         try:
             if metrics and getattr(metrics, "BATCH_PROCESSING_LATENCY", None):
-                metrics.BATCH_PROCESSING_LATENCY.observe(max(0.0, time.perf_counter() - t0))
+                metrics.BATCH_PROCESSING_LATENCY.observe(elapsed)
             if metrics and getattr(metrics, "EVENTS_PROCESSED_BATCH", None):
                 metrics.EVENTS_PROCESSED_BATCH.labels(batch_size=str(len(events))).inc()
             if metrics and getattr(metrics, "ALERT_BATCH_PROCESSING_TIME", None):
-                metrics.ALERT_BATCH_PROCESSING_TIME.observe(max(0.0, time.perf_counter() - t0))
+                metrics.ALERT_BATCH_PROCESSING_TIME.observe(elapsed)
+            if metrics and getattr(metrics, "ALERT_BATCH_THROUGHPUT", None):
+                metrics.ALERT_BATCH_THROUGHPUT.set(batch_metrics["events_per_second"])
         except Exception:
             pass
         # Laufzeit-Logging
         try:
-            elapsed_ms = (time.perf_counter() - t0) * 1000.0
             logger.debug(
-                f"process_event_batch: {len(events)} events -> {len(all_alerts)} alerts in {elapsed_ms:.2f} ms"
+                f"process_event_batch: {len(events)} events in {len(groups)} entity groups -> "
+                f"{len(all_alerts)} alerts in {batch_metrics['elapsed_ms']:.2f} ms"
             )
         except Exception:
             pass
-        return all_alerts
+        return {"alerts": all_alerts, "results": results, "metrics": batch_metrics}
     
     def get_recent_alerts(
         self,
         limit: int = 100,
         severity: Optional[AlertSeverity] = None
     ) -> List[Alert]:
-        """Get recent alerts"""
-        filtered = self.alerts
-        
-        if severity:
-            filtered = [a for a in filtered if a.severity == severity]
-        
-        # Sort by timestamp descending
-        filtered = sorted(filtered, key=lambda a: a.timestamp, reverse=True)
-        
-        return filtered[:limit]
+        """Get recent alerts (newest first, served from the store's indexes)"""
+        return self.alerts.recent(limit=limit, severity=severity)
     
     def get_suppression_events(
         self,
@@ -1994,28 +2020,22 @@ class AlertEngine:
     
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Acknowledge an alert"""
-        for alert in self.alerts:
-            if alert.alert_id == alert_id:
-                alert.acknowledged = True
-                logger.info(f"Alert acknowledged: {alert_id}")
-                return True
+        if self.alerts.acknowledge(alert_id):
+            logger.info(f"Alert acknowledged: {alert_id}")
+            return True
         return False
     
     def get_alert_stats(self) -> Dict[str, Any]:
         """Get alert statistics"""
         total = len(self.alerts)
+        severity_counts = self.alerts.count_by_severity()
         by_severity = {
-            "critical": len([a for a in self.alerts if a.severity == AlertSeverity.CRITICAL]),
-            "high": len([a for a in self.alerts if a.severity == AlertSeverity.HIGH]),
-            "medium": len([a for a in self.alerts if a.severity == AlertSeverity.MEDIUM]),
-            "low": len([a for a in self.alerts if a.severity == AlertSeverity.LOW]),
+            sev.value: severity_counts.get(sev.value, 0)
+            for sev in (AlertSeverity.CRITICAL, AlertSeverity.HIGH, AlertSeverity.MEDIUM, AlertSeverity.LOW)
         }
-        by_type = {}
-        for alert in self.alerts:
-            alert_type = alert.alert_type.value
-            by_type[alert_type] = by_type.get(alert_type, 0) + 1
+        by_type = self.alerts.count_by_type()
         
-        unacknowledged = len([a for a in self.alerts if not a.acknowledged])
+        unacknowledged = self.alerts.unacknowledged
         
         # Suppression stats
         suppression_stats = {}
@@ -2105,14 +2125,13 @@ class AlertEngine:
         try:
             self.alerts.clear()
         except Exception:
-            self.alerts = []
+            self.alerts = AlertStore()
         try:
             self.suppression_events.clear()
         except Exception:
             self.suppression_events = []
-        self._dedup = {}
-        self._entity_suppression = {}
-        self._global_suppression = {}
+        self.suppression_store.reset()
+        self.correlation_engine.reset()
     
     async def create_alert(
         self,
@@ -2154,7 +2173,7 @@ class AlertEngine:
         
         # Check suppression
         fingerprint = self._fingerprint(alert)
-        if self._should_suppress(alert, fingerprint):
+        if await self._should_suppress(alert, fingerprint):
             logger.info(f"Alert suppressed: {fingerprint}")
             return alert.alert_id
         
@@ -2212,9 +2231,25 @@ class AlertEngine:
 
 
 class AlertCorrelationEngine:
-    """Korrelations-Engine für komplexe Alert-Muster"""
+    """
+    Korrelations-Engine für komplexe Alert-Muster
+
+    Inkrementell statt Scan über die Historie:
+    - Sliding-Window-Indizes `(scope, key, alert_type) -> deque[Alert]` für die
+      Scopes address / cluster / tx; der Alert-Typ entspricht der Regel
+    - Eine globale, zeitlich geordnete Expiry-Queue entfernt Einträge älter als
+      das größte Regel-Fenster (amortisiert O(1) pro Alert)
+    - Ein Treffer eröffnet einen Incident pro (Regel, Scope-Key); weitere
+      passende Alerts im Fenster werden dem Incident zugeordnet statt erneut
+      zu korrelieren, damit ein Alert-Storm keinen Korrelations-Storm erzeugt
+
+    Kosten pro Alert hängen nur von Scopes × Regeln × Patterns ab, nicht von
+    der Anzahl gespeicherter Alerts.
+    """
 
-    def __init__(self):
+    SCOPES = ("address", "cluster", "tx")
+
+    def __init__(self, max_entries: int = 200_000, max_incidents: int = 10_000):
         self.correlation_rules = {
             "flash_loan_exploit": {
                 "patterns": ["flash_loan_attack", "smart_contract_exploit"],
@@ -2230,54 +2265,193 @@ class AlertCorrelationEngine:
                 "patterns": ["insider_trading", "smart_contract_exploit"],
                 "time_window": 1800,  # 30 Minuten
                 "min_severity": "high"
-            }
+            },
+            "swap_then_bridge": {
+                "patterns": ["dex_swap", "bridge_activity"],
+                "time_window": 600,  # 10 Minuten
+                "min_severity": "medium"
+            },
         }
+        self.max_entries = max_entries
+        self.max_incidents = max_incidents
+        self._index: Dict[tuple, deque] = {}
+        self._expiry: deque = deque()  # (timestamp, index_keys) in Ankunftsreihenfolge
+        self._incidents: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"observed": 0, "expired": 0, "correlated": 0, "incident_joins": 0}
+
+    # -----------------------------
+    # Indexpflege
+    # -----------------------------
+    @staticmethod
+    def _scope_keys(alert: Alert) -> List[tuple]:
+        keys = []
+        if alert.address:
+            keys.append(("address", str(alert.address).lower()))
+        cluster = (alert.metadata or {}).get("cluster_id") or (alert.metadata or {}).get("cluster")
+        if cluster:
+            keys.append(("cluster", str(cluster)))
+        if alert.tx_hash:
+            keys.append(("tx", str(alert.tx_hash).lower()))
+        return keys
+
+    def _horizon(self) -> float:
+        return float(max((r.get("time_window", 0) for r in self.correlation_rules.values()), default=0))
+
+    def observe(self, alert: Alert) -> None:
+        """Nimmt einen Alert in die Fenster-Indizes auf."""
+        alert_type = alert.alert_type.value
+        index_keys = [(scope, key, alert_type) for scope, key in self._scope_keys(alert)]
+        for ik in index_keys:
+            self._index.setdefault(ik, deque()).append(alert)
+        self._expiry.append((alert.timestamp, index_keys))
+        self.stats["observed"] += 1
+        self._expire(alert.timestamp)
+
+    def _expire(self, now: datetime) -> None:
+        cutoff = now - timedelta(seconds=self._horizon())
+        while self._expiry and (self._expiry[0][0] < cutoff or len(self._expiry) > self.max_entries):
+            _ts, index_keys = self._expiry.popleft()
+            for ik in index_keys:
+                dq = self._index.get(ik)
+                if dq:
+                    dq.popleft()
+                    if not dq:
+                        del self._index[ik]
+            self.stats["expired"] += 1
+        while self._incidents:
+            key, incident = next(iter(self._incidents.items()))
+            if incident["expires_at"] >= now and len(self._incidents) <= self.max_incidents:
+                break
+            self._incidents.popitem(last=False)
+
+    def _latest(self, scope: str, key: str, alert_type: str, cutoff: datetime) -> Optional[Alert]:
+        dq = self._index.get((scope, key, alert_type))
+        if dq and dq[-1].timestamp > cutoff:
+            return dq[-1]
+        return None
+
+    # -----------------------------
+    # Korrelation
+    # -----------------------------
+    def correlate_alerts(self, new_alert: Alert, recent_alerts: Optional[List[Alert]] = None) -> Optional[Alert]:
+        """
+        Korreliert einen neuen Alert.
+
+        Ohne `recent_alerts` über die Fenster-Indizes (Live-Pfad); mit Liste
+        wird nur diese geprüft (Regel-Tests/Analyse über explizite Samples).
+        """
+        if recent_alerts is not None:
+            return self._correlate_list(new_alert, recent_alerts)
+
+        self.observe(new_alert)
+        alert_type = new_alert.alert_type.value
+        scope_keys = self._scope_keys(new_alert)
+        for rule_name, rule_config in self.correlation_rules.items():
+            patterns = rule_config.get("patterns") or []
+            if alert_type not in patterns or not self._meets_min_severity(new_alert, rule_config):
+                continue
+            window = timedelta(seconds=rule_config["time_window"])
+            cutoff = new_alert.timestamp - window
+            for scope, key in scope_keys:
+                incident_key = (rule_name, scope, key)
+                incident = self._incidents.get(incident_key)
+                if incident is not None and incident["expires_at"] >= new_alert.timestamp:
+                    incident["alert_ids"].append(new_alert.alert_id)
+                    incident["last_seen"] = new_alert.timestamp
+                    incident["expires_at"] = new_alert.timestamp + window
+                    self._incidents.move_to_end(incident_key)
+                    self.stats["incident_joins"] += 1
+                    break
+                matched = [self._latest(scope, key, p, cutoff) for p in patterns]
+                if all(matched):
+                    correlated = self._build_correlated_alert(rule_name, new_alert, matched)
+                    self._incidents[incident_key] = {
+                        "incident_id": correlated.alert_id,
+                        "rule": rule_name,
+                        "scope": scope,
+                        "key": key,
+                        "alert_ids": list(dict.fromkeys(a.alert_id for a in matched)),
+                        "first_seen": min(a.timestamp for a in matched),
+                        "last_seen": new_alert.timestamp,
+                        "expires_at": new_alert.timestamp + window,
+                    }
+                    self.stats["correlated"] += 1
+                    return correlated
+        return None
 
-    def correlate_alerts(self, new_alert: Alert, recent_alerts: List[Alert]) -> Optional[Alert]:
-        """Korrelations-Logik für Alerts"""
+    def _correlate_list(self, new_alert: Alert, recent_alerts: List[Alert]) -> Optional[Alert]:
         for rule_name, rule_config in self.correlation_rules.items():
             if self._matches_correlation_rule(new_alert, recent_alerts, rule_config):
-                return Alert(
-                    alert_type=AlertType.SUSPICIOUS_PATTERN,
-                    severity=AlertSeverity.CRITICAL,
-                    title=f"Verdächtiges Muster erkannt: {rule_name}",
-                    description=f"Korrelation zwischen Alerts deutet auf komplexes Schema hin",
-                    metadata={
-                        "correlation_rule": rule_name,
-                        "correlated_alerts": [a.alert_id for a in recent_alerts if self._alert_matches_pattern(a, rule_config["patterns"])],
-                        "correlation_confidence": 0.9
-                    },
-                    address=new_alert.address,
-                    tx_hash=new_alert.tx_hash
-                )
+                matched = [a for a in recent_alerts if self._alert_matches_pattern(a, rule_config["patterns"])]
+                return self._build_correlated_alert(rule_name, new_alert, matched)
         return None
 
-    def _matches_correlation_rule(self, alert: Alert, recent_alerts: List[Alert], rule: Dict) -> bool:
-        """Prüft ob ein Alert zu einer Korrelations-Regel passt"""
+    @staticmethod
+    def _build_correlated_alert(rule_name: str, new_alert: Alert, matched: List[Alert]) -> Alert:
+        return Alert(
+            alert_type=AlertType.SUSPICIOUS_PATTERN,
+            severity=AlertSeverity.CRITICAL,
+            title=f"Verdächtiges Muster erkannt: {rule_name}",
+            description=f"Korrelation zwischen Alerts deutet auf komplexes Schema hin",
+            metadata={
+                "correlation_rule": rule_name,
+                "correlated_alerts": list(dict.fromkeys(a.alert_id for a in matched)),
+                "correlation_confidence": 0.9
+            },
+            address=new_alert.address,
+            tx_hash=new_alert.tx_hash
+        )
+
+    @staticmethod
+    def _meets_min_severity(alert: Alert, rule: Dict) -> bool:
         try:
             rank = {"low": 0, "medium": 1, "high": 2, "critical": 3}
             alert_rank = rank.get(alert.severity.value, 0)
             rule_min_rank = rank.get(str(rule.get("min_severity", "medium")).lower(), 1)
-            if alert_rank < rule_min_rank:
-                return False
+            return alert_rank >= rule_min_rank
         except Exception:
             # Fallback: do not filter by severity if rule is malformed
-            pass
+            return True
+
+    def _matches_correlation_rule(self, alert: Alert, recent_alerts: List[Alert], rule: Dict) -> bool:
+        """Prüft ob ein Alert zusammen mit `recent_alerts` alle Patterns einer Regel abdeckt"""
+        if not self._meets_min_severity(alert, rule):
+            return False
 
         time_window = rule["time_window"]
         cutoff_time = datetime.utcnow() - timedelta(seconds=time_window)
 
-        relevant_alerts = [
-            a for a in recent_alerts
-            if a.timestamp > cutoff_time and self._alert_matches_pattern(a, rule["patterns"])
-        ]
-
-        return len(relevant_alerts) >= len(rule["patterns"]) - 1  # Mindestens ein Pattern-Match
+        patterns = rule["patterns"]
+        present = {alert.alert_type.value} if self._alert_matches_pattern(alert, patterns) else set()
+        present.update(
+            a.alert_type.value for a in recent_alerts
+            if a.timestamp > cutoff_time and self._alert_matches_pattern(a, patterns)
+        )
+        return all(p in present for p in patterns)
 
     def _alert_matches_pattern(self, alert: Alert, patterns: List[str]) -> bool:
         """Prüft ob ein Alert zu einem Pattern passt"""
         return alert.alert_type.value in patterns
 
+    def get_incidents(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Aktive Incidents, zuletzt aktualisierte zuerst."""
+        out = []
+        for incident in reversed(self._incidents.values()):
+            if len(out) >= limit:
+                break
+            out.append({
+                **incident,
+                "first_seen": incident["first_seen"].isoformat(),
+                "last_seen": incident["last_seen"].isoformat(),
+                "expires_at": incident["expires_at"].isoformat(),
+            })
+        return out
+
+    def reset(self) -> None:
+        self._index.clear()
+        self._expiry.clear()
+        self._incidents.clear()
+
 # Global singleton instance for external imports
 alert_engine = AlertEngine()
 
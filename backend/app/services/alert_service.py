@@ -3,6 +3,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from app.services.alert_engine import alert_engine, AlertSeverity, Alert, AlertType  # re-use engine types
+from app.services.alert_store import AlertStore
 
 
 class AlertService:
@@ -16,7 +17,7 @@ class AlertService:
 
     def get_recent_alerts_since(self, *, since: datetime, min_severity: Optional[AlertSeverity] = None) -> List[Alert]:
         """Return alerts after a cutoff time, optionally filtering by minimum severity."""
-        alerts = [a for a in alert_engine.alerts if getattr(a, "timestamp", datetime.min) > since]
+        alerts = alert_engine.alerts.since(since)
         if min_severity is not None:
             rank = {"low": 0, "medium": 1, "high": 2, "critical": 3}
             alerts = [a for a in alerts if rank.get(a.severity.value, 0) >= rank.get(min_severity.value, 0)]
@@ -39,6 +40,9 @@ class AlertService:
     async def process_event_batch(self, events: List[Dict[str, Any]]) -> List[Alert]:
         return await alert_engine.process_event_batch(events)
 
+    async def process_event_batch_detailed(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await alert_engine.process_event_batch_detailed(events)
+
     async def process_event(self, event: Dict[str, Any]) -> List[Alert]:
         return await alert_engine.process_event(event)
 
@@ -48,7 +52,7 @@ class AlertService:
 
     async def dispatch_manual_alert(self, alert: Alert) -> None:
         """Append a manually created alert and best-effort notify sinks."""
-        alert_engine.alerts.append(alert)
+        alert_engine._store_alert(alert)
         try:
             await alert_engine._send_notifications(alert)
         except Exception:
@@ -99,7 +103,7 @@ class AlertService:
 
     # Engine readiness / cache info
     def is_engine_ready(self) -> bool:
-        return isinstance(getattr(alert_engine, "alerts", None), list)
+        return isinstance(getattr(alert_engine, "alerts", None), AlertStore)
 
     def cached_alerts_count(self) -> int:
         try:
@@ -0,0 +1,242 @@
+"""
+Indexed Alert Store
+===================
+
+Ersetzt die flache `AlertEngine.alerts`-Liste:
+
+- Hash-Map `alert_id -> Alert` für Lookup/Ack in O(1)
+- Zeitlich geordneter Ringpuffer (deque), Retention evictet vorne in O(1)
+- Sekundärindizes (ebenfalls zeitlich geordnete deques) nach Severity,
+  Alert-Typ (entspricht der auslösenden Regel) und Entity (Adresse/Tx)
+
+Recent-N liest vom rechten Ende und kostet O(N) statt Sortieren aller Alerts.
+Alerts mit älterem Timestamp als der jüngste werden von rechts einsortiert
+(selten, Kosten proportional zur Verschiebung).
+"""
+
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+
+def _entity_of(alert: Any) -> Optional[str]:
+    key = getattr(alert, "address", None) or getattr(alert, "tx_hash", None)
+    return str(key).lower() if key else None
+
+
+def _type_of(alert: Any) -> str:
+    alert_type = getattr(alert, "alert_type", None)
+    return str(getattr(alert_type, "value", alert_type))
+
+
+def _severity_of(alert: Any) -> str:
+    severity = getattr(alert, "severity", None)
+    return str(getattr(severity, "value", severity))
+
+
+class AlertStore:
+    """
+    In-Memory Alert Store mit Indizes
+
+    Bleibt listenähnlich (`append`, `len`, Iteration alt→neu, `clear`,
+    Slicing), damit bestehende Aufrufer weiter funktionieren.
+    """
+
+    def __init__(self, max_records: Optional[int] = None):
+        self.max_records = max_records
+        self._ring: Deque[Any] = deque()
+        self._by_id: Dict[str, Any] = {}
+        self._by_severity: Dict[str, Deque[Any]] = {}
+        self._by_type: Dict[str, Deque[Any]] = {}
+        self._by_entity: Dict[str, Deque[Any]] = {}
+        self._unacknowledged = 0
+
+    # -----------------------------
+    # Schreiben
+    # -----------------------------
+    def append(self, alert: Any) -> None:
+        """Fügt einen Alert ein (ersetzt einen gleichnamigen) und hält `max_records` ein."""
+        if alert.alert_id in self._by_id:
+            self.remove(alert.alert_id)
+        self._insort(self._ring, alert)
+        self._by_id[alert.alert_id] = alert
+        self._insort(self._by_severity.setdefault(_severity_of(alert), deque()), alert)
+        self._insort(self._by_type.setdefault(_type_of(alert), deque()), alert)
+        entity = _entity_of(alert)
+        if entity:
+            self._insort(self._by_entity.setdefault(entity, deque()), alert)
+        if not getattr(alert, "acknowledged", False):
+            self._unacknowledged += 1
+        if self.max_records:
+            self.evict_to(self.max_records)
+
+    def extend(self, alerts: List[Any]) -> None:
+        for alert in alerts:
+            self.append(alert)
+
+    @staticmethod
+    def _insort(dq: Deque[Any], alert: Any) -> None:
+        ts = alert.timestamp
+        if not dq or dq[-1].timestamp <= ts:
+            dq.append(alert)
+            return
+        # Out-of-order: von rechts die Einfügeposition suchen
+        pos = len(dq)
+        while pos > 0 and dq[pos - 1].timestamp > ts:
+            pos -= 1
+        dq.insert(pos, alert)
+
+    def acknowledge(self, alert_id: str) -> bool:
+        alert = self._by_id.get(alert_id)
+        if alert is None:
+            return False
+        if not alert.acknowledged:
+            alert.acknowledged = True
+            self._unacknowledged -= 1
+        return True
+
+    def remove(self, alert_id: str) -> Optional[Any]:
+        """Entfernt einen einzelnen Alert (O(n) in den betroffenen deques)."""
+        alert = self._by_id.pop(alert_id, None)
+        if alert is None:
+            return None
+        self._ring.remove(alert)
+        self._discard(self._by_severity, _severity_of(alert), alert, left=False)
+        self._discard(self._by_type, _type_of(alert), alert, left=False)
+        entity = _entity_of(alert)
+        if entity:
+            self._discard(self._by_entity, entity, alert, left=False)
+        if not alert.acknowledged:
+            self._unacknowledged -= 1
+        return alert
+
+    def evict_to(self, max_records: int) -> int:
+        """Evictet die ältesten Alerts bis höchstens `max_records` übrig sind."""
+        evicted = 0
+        while len(self._ring) > max_records:
+            alert = self._ring.popleft()
+            self._by_id.pop(alert.alert_id, None)
+            self._discard(self._by_severity, _severity_of(alert), alert)
+            self._discard(self._by_type, _type_of(alert), alert)
+            entity = _entity_of(alert)
+            if entity:
+                self._discard(self._by_entity, entity, alert)
+            if not alert.acknowledged:
+                self._unacknowledged -= 1
+            evicted += 1
+        return evicted
+
+    @staticmethod
+    def _discard(index: Dict[str, Deque[Any]], key: str, alert: Any, left: bool = True) -> None:
+        dq = index.get(key)
+        if not dq:
+            return
+        # Der global älteste Alert ist auch der älteste in seinem Index
+        if left and dq[0] is alert:
+            dq.popleft()
+        else:
+            try:
+                dq.remove(alert)
+            except ValueError:
+                pass
+        if not dq:
+            del index[key]
+
+    def clear(self) -> None:
+        self._ring.clear()
+        self._by_id.clear()
+        self._by_severity.clear()
+        self._by_type.clear()
+        self._by_entity.clear()
+        self._unacknowledged = 0
+
+    # -----------------------------
+    # Lesen
+    # -----------------------------
+    def get(self, alert_id: str) -> Optional[Any]:
+        return self._by_id.get(alert_id)
+
+    def recent(
+        self,
+        limit: int = 100,
+        severity: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        entity: Optional[str] = None,
+    ) -> List[Any]:
+        """Neueste zuerst; nutzt den kleinsten passenden Index."""
+        candidates = [self._ring]
+        if severity is not None:
+            candidates.append(self._by_severity.get(str(getattr(severity, "value", severity)), deque()))
+        if alert_type is not None:
+            candidates.append(self._by_type.get(str(getattr(alert_type, "value", alert_type)), deque()))
+        if entity is not None:
+            candidates.append(self._by_entity.get(str(entity).lower(), deque()))
+        source = min(candidates, key=len)
+
+        def matches(alert: Any) -> bool:
+            return (
+                (severity is None or _severity_of(alert) == str(getattr(severity, "value", severity)))
+                and (alert_type is None or _type_of(alert) == str(getattr(alert_type, "value", alert_type)))
+                and (entity is None or _entity_of(alert) == str(entity).lower())
+            )
+
+        if limit <= 0:
+            return []
+        return list(islice((a for a in reversed(source) if matches(a)), limit))
+
+    def since(self, cutoff: datetime) -> List[Any]:
+        """Alle Alerts mit Timestamp > cutoff, alt→neu (liest nur den Tail)."""
+        out: List[Any] = []
+        for alert in reversed(self._ring):
+            if alert.timestamp <= cutoff:
+                break
+            out.append(alert)
+        out.reverse()
+        return out
+
+    def tail(self, n: int) -> List[Any]:
+        """Die letzten n Alerts, alt→neu."""
+        if n <= 0:
+            return list(self._ring)
+        start = max(0, len(self._ring) - n)
+        return list(islice(self._ring, start, None))
+
+    def count_by_severity(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in self._by_severity.items()}
+
+    def count_by_type(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in self._by_type.items()}
+
+    @property
+    def unacknowledged(self) -> int:
+        return self._unacknowledged
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "alerts": len(self._ring),
+            "severities": len(self._by_severity),
+            "types": len(self._by_type),
+            "entities": len(self._by_entity),
+            "unacknowledged": self._unacknowledged,
+        }
+
+    # -----------------------------
+    # Listen-Kompatibilität
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def __bool__(self) -> bool:
+        return bool(self._ring)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._ring)
+
+    def __contains__(self, alert: Any) -> bool:
+        return getattr(alert, "alert_id", None) in self._by_id
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return list(self._ring)[index]
+        return self._ring[index]
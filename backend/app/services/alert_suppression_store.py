@@ -0,0 +1,368 @@
+"""
+Alert Suppression Store
+=======================
+Austauschbarer Zustand für Dedup, Rate-Limits und Silence-Fenster der AlertEngine.
+
+- Dedup: Fingerprint -> letzter Zeitpunkt (TTL = Dedup-Fenster)
+- Rate-Limits: zeit-gebucketete Zähler (Sliding Window aus aktuellem und
+  vorherigem Fenster, gewichtet) statt Listen von Zeitstempeln
+- Silence: Schlüssel -> letzter Zeitpunkt
+
+Alle Checks sind O(1). `InMemorySuppressionStore` begrenzt jede Struktur hart
+(LRU); `RedisSuppressionStore` teilt den Zustand über alle API-Worker und fällt
+ohne Redis-Verbindung auf einen In-Memory-Store zurück.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Standardfenster der AlertEngine (Minute/Stunde)
+DEFAULT_WINDOWS: Tuple[int, ...] = (60, 3600)
+
+
+def _sliding_count(prev: int, curr: int, window: int, now: float) -> float:
+    """Sliding-Window-Schätzung: vorheriges Fenster anteilig + aktuelles Fenster."""
+    elapsed = (now % window) / window
+    return prev * (1.0 - elapsed) + curr
+
+
+class SuppressionStore(abc.ABC):
+    """Schnittstelle des Suppression-Zustands (async, damit Redis austauschbar ist)."""
+
+    backend = "base"
+
+    @abc.abstractmethod
+    async def dedup_hit(self, fingerprint: str, window_seconds: float, refresh: bool = True) -> bool:
+        """True, wenn der Fingerprint innerhalb des Fensters schon gesehen wurde.
+        Sonst wird er gemerkt. `refresh` verlängert das Fenster auch bei Treffern."""
+
+    @abc.abstractmethod
+    async def counts(self, key: str, windows: Sequence[int] = DEFAULT_WINDOWS) -> List[float]:
+        """Geschätzte Anzahl Ereignisse pro Fenster (Sekunden)."""
+
+    @abc.abstractmethod
+    async def incr(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS) -> None:
+        """Zählt je ein Ereignis pro Schlüssel und Fenster."""
+
+    @abc.abstractmethod
+    def incr_nowait(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS) -> None:
+        """Zählen ohne await (z.B. aus synchronem Alert-Speicherpfad)."""
+
+    @abc.abstractmethod
+    async def touch(self, key: str, ttl_seconds: float = 86400) -> None:
+        """Merkt den aktuellen Zeitpunkt für `key` (Silence-Fenster)."""
+
+    @abc.abstractmethod
+    async def last_seen(self, key: str) -> Optional[float]:
+        """Letzter `touch`-Zeitpunkt oder None."""
+
+    @abc.abstractmethod
+    def clear_dedup(self) -> None:
+        """Vergisst alle Dedup-Fingerprints."""
+
+    @abc.abstractmethod
+    def reset(self) -> None:
+        """Verwirft den gesamten Zustand."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+
+class InMemorySuppressionStore(SuppressionStore):
+    """Prozesslokaler Store mit harten Größenlimits (LRU-Verdrängung)."""
+
+    backend = "memory"
+
+    def __init__(self, max_fingerprints: int = 1_000_000, max_keys: int = 200_000):
+        self.max_fingerprints = max_fingerprints
+        self.max_keys = max_keys
+        # fp -> (expires_at, last_ts)
+        self._dedup: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        # key -> {window: [window_index, prev_count, curr_count]}
+        self._counters: "OrderedDict[str, Dict[int, List[int]]]" = OrderedDict()
+        # key -> (expires_at, ts)
+        self._last: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def dedup_hit(self, fingerprint: str, window_seconds: float, refresh: bool = True) -> bool:
+        return self.dedup_hit_sync(fingerprint, window_seconds, refresh)
+
+    def dedup_hit_sync(self, fingerprint: str, window_seconds: float, refresh: bool = True, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        entry = self._dedup.get(fingerprint)
+        hit = entry is not None and entry[0] > now
+        if not hit or refresh:
+            self._dedup[fingerprint] = (now + window_seconds, now)
+        self._dedup.move_to_end(fingerprint)
+        self._evict(self._dedup, self.max_fingerprints)
+        return hit
+
+    async def counts(self, key: str, windows: Sequence[int] = DEFAULT_WINDOWS) -> List[float]:
+        return self.counts_sync(key, windows)
+
+    def counts_sync(self, key: str, windows: Sequence[int] = DEFAULT_WINDOWS, now: Optional[float] = None) -> List[float]:
+        now = time.time() if now is None else now
+        slots = self._counters.get(key)
+        out: List[float] = []
+        for window in windows:
+            slot = slots.get(window) if slots else None
+            if slot is None:
+                out.append(0.0)
+                continue
+            idx = int(now // window)
+            if slot[0] == idx:
+                out.append(_sliding_count(slot[1], slot[2], window, now))
+            elif slot[0] == idx - 1:
+                out.append(_sliding_count(slot[2], 0, window, now))
+            else:
+                out.append(0.0)
+        return out
+
+    async def incr(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS) -> None:
+        self.incr_sync(keys, windows)
+
+    def incr_nowait(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS) -> None:
+        self.incr_sync(keys, windows)
+
+    def incr_sync(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        for key in keys:
+            slots = self._counters.get(key)
+            if slots is None:
+                slots = self._counters[key] = {}
+            for window in windows:
+                idx = int(now // window)
+                slot = slots.get(window)
+                if slot is None:
+                    slots[window] = [idx, 0, 1]
+                elif slot[0] == idx:
+                    slot[2] += 1
+                else:
+                    # Fenster weitergerückt: aktuelles wird vorheriges (nur bei direktem Nachfolger)
+                    slot[1] = slot[2] if slot[0] == idx - 1 else 0
+                    slot[0], slot[2] = idx, 1
+            self._counters.move_to_end(key)
+        self._evict(self._counters, self.max_keys)
+
+    async def touch(self, key: str, ttl_seconds: float = 86400) -> None:
+        self.touch_sync(key, ttl_seconds)
+
+    def touch_sync(self, key: str, ttl_seconds: float = 86400, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._last[key] = (now + ttl_seconds, now)
+        self._last.move_to_end(key)
+        self._evict(self._last, self.max_keys)
+
+    async def last_seen(self, key: str) -> Optional[float]:
+        entry = self._last.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._last.pop(key, None)
+            return None
+        return entry[1]
+
+    def clear_dedup(self) -> None:
+        self._dedup.clear()
+
+    def reset(self) -> None:
+        self._dedup.clear()
+        self._counters.clear()
+        self._last.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "fingerprints": len(self._dedup),
+            "counter_keys": len(self._counters),
+            "silence_keys": len(self._last),
+            "evictions": self.evictions,
+        }
+
+    def _evict(self, data: OrderedDict, cap: int) -> None:
+        while len(data) > cap:
+            data.popitem(last=False)
+            self.evictions += 1
+
+
+class RedisSuppressionStore(SuppressionStore):
+    """
+    Über alle Worker geteilter Store.
+
+    Dedup über `SET NX EX`, Zähler als `INCR` auf `<key>:<window>:<index>` mit
+    Ablauf nach zwei Fenstern, Silence als `SET EX`. Redis begrenzt den Speicher
+    über TTLs. Ohne Verbindung (z.B. Tests) greift der In-Memory-Fallback.
+
+    `clear_dedup()`/`reset()` sind synchron (Aufrufer in der AlertEngine); sie
+    merken das Löschen per Präfix vor. Es läuft sofort als Task, falls ein
+    Event-Loop läuft, spätestens aber vor der nächsten Redis-Operation dieses
+    Prozesses, damit dieser nie alten Zustand liest.
+    """
+
+    backend = "redis"
+
+    def __init__(self, redis_client: Any = None, prefix: str = "alerts:supp", fallback: Optional[InMemorySuppressionStore] = None):
+        if redis_client is None:
+            from app.db.redis_client import redis_client as _rc
+            redis_client = _rc
+        self._redis = redis_client
+        self.prefix = prefix
+        self.fallback = fallback or InMemorySuppressionStore()
+        self._tasks: set = set()
+        self._pending_deletes: List[str] = []  # vorgemerkte Löschmuster (clear_dedup/reset)
+        self._delete_lock = asyncio.Lock()
+
+    async def _client(self):
+        try:
+            ensure = getattr(self._redis, "_ensure_connected", None)
+            if ensure is not None:
+                await ensure()
+            client = getattr(self._redis, "client", self._redis)
+        except Exception:
+            return None
+        if client is not None and (self._pending_deletes or self._delete_lock.locked()):
+            await self._run_pending_deletes(client)
+        return client
+
+    def _k(self, *parts: Any) -> str:
+        return ":".join([self.prefix, *map(str, parts)])
+
+    async def _run_pending_deletes(self, client: Any) -> None:
+        async with self._delete_lock:
+            patterns, self._pending_deletes = self._pending_deletes, []
+            for pattern in patterns:
+                try:
+                    batch: List[Any] = []
+                    async for key in client.scan_iter(match=pattern, count=1000):
+                        batch.append(key)
+                        if len(batch) >= 1000:
+                            await client.delete(*batch)
+                            batch = []
+                    if batch:
+                        await client.delete(*batch)
+                except Exception as e:
+                    logger.warning(f"Redis suppression cleanup for {pattern} failed: {e}")
+
+    def _schedule_delete(self, pattern: str) -> None:
+        self._pending_deletes.append(pattern)
+        try:
+            task = asyncio.get_running_loop().create_task(self._client())
+        except RuntimeError:
+            return  # ohne Loop: vor der nächsten Redis-Operation
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def dedup_hit(self, fingerprint: str, window_seconds: float, refresh: bool = True) -> bool:
+        client = await self._client()
+        if client is None:
+            return await self.fallback.dedup_hit(fingerprint, window_seconds, refresh)
+        key = self._k("dedup", fingerprint)
+        ttl = max(1, int(math.ceil(window_seconds)))
+        try:
+            created = await client.set(key, "1", ex=ttl, nx=True)
+            if not created and refresh:
+                await client.expire(key, ttl)
+            return not created
+        except Exception as e:
+            logger.debug(f"Redis dedup failed, using local state: {e}")
+            return await self.fallback.dedup_hit(fingerprint, window_seconds, refresh)
+
+    async def counts(self, key: str, windows: Sequence[int] = DEFAULT_WINDOWS) -> List[float]:
+        client = await self._client()
+        if client is None:
+            return await self.fallback.counts(key, windows)
+        now = time.time()
+        names: List[str] = []
+        for window in windows:
+            idx = int(now // window)
+            names += [self._k("cnt", key, window, idx - 1), self._k("cnt", key, window, idx)]
+        try:
+            values = await client.mget(names)
+        except Exception as e:
+            logger.debug(f"Redis counter read failed, using local state: {e}")
+            return await self.fallback.counts(key, windows)
+        out: List[float] = []
+        for i, window in enumerate(windows):
+            prev, curr = (int(v or 0) for v in values[2 * i:2 * i + 2])
+            out.append(_sliding_count(prev, curr, window, now))
+        return out
+
+    async def incr(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS) -> None:
+        keys = list(keys)
+        client = await self._client()
+        if client is None:
+            return await self.fallback.incr(keys, windows)
+        now = time.time()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                for window in windows:
+                    name = self._k("cnt", key, window, int(now // window))
+                    pipe.incr(name)
+                    pipe.expire(name, 2 * window)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Redis counter increment failed, using local state: {e}")
+            await self.fallback.incr(keys, windows)
+
+    def incr_nowait(self, keys: Iterable[str], windows: Sequence[int] = DEFAULT_WINDOWS) -> None:
+        keys = list(keys)
+        try:
+            task = asyncio.get_running_loop().create_task(self.incr(keys, windows))
+        except RuntimeError:
+            self.fallback.incr_nowait(keys, windows)
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def touch(self, key: str, ttl_seconds: float = 86400) -> None:
+        client = await self._client()
+        if client is None:
+            return await self.fallback.touch(key, ttl_seconds)
+        try:
+            await client.set(self._k("last", key), repr(time.time()), ex=max(1, int(ttl_seconds)))
+        except Exception as e:
+            logger.debug(f"Redis touch failed, using local state: {e}")
+            await self.fallback.touch(key, ttl_seconds)
+
+    async def last_seen(self, key: str) -> Optional[float]:
+        client = await self._client()
+        if client is None:
+            return await self.fallback.last_seen(key)
+        try:
+            value = await client.get(self._k("last", key))
+            return float(value) if value is not None else None
+        except Exception:
+            return await self.fallback.last_seen(key)
+
+    def clear_dedup(self) -> None:
+        self.fallback.clear_dedup()
+        self._schedule_delete(self._k("dedup", "*"))
+
+    def reset(self) -> None:
+        # Zustand aller Worker liegt unter dem Präfix; per Präfix löschen
+        self.fallback.reset()
+        self._schedule_delete(self._k("*"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "prefix": self.prefix, "fallback": self.fallback.stats()}
+
+
+def create_suppression_store(backend: Optional[str] = None) -> SuppressionStore:
+    """Store gemäß `ALERT_SUPPRESSION_BACKEND` (memory|redis)."""
+    backend = (backend or os.getenv("ALERT_SUPPRESSION_BACKEND", "memory")).lower()
+    if backend == "redis":
+        return RedisSuppressionStore()
+    return InMemorySuppressionStore(
+        max_fingerprints=int(os.getenv("ALERT_SUPPRESSION_MAX_FINGERPRINTS", "1000000")),
+        max_keys=int(os.getenv("ALERT_SUPPRESSION_MAX_KEYS", "200000")),
+    )
@@ -0,0 +1,478 @@
+"""
+Alert Webhook Delivery
+======================
+
+Entkoppelt die Webhook-Zustellung vom Alert-Pfad:
+
+- `enqueue()` ist non-blocking; dispatch_alert wartet nie auf den Empfänger
+- Pro Ziel: eigene bounded Queue, gepoolter Keep-Alive-Client (httpx),
+  feste Anzahl Worker als Concurrency-Limit
+- Batching für Empfänger, die eine JSON-Liste von Alerts annehmen
+- Fehlschläge landen mit exponentiellem Backoff im persistenten Retry-Spool
+  (JSONL), der auch einen Neustart überlebt; mehrere Worker-Prozesse teilen
+  sich den Spool über einen `flock` auf `<spool>.lock`
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+try:
+    from app import metrics  # type: ignore
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+DestinationSpec = Union[str, Dict[str, Any]]
+
+
+def parse_destinations(value: Any) -> List[DestinationSpec]:
+    """
+    Normalisiert ALERT_WEBHOOK_URLS.
+
+    Akzeptiert kommagetrennte URLs oder JSON mit Einstellungen pro Ziel, z.B.
+    `[{"url": "https://siem/hook", "batch_size": 50, "concurrency": 2}, "https://other"]`.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return list(_parse_destinations_str(value.strip()))
+    if isinstance(value, dict):
+        return [value]
+    return [v for v in value if v]
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_destinations_str(value: str) -> Tuple[DestinationSpec, ...]:
+    # Wird pro Alert aufgerufen: JSON nur einmal pro Konfigurationswert parsen
+    if value[:1] in ("[", "{"):
+        try:
+            parsed = json.loads(value)
+        except ValueError as e:
+            logger.error(f"Invalid ALERT_WEBHOOK_URLS JSON: {e}")
+            return ()
+        items = parsed if isinstance(parsed, list) else [parsed]
+        specs: List[DestinationSpec] = []
+        for item in items:
+            if isinstance(item, str) and item.strip():
+                specs.append(item.strip())
+            elif isinstance(item, dict) and item.get("url"):
+                specs.append(item)
+            else:
+                logger.warning(f"Ignoring invalid webhook destination: {item!r}")
+        return tuple(specs)
+    return tuple(u.strip() for u in value.split(",") if u.strip())
+
+
+@dataclass
+class _Destination:
+    """Zustellziel mit eigener Queue, Client und Workern."""
+
+    url: str
+    batch_size: int = 1
+    concurrency: int = 4
+    timeout: float = 5.0
+    queue: Optional[asyncio.Queue] = None
+    client: Any = None
+    workers: List[asyncio.Task] = field(default_factory=list)
+
+
+class WebhookDeliveryService:
+    """
+    Asynchrone Webhook-Zustellung für Alerts
+
+    Ein Eintrag ist `{"url", "payload", "attempts", "due"}`. Der erste Versuch
+    läuft über die Queue des Ziels; jeder weitere über den Spool, dessen
+    Replayer fällige Einträge wieder in die Queue stellt. Nach `max_attempts`
+    wird der Eintrag verworfen (Metrik `status="dead"`).
+    """
+
+    def __init__(
+        self,
+        spool_path: Optional[str] = None,
+        max_queue: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_attempts: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        batch_linger: float = 0.05,
+        replay_interval: float = 1.0,
+    ):
+        self.spool_path = spool_path or os.getenv("ALERT_WEBHOOK_SPOOL_PATH", "data/alert_webhook_spool.jsonl")
+        self.max_queue = max_queue or int(os.getenv("ALERT_WEBHOOK_QUEUE_SIZE", "10000"))
+        self.concurrency = concurrency or int(os.getenv("ALERT_WEBHOOK_CONCURRENCY", "4"))
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.batch_linger = batch_linger
+        self.replay_interval = replay_interval
+        self._destinations: Dict[str, _Destination] = {}
+        self._spool_lock: Optional[asyncio.Lock] = None
+        # Stand des Spools beim letzten Lesen/Schreiben dieses Prozesses und dessen
+        # frühestes `due`; solange beides passt, muss der Replayer nicht neu lesen
+        self._spool_sig: Optional[Tuple[int, int, int]] = None
+        self._spool_next_due: Optional[float] = None
+        self._replayer: Optional[asyncio.Task] = None
+        # Überlauf-Spools aus enqueue(); Referenzen halten, stop() wartet darauf
+        self._spool_tasks: Set[asyncio.Task] = set()
+        self.stats = {"enqueued": 0, "delivered": 0, "failed": 0, "spooled": 0, "dead": 0, "batches": 0}
+
+    # -----------------------------
+    # Konfiguration / Lifecycle
+    # -----------------------------
+    def configure(self, spec: DestinationSpec) -> _Destination:
+        """Registriert ein Ziel (URL oder Dict mit url/batch_size/concurrency/timeout)."""
+        if isinstance(spec, str):
+            spec = {"url": spec}
+        url = str(spec["url"])
+        dest = self._destinations.get(url)
+        if dest is None:
+            dest = _Destination(
+                url=url,
+                batch_size=max(1, int(spec.get("batch_size", 1))),
+                concurrency=max(1, int(spec.get("concurrency", self.concurrency))),
+                timeout=float(spec.get("timeout", 5.0)),
+            )
+            self._destinations[url] = dest
+        return dest
+
+    def _ensure_started(self, dest: _Destination) -> None:
+        if dest.queue is None:
+            dest.queue = asyncio.Queue(maxsize=self.max_queue)
+        if dest.client is None:
+            import httpx  # type: ignore
+
+            dest.client = httpx.AsyncClient(
+                timeout=dest.timeout,
+                limits=httpx.Limits(
+                    max_connections=dest.concurrency,
+                    max_keepalive_connections=dest.concurrency,
+                ),
+            )
+        dest.workers = [w for w in dest.workers if not w.done()]
+        loop = asyncio.get_running_loop()
+        while len(dest.workers) < dest.concurrency:
+            dest.workers.append(loop.create_task(self._worker(dest)))
+        self._ensure_replayer()
+
+    def _ensure_replayer(self) -> None:
+        if self._spool_lock is None:
+            self._spool_lock = asyncio.Lock()
+        if self._replayer is None or self._replayer.done():
+            self._replayer = asyncio.get_running_loop().create_task(self._replay_loop())
+
+    async def start(self, destinations: Iterable[DestinationSpec] = ()) -> None:
+        """Startet Worker für bekannte Ziele und den Spool-Replayer (Reste vom letzten Lauf)."""
+        for spec in destinations:
+            self._ensure_started(self.configure(spec))
+        self._ensure_replayer()
+
+    async def stop(self) -> None:
+        """Stoppt Worker und Replayer; noch nicht zugestellte Einträge wandern in den Spool."""
+        tasks = [w for d in self._destinations.values() for w in d.workers]
+        if self._replayer is not None:
+            tasks.append(self._replayer)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._replayer = None
+
+        leftovers: List[Dict[str, Any]] = []
+        for dest in self._destinations.values():
+            dest.workers = []
+            while dest.queue is not None and not dest.queue.empty():
+                leftovers.append(dest.queue.get_nowait())
+            if dest.client is not None:
+                try:
+                    await dest.client.aclose()
+                except Exception:
+                    pass
+                dest.client = None
+        if leftovers:
+            await self._spool(leftovers)
+        if self._spool_tasks:
+            await asyncio.gather(*list(self._spool_tasks), return_exceptions=True)
+
+    # -----------------------------
+    # Einreihen (Alert-Pfad)
+    # -----------------------------
+    def enqueue(self, destinations: Iterable[DestinationSpec], payload: Dict[str, Any]) -> int:
+        """Reiht `payload` für alle Ziele ein, ohne zu blockieren. Liefert Anzahl eingereihter Ziele."""
+        queued = 0
+        overflow: List[Dict[str, Any]] = []
+        for spec in destinations:
+            try:
+                dest = self.configure(spec)
+                self._ensure_started(dest)
+            except Exception as e:
+                logger.warning(f"Webhook destination unusable: {e}")
+                continue
+            entry = {"url": dest.url, "payload": payload, "attempts": 0, "due": 0.0}
+            try:
+                dest.queue.put_nowait(entry)  # type: ignore[union-attr]
+                queued += 1
+            except asyncio.QueueFull:
+                # Voll: nicht verwerfen, sondern sofort fällig in den Spool
+                overflow.append(entry)
+        self.stats["enqueued"] += queued
+        if overflow:
+            task = asyncio.get_running_loop().create_task(self._spool(overflow))
+            self._spool_tasks.add(task)
+            task.add_done_callback(self._spool_task_done)
+        self._export_queue_sizes()
+        return queued
+
+    def _spool_task_done(self, task: asyncio.Task) -> None:
+        self._spool_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Overflow spool task failed: {task.exception()}")
+
+    # -----------------------------
+    # Zustellung
+    # -----------------------------
+    async def _worker(self, dest: _Destination) -> None:
+        assert dest.queue is not None
+        while True:
+            batch = await self._collect_batch(dest)
+            try:
+                await self._deliver(dest, batch)
+            except asyncio.CancelledError:
+                # Laufender Batch geht beim Shutdown nicht verloren
+                await self._spool(batch)
+                raise
+            except Exception as e:  # pragma: no cover - defensiv
+                logger.error(f"Webhook worker error for {dest.url}: {e}")
+            finally:
+                self._export_queue_sizes()
+
+    async def _collect_batch(self, dest: _Destination) -> List[Dict[str, Any]]:
+        """Erster Eintrag blockierend, danach bis batch_size oder Linger-Timeout."""
+        assert dest.queue is not None
+        batch = [await dest.queue.get()]
+        deadline = time.monotonic() + self.batch_linger
+        while len(batch) < dest.batch_size:
+            try:
+                batch.append(dest.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(dest.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                # Angefangenen Batch direkt spoolen; Zurücklegen könnte an
+                # einer inzwischen vollen Queue scheitern
+                await self._spool(batch)
+                raise
+        return batch
+
+    async def _deliver(self, dest: _Destination, batch: List[Dict[str, Any]]) -> None:
+        body: Any = [e["payload"] for e in batch] if dest.batch_size > 1 else batch[0]["payload"]
+        t0 = time.time()
+        ok = False
+        try:
+            resp = await dest.client.post(dest.url, json=body)
+            ok = 200 <= resp.status_code < 300
+        except Exception as e:
+            logger.debug(f"Webhook delivery to {dest.url} failed: {e}")
+        self._observe(ok, time.time() - t0)
+        if dest.batch_size > 1:
+            self.stats["batches"] += 1
+        if ok:
+            self.stats["delivered"] += len(batch)
+            return
+        self.stats["failed"] += len(batch)
+        retry: List[Dict[str, Any]] = []
+        for entry in batch:
+            entry = dict(entry, attempts=int(entry.get("attempts", 0)) + 1)
+            if entry["attempts"] >= self.max_attempts:
+                self.stats["dead"] += 1
+                self._count("dead")
+                logger.warning(f"Dropping webhook for {dest.url} after {entry['attempts']} attempts")
+                continue
+            entry["due"] = time.time() + self._backoff(entry["attempts"])
+            retry.append(entry)
+        if retry:
+            await self._spool(retry)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+        return delay * (0.8 + random.random() * 0.4)
+
+    # -----------------------------
+    # Persistenter Retry-Spool
+    # -----------------------------
+    async def _spool(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        if self._spool_lock is None:
+            self._spool_lock = asyncio.Lock()
+        lines = "".join(json.dumps(e, default=str) + "\n" for e in entries)
+        next_due = min(float(e.get("due", 0)) for e in entries)
+        try:
+            async with self._spool_lock:
+                await asyncio.to_thread(self._append_spool, lines, next_due)
+            self.stats["spooled"] += len(entries)
+        except Exception as e:
+            logger.error(f"Failed to spool {len(entries)} webhook deliveries: {e}")
+
+    @contextmanager
+    def _spool_file_lock(self) -> Iterator[None]:
+        """Exklusiver Lock über Prozesse hinweg (separate Datei, da der Spool ersetzt wird)."""
+        directory = os.path.dirname(self.spool_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spool_path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _stat_spool(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.spool_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _append_spool(self, lines: str, next_due: float) -> None:
+        with self._spool_file_lock():
+            unchanged = self._stat_spool() == self._spool_sig
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            if unchanged:
+                # Nur eigene Änderung: Stand fortschreiben statt beim nächsten Replay neu zu lesen
+                self._spool_sig = self._stat_spool()
+                if self._spool_next_due is None or next_due < self._spool_next_due:
+                    self._spool_next_due = next_due
+
+    def _spool_unchanged_and_not_due(self, now: float) -> bool:
+        if self._spool_sig != self._stat_spool():
+            return False  # anderer Prozess hat geschrieben (oder erster Lauf)
+        return self._spool_next_due is None or self._spool_next_due > now
+
+    def _take_due(self, now: float) -> List[Dict[str, Any]]:
+        """Liest den Spool, schreibt nicht fällige Einträge zurück, liefert fällige."""
+        if self._spool_sig is not None and self._spool_unchanged_and_not_due(now):
+            return []
+        with self._spool_file_lock():
+            if not os.path.exists(self.spool_path):
+                self._spool_sig, self._spool_next_due = None, None
+                return []
+            with open(self.spool_path, encoding="utf-8") as f:
+                raw = f.readlines()
+            due: List[Dict[str, Any]] = []
+            keep: List[str] = []
+            next_due: Optional[float] = None
+            for line in raw:
+                try:
+                    entry = json.loads(line)
+                except Exception:
+                    continue
+                entry_due = float(entry.get("due", 0))
+                if entry_due <= now:
+                    due.append(entry)
+                else:
+                    keep.append(line)
+                    next_due = entry_due if next_due is None else min(next_due, entry_due)
+            if due:
+                tmp = self.spool_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(keep)
+                os.replace(tmp, self.spool_path)
+            self._spool_sig = self._stat_spool()
+            self._spool_next_due = next_due
+        return due
+
+    async def replay_due(self) -> int:
+        """Stellt fällige Spool-Einträge zurück in die Ziel-Queues."""
+        if self._spool_lock is None:
+            self._spool_lock = asyncio.Lock()
+        async with self._spool_lock:
+            due = await asyncio.to_thread(self._take_due, time.time())
+        requeued = 0
+        overflow: List[Dict[str, Any]] = []
+        for entry in due:
+            dest = self.configure(entry["url"])
+            self._ensure_started(dest)
+            try:
+                dest.queue.put_nowait(entry)  # type: ignore[union-attr]
+                requeued += 1
+            except asyncio.QueueFull:
+                entry["due"] = time.time() + self.replay_interval
+                overflow.append(entry)
+        await self._spool(overflow)
+        return requeued
+
+    async def _replay_loop(self) -> None:
+        while True:
+            try:
+                await self.replay_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook spool replay failed: {e}")
+            await asyncio.sleep(self.replay_interval)
+
+    # -----------------------------
+    # Metriken
+    # -----------------------------
+    def _observe(self, ok: bool, latency: float) -> None:
+        self._count("ok" if ok else "error")
+        try:
+            if metrics is not None and getattr(metrics, "WEBHOOK_NOTIFICATION_LATENCY", None):
+                metrics.WEBHOOK_NOTIFICATION_LATENCY.observe(latency)
+        except Exception:
+            pass
+
+    def _count(self, status: str) -> None:
+        try:
+            if metrics is not None and getattr(metrics, "WEBHOOK_NOTIFICATIONS_SENT", None):
+                metrics.WEBHOOK_NOTIFICATIONS_SENT.labels(status=status).inc()
+        except Exception:
+            pass
+
+    def _export_queue_sizes(self) -> None:
+        try:
+            gauge = getattr(metrics, "WEBHOOK_DELIVERY_QUEUE_SIZE", None) if metrics is not None else None
+            if gauge is None:
+                return
+            for dest in self._destinations.values():
+                if dest.queue is not None:
+                    gauge.labels(destination=dest.url).set(dest.queue.qsize())
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queues": {
+                url: d.queue.qsize() if d.queue is not None else 0
+                for url, d in self._destinations.items()
+            },
+        }
+
+
+# Singleton
+webhook_delivery = WebhookDeliveryService()
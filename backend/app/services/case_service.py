@@ -25,6 +25,7 @@ from app.models.case import (
 )
 from app.db.session import SessionLocal
 from app.messaging.kafka_client import KafkaTopics
+from app.services.kpi_aggregates import kpi_aggregates
 
 logger = logging.getLogger(__name__)
 
@@ -240,6 +241,7 @@ class CaseManagementService:
 
             # Track changes for events
             changes = []
+            closed_now = False
 
             if title and title != case.title:
                 changes.append(f"Title changed to '{title}'")
@@ -256,6 +258,7 @@ class CaseManagementService:
 
                 if status == CaseStatus.CLOSED:
                     case.closed_at = datetime.utcnow()
+                    closed_now = True
 
             if priority and priority != case.priority:
                 old_priority = case.priority.value
@@ -291,6 +294,9 @@ class CaseManagementService:
 
             db.commit()
 
+            if closed_now:
+                kpi_aggregates.record_case_closed(case.created_at, case.closed_at)
+
             # Trigger audit event
             self._trigger_audit_event(case_id, "case_updated", {
                 "changes": changes,
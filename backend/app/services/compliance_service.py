@@ -86,6 +86,19 @@ class ComplianceService:
         self._cache[k] = (now + self._ttl_seconds, res)
         return res
 
+    def screen_many(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], ScreeningResult]:
+        """Screen many (chain, address) pairs in one pass.
+
+        Duplicates are screened once; cache hits are served from a single
+        expiry snapshot and only misses run the watchlist/pattern checks.
+        """
+        out: Dict[Tuple[str, str], ScreeningResult] = {}
+        now = time.time()
+        for chain, address in dict.fromkeys(pairs):
+            ent = self._cache.get(self._key(chain, address))
+            out[(chain, address)] = ent[1] if ent and ent[0] > now else self.screen(chain, address)
+        return out
+
     async def add_watch(self, chain: str, address: str, reason: str = "manual") -> Dict[str, Any]:
         # persist to Postgres repo
         return await repo_add_watch(chain, address, reason)
@@ -2,9 +2,15 @@ from __future__ import annotations
 import os
 import io
 import json
+import asyncio
 import hashlib
+import logging
 import datetime as dt
-from typing import Optional, Dict, Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
@@ -25,8 +31,14 @@ except Exception:  # pragma: no cover
 from app.db.postgres import postgres_client
 from app.metrics import AUDIT_EVENTS_TOTAL
 
+logger = logging.getLogger(__name__)
+
 Payload = Union[bytes, str, Dict[str, Any]]
 
+GENESIS_HASH = "0" * 64
+# Advisory-Lock-Key für den Chain-Head (serialisiert Batches über Prozesse hinweg)
+_CHAIN_LOCK_KEY = 0x45564944
+
 
 def _to_bytes(payload: Payload) -> bytes:
     if isinstance(payload, bytes):
@@ -43,6 +55,85 @@ def _hash_chain(prev_hash: str, payload_bytes: bytes) -> str:
     return h.hexdigest()
 
 
+def _merkle_leaf(record_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(record_hash)).digest()
+
+
+def _merkle_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _merkle_levels(record_hashes: List[str]) -> List[List[bytes]]:
+    """Baut alle Ebenen eines Merkle-Baums (Blätter zuerst).
+
+    Ein ungerader letzter Knoten wird unverändert in die nächste Ebene übernommen
+    (kein Duplizieren, vermeidet mehrdeutige Bäume).
+    """
+    level = [_merkle_leaf(h) for h in record_hashes]
+    levels = [level]
+    while len(level) > 1:
+        nxt = [_merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2 == 1:
+            nxt.append(level[-1])
+        levels.append(nxt)
+        level = nxt
+    return levels
+
+
+def _merkle_proof(levels: List[List[bytes]], index: int) -> List[Dict[str, str]]:
+    proof: List[Dict[str, str]] = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"side": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+        index //= 2
+    return proof
+
+
+def verify_inclusion_proof(record_hash: str, proof: List[Dict[str, str]], merkle_root: str) -> bool:
+    """Prüft, ob ein Record-Hash über den Proof im signierten Merkle-Root enthalten ist."""
+    try:
+        node = _merkle_leaf(record_hash)
+        for step in proof:
+            sibling = bytes.fromhex(step["hash"])
+            node = _merkle_node(sibling, node) if step["side"] == "left" else _merkle_node(node, sibling)
+        return node.hex() == merkle_root
+    except Exception:
+        return False
+
+
+def _batch_notarization_bytes(batch: Dict[str, Any]) -> bytes:
+    data = {
+        "merkle_root": batch["merkle_root"],
+        "prev_hash": batch["prev_hash"],
+        "last_hash": batch["last_hash"],
+        "size": batch["size"],
+        "ts": batch["ts"],
+    }
+    return json.dumps(data, sort_keys=True).encode("utf-8")
+
+
+@dataclass
+class _PendingAppend:
+    event_type: str
+    payload: Payload
+    payload_b: bytes
+    meta: Dict[str, Any]
+    future: "asyncio.Future[Dict[str, Any]]"
+    prev_hash: str = ""
+    hash: str = ""
+    proof: List[Dict[str, str]] = field(default_factory=list)
+
+    def payload_json(self) -> Any:
+        if isinstance(self.payload, bytes):
+            return {"_bytes": True}
+        text = self.payload_b.decode("utf-8", "ignore")
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+
+
 def _generate_rsa_keypair() -> tuple[str, str]:
     """Generate RSA keypair for digital signatures"""
     private_key = rsa.generate_private_key(
@@ -66,13 +157,27 @@ def _generate_rsa_keypair() -> tuple[str, str]:
     return private_pem, public_pem
 
 
-def _sign_data(private_key_pem: str, data: bytes) -> str:
-    """Sign data with RSA-PSS (eIDAS compliant)"""
-    private_key = serialization.load_pem_private_key(
+@lru_cache(maxsize=8)
+def _load_private_key(private_key_pem: str):
+    # PEM-Parsing inkl. RSA-Konsistenzprüfung ist teurer als die Signatur selbst
+    return serialization.load_pem_private_key(
         private_key_pem.encode(),
         password=None,
         backend=default_backend()
     )
+
+
+@lru_cache(maxsize=64)
+def _load_public_key(public_key_pem: str):
+    return serialization.load_pem_public_key(
+        public_key_pem.encode(),
+        backend=default_backend()
+    )
+
+
+def _sign_data(private_key_pem: str, data: bytes) -> str:
+    """Sign data with RSA-PSS (eIDAS compliant)"""
+    private_key = _load_private_key(private_key_pem)
     
     signature = private_key.sign(
         data,
@@ -89,10 +194,7 @@ def _sign_data(private_key_pem: str, data: bytes) -> str:
 def _verify_signature(public_key_pem: str, data: bytes, signature_b64: str) -> bool:
     """Verify RSA-PSS signature"""
     try:
-        public_key = serialization.load_pem_public_key(
-            public_key_pem.encode(),
-            backend=default_backend()
-        )
+        public_key = _load_public_key(public_key_pem)
         
         signature = base64.b64decode(signature_b64)
         
@@ -110,6 +212,180 @@ def _verify_signature(public_key_pem: str, data: bytes, signature_b64: str) -> b
         return False
 
 
+def _legacy_notarization_bytes(event_type: str, prev_hash: str, record_hash: str, ts: str, payload_b: bytes) -> bytes:
+    """Notarization-Daten der per-Record signierten Einträge (vor Group Commit)."""
+    notarization_data = {
+        "event_type": event_type,
+        "prev_hash": prev_hash,
+        "hash": record_hash,
+        "ts": ts,
+        "payload_hash": hashlib.sha256(payload_b).hexdigest()
+    }
+    return json.dumps(notarization_data, sort_keys=True).encode('utf-8')
+
+
+def _checkpoint_bytes(checkpoint: Dict[str, Any]) -> bytes:
+    data = {k: v for k, v in checkpoint.items() if k not in ("checkpoint_id", "digital_signature", "public_key")}
+    return json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+
+
+# -----------------------------
+# Parallele Signaturprüfung
+# -----------------------------
+# Unterhalb dieser Anzahl lohnt sich der Prozess-Pool nicht (Pickling/IPC)
+_PARALLEL_VERIFY_MIN = 64
+_verify_pool: Optional[ProcessPoolExecutor] = None
+_verify_workers = 0
+
+
+def _verify_signature_jobs(jobs: List[Tuple[str, bytes, str]]) -> List[bool]:
+    """Läuft im Worker-Prozess: (public_key_pem, data, signature_b64) -> ok"""
+    return [_verify_signature(pk, data, sig) for pk, data, sig in jobs]
+
+
+def _get_verify_pool() -> Optional[ProcessPoolExecutor]:
+    global _verify_pool, _verify_workers
+    if _verify_pool is None:
+        # 0 (oder 1) = ohne Pool im Thread prüfen; Default: höchstens 2 Prozesse
+        v = os.getenv("EVIDENCE_VERIFY_WORKERS")
+        workers = int(v) if v not in (None, "") else min(2, os.cpu_count() or 1)
+        if workers <= 1:
+            return None
+        _verify_pool = ProcessPoolExecutor(max_workers=workers)
+        _verify_workers = workers
+    return _verify_pool
+
+
+def shutdown_verify_pool() -> None:
+    """Beendet den Prüf-Pool (App-Shutdown); der nächste große Chunk baut ihn neu auf"""
+    global _verify_pool
+    pool, _verify_pool = _verify_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _verify_signatures(jobs: List[Tuple[str, bytes, str]]) -> List[bool]:
+    """Prüft Signaturen eines Chunks; große Chunks verteilt auf den Prozess-Pool."""
+    if not jobs:
+        return []
+    pool = _get_verify_pool() if len(jobs) >= _PARALLEL_VERIFY_MIN else None
+    if pool is not None:
+        loop = asyncio.get_running_loop()
+        size = -(-len(jobs) // _verify_workers)
+        try:
+            parts = await asyncio.gather(*[
+                loop.run_in_executor(pool, _verify_signature_jobs, jobs[i:i + size])
+                for i in range(0, len(jobs), size)
+            ])
+            return [ok for part in parts for ok in part]
+        except BrokenProcessPool as e:
+            # Abgestürzter Worker: Pool verwerfen (wird beim nächsten Chunk neu gebaut)
+            logger.warning("Evidence signature pool broken, verifying in thread: %s", e)
+            if _verify_pool is pool:
+                shutdown_verify_pool()
+        except Exception as e:
+            logger.warning("Evidence signature pool failed, verifying in thread: %s", e)
+    return await asyncio.to_thread(_verify_signature_jobs, jobs)
+
+
+class _ChainVerifier:
+    """
+    Streaming-Prüfung einer Hash-Kette.
+
+    Hash-Verkettung und Inclusion-Proofs werden sofort geprüft; Signaturen werden
+    pro Chunk gesammelt (Batch-Signaturen einmal pro Merkle-Root) und in `drain`
+    gebündelt verifiziert.
+    """
+
+    _MESSAGES = {
+        "db": (
+            "Hash mismatch at seq {pos}: expected {expected}, got {got}",
+            "Invalid batch signature or inclusion proof at seq {pos}",
+            "Invalid signature at seq {pos}",
+        ),
+        "file": (
+            "File hash mismatch at line {pos}: expected {expected}, got {got}",
+            "File invalid batch signature or inclusion proof at line {pos}",
+            "File invalid signature at line {pos}",
+        ),
+    }
+
+    def __init__(self, scope: str, prev_hash: str = GENESIS_HASH):
+        self.scope = scope
+        self.prev_hash = prev_hash
+        self.issues: List[str] = []
+        self.records = 0
+        self.verified_signatures = 0
+        self._hash_msg, self._batch_msg, self._sig_msg = self._MESSAGES[scope]
+        self._root_ok: Dict[str, bool] = {}
+        self._jobs: Dict[str, Tuple[str, bytes, str]] = {}
+        self._pending: List[Tuple[Any, str, str]] = []  # (pos, job key, message)
+
+    def check(
+        self,
+        pos: Any,
+        event_type: str,
+        record_hash: str,
+        payload_b: bytes,
+        ts: str,
+        batch: Optional[Dict[str, Any]] = None,
+        proof: Any = None,
+        signature: Optional[str] = None,
+        public_key: Optional[str] = None,
+    ) -> None:
+        self.records += 1
+        expected = _hash_chain(self.prev_hash, payload_b)
+        if record_hash != expected:
+            self.issues.append(self._hash_msg.format(pos=pos, expected=expected, got=record_hash))
+
+        if batch is not None:
+            # Group-Commit-Records: Inclusion-Proof sofort, Batch-Signatur einmal pro Root
+            root = batch.get("merkle_root")
+            if isinstance(proof, str):
+                proof = json.loads(proof)
+            if not root or not verify_inclusion_proof(record_hash, proof or [], root):
+                self.issues.append(self._batch_msg.format(pos=pos))
+            else:
+                key = "batch:" + root
+                if key not in self._root_ok and key not in self._jobs:
+                    self._jobs[key] = (
+                        batch.get("public_key") or "",
+                        _batch_notarization_bytes(batch),
+                        batch.get("digital_signature") or "",
+                    )
+                self._pending.append((pos, key, self._batch_msg))
+        elif signature and public_key:
+            key = f"record:{pos}"
+            self._jobs[key] = (
+                public_key,
+                _legacy_notarization_bytes(event_type, self.prev_hash, record_hash, ts, payload_b),
+                signature,
+            )
+            self._pending.append((pos, key, self._sig_msg))
+
+        self.prev_hash = record_hash
+
+    @property
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    async def drain(self) -> None:
+        keys = list(self._jobs)
+        results = await _verify_signatures([self._jobs[k] for k in keys])
+        self._root_ok.update(zip(keys, results))
+        for pos, key, msg in self._pending:
+            if self._root_ok.get(key):
+                self.verified_signatures += 1
+            else:
+                self.issues.append(msg.format(pos=pos))
+        self._jobs.clear()
+        self._pending.clear()
+        # Nur Batch-Roots cachen (Batches können über Chunk-Grenzen reichen)
+        self._root_ok = {k: v for k, v in self._root_ok.items() if k.startswith("batch:")}
+        if len(self._root_ok) > 10_000:
+            self._root_ok.clear()
+
+
 class EvidenceVault:
     """
     Evidence Vault (Production-Ready): Append-only Hash-Kette mit eIDAS-kompatibler Notarization.
@@ -127,10 +403,42 @@ class EvidenceVault:
       - digital_signature TEXT (neu: eIDAS-kompatibel)
       - public_key TEXT (neu: für Verifikation)
       - notarization_ts TIMESTAMPTZ (neu: Notarization-Zeitstempel)
+      - batch_id BIGINT (Group-Commit-Batch)
+      - leaf_index INT / merkle_proof JSONB (Inclusion-Proof gegen den Batch-Root)
+
+    Schema (Postgres): evidence_batches
+      - batch_id BIGSERIAL PRIMARY KEY
+      - merkle_root, prev_hash, last_hash, size, ts
+      - digital_signature, public_key, anchor_tx
+
+    Schema (Postgres): evidence_checkpoints
+      - last_seq, last_hash, total_records, verified_signatures, ts
+      - digital_signature, public_key (vom Vault signierter Prüfstand)
+
+    Group Commit: `append` reiht Records in eine Queue ein; ein einzelner Writer
+    bildet daraus Batches (bis `max_batch`), verkettet die Hashes im Speicher,
+    signiert pro Batch einmal den Merkle-Root (ein RSA-Sign, ein Anchor) und
+    liefert jedem Aufrufer seinen Record inkl. Inclusion-Proof zurück.
     """
 
-    def __init__(self, file_fallback_path: str = "data/evidence_vault.jsonl"):
+    def __init__(
+        self,
+        file_fallback_path: str = "data/evidence_vault.jsonl",
+        max_batch: Optional[int] = None,
+        max_pending: int = 100_000,
+    ):
         self.file_fallback_path = file_fallback_path
+        self.max_batch = max(1, int(max_batch or os.getenv("EVIDENCE_VAULT_MAX_BATCH", "1024")))
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._anchor_tasks: set = set()
+        # Chain-Head des File-Fallbacks (vom Writer gepflegt)
+        self._file_head: Optional[str] = None
+        # Signierte Verifikations-Checkpoints des File-Fallbacks
+        self.checkpoint_path = file_fallback_path + ".checkpoints.jsonl"
+        self.verify_chunk = max(1, int(os.getenv("EVIDENCE_VERIFY_CHUNK", "5000")))
+        self.stats = {"records": 0, "batches": 0, "signatures": 0}
         self.private_key = os.getenv("EVIDENCE_VAULT_PRIVATE_KEY")
         self.public_key = os.getenv("EVIDENCE_VAULT_PUBLIC_KEY")
         
@@ -215,6 +523,31 @@ class EvidenceVault:
                         public_key TEXT,
                         notarization_ts TIMESTAMPTZ
                     );
+                    CREATE TABLE IF NOT EXISTS evidence_batches (
+                        batch_id BIGSERIAL PRIMARY KEY,
+                        merkle_root TEXT NOT NULL,
+                        prev_hash TEXT NOT NULL,
+                        last_hash TEXT NOT NULL,
+                        size INT NOT NULL,
+                        ts TEXT NOT NULL,
+                        digital_signature TEXT NOT NULL,
+                        public_key TEXT NOT NULL,
+                        anchor_tx TEXT
+                    );
+                    ALTER TABLE evidence_chain ADD COLUMN IF NOT EXISTS batch_id BIGINT;
+                    ALTER TABLE evidence_chain ADD COLUMN IF NOT EXISTS leaf_index INT;
+                    ALTER TABLE evidence_chain ADD COLUMN IF NOT EXISTS merkle_proof JSONB;
+                    CREATE INDEX IF NOT EXISTS idx_evidence_chain_batch ON evidence_chain(batch_id);
+                    CREATE TABLE IF NOT EXISTS evidence_checkpoints (
+                        checkpoint_id BIGSERIAL PRIMARY KEY,
+                        last_seq BIGINT NOT NULL,
+                        last_hash TEXT NOT NULL,
+                        total_records BIGINT NOT NULL,
+                        verified_signatures BIGINT NOT NULL,
+                        ts TEXT NOT NULL,
+                        digital_signature TEXT NOT NULL,
+                        public_key TEXT NOT NULL
+                    );
                     """
                 )
         except Exception:
@@ -222,190 +555,470 @@ class EvidenceVault:
             pass
 
     async def append(self, event_type: str, payload: Payload, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        meta = meta or {}
-        payload_b = _to_bytes(payload)
-        now = dt.datetime.utcnow().isoformat()
-        prev = "0" * 64
+        """Reiht einen Record ein und wartet auf den Group-Commit seines Batches."""
+        loop = asyncio.get_running_loop()
+        item = _PendingAppend(
+            event_type=event_type,
+            payload=payload,
+            payload_b=_to_bytes(payload),
+            meta=meta or {},
+            future=loop.create_future(),
+        )
+        self._ensure_writer()
+        assert self._queue is not None
+        await self._queue.put(item)
+        return await item.future
+
+    def _ensure_writer(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.get_running_loop().create_task(self._writer_loop())
+
+    async def _writer_loop(self) -> None:
+        """Einziger Writer: nimmt alles Wartende (bis max_batch) als einen Batch."""
+        assert self._queue is not None
+        while True:
+            batch: List[_PendingAppend] = [await self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                results = await self._commit_batch(batch)
+                for item, rec in zip(batch, results):
+                    if not item.future.done():
+                        item.future.set_result(rec)
+            except Exception as e:
+                logger.error(f"Evidence batch commit failed: {e}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _link_batch(self, batch: List[_PendingAppend], prev: str) -> Dict[str, Any]:
+        """Verkettet die Records im Speicher, baut den Merkle-Baum und signiert den Root."""
+        for item in batch:
+            item.prev_hash = prev
+            item.hash = _hash_chain(prev, item.payload_b)
+            prev = item.hash
+        levels = _merkle_levels([item.hash for item in batch])
+        for idx, item in enumerate(batch):
+            item.proof = _merkle_proof(levels, idx)
+        info: Dict[str, Any] = {
+            "merkle_root": levels[-1][0].hex(),
+            "prev_hash": batch[0].prev_hash,
+            "last_hash": prev,
+            "size": len(batch),
+            "ts": dt.datetime.utcnow().isoformat(),
+        }
+        info["digital_signature"] = _sign_data(self.private_key, _batch_notarization_bytes(info))
+        info["public_key"] = self.public_key
+        self.stats["signatures"] += 1
+        return info
+
+    async def _commit_batch(self, batch: List[_PendingAppend]) -> List[Dict[str, Any]]:
+        results: Optional[List[Dict[str, Any]]] = None
+        if postgres_client and postgres_client.pool:
+            try:
+                results = await self._commit_batch_db(batch)
+            except Exception as e:
+                logger.warning(f"Evidence DB commit failed, using file fallback: {e}")
+        if results is None:
+            results = self._commit_batch_file(batch)
+        self.stats["records"] += len(batch)
+        self.stats["batches"] += 1
         try:
-            if postgres_client and postgres_client.pool:
-                async with postgres_client.acquire() as conn:
-                    row = await conn.fetchrow("SELECT hash FROM evidence_chain ORDER BY seq DESC LIMIT 1")
-                    if row and row["hash"]:
-                        prev = str(row["hash"])[:64]
-                    current = _hash_chain(prev, payload_b)
-                    
-                    # Create notarization data
-                    notarization_data = {
-                        "event_type": event_type,
-                        "prev_hash": prev,
-                        "hash": current,
-                        "ts": now,
-                        "payload_hash": hashlib.sha256(payload_b).hexdigest()
-                    }
-                    notarization_bytes = json.dumps(notarization_data, sort_keys=True).encode('utf-8')
-                    
-                    # Digital signature (eIDAS compliant)
-                    digital_signature = _sign_data(self.private_key, notarization_bytes)
-                    
-                    rec = await conn.fetchrow(
-                        """
-                        INSERT INTO evidence_chain(event_type, prev_hash, hash, meta, payload, digital_signature, public_key, notarization_ts)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, NOW())
-                        RETURNING id, seq, ts, event_type, prev_hash, hash, anchor_tx, digital_signature, public_key, notarization_ts
-                        """,
-                        event_type,
-                        prev,
-                        current,
-                        json.dumps(meta, default=str),
-                        json.loads(payload_b.decode("utf-8", "ignore")) if not isinstance(payload, bytes) else {"_bytes": True},
-                        digital_signature,
-                        self.public_key,
-                    )
-                    try:
-                        AUDIT_EVENTS_TOTAL.labels(event_type="evidence_append", severity="info").inc()
-                    except Exception:
-                        pass
-                    # On-Chain Anchoring (best-effort, non-fatal)
-                    result = dict(rec)
-                    try:
-                        anchor_tx = await self._anchor_on_chain(current)
-                    except Exception:
-                        anchor_tx = None
-                    if anchor_tx:
-                        try:
-                            await conn.execute(
-                                "UPDATE evidence_chain SET anchor_tx = $1 WHERE hash = $2",
-                                anchor_tx,
-                                current,
-                            )
-                        except Exception:
-                            pass
-                        result["anchor_tx"] = anchor_tx
-                    return result
+            AUDIT_EVENTS_TOTAL.labels(event_type="evidence_append", severity="info").inc(len(batch))
         except Exception:
             pass
-        # Fallback: File append-only JSONL
-        current = _hash_chain(prev, payload_b)
-        
-        # Create notarization data for file fallback
-        notarization_data = {
-            "event_type": event_type,
-            "prev_hash": prev,
-            "hash": current,
-            "ts": now,
-            "payload_hash": hashlib.sha256(payload_b).hexdigest()
-        }
-        notarization_bytes = json.dumps(notarization_data, sort_keys=True).encode('utf-8')
-        digital_signature = _sign_data(self.private_key, notarization_bytes)
-        
-        # Best-effort anchoring (file mode)
+        return results
+
+    async def _commit_batch_db(self, batch: List[_PendingAppend]) -> List[Dict[str, Any]]:
+        async with postgres_client.acquire() as conn:
+            async with conn.transaction():
+                # Head unter Advisory-Lock lesen: andere Prozesse können nicht dazwischen schreiben
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", _CHAIN_LOCK_KEY)
+                row = await conn.fetchrow("SELECT hash FROM evidence_chain ORDER BY seq DESC LIMIT 1")
+                prev = str(row["hash"])[:64] if row and row["hash"] else GENESIS_HASH
+                info = self._link_batch(batch, prev)
+                batch_id = await conn.fetchval(
+                    """
+                    INSERT INTO evidence_batches(merkle_root, prev_hash, last_hash, size, ts, digital_signature, public_key)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    RETURNING batch_id
+                    """,
+                    info["merkle_root"], info["prev_hash"], info["last_hash"], info["size"], info["ts"],
+                    info["digital_signature"], info["public_key"],
+                )
+                rows = await conn.fetch(
+                    """
+                    INSERT INTO evidence_chain(event_type, prev_hash, hash, meta, payload, batch_id, leaf_index, merkle_proof, notarization_ts)
+                    SELECT t.event_type, t.prev_hash, t.hash, t.meta::jsonb, t.payload::jsonb, $6, t.leaf_index, t.proof::jsonb, NOW()
+                    FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $7::int[], $8::text[])
+                        AS t(event_type, prev_hash, hash, meta, payload, leaf_index, proof)
+                    RETURNING id, seq, ts, event_type, prev_hash, hash, notarization_ts
+                    """,
+                    [i.event_type for i in batch],
+                    [i.prev_hash for i in batch],
+                    [i.hash for i in batch],
+                    [json.dumps(i.meta, default=str) for i in batch],
+                    [json.dumps(i.payload_json(), default=str) for i in batch],
+                    batch_id,
+                    list(range(len(batch))),
+                    [json.dumps(i.proof) for i in batch],
+                )
+        by_hash = {r["hash"]: dict(r) for r in rows}
+        info["batch_id"] = batch_id
+        self._schedule_anchor(info)
+        return [self._result(by_hash[i.hash], i, idx, info) for idx, i in enumerate(batch)]
+
+    def _commit_batch_file(self, batch: List[_PendingAppend]) -> List[Dict[str, Any]]:
+        if self._file_head is None:
+            last = self._read_file_head()
+            self._file_head = last["hash"] if last else GENESIS_HASH
+        info = self._link_batch(batch, self._file_head)
+        now = info["ts"]
+        records = []
+        for idx, item in enumerate(batch):
+            records.append(self._result({
+                "ts": now,
+                "event_type": item.event_type,
+                "prev_hash": item.prev_hash,
+                "hash": item.hash,
+                "meta": item.meta,
+                "payload": item.payload_json(),
+                "anchor_tx": None,
+                "notarization_ts": now,
+            }, item, idx, info))
+        try:
+            with io.open(self.file_fallback_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records))
+            self._file_head = info["last_hash"]
+        except Exception as e:
+            logger.error(f"Evidence file append failed: {e}")
+        self._schedule_anchor(info)
+        return records
+
+    @staticmethod
+    def _result(base: Dict[str, Any], item: _PendingAppend, idx: int, info: Dict[str, Any]) -> Dict[str, Any]:
+        base.update({
+            "batch_id": info.get("batch_id"),
+            "leaf_index": idx,
+            "merkle_root": info["merkle_root"],
+            "merkle_proof": item.proof,
+            "batch_size": info["size"],
+            "batch_ts": info["ts"],
+            "batch_prev_hash": info["prev_hash"],
+            "batch_last_hash": info["last_hash"],
+            "digital_signature": info["digital_signature"],
+            "public_key": info["public_key"],
+        })
+        return base
+
+    def _schedule_anchor(self, info: Dict[str, Any]) -> None:
+        """Ein Anchor pro Batch (Merkle-Root), im Hintergrund; blockiert den Writer nicht."""
+        task = asyncio.get_running_loop().create_task(self._anchor_batch(info))
+        self._anchor_tasks.add(task)
+        task.add_done_callback(self._anchor_tasks.discard)
+
+    async def _anchor_batch(self, info: Dict[str, Any]) -> None:
         try:
-            anchor_tx = await self._anchor_on_chain(current)
+            anchor_tx = await self._anchor_on_chain(info["merkle_root"])
         except Exception:
             anchor_tx = None
-        record = {
-            "ts": now,
-            "event_type": event_type,
-            "prev_hash": prev,
-            "hash": current,
-            "meta": meta,
-            "payload": json.loads(payload_b.decode("utf-8", "ignore")) if not isinstance(payload, bytes) else {"_bytes": True},
-            "anchor_tx": anchor_tx,
-            "digital_signature": digital_signature,
-            "public_key": self.public_key,
-            "notarization_ts": now,
+        if not anchor_tx or info.get("batch_id") is None:
+            return
+        try:
+            async with postgres_client.acquire() as conn:
+                await conn.execute(
+                    "UPDATE evidence_batches SET anchor_tx = $1 WHERE batch_id = $2", anchor_tx, info["batch_id"]
+                )
+                await conn.execute(
+                    "UPDATE evidence_chain SET anchor_tx = $1 WHERE batch_id = $2", anchor_tx, info["batch_id"]
+                )
+        except Exception:
+            pass
+
+    def _read_file_head(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.file_fallback_path):
+            return None
+        last = None
+        with io.open(self.file_fallback_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    last = line
+        return json.loads(last) if last else None
+
+    async def flush(self) -> None:
+        """Wartet, bis alle eingereihten Records committed sind (z.B. beim Shutdown)."""
+        if self._queue is not None:
+            await self._queue.join()
+        if self._anchor_tasks:
+            await asyncio.gather(*list(self._anchor_tasks), return_exceptions=True)
+
+    @staticmethod
+    async def _load_batches(conn, batch_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not batch_ids:
+            return {}
+        try:
+            rows = await conn.fetch("SELECT * FROM evidence_batches WHERE batch_id = ANY($1::bigint[])", batch_ids)
+        except Exception:
+            return {}
+        return {r["batch_id"]: dict(r) for r in rows}
+
+    @staticmethod
+    def _file_batch_info(rec: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "merkle_root": rec.get("merkle_root"),
+            "prev_hash": rec.get("batch_prev_hash"),
+            "last_hash": rec.get("batch_last_hash"),
+            "size": rec.get("batch_size"),
+            "ts": rec.get("batch_ts"),
+            "digital_signature": rec.get("digital_signature"),
+            "public_key": rec.get("public_key"),
         }
+
+    @staticmethod
+    def _verify_batch_member(record_hash: str, proof: Any, batch: Dict[str, Any], sig_cache: Dict[str, bool]) -> bool:
+        """Batch-Signatur (einmal pro Batch geprüft) und Inclusion-Proof des Records."""
+        root = batch.get("merkle_root")
+        if not root:
+            return False
+        sig_ok = sig_cache.get(root)
+        if sig_ok is None:
+            sig_ok = _verify_signature(
+                batch.get("public_key") or "", _batch_notarization_bytes(batch), batch.get("digital_signature") or ""
+            )
+            sig_cache[root] = sig_ok
+        if isinstance(proof, str):
+            proof = json.loads(proof)
+        return sig_ok and verify_inclusion_proof(record_hash, proof or [], root)
+
+    # -----------------------------
+    # Verifikations-Checkpoints
+    # -----------------------------
+    def _sign_checkpoint(self, checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+        checkpoint["digital_signature"] = _sign_data(self.private_key, _checkpoint_bytes(checkpoint))
+        checkpoint["public_key"] = self.public_key
+        return checkpoint
+
+    def _checkpoint_trusted(self, checkpoint: Optional[Dict[str, Any]]) -> bool:
+        """Nur Checkpoints, die mit dem Schlüssel dieses Vaults signiert wurden."""
+        if not checkpoint or checkpoint.get("public_key") != self.public_key:
+            return False
+        return _verify_signature(self.public_key, _checkpoint_bytes(checkpoint), checkpoint.get("digital_signature") or "")
+
+    async def _load_db_checkpoint(self, conn) -> Optional[Dict[str, Any]]:
         try:
-            with io.open(self.file_fallback_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
-            try:
-                AUDIT_EVENTS_TOTAL.labels(event_type="evidence_append", severity="info").inc()
-            except Exception:
-                pass
+            row = await conn.fetchrow("SELECT * FROM evidence_checkpoints ORDER BY checkpoint_id DESC LIMIT 1")
+        except Exception:
+            return None
+        checkpoint = dict(row) if row else None
+        if not self._checkpoint_trusted(checkpoint):
+            return None
+        # Checkpoint-Record muss noch unverändert sein, sonst volle Prüfung
+        head = await conn.fetchrow("SELECT hash FROM evidence_chain WHERE seq = $1", checkpoint["last_seq"])
+        if not head or head["hash"] != checkpoint["last_hash"]:
+            logger.warning("Evidence checkpoint at seq %s no longer matches the chain", checkpoint["last_seq"])
+            return None
+        return checkpoint
+
+    async def _save_db_checkpoint(self, conn, checkpoint: Dict[str, Any]) -> bool:
+        self._sign_checkpoint(checkpoint)
+        try:
+            await conn.execute(
+                """
+                INSERT INTO evidence_checkpoints
+                    (last_seq, last_hash, total_records, verified_signatures, ts, digital_signature, public_key)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                """,
+                checkpoint["last_seq"], checkpoint["last_hash"], checkpoint["total_records"],
+                checkpoint["verified_signatures"], checkpoint["ts"],
+                checkpoint["digital_signature"], checkpoint["public_key"],
+            )
+            return True
+        except Exception as e:
+            logger.warning("Evidence checkpoint could not be saved: %s", e)
+            return False
+
+    def _load_file_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            last = None
+            with io.open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        last = line
+            checkpoint = json.loads(last) if last else None
+        except Exception:
+            return None
+        if not self._checkpoint_trusted(checkpoint):
+            return None
+        try:
+            with io.open(self.file_fallback_path, "rb") as f:
+                f.seek(checkpoint["line_offset"])
+                rec = json.loads(f.readline())
+                if rec.get("hash") == checkpoint["last_hash"] and f.tell() == checkpoint["offset"]:
+                    return checkpoint
         except Exception:
             pass
-        return record
+        logger.warning("Evidence file checkpoint at line %s no longer matches the chain", checkpoint.get("lines"))
+        return None
 
-    async def verify_chain_integrity(self) -> Dict[str, Any]:
-        """Verify the entire evidence chain integrity and signatures"""
-        issues = []
+    def _save_file_checkpoint(self, checkpoint: Dict[str, Any]) -> bool:
+        self._sign_checkpoint(checkpoint)
+        try:
+            with io.open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(checkpoint, sort_keys=True) + "\n")
+            return True
+        except Exception as e:
+            logger.warning("Evidence file checkpoint could not be saved: %s", e)
+            return False
+
+    async def _verify_db_chain(self, full: bool) -> Tuple[_ChainVerifier, Dict[str, Any]]:
+        async with postgres_client.acquire() as conn:
+            checkpoint = None if full else await self._load_db_checkpoint(conn)
+            start_seq = checkpoint["last_seq"] if checkpoint else 0
+            verifier = _ChainVerifier("db", checkpoint["last_hash"] if checkpoint else GENESIS_HASH)
+            last_seq = start_seq
+            # Server-seitiger Cursor: Records werden chunkweise gestreamt statt komplett geladen
+            async with conn.transaction():
+                cursor = await conn.cursor(
+                    "SELECT * FROM evidence_chain WHERE seq > $1 ORDER BY seq", start_seq
+                )
+                batches: Dict[int, Dict[str, Any]] = {}
+                while True:
+                    rows = await cursor.fetch(self.verify_chunk)
+                    if not rows:
+                        break
+                    # Nur die Batches des aktuellen Chunks halten (ein Batch kann über die Grenze reichen)
+                    needed = {r["batch_id"] for r in rows if r["batch_id"] is not None}
+                    batches = {k: v for k, v in batches.items() if k in needed}
+                    batches.update(await self._load_batches(conn, sorted(needed - batches.keys())))
+                    for rec in rows:
+                        batch_id = rec["batch_id"]
+                        verifier.check(
+                            rec["seq"],
+                            rec["event_type"],
+                            rec["hash"],
+                            _to_bytes(rec["payload"]),
+                            rec["ts"].isoformat(),
+                            batch=(batches.get(batch_id) or {}) if batch_id is not None else None,
+                            proof=rec["merkle_proof"],
+                            signature=rec["digital_signature"],
+                            public_key=rec["public_key"],
+                        )
+                        last_seq = rec["seq"]
+                    await verifier.drain()
+
+            info: Dict[str, Any] = {"resumed_from_seq": start_seq if checkpoint else None, "saved": False}
+            total = verifier.records + (checkpoint["total_records"] if checkpoint else 0)
+            signatures = verifier.verified_signatures + (checkpoint["verified_signatures"] if checkpoint else 0)
+            if verifier.records and not verifier.issues:
+                info["saved"] = await self._save_db_checkpoint(conn, {
+                    "last_seq": last_seq,
+                    "last_hash": verifier.prev_hash,
+                    "total_records": total,
+                    "verified_signatures": signatures,
+                    "ts": dt.datetime.utcnow().isoformat(),
+                })
+            info.update(total_records=total, verified_signatures=signatures)
+            return verifier, info
+
+    async def _verify_file_chain(self, full: bool) -> Tuple[_ChainVerifier, Dict[str, Any]]:
+        checkpoint = None if full else self._load_file_checkpoint()
+        verifier = _ChainVerifier("file", checkpoint["last_hash"] if checkpoint else GENESIS_HASH)
+        line_no = checkpoint["lines"] if checkpoint else 0
+        offset = checkpoint["offset"] if checkpoint else 0
+        line_offset = checkpoint["line_offset"] if checkpoint else 0
+        with io.open(self.file_fallback_path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.strip():
+                    offset += len(raw)
+                    continue
+                rec = json.loads(raw)
+                payload_b = _to_bytes(rec["payload"])
+                verifier.check(
+                    line_no,
+                    rec["event_type"],
+                    rec["hash"],
+                    payload_b,
+                    rec["ts"],
+                    batch=self._file_batch_info(rec) if rec.get("merkle_root") else None,
+                    proof=rec.get("merkle_proof") or [],
+                    signature=rec.get("digital_signature"),
+                    public_key=rec.get("public_key"),
+                )
+                line_no += 1
+                line_offset = offset
+                offset += len(raw)
+                if verifier.pending >= self.verify_chunk:
+                    await verifier.drain()
+        await verifier.drain()
+
+        info: Dict[str, Any] = {"resumed_from_line": checkpoint["lines"] if checkpoint else None, "saved": False}
+        total = verifier.records + (checkpoint["total_records"] if checkpoint else 0)
+        signatures = verifier.verified_signatures + (checkpoint["verified_signatures"] if checkpoint else 0)
+        if verifier.records and not verifier.issues:
+            info["saved"] = self._save_file_checkpoint({
+                "lines": line_no,
+                "offset": offset,
+                "line_offset": line_offset,
+                "last_hash": verifier.prev_hash,
+                "total_records": total,
+                "verified_signatures": signatures,
+                "ts": dt.datetime.utcnow().isoformat(),
+            })
+        info.update(total_records=total, verified_signatures=signatures)
+        return verifier, info
+
+    async def verify_chain_integrity(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Verify the evidence chain integrity and signatures.
+
+        Records werden gestreamt (DB: server-seitiger Cursor, File: zeilenweise) und
+        Signaturen chunkweise im Prozess-Pool geprüft. Nach einem fehlerfreien Lauf
+        wird ein signierter Checkpoint geschrieben; Folgeläufe prüfen nur Records
+        danach. `full=True` prüft ab Genesis.
+        """
+        issues: List[str] = []
         total_records = 0
         verified_signatures = 0
-        
+        checkpoints: Dict[str, Any] = {}
+
         try:
             if postgres_client and postgres_client.pool:
-                async with postgres_client.acquire() as conn:
-                    records = await conn.fetch("SELECT * FROM evidence_chain ORDER BY seq")
-                    
-                    prev_hash = "0" * 64
-                    for rec in records:
-                        total_records += 1
-                        
-                        # Verify hash chain
-                        payload_b = _to_bytes(rec["payload"])
-                        expected_hash = _hash_chain(prev_hash, payload_b)
-                        if rec["hash"] != expected_hash:
-                            issues.append(f"Hash mismatch at seq {rec['seq']}: expected {expected_hash}, got {rec['hash']}")
-                        
-                        # Verify digital signature
-                        if rec["digital_signature"] and rec["public_key"]:
-                            notarization_data = {
-                                "event_type": rec["event_type"],
-                                "prev_hash": prev_hash,
-                                "hash": rec["hash"],
-                                "ts": rec["ts"].isoformat(),
-                                "payload_hash": hashlib.sha256(_to_bytes(rec["payload"])).hexdigest()
-                            }
-                            notarization_bytes = json.dumps(notarization_data, sort_keys=True).encode('utf-8')
-                            
-                            if _verify_signature(rec["public_key"], notarization_bytes, rec["digital_signature"]):
-                                verified_signatures += 1
-                            else:
-                                issues.append(f"Invalid signature at seq {rec['seq']}")
-                        
-                        prev_hash = rec["hash"]
-                        
+                verifier, info = await self._verify_db_chain(full)
+                issues.extend(verifier.issues)
+                total_records += info.pop("total_records")
+                verified_signatures += info.pop("verified_signatures")
+                info["verified_records"] = verifier.records
+                checkpoints["db"] = info
         except Exception as e:
             issues.append(f"Database error: {str(e)}")
-        
+
         # File fallback verification
         try:
             if os.path.exists(self.file_fallback_path):
-                with io.open(self.file_fallback_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    prev_hash = "0" * 64
-                    for i, line in enumerate(lines):
-                        rec = json.loads(line)
-                        payload_b = _to_bytes(rec["payload"])
-                        expected_hash = _hash_chain(prev_hash, payload_b)
-                        if rec["hash"] != expected_hash:
-                            issues.append(f"File hash mismatch at line {i}: expected {expected_hash}, got {rec['hash']}")
-                        
-                        if rec.get("digital_signature") and rec.get("public_key"):
-                            notarization_data = {
-                                "event_type": rec["event_type"],
-                                "prev_hash": prev_hash,
-                                "hash": rec["hash"],
-                                "ts": rec["ts"],
-                                "payload_hash": hashlib.sha256(payload_b).hexdigest()
-                            }
-                            notarization_bytes = json.dumps(notarization_data, sort_keys=True).encode('utf-8')
-                            
-                            if _verify_signature(rec["public_key"], notarization_bytes, rec["digital_signature"]):
-                                verified_signatures += 1
-                            else:
-                                issues.append(f"File invalid signature at line {i}")
-                        
-                        prev_hash = rec["hash"]
-                        total_records += 1
+                verifier, info = await self._verify_file_chain(full)
+                issues.extend(verifier.issues)
+                total_records += info.pop("total_records")
+                verified_signatures += info.pop("verified_signatures")
+                info["verified_records"] = verifier.records
+                checkpoints["file"] = info
         except Exception as e:
             issues.append(f"File verification error: {str(e)}")
-        
+
         return {
             "total_records": total_records,
             "verified_signatures": verified_signatures,
             "integrity_issues": issues,
-            "chain_valid": len(issues) == 0
+            "chain_valid": len(issues) == 0,
+            "checkpoints": checkpoints,
         }
 
     async def get_record_by_seq(self, seq: int) -> Optional[Dict[str, Any]]:
@@ -453,8 +1066,15 @@ class EvidenceVault:
                 result["stored_hash"] = rec["hash"]  # type: ignore[index]
                 result["hash_chain_valid"] = (rec["hash"] == expected_hash)  # type: ignore[index]
 
+                # Group-Commit-Records: Batch-Signatur + Inclusion-Proof
+                if rec.get("batch_id") is not None:
+                    batch = await conn.fetchrow("SELECT * FROM evidence_batches WHERE batch_id = $1", rec["batch_id"])
+                    result["batch_id"] = rec["batch_id"]
+                    result["signature_valid"] = bool(batch) and self._verify_batch_member(
+                        rec["hash"], rec["merkle_proof"], dict(batch), {}
+                    )
                 # Verify signature if available
-                if rec["digital_signature"] and rec["public_key"]:  # type: ignore[index]
+                elif rec["digital_signature"] and rec["public_key"]:  # type: ignore[index]
                     notarization_data = {
                         "event_type": rec["event_type"],
                         "prev_hash": prev_hash,
@@ -525,11 +1145,24 @@ class EvidenceVault:
             if not (postgres_client and postgres_client.pool):
                 return {"seq": seq, "error": "Retry requires database mode"}
             async with postgres_client.acquire() as conn:
-                rec = await conn.fetchrow("SELECT hash, anchor_tx FROM evidence_chain WHERE seq = $1", seq)
+                rec = await conn.fetchrow("SELECT hash, anchor_tx, batch_id FROM evidence_chain WHERE seq = $1", seq)
                 if not rec:
                     return {"seq": seq, "error": "Record not found"}
                 if rec["anchor_tx"]:  # type: ignore[index]
                     return {"seq": seq, "anchor_tx": rec["anchor_tx"], "note": "Already anchored"}
+                if rec["batch_id"] is not None:  # type: ignore[index]
+                    # Group-Commit: der Merkle-Root des Batches wird verankert
+                    batch = await conn.fetchrow(
+                        "SELECT batch_id, merkle_root FROM evidence_batches WHERE batch_id = $1", rec["batch_id"]
+                    )
+                    if not batch:
+                        return {"seq": seq, "error": "Batch not found"}
+                    info = {"batch_id": batch["batch_id"], "merkle_root": batch["merkle_root"]}
+                    await self._anchor_batch(info)
+                    anchored = await conn.fetchval("SELECT anchor_tx FROM evidence_batches WHERE batch_id = $1", batch["batch_id"])
+                    if anchored:
+                        return {"seq": seq, "batch_id": batch["batch_id"], "anchor_tx": anchored, "anchored": True}
+                    return {"seq": seq, "batch_id": batch["batch_id"], "anchored": False}
                 anchor_tx = await self._anchor_on_chain(rec["hash"])  # type: ignore[index]
                 if anchor_tx:
                     try:
@@ -553,7 +1186,8 @@ class EvidenceVault:
                 "signature_algorithm": "RSA-PSS with SHA256"
             },
             "records": [],
-            "integrity_verification": await self.verify_chain_integrity()
+            # Gerichtsverwertbar: immer ab Genesis prüfen, nicht nur seit dem letzten Checkpoint
+            "integrity_verification": await self.verify_chain_integrity(full=True)
         }
         
         try:
@@ -12,26 +12,52 @@ Features:
 
 from __future__ import annotations
 import asyncio
+import hashlib
+import itertools
+import json
 import logging
+import os
 from typing import Any, Dict, List, Optional, Set, Callable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 import heapq
 import functools
-from collections import deque
-
-try:
-    from neo4j import GraphDatabase as _Neo4jGraphDatabase
-    GraphDatabase: Any = _Neo4jGraphDatabase
-except Exception:
-    GraphDatabase = None
+import time
+from collections import OrderedDict, deque
 
 from app.config import settings
 from app.db.redis_client import redis_client
 from app.db.neo4j_client import neo4j_client
 
+try:
+    from app import metrics
+except Exception:  # pragma: no cover
+    metrics = None
+
 logger = logging.getLogger(__name__)
 
+# Prozessübergreifende Hot-Path-Invalidierung: Versionszähler + Adress-Log (Score = Version)
+HOT_PATH_VERSION_KEY = "graph_v2:hot_paths:version"
+HOT_PATH_INVALIDATIONS_KEY = "graph_v2:hot_paths:invalidated"
+HOT_PATH_FLOOR_KEY = "graph_v2:hot_paths:floor"  # höchste aus dem Log getrimmte Version
+HOT_PATH_INVALIDATION_LOG = int(os.getenv("GRAPH_V2_INVALIDATION_LOG", "100000"))
+
+# INCR + ZADD atomar, damit Leser keine Version ohne zugehörige Adressen sehen
+_PUBLISH_INVALIDATION_LUA = """
+local v = redis.call('INCR', KEYS[1])
+local limit = tonumber(ARGV[#ARGV])
+for i = 1, #ARGV - 1 do
+  redis.call('ZADD', KEYS[2], v, ARGV[i])
+end
+local n = redis.call('ZCARD', KEYS[2]) - limit
+if n > 0 then
+  local top = redis.call('ZRANGE', KEYS[2], n - 1, n - 1, 'WITHSCORES')
+  redis.call('SET', KEYS[3], top[2])
+  redis.call('ZREMRANGEBYRANK', KEYS[2], 0, n - 1)
+end
+return v
+"""
+
 
 @dataclass
 class PathConstraint:
@@ -56,18 +82,28 @@ class CostFunction:
     hop_penalty_weight: float = 0.5
 
 
-@dataclass
+@dataclass(frozen=True)
 class PathNode:
-    """Node in Pathfinding Graph"""
+    """
+    Unveränderlicher Suchknoten mit Parent-Pointer
+
+    Pfade teilen sich ihre Präfixe: ein Nachfolger verweist nur auf seinen
+    Vorgänger statt Pfad-Liste und Visited-Set zu kopieren.
+    """
     address: str
     chain: str
     total_cost: float
     hops: int
-    path: List[Dict[str, Any]] = field(default_factory=list)
-    visited: Set[str] = field(default_factory=set)
+    parent: Optional['PathNode'] = None
+    edge: Optional[Dict[str, Any]] = None  # Kante parent -> self (Suchrichtung)
+    edge_cost: float = 0.0
 
-    def __lt__(self, other: 'PathNode') -> bool:
-        return self.total_cost < other.total_cost
+    def iter_chain(self):
+        """Knoten von self zurück bis zur Wurzel"""
+        node: Optional[PathNode] = self
+        while node is not None:
+            yield node
+            node = node.parent
 
 
 @dataclass
@@ -79,6 +115,15 @@ class PathResult:
     execution_time_ms: float
     total_paths_found: int
     constraints_applied: PathConstraint
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _Adjacency:
+    """Nachbarschaft einer Adresse (Ergebnis eines Frontier-Batches)"""
+    chain: str
+    risk_score: float
+    neighbors: List[Dict[str, Any]]
 
 
 def _risk_level_from_score(score: Optional[float]) -> str:
@@ -99,27 +144,27 @@ class GraphEngineV2:
     """Advanced Graph Engine mit Pathfinder"""
 
     def __init__(self):
-        self.enabled = bool((GraphDatabase is not None) and getattr(settings, "NEO4J_URI", None))
-        self._driver = None
-        self._materialized_paths = {}  # Cache für häufige Paths
-        self._hot_paths_cache = {}  # LRU Cache für Hot Paths
-
-        if self.enabled:
-            try:
-                self._driver = GraphDatabase.driver(
-                    settings.NEO4J_URI,
-                    auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
-                )
-                logger.info("GraphEngineV2: Neo4j driver initialized")
-            except Exception as e:
-                logger.warning(f"GraphEngineV2 disabled (Neo4j init failed): {e}")
-                self.enabled = False
-        else:
+        # Queries laufen über den (asynchronen) neo4j_client, kein eigener Treiber
+        self.enabled = bool(getattr(settings, "NEO4J_URI", None))
+        self._hot_paths_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # LRU materialisierter Paths
+        self._hot_path_index: Dict[str, Set[str]] = {}  # Adresse -> Hot-Path-Keys (Invalidierung)
+        self._query_frequency: Dict[str, Dict[str, Any]] = {}
+        self._hot_path_stats = {"hit": 0, "miss": 0, "stale": 0, "invalidations": 0, "materialized": 0}
+        self._materializer_task: Optional[asyncio.Task] = None
+        self._hot_path_version: Optional[int] = None  # zuletzt angewandte Invalidierungs-Version
+        self.hot_path_min_frequency = int(os.getenv("GRAPH_V2_MIN_FREQUENCY", "100"))
+        self.hot_path_ttl = float(os.getenv("GRAPH_V2_HOT_PATH_TTL", "3600"))
+        self.hot_path_max_entries = int(os.getenv("GRAPH_V2_HOT_PATHS_MAX", "1000"))
+        self.hot_path_track_limit = 10_000
+        self.neighbor_limit = 100  # Nachbarn pro Adresse (nach Betrag absteigend)
+        self.expand_batch_size = max(1, int(os.getenv("GRAPH_V2_EXPAND_BATCH", "64")))
+
+        if not self.enabled:
             logger.info("GraphEngineV2: running in no-op mode")
 
     async def close(self):
-        if self._driver:
-            await asyncio.to_thread(self._driver.close)
+        """Stoppt den Materializer; die Neo4j-Verbindung gehört dem neo4j_client"""
+        await self.stop_hot_path_materializer()
 
     def _calculate_edge_cost(self, edge: Dict[str, Any], cost_fn: CostFunction) -> float:
         """Berechne Cost für eine Edge"""
@@ -135,218 +180,421 @@ class GraphEngineV2:
         )
         return cost
 
-    async def _get_neighbors(self, address: str, chain: str, constraints: PathConstraint) -> List[Dict[str, Any]]:
-        """Hole Nachbarn eines Address mit Constraints"""
-        if not self.enabled or not self._driver:
-            return []
-
-        # Cache-Key für Hot Paths
-        cache_key = f"neighbors:{address}:{chain}:{hash(str(constraints))}"
-        cached = await self._get_cached_neighbors(cache_key)
-        if cached:
-            return cached
-
-        query = """
-        MATCH (a:Address {address: $address, chain: $chain})
-        MATCH (a)-[r]-(t:Tx)-[s]-(b:Address)
-        WHERE r.tx = s.tx
-        AND (b.address <> $address OR b.chain <> $chain)
-        AND t.timestamp >= datetime() - duration({days: $time_window})
-        AND ($chains IS NULL OR b.chain IN $chains)
-        AND ($exclude_addresses IS NULL OR NOT b.address IN $exclude_addresses)
-        WITH b, r, s, t,
-             CASE WHEN r.amount IS NOT NULL THEN r.amount ELSE s.amount END as amount,
-             duration.between(t.timestamp, datetime()).days * -1 as age_days
-        WHERE amount >= $min_amount
-        AND ($max_amount IS NULL OR amount <= $max_amount)
-        RETURN DISTINCT
-            b.address as address,
-            b.chain as chain,
-            amount,
-            t.hash as tx_hash,
-            t.timestamp as timestamp,
-            age_days,
-            r.fee as fee,
-            COALESCE(b.risk_score, 0.0) as risk_score,
-            CASE WHEN EXISTS((b)-[:HAS_TAG]->(:Tag)) THEN [(b)-[:HAS_TAG]->(tag:Tag) | tag.name] ELSE [] END as tags
-        ORDER BY amount DESC
-        LIMIT 100
-        """
+    _NEIGHBORS_BATCH_QUERY = """
+    UNWIND $addresses AS src
+    MATCH (a:Address {address: src})
+    OPTIONAL MATCH (a)-[r]-(t:Tx)-[s]-(b:Address)
+    WHERE r.tx = s.tx
+    AND (b.address <> a.address OR b.chain <> a.chain)
+    AND t.timestamp >= datetime() - duration({days: $time_window})
+    AND ($chains IS NULL OR b.chain IN $chains)
+    AND ($exclude_addresses IS NULL OR NOT b.address IN $exclude_addresses)
+    WITH a, b, r, t,
+         CASE WHEN r.amount IS NOT NULL THEN r.amount ELSE s.amount END as amount
+    WHERE b IS NULL OR (amount >= $min_amount AND ($max_amount IS NULL OR amount <= $max_amount))
+    WITH a, b, r, t, amount
+    ORDER BY amount DESC
+    WITH a, collect(DISTINCT CASE WHEN b IS NULL THEN NULL ELSE {
+        address: b.address,
+        chain: b.chain,
+        amount: amount,
+        tx_hash: t.hash,
+        timestamp: toString(t.timestamp),
+        age_days: duration.between(t.timestamp, datetime()).days * -1,
+        fee: r.fee,
+        risk_score: COALESCE(b.risk_score, 0.0),
+        tags: [(b)-[:HAS_TAG]->(tag:Tag) | tag.name]
+    } END)[..$limit] as neighbors
+    RETURN a.address as address, a.chain as chain, COALESCE(a.risk_score, 0.0) as risk_score, neighbors
+    """
+
+    @staticmethod
+    def _constraints_key(constraints: PathConstraint) -> str:
+        # hash(str(...)) ist pro Prozess gesalzen und taugt nicht als Redis-Key
+        return hashlib.md5(repr(constraints).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _apply_neighbor_filters(
+        neighbors: List[Dict[str, Any]], constraints: PathConstraint
+    ) -> List[Dict[str, Any]]:
+        """Tag- und Risk-Filter, die nicht in Cypher abgebildet sind"""
+        out = []
+        for nb in neighbors:
+            tags = nb.get("tags") or []
+            if constraints.include_tags and not any(tag in constraints.include_tags for tag in tags):
+                continue
+            if constraints.exclude_tags and any(tag in constraints.exclude_tags for tag in tags):
+                continue
+            if (nb.get("risk_score") or 0.0) > constraints.risk_threshold:
+                continue
+            out.append(nb)
+        return out
 
+    async def _query_neighbors_batch(
+        self, addresses: List[str], constraints: PathConstraint
+    ) -> Dict[str, _Adjacency]:
+        """Ein Cypher-Roundtrip (UNWIND) für alle Adressen eines Frontier-Levels"""
         params = {
-            "address": address,
-            "chain": chain,
+            "addresses": list(addresses),
             "time_window": constraints.time_window_days,
             "chains": list(constraints.chains) if constraints.chains else None,
             "exclude_addresses": list(constraints.exclude_addresses) if constraints.exclude_addresses else None,
             "min_amount": constraints.min_amount,
             "max_amount": constraints.max_amount,
+            "limit": self.neighbor_limit,
         }
+        rows = await neo4j_client.execute_read(self._NEIGHBORS_BATCH_QUERY, params)
 
-        try:
-            records = await asyncio.to_thread(
-                lambda: list(self._driver.session().run(query, **params))
-            )
-
-            neighbors = []
-            for rec in records:
-                tags = rec.get("tags", [])
-                risk_score = rec.get("risk_score", 0.0)
+        result: Dict[str, _Adjacency] = {}
+        for row in rows:
+            address = row.get("address")
+            if not address:
+                continue
+            chain = row.get("chain") or "unknown"
+            neighbors = [
+                {
+                    "address": nb["address"],
+                    "chain": nb.get("chain") or "unknown",
+                    "from_chain": chain,
+                    "amount": nb.get("amount"),
+                    "tx_hash": nb.get("tx_hash"),
+                    "timestamp": nb.get("timestamp"),
+                    "age_days": nb.get("age_days"),
+                    "fee": nb.get("fee") or 0.0,
+                    "risk_score": nb.get("risk_score") or 0.0,
+                    "tags": nb.get("tags") or [],
+                }
+                for nb in (row.get("neighbors") or [])
+                if nb and nb.get("address")
+            ]
+            adj = result.get(address)
+            if adj is None:
+                # Gleiche Adresse auf mehreren Chains: Nachbarschaften zusammenführen
+                result[address] = _Adjacency(chain, float(row.get("risk_score") or 0.0), neighbors)
+            else:
+                adj.neighbors.extend(neighbors)
+        return result
 
-                # Apply tag filters
-                if constraints.include_tags and not any(tag in constraints.include_tags for tag in tags):
-                    continue
-                if constraints.exclude_tags and any(tag in constraints.exclude_tags for tag in tags):
-                    continue
+    async def _get_neighbors_batch(
+        self,
+        addresses: List[str],
+        constraints: PathConstraint,
+        memo: Optional[Dict[str, _Adjacency]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, _Adjacency]:
+        """
+        Nachbarschaften für ein ganzes Frontier-Level
 
-                # Apply risk threshold
-                if risk_score > constraints.risk_threshold:
-                    continue
+        Reihenfolge: Such-lokales Memo -> Redis (MGET) -> ein Batch-Query für
+        den Rest. Tag-/Risk-Filter werden nach dem Cache angewandt.
+        """
+        memo = memo if memo is not None else {}
+        result: Dict[str, _Adjacency] = {}
+        missing = []
+        for address in dict.fromkeys(addresses):
+            if address in memo:
+                result[address] = memo[address]
+            else:
+                missing.append(address)
+        if not missing or not self.enabled:
+            for address in missing:
+                result[address] = memo[address] = _Adjacency("unknown", 0.0, [])
+            return result
+
+        ckey = self._constraints_key(constraints)
+        cache_keys = [f"neighbors:v2:{address}:{ckey}" for address in missing]
+        cached = await self._get_cached_neighbors_many(cache_keys)
+
+        to_query = []
+        raw: Dict[str, _Adjacency] = {}
+        for address, data in zip(missing, cached):
+            if data is not None:
+                raw[address] = _Adjacency(data.get("chain", "unknown"), data.get("risk_score", 0.0), data.get("neighbors", []))
+            else:
+                to_query.append(address)
 
-                neighbor = {
-                    "address": rec["address"],
-                    "chain": rec["chain"],
-                    "amount": rec["amount"],
-                    "tx_hash": rec["tx_hash"],
-                    "timestamp": rec["timestamp"],
-                    "age_days": rec["age_days"],
-                    "fee": rec.get("fee", 0.0),
-                    "risk_score": risk_score,
-                    "tags": tags
-                }
-                neighbors.append(neighbor)
+        if to_query:
+            try:
+                fetched = await self._query_neighbors_batch(to_query, constraints)
+            except Exception as e:
+                logger.error(f"Error getting neighbors for {len(to_query)} addresses: {e}")
+                fetched = {}
+            if stats is not None:
+                stats["neighbor_batches"] += 1
+                stats["neighbors_fetched"] += len(to_query)
+            for address in to_query:
+                raw[address] = fetched.get(address) or _Adjacency("unknown", 0.0, [])
+            await self._cache_neighbors_many(
+                {
+                    f"neighbors:v2:{address}:{ckey}": {
+                        "chain": raw[address].chain,
+                        "risk_score": raw[address].risk_score,
+                        "neighbors": raw[address].neighbors,
+                    }
+                    for address in to_query
+                },
+                ttl=300,
+            )
 
-            # Cache für 5 Minuten
-            await self._cache_neighbors(cache_key, neighbors, ttl=300)
-            return neighbors
+        for address in missing:
+            adj = raw[address]
+            adj = _Adjacency(adj.chain, adj.risk_score, self._apply_neighbor_filters(adj.neighbors, constraints))
+            result[address] = memo[address] = adj
+        return result
 
-        except Exception as e:
-            logger.error(f"Error getting neighbors for {address}: {e}")
+    async def _get_neighbors(self, address: str, chain: str, constraints: PathConstraint) -> List[Dict[str, Any]]:
+        """Hole Nachbarn eines Address mit Constraints"""
+        adjacency = (await self._get_neighbors_batch([address], constraints)).get(address)
+        if adjacency is None:
             return []
+        if chain and chain != "unknown":
+            return [nb for nb in adjacency.neighbors if nb.get("from_chain") in (chain, "unknown")]
+        return adjacency.neighbors
 
-    async def _get_cached_neighbors(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
-        """Hole gecachte Nachbarn aus Redis"""
+    async def _get_cached_neighbors_many(self, cache_keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Hole gecachte Nachbarschaften aus Redis (ein MGET)"""
         try:
             await redis_client._ensure_connected()
             client = getattr(redis_client, "client", None)
             if client:
-                data = await client.get(cache_key)
-                if data:
-                    import json
-                    return json.loads(data)
+                values = await client.mget(cache_keys)
+                return [json.loads(v) if v else None for v in values]
         except Exception:
             pass
-        return None
+        return [None] * len(cache_keys)
 
-    async def _cache_neighbors(self, cache_key: str, neighbors: List[Dict[str, Any]], ttl: int = 300):
-        """Cache Nachbarn in Redis"""
+    async def _cache_neighbors_many(self, entries: Dict[str, Dict[str, Any]], ttl: int = 300):
+        """Cache Nachbarschaften in Redis (eine Pipeline)"""
+        if not entries:
+            return
         try:
             await redis_client._ensure_connected()
             client = getattr(redis_client, "client", None)
             if client:
-                import json
-                await client.setex(cache_key, ttl, json.dumps(neighbors))
+                pipe = client.pipeline()
+                for key, value in entries.items():
+                    pipe.setex(key, ttl, json.dumps(value, default=str))
+                await pipe.execute()
         except Exception:
             pass
 
-    async def find_paths_astar(
+    @staticmethod
+    def _edge_record(from_node: PathNode, to_address: str, to_chain: str, edge: Dict[str, Any], edge_cost: float) -> Dict[str, Any]:
+        return {
+            "from_address": from_node.address,
+            "to_address": to_address,
+            "from_chain": from_node.chain,
+            "to_chain": to_chain,
+            "amount": edge.get("amount"),
+            "tx_hash": edge.get("tx_hash"),
+            "timestamp": edge.get("timestamp"),
+            "fee": edge.get("fee", 0.0),
+            "risk_score": edge.get("risk_score", 0.0),
+            "edge_cost": edge_cost,
+        }
+
+    def _join_path(self, forward: PathNode, backward: Optional[PathNode]) -> Optional[Dict[str, Any]]:
+        """
+        Setzt Vorwärts-Kette (source..m) und Rückwärts-Kette (m..target) zu
+        path_data zusammen. None, falls der Pfad nicht einfach ist.
+        """
+        edges: List[Dict[str, Any]] = []
+        seen = set()
+        fwd = list(forward.iter_chain())
+        fwd.reverse()
+        for node in fwd:
+            if node.address in seen:
+                return None
+            seen.add(node.address)
+            if node.parent is not None:
+                edges.append(self._edge_record(node.parent, node.address, node.chain, node.edge or {}, node.edge_cost))
+        node = backward
+        last = forward
+        while node is not None and node.parent is not None:
+            # Rückwärtskante node -> parent entspricht der Vorwärtskante node -> parent
+            nxt = node.parent
+            if nxt.address in seen:
+                return None
+            seen.add(nxt.address)
+            edges.append(self._edge_record(last, nxt.address, nxt.chain, node.edge or {}, node.edge_cost))
+            last = nxt
+            node = nxt
+        return {
+            "path": edges,
+            "total_cost": forward.total_cost + (backward.total_cost if backward else 0.0),
+            "hops": len(edges),
+            "source_chain": edges[0]["from_chain"] if edges else "unknown",
+            "target_chain": last.chain,
+            "meeting_point": forward.address,
+        }
+
+    async def _search(
         self,
         source: str,
         target: str,
         constraints: PathConstraint,
         cost_fn: CostFunction,
-        max_paths: int = 10
+        max_paths: int,
+        bidirectional: bool = True,
+        explored: Optional[Set[str]] = None,
     ) -> PathResult:
         """
-        A* Pathfinding Algorithm mit Constraints und Costs
+        Bidirektionaler Dijkstra mit Frontier-Batching
+
+        - Ohne Koordinaten oder Distanz-Vorberechnung gibt es keine zulässige
+          knotenspezifische Heuristik (kein A*); die Heaps sind nach g geordnet.
+        - Expandiert wird abwechselnd die Richtung mit der kleineren offenen
+          Menge; pro Runde werden alle Einträge innerhalb eines Hop-Kosten-
+          Levels (g-Minimum + `hop_penalty_weight`) gemeinsam expandiert und
+          ihre Nachbarn mit einem Query geholt.
+        - Label-korrigierend: wird ein bereits expandierter Knoten später
+          billiger erreicht, wird er erneut geöffnet (Nachbarn aus dem Memo).
+        - Abbruch, sobald die untere Schranke (Summe der g-Minima beider
+          Heap-Spitzen bzw. das g-Minimum bei unidirektionaler Suche) die beste
+          gefundene Verbindung erreicht.
+
+        Neben dem optimalen Pfad werden die bis dahin gefundenen Alternativen
+        über andere Treffpunkte (nach Kosten sortiert) bis `max_paths` geliefert.
+        `explored` erhält (falls übergeben) alle gelabelten Adressen beider
+        Richtungen – die Region, in der neue Kanten das Ergebnis ändern können.
         """
         start_time = datetime.now()
-
-        # Priority Queue für A*
-        frontier = []
-        heapq.heappush(frontier, PathNode(
-            address=source,
-            chain="unknown",  # Wird beim ersten Nachbarn bestimmt
-            total_cost=0.0,
-            hops=0,
-            path=[],
-            visited={source}
-        ))
-
-        paths_found = []
-        visited_global = set()
-
-        while frontier and len(paths_found) < max_paths:
-            current = heapq.heappop(frontier)
-
-            if current.address in visited_global:
-                continue
-            visited_global.add(current.address)
-
-            # Target erreicht?
-            if current.address == target and current.hops > 0:
-                path_data = {
-                    "path": current.path.copy(),
-                    "total_cost": current.total_cost,
-                    "hops": current.hops,
-                    "source_chain": current.path[0]["from_chain"] if current.path else "unknown",
-                    "target_chain": current.chain
-                }
-                paths_found.append(path_data)
-                continue
-
-            # Max Hops erreicht?
-            if current.hops >= constraints.max_hops:
-                continue
-
-            # Nachbarn holen
-            neighbors = await self._get_neighbors(current.address, current.chain, constraints)
-
-            for neighbor in neighbors:
-                neighbor_addr = neighbor["address"]
-                if neighbor_addr in current.visited:
+        stats = {"expansions": 0, "neighbor_batches": 0, "neighbors_fetched": 0, "reopened": 0}
+        hop_floor = max(0.0, cost_fn.hop_penalty_weight)
+        memo: Dict[str, _Adjacency] = {}
+        seq = itertools.count()
+
+        # Richtung 0 = vorwärts (source -> target), 1 = rückwärts (target -> source)
+        goals = (target, source)
+        roots = (PathNode(source, "unknown", 0.0, 0), PathNode(target, "unknown", 0.0, 0))
+        labels: List[Dict[str, PathNode]] = [{source: roots[0]}, {target: roots[1]}]
+        closed: List[Dict[str, float]] = [{}, {}]
+        heaps: List[List[Any]] = [[], []]
+        for d in (0, 1) if bidirectional else (0,):
+            heapq.heappush(heaps[d], (0.0, next(seq), roots[d]))
+
+        best: Dict[str, tuple] = {}  # Treffpunkt -> (Kosten, Vorwärts-Node, Rückwärts-Node)
+        mu = float("inf")
+
+        def clean(d: int) -> None:
+            h = heaps[d]
+            while h:
+                node = h[0][2]
+                if labels[d].get(node.address) is not node or closed[d].get(node.address, float("inf")) <= node.total_cost:
+                    heapq.heappop(h)
+                else:
+                    break
+
+        def offer(meeting: str) -> None:
+            nonlocal mu
+            fwd = labels[0].get(meeting)
+            bwd = labels[1].get(meeting) if bidirectional else (roots[1] if meeting == target else None)
+            if fwd is None or bwd is None or fwd.hops + bwd.hops > constraints.max_hops:
+                return
+            cost = fwd.total_cost + bwd.total_cost
+            if fwd.hops + bwd.hops == 0:
+                return
+            prev = best.get(meeting)
+            if prev is None or cost < prev[0]:
+                best[meeting] = (cost, fwd, bwd)
+                mu = min(mu, cost)
+
+        if source != target:
+            while True:
+                clean(0)
+                if bidirectional:
+                    clean(1)
+                active = [d for d in ((0, 1) if bidirectional else (0,)) if heaps[d]]
+                if len(active) < (2 if bidirectional else 1):
+                    break
+                # Heaps nach g geordnet: die Spitze ist das g-Minimum (O(1))
+                lower = sum(heaps[d][0][0] for d in active)
+                if lower >= mu:
+                    break
+
+                d = min(active, key=lambda i: len(heaps[i]))
+                level = heaps[d][0][0] + hop_floor
+                batch: List[PathNode] = []
+                while heaps[d] and heaps[d][0][0] <= level and len(batch) < self.expand_batch_size:
+                    node = heapq.heappop(heaps[d])[2]
+                    if labels[d].get(node.address) is not node:
+                        continue
+                    if node.address in closed[d]:
+                        if closed[d][node.address] <= node.total_cost:
+                            continue
+                        stats["reopened"] += 1
+                    closed[d][node.address] = node.total_cost
+                    if node.address == goals[d] or node.hops >= constraints.max_hops:
+                        continue
+                    batch.append(node)
+                if not batch:
                     continue
 
-                # Edge Cost berechnen
-                edge_cost = self._calculate_edge_cost(neighbor, cost_fn)
-                new_cost = current.total_cost + edge_cost
-
-                # Path erweitern
-                new_path = current.path + [{
-                    "from_address": current.address,
-                    "to_address": neighbor_addr,
-                    "from_chain": current.chain,
-                    "to_chain": neighbor["chain"],
-                    "amount": neighbor["amount"],
-                    "tx_hash": neighbor["tx_hash"],
-                    "timestamp": neighbor["timestamp"],
-                    "fee": neighbor.get("fee", 0.0),
-                    "risk_score": neighbor.get("risk_score", 0.0),
-                    "edge_cost": edge_cost
-                }]
-
-                new_node = PathNode(
-                    address=neighbor_addr,
-                    chain=neighbor["chain"],
-                    total_cost=new_cost,
-                    hops=current.hops + 1,
-                    path=new_path,
-                    visited=current.visited | {neighbor_addr}
-                )
-
-                heapq.heappush(frontier, new_node)
-
+                adjacency = await self._get_neighbors_batch([n.address for n in batch], constraints, memo, stats)
+                stats["expansions"] += len(batch)
+                for node in batch:
+                    adj = adjacency.get(node.address)
+                    if adj is None:
+                        continue
+                    if node.chain == "unknown" and adj.chain != "unknown":
+                        node = replace(node, chain=adj.chain)
+                        labels[d][node.address] = node
+                    for nb in adj.neighbors:
+                        addr = nb["address"]
+                        if addr == node.address:
+                            continue
+                        # Rückwärts: die Vorwärtskante nb -> node betritt `node`
+                        edge = nb if d == 0 else dict(nb, risk_score=adj.risk_score)
+                        edge_cost = self._calculate_edge_cost(edge, cost_fn)
+                        g = node.total_cost + edge_cost
+                        current = labels[d].get(addr)
+                        if current is not None and current.total_cost <= g:
+                            continue
+                        child = PathNode(addr, nb.get("chain") or "unknown", g, node.hops + 1, node, edge, edge_cost)
+                        labels[d][addr] = child
+                        heapq.heappush(heaps[d], (g, next(seq), child))
+                        offer(addr)
+
+        paths = []
+        for cost, fwd, bwd in sorted(best.values(), key=lambda x: x[0]):
+            path_data = self._join_path(fwd, bwd)
+            if path_data is None:
+                continue
+            paths.append(path_data)
+            if len(paths) >= max_paths:
+                break
+
+        stats["nodes_labeled"] = len(labels[0]) + len(labels[1])
+        if explored is not None:
+            explored.update(labels[0])
+            explored.update(labels[1])
         execution_time = (datetime.now() - start_time).total_seconds() * 1000
-
         return PathResult(
             source=source,
             target=target,
-            paths=paths_found,
+            paths=paths,
             execution_time_ms=execution_time,
-            total_paths_found=len(paths_found),
-            constraints_applied=constraints
+            total_paths_found=len(paths),
+            constraints_applied=constraints,
+            stats=stats,
         )
 
+    async def find_paths_astar(
+        self,
+        source: str,
+        target: str,
+        constraints: PathConstraint,
+        cost_fn: CostFunction,
+        max_paths: int = 10
+    ) -> PathResult:
+        """
+        Veralteter Alias für `find_paths_bidirectional`
+
+        Es gibt keine zulässige A*-Heuristik; gesucht wird immer per
+        bidirektionalem Dijkstra. Bleibt nur für bestehende Aufrufer erhalten.
+        """
+        return await self.find_paths_bidirectional(source, target, constraints, cost_fn, max_paths)
+
     async def _get_address_metadata(self, address: str) -> Dict[str, Any]:
         if not address:
             return {}
@@ -412,7 +660,7 @@ class GraphEngineV2:
             time_window_days=time_window_days,
         )
 
-        if not self.enabled or not self._driver:
+        if not self.enabled:
             root_meta = await self._get_address_metadata(address)
             nodes = {
                 address: {
@@ -565,159 +813,309 @@ class GraphEngineV2:
         max_paths: int = 10
     ) -> PathResult:
         """
-        Bidirektionales Pathfinding für bessere Performance bei großen Graphs
+        Pathfinding mit Constraints und Costs per bidirektionalem Dijkstra
+        (siehe `_search`), materialisierte Hot-Paths werden bevorzugt
         """
-        start_time = datetime.now()
-
-        # Forward search von Source
-        forward_frontier = []
-        heapq.heappush(forward_frontier, PathNode(
-            address=source, chain="unknown", total_cost=0.0, hops=0, path=[], visited={source}
-        ))
-
-        # Backward search von Target
-        backward_frontier = []
-        heapq.heappush(backward_frontier, PathNode(
-            address=target, chain="unknown", total_cost=0.0, hops=0, path=[], visited={target}
-        ))
-
-        forward_visited = {}
-        backward_visited = {}
-        paths_found = []
-
-        while forward_frontier and backward_frontier and len(paths_found) < max_paths:
-            # Forward step
-            if forward_frontier:
-                current_forward = heapq.heappop(forward_frontier)
-                forward_addr = current_forward.address
-
-                if forward_addr not in forward_visited:
-                    forward_visited[forward_addr] = current_forward
-
-                    # Check if we can meet backward search
-                    if forward_addr in backward_visited:
-                        # Meeting point gefunden!
-                        backward_node = backward_visited[forward_addr]
-                        combined_path = current_forward.path + backward_node.path[::-1]  # Reverse backward path
-                        total_cost = current_forward.total_cost + backward_node.total_cost
-                        total_hops = current_forward.hops + backward_node.hops
-
-                        path_data = {
-                            "path": combined_path,
-                            "total_cost": total_cost,
-                            "hops": total_hops,
-                            "meeting_point": forward_addr
-                        }
-                        paths_found.append(path_data)
-                        continue
-
-                    # Expand forward
-                    neighbors = await self._get_neighbors(forward_addr, current_forward.chain, constraints)
-                    for neighbor in neighbors:
-                        if neighbor["address"] not in current_forward.visited:
-                            edge_cost = self._calculate_edge_cost(neighbor, cost_fn)
-                            new_cost = current_forward.total_cost + edge_cost
-                            new_path = current_forward.path + [neighbor]
-                            new_node = PathNode(
-                                address=neighbor["address"],
-                                chain=neighbor["chain"],
-                                total_cost=new_cost,
-                                hops=current_forward.hops + 1,
-                                path=new_path,
-                                visited=current_forward.visited | {neighbor["address"]}
-                            )
-                            heapq.heappush(forward_frontier, new_node)
-
-            # Backward step (symmetrisch)
-            if backward_frontier:
-                current_backward = heapq.heappop(backward_frontier)
-                backward_addr = current_backward.address
-
-                if backward_addr not in backward_visited:
-                    backward_visited[backward_addr] = current_backward
-
-                    if backward_addr in forward_visited:
-                        forward_node = forward_visited[backward_addr]
-                        combined_path = forward_node.path + current_backward.path[::-1]
-                        total_cost = forward_node.total_cost + current_backward.total_cost
-                        total_hops = forward_node.hops + current_backward.hops
-
-                        path_data = {
-                            "path": combined_path,
-                            "total_cost": total_cost,
-                            "hops": total_hops,
-                            "meeting_point": backward_addr
-                        }
-                        paths_found.append(path_data)
-                        continue
+        return await self._find_paths_cached(source, target, constraints, cost_fn, max_paths)
+
+    # -----------------------------
+    # Materialisierte Hot-Paths
+    # -----------------------------
+    @staticmethod
+    def _hot_path_key(source: str, target: str, constraints: PathConstraint, cost_fn: CostFunction, max_paths: int) -> str:
+        params = hashlib.md5(f"{constraints!r}|{cost_fn!r}|{max_paths}".encode("utf-8")).hexdigest()[:16]
+        return f"hot_path:{source}:{target}:{params}"
+
+    def _record_query(self, key: str, source: str, target: str, constraints: PathConstraint, cost_fn: CostFunction, max_paths: int) -> int:
+        """Zählt Abfragen pro (source, target, Parameter); Tabelle ist begrenzt."""
+        tracked = self._query_frequency.get(key)
+        if tracked is None:
+            if len(self._query_frequency) >= self.hot_path_track_limit:
+                # Kälteste Hälfte verwerfen
+                keep = sorted(self._query_frequency.items(), key=lambda kv: kv[1]["count"], reverse=True)
+                self._query_frequency = dict(keep[: self.hot_path_track_limit // 2])
+            tracked = self._query_frequency[key] = {
+                "count": 0,
+                "source": source,
+                "target": target,
+                "constraints": constraints,
+                "cost_fn": cost_fn,
+                "max_paths": max_paths,
+            }
+        tracked["count"] += 1
+        return tracked["count"]
+
+    def _store_hot_path(self, key: str, source: str, target: str, result: PathResult, explored: Set[str]) -> None:
+        self._drop_hot_path(key)
+        nodes = {str(a).lower() for a in explored} | {source.lower(), target.lower()}
+        self._hot_paths_cache[key] = {
+            "source": source,
+            "target": target,
+            "result": result,
+            "nodes": nodes,
+            "materialized_at": time.time(),
+        }
+        for address in nodes:
+            self._hot_path_index.setdefault(address, set()).add(key)
+        while len(self._hot_paths_cache) > self.hot_path_max_entries:
+            self._drop_hot_path(next(iter(self._hot_paths_cache)))
+
+    def _drop_hot_path(self, key: str) -> bool:
+        entry = self._hot_paths_cache.pop(key, None)
+        if entry is None:
+            return False
+        for address in entry["nodes"]:
+            keys = self._hot_path_index.get(address)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._hot_path_index[address]
+        return True
+
+    def invalidate_addresses(self, addresses: Any) -> int:
+        """
+        Inkrementelle Invalidierung nach Kanten-Ingest
 
-                    # Expand backward (gleiche Logik wie forward)
-                    neighbors = await self._get_neighbors(backward_addr, current_backward.chain, constraints)
-                    for neighbor in neighbors:
-                        if neighbor["address"] not in current_backward.visited:
-                            edge_cost = self._calculate_edge_cost(neighbor, cost_fn)
-                            new_cost = current_backward.total_cost + edge_cost
-                            new_path = current_backward.path + [neighbor]
-                            new_node = PathNode(
-                                address=neighbor["address"],
-                                chain=neighbor["chain"],
-                                total_cost=new_cost,
-                                hops=current_backward.hops + 1,
-                                path=new_path,
-                                visited=current_backward.visited | {neighbor["address"]}
-                            )
-                            heapq.heappush(backward_frontier, new_node)
+        Eine neue Kante (u, v) kann einen Pfad nur verbessern, wenn u oder v in
+        der explorierten Region der Suche lag (jeder kürzere Pfad kreuzt die
+        Grenze zwischen Vorwärts- und Rückwärts-Region). Daher werden genau die
+        Einträge verworfen, deren Region eine der Adressen enthält; das Paar
+        bleibt heiß und wird im nächsten Zyklus neu materialisiert.
+        """
+        keys: Set[str] = set()
+        for address in addresses or []:
+            if address:
+                keys |= self._hot_path_index.get(str(address).lower(), set())
+        dropped = sum(1 for key in keys if self._drop_hot_path(key))
+        if dropped:
+            self._hot_path_stats["invalidations"] += dropped
+            metric = getattr(metrics, "GRAPH_HOT_PATH_INVALIDATIONS", None)
+            if metric is not None:
+                try:
+                    metric.inc(dropped)
+                except Exception:
+                    pass
+            self._update_hot_path_gauges()
+        return dropped
+
+    async def publish_invalidation(self, addresses: Any) -> int:
+        """
+        Invalidierung für alle Prozesse (z.B. aus dem Trace-Consumer)
 
-        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        Verwirft lokal betroffene Einträge und schreibt die Adressen unter einer
+        neuen Version nach Redis; andere Prozesse gleichen vor dem Ausliefern
+        eines materialisierten Pfads ab (`_sync_hot_path_invalidations`).
+        """
+        normalized = sorted({str(a).lower() for a in addresses or [] if a})
+        dropped = self.invalidate_addresses(normalized)
+        if not normalized:
+            return dropped
+        try:
+            client = await self._redis()
+            if client:
+                await client.eval(
+                    _PUBLISH_INVALIDATION_LUA, 3,
+                    HOT_PATH_VERSION_KEY, HOT_PATH_INVALIDATIONS_KEY, HOT_PATH_FLOOR_KEY,
+                    *normalized, HOT_PATH_INVALIDATION_LOG,
+                )
+        except Exception as e:
+            logger.warning(f"Publishing hot path invalidation failed: {e}")
+        return dropped
 
-        return PathResult(
-            source=source,
-            target=target,
-            paths=paths_found,
-            execution_time_ms=execution_time,
-            total_paths_found=len(paths_found),
-            constraints_applied=constraints
-        )
+    async def _sync_hot_path_invalidations(self) -> None:
+        """Wendet seit der letzten Synchronisation veröffentlichte Invalidierungen an"""
+        try:
+            client = await self._redis()
+            if not client:
+                return
+            raw = await client.get(HOT_PATH_VERSION_KEY)
+            version = int(raw or 0)
+            last = self._hot_path_version
+            if last is not None and version <= last:
+                return
+            if last is None:
+                # Erster Abgleich setzt die Basis; schon Materialisiertes kann Invalidierungen verpasst haben
+                self._clear_hot_paths()
+            else:
+                pipe = client.pipeline()
+                pipe.zrangebyscore(HOT_PATH_INVALIDATIONS_KEY, f"({last}", version)
+                pipe.get(HOT_PATH_FLOOR_KEY)
+                members, floor = await pipe.execute()
+                if int(floor or 0) > last:
+                    # Log wurde über unseren Stand hinaus getrimmt
+                    self._clear_hot_paths()
+                else:
+                    self.invalidate_addresses([m.decode() if isinstance(m, bytes) else m for m in members or []])
+            self._hot_path_version = version
+        except Exception as e:
+            logger.debug(f"Hot path invalidation sync skipped: {e}")
+
+    def _clear_hot_paths(self) -> None:
+        dropped = len(self._hot_paths_cache)
+        self._hot_paths_cache.clear()
+        self._hot_path_index.clear()
+        if dropped:
+            self._hot_path_stats["invalidations"] += dropped
+            self._update_hot_path_gauges()
+
+    @staticmethod
+    async def _redis():
+        await redis_client._ensure_connected()
+        return getattr(redis_client, "client", None)
+
+    async def _find_paths_cached(
+        self,
+        source: str,
+        target: str,
+        constraints: PathConstraint,
+        cost_fn: CostFunction,
+        max_paths: int,
+    ) -> PathResult:
+        key = self._hot_path_key(source, target, constraints, cost_fn, max_paths)
+        count = self._record_query(key, source, target, constraints, cost_fn, max_paths)
+
+        if key in self._hot_paths_cache or self._hot_path_version is None:
+            await self._sync_hot_path_invalidations()
+        entry = self._hot_paths_cache.get(key)
+        outcome = "miss"
+        if entry is not None:
+            age = time.time() - entry["materialized_at"]
+            if age <= self.hot_path_ttl:
+                self._hot_paths_cache.move_to_end(key)
+                self._observe_lookup("hit")
+                cached: PathResult = entry["result"]
+                return replace(
+                    cached,
+                    execution_time_ms=0.0,
+                    stats=dict(cached.stats, materialized=True, materialized_age_s=round(age, 3)),
+                )
+            self._drop_hot_path(key)
+            outcome = "stale"
+        self._observe_lookup(outcome)
+
+        explored: Set[str] = set()
+        result = await self._search(source, target, constraints, cost_fn, max_paths, explored=explored)
+        if count >= self.hot_path_min_frequency:
+            # Write-Through für bereits heiße Paare
+            self._store_hot_path(key, source, target, result, explored)
+            self._update_hot_path_gauges()
+        return result
+
+    def _observe_lookup(self, outcome: str) -> None:
+        self._hot_path_stats[outcome] += 1
+        metric = getattr(metrics, "GRAPH_HOT_PATH_LOOKUPS", None)
+        if metric is not None:
+            try:
+                metric.labels(result=outcome).inc()
+            except Exception:
+                pass
+
+    def _update_hot_path_gauges(self) -> None:
+        stats = self.get_hot_path_stats()
+        for name, value in (
+            ("GRAPH_HOT_PATH_ENTRIES", stats["entries"]),
+            ("GRAPH_HOT_PATH_HIT_RATE", stats["hit_rate"]),
+            ("GRAPH_HOT_PATH_STALENESS", stats["max_age_s"]),
+        ):
+            metric = getattr(metrics, name, None)
+            if metric is not None:
+                try:
+                    metric.set(value)
+                except Exception:
+                    pass
+
+    def get_hot_path_stats(self) -> Dict[str, Any]:
+        """Hit-Rate und Staleness der materialisierten Pfade"""
+        now = time.time()
+        ages = [now - e["materialized_at"] for e in self._hot_paths_cache.values()]
+        lookups = self._hot_path_stats["hit"] + self._hot_path_stats["miss"] + self._hot_path_stats["stale"]
+        hot_pairs = sum(1 for t in self._query_frequency.values() if t["count"] >= self.hot_path_min_frequency)
+        return {
+            "entries": len(self._hot_paths_cache),
+            "tracked_pairs": len(self._query_frequency),
+            "hot_pairs": hot_pairs,
+            "pending": max(0, hot_pairs - len(self._hot_paths_cache)),
+            "hits": self._hot_path_stats["hit"],
+            "misses": self._hot_path_stats["miss"],
+            "stale": self._hot_path_stats["stale"],
+            "hit_rate": round(self._hot_path_stats["hit"] / lookups, 4) if lookups else 0.0,
+            "invalidations": self._hot_path_stats["invalidations"],
+            "materialized": self._hot_path_stats["materialized"],
+            "max_age_s": round(max(ages), 3) if ages else 0.0,
+            "avg_age_s": round(sum(ages) / len(ages), 3) if ages else 0.0,
+        }
 
-    async def materialize_hot_paths(self, min_frequency: int = 100):
+    async def materialize_hot_paths(self, min_frequency: Optional[int] = None, limit: int = 100) -> int:
         """
         Materialisiere häufig abgefragte Paths für bessere Performance
-        """
-        if not self.enabled or not self._driver:
-            return
 
-        # Finde häufige Path-Queries (vereinfacht - würde normalerweise aus Analytics kommen)
-        query = """
-        MATCH (a:Address)-[r*1..5]-(b:Address)
-        WHERE a <> b
-        WITH a.address as source, b.address as target, count(*) as freq
-        WHERE freq >= $min_freq
-        RETURN source, target, freq
-        ORDER BY freq DESC
-        LIMIT 100
+        Berechnet für die `limit` meistgefragten Paare mit mindestens
+        `min_frequency` Abfragen kürzesten Pfad und Top-k-Alternativen neu,
+        sofern kein frischer Eintrag (jünger als die halbe TTL) vorliegt.
         """
+        await self._sync_hot_path_invalidations()
+        threshold = min_frequency if min_frequency is not None else self.hot_path_min_frequency
+        hot = sorted(
+            ((t["count"], key) for key, t in self._query_frequency.items() if t["count"] >= threshold),
+            reverse=True,
+        )[:limit]
+
+        materialized = 0
+        now = time.time()
+        for _count, key in hot:
+            entry = self._hot_paths_cache.get(key)
+            if entry is not None and now - entry["materialized_at"] < self.hot_path_ttl / 2:
+                continue
+            tracked = self._query_frequency.get(key)
+            if tracked is None:
+                continue
+            try:
+                explored: Set[str] = set()
+                result = await self._search(
+                    tracked["source"], tracked["target"], tracked["constraints"], tracked["cost_fn"],
+                    tracked["max_paths"], explored=explored,
+                )
+                self._store_hot_path(key, tracked["source"], tracked["target"], result, explored)
+                materialized += 1
+            except Exception as e:
+                logger.error(f"Error materializing hot path {key}: {e}")
 
-        try:
-            records = await asyncio.to_thread(
-                lambda: list(self._driver.session().run(query, min_freq=min_frequency))
-            )
+        self._hot_path_stats["materialized"] += materialized
+        self._update_hot_path_gauges()
+        if materialized:
+            logger.info(f"Materialized {materialized} hot paths")
+        return materialized
 
-            for rec in records:
-                source = rec["source"]
-                target = rec["target"]
-                # Cache dummy path (in Produktion: berechne echte Paths)
-                cache_key = f"hot_path:{source}:{target}"
-                self._hot_paths_cache[cache_key] = {
-                    "source": source,
-                    "target": target,
-                    "materialized": True,
-                    "last_updated": datetime.now().isoformat()
-                }
+    async def _materialize_loop(self, interval: float, min_frequency: Optional[int] = None) -> None:
+        while True:
+            try:
+                await self.materialize_hot_paths(min_frequency)
+                # Häufigkeiten altern, damit abgekühlte Paare aus dem Hot-Set fallen
+                for key in list(self._query_frequency):
+                    self._query_frequency[key]["count"] //= 2
+                    if not self._query_frequency[key]["count"] and key not in self._hot_paths_cache:
+                        del self._query_frequency[key]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Hot path materializer error: {e}")
+            await asyncio.sleep(interval)
 
-            logger.info(f"Materialized {len(records)} hot paths")
+    async def start_hot_path_materializer(self, min_frequency: Optional[int] = None, interval: Optional[float] = None) -> None:
+        """Startet die Hintergrund-Materialisierung (idempotent)"""
+        if self._materializer_task is not None and not self._materializer_task.done():
+            return
+        interval = interval if interval is not None else float(os.getenv("GRAPH_V2_MATERIALIZE_INTERVAL", "60"))
+        self._materializer_task = asyncio.create_task(self._materialize_loop(interval, min_frequency))
 
-        except Exception as e:
-            logger.error(f"Error materializing hot paths: {e}")
+    async def stop_hot_path_materializer(self) -> None:
+        task, self._materializer_task = self._materializer_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
 
     async def query_graph_v2(self, query: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -738,12 +1136,8 @@ class GraphEngineV2:
 
             constraints = PathConstraint(**params.get("constraints", {}))
             cost_fn = CostFunction(**params.get("cost_function", {}))
-            algorithm = params.get("algorithm", "astar")  # "astar" oder "bidirectional"
-
-            if algorithm == "bidirectional":
-                result = await self.find_paths_bidirectional(source, target, constraints, cost_fn)
-            else:
-                result = await self.find_paths_astar(source, target, constraints, cost_fn)
+            # "astar" wird als Alias akzeptiert, gesucht wird immer bidirektional
+            result = await self.find_paths_bidirectional(source, target, constraints, cost_fn)
 
             return {
                 "query_type": "find_paths",
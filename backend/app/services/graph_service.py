@@ -5,6 +5,7 @@ Optional Neo4j-backed graph writer with safe no-op fallback.
 from __future__ import annotations
 
 from typing import Any, Dict, Optional, List
+import asyncio
 import logging
 
 try:
@@ -39,6 +40,37 @@ class GraphService:
         if self._driver:
             self._driver.close()
 
+    _pending_invalidations: "set[asyncio.Task]" = set()
+
+    @classmethod
+    def _invalidate_hot_paths(cls, addresses: List[str]) -> None:
+        """New edges invalidate materialized graph v2 paths touching these addresses.
+
+        Inside an event loop the invalidation is also published via Redis so other
+        processes drop their copies; without a loop only the local cache is updated.
+        """
+        try:
+            from app.services.graph_engine_v2 import graph_engine_v2
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                graph_engine_v2.invalidate_addresses(addresses)
+                return
+            task = loop.create_task(graph_engine_v2.publish_invalidation(addresses))
+            cls._pending_invalidations.add(task)
+            task.add_done_callback(cls._pending_invalidations.discard)
+        except Exception as e:  # pragma: no cover
+            logger.debug(f"Hot path invalidation skipped: {e}")
+
+    @staticmethod
+    def _invalidate_screening_activity(chain: str, addresses: List[str]) -> None:
+        """New transactions make cached universal-screening activity summaries stale."""
+        try:
+            from app.services.universal_screening import universal_screening_service
+            universal_screening_service.invalidate_activity(chain, addresses)
+        except Exception as e:  # pragma: no cover
+            logger.debug(f"Screening activity invalidation skipped: {e}")
+
     # --------------- public API ---------------
     def ingest_canonical(self, evt: Dict[str, Any]) -> Dict[str, Any]:
         if not self.enabled:
@@ -67,7 +99,9 @@ class GraphService:
         assert self._driver is not None
         with self._driver.session() as s:
             rec = s.run(q, **params).single()
-            return {"tx": rec["tx"] if rec else evt.get("tx_hash")}
+        self._invalidate_hot_paths([params["from"], params["to"]])
+        self._invalidate_screening_activity(params["chain"], [params["from"], params["to"]])
+        return {"tx": rec["tx"] if rec else evt.get("tx_hash")}
 
     def ingest_btc_edges(self, txid: str, edges: List[Dict[str, Any]], fee: float | None = None) -> Dict[str, Any]:
         if not self.enabled:
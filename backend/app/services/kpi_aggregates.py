@@ -0,0 +1,286 @@
+"""
+KPI Aggregates
+==============
+Inkrementell gepflegte, stündlich gebucketete KPI-Zähler.
+
+Statt bei jeder Anfrage alle Alerts, Annotationen und Cases neu zu laden,
+werden Alerts, Dispositionen, Eventzeiten und Case-Schließungen beim
+Entstehen in Stunden-Buckets verbucht. `KpiService.get_kpis` summiert dann
+nur noch die Buckets des angefragten Fensters.
+
+- Alerts/FP/TP/MTTD werden dem Bucket des Alert-Zeitstempels zugeordnet
+- Case-Schließungen dem Bucket von `closed_at` (Dauer in Sekunden als Histogramm,
+  damit Median und SLA-Breaches für beliebige `sla_hours` exakt bleiben)
+- Dispositionswechsel (FP -> TP) korrigieren den alten Zähler
+- Adressen werden nicht pro Bucket als Set gehalten, sondern einmal mit ihrem
+  jüngsten Alert-Bucket; die Adressen eines Fensters kosten so O(Adressen)
+  statt O(Buckets x Adressen)
+- Buckets älter als `retention_days` und der Alert-Index (LRU) sind begrenzt
+- Die Zähler liegen pro Prozess im Speicher; Ereignisse anderer Worker/Replicas
+  kommen über den kurzen Abgleich im KpiWorker hinzu
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+BUCKET_SECONDS = 3600
+
+
+def _bucket_of(ts: datetime) -> int:
+    return int(ts.timestamp()) // BUCKET_SECONDS
+
+
+@dataclass
+class _Bucket:
+    alerts: int = 0
+    false_positives: int = 0
+    true_positives: int = 0
+    mttd_hours_sum: float = 0.0
+    mttd_count: int = 0
+    closed_durations: Counter = field(default_factory=Counter)  # Sekunden -> Anzahl
+
+
+@dataclass
+class _AlertEntry:
+    bucket: int
+    timestamp: datetime
+    address: Optional[str] = None
+    disposition: Optional[str] = None
+    detection_hours: Optional[float] = None
+    seq: int = 0  # Stand der letzten Änderung (siehe KpiAggregates.snapshot_marker)
+
+
+@dataclass
+class KpiWindow:
+    """Summe der Buckets eines Zeitfensters."""
+    alerts: int
+    false_positives: int
+    true_positives: int
+    mttd_hours_sum: float
+    mttd_count: int
+    closed_durations: Counter
+    addresses: Set[str]
+
+
+class KpiAggregates:
+    """Thread-sichere In-Memory-Bucket-Ablage für Alert/Case-KPIs."""
+
+    def __init__(self, retention_days: int = 400, max_tracked_alerts: int = 500_000):
+        self.retention_days = retention_days
+        self.max_tracked_alerts = max_tracked_alerts
+        self._buckets: Dict[int, _Bucket] = {}
+        self._alerts: "OrderedDict[str, _AlertEntry]" = OrderedDict()
+        self._address_seen: Dict[str, int] = {}  # Adresse -> jüngster Alert-Bucket
+        self._lock = threading.RLock()
+        self._seq = 0
+        # Erst nach einem Backfill (rebuild) gelten die Zähler als vollständig
+        self.primed = False
+
+    # -----------------------------
+    # Ereignisse
+    # -----------------------------
+    def record_alert(self, alert_id: str, timestamp: datetime, address: Optional[str] = None) -> None:
+        if not alert_id or timestamp is None:
+            return
+        with self._lock:
+            if alert_id in self._alerts:
+                return
+            b = _bucket_of(timestamp)
+            bucket = self._bucket(b)
+            bucket.alerts += 1
+            if isinstance(address, str) and address and self._address_seen.get(address, b - 1) < b:
+                self._address_seen[address] = b
+            self._alerts[alert_id] = _AlertEntry(bucket=b, timestamp=timestamp, address=address, seq=self._next_seq())
+            while len(self._alerts) > self.max_tracked_alerts:
+                self._alerts.popitem(last=False)
+
+    def record_disposition(self, alert_id: str, disposition: Optional[str]) -> None:
+        with self._lock:
+            entry = self._alerts.get(alert_id)
+            if entry is None:
+                return
+            bucket = self._bucket(entry.bucket)
+            self._apply_disposition(bucket, entry.disposition, -1)
+            entry.disposition = disposition
+            self._apply_disposition(bucket, disposition, +1)
+            entry.seq = self._next_seq()
+
+    def record_event_time(self, alert_id: str, event_time: Optional[datetime]) -> None:
+        with self._lock:
+            entry = self._alerts.get(alert_id)
+            if entry is None or event_time is None:
+                return
+            try:
+                det = (entry.timestamp - event_time).total_seconds() / 3600.0
+            except Exception:
+                return
+            self._set_detection(entry, det if det >= 0 else None)
+            entry.seq = self._next_seq()
+
+    def record_case_closed(self, created_at: Optional[datetime], closed_at: Optional[datetime]) -> None:
+        if created_at is None or closed_at is None:
+            return
+        seconds = max(0, int((closed_at - created_at).total_seconds()))
+        with self._lock:
+            self._bucket(_bucket_of(closed_at)).closed_durations[seconds] += 1
+
+    # -----------------------------
+    # Abfrage
+    # -----------------------------
+    def window(self, since: datetime, until: Optional[datetime] = None) -> KpiWindow:
+        """Summiert alle Buckets im Bereich [since, until].
+
+        `addresses` enthält die Adressen, deren jüngster Alert im Bereich liegt;
+        für Fenster bis jetzt (`until=None`) sind das genau die Adressen des Fensters.
+        """
+        lo = _bucket_of(since)
+        hi = _bucket_of(until or datetime.utcnow())
+        out = KpiWindow(0, 0, 0, 0.0, 0, Counter(), set())
+        with self._lock:
+            if hi - lo + 1 <= len(self._buckets):
+                keys: Iterable[int] = range(lo, hi + 1)
+            else:
+                keys = [k for k in self._buckets if lo <= k <= hi]
+            for k in keys:
+                b = self._buckets.get(k)
+                if b is None:
+                    continue
+                out.alerts += b.alerts
+                out.false_positives += b.false_positives
+                out.true_positives += b.true_positives
+                out.mttd_hours_sum += b.mttd_hours_sum
+                out.mttd_count += b.mttd_count
+                out.closed_durations.update(b.closed_durations)
+            out.addresses = {a for a, k in self._address_seen.items() if lo <= k <= hi}
+        return out
+
+    # -----------------------------
+    # Wartung
+    # -----------------------------
+    def snapshot_marker(self) -> int:
+        """Marke vor dem Laden der Backfill-Quellen; spätere Live-Ereignisse übernimmt `rebuild`."""
+        with self._lock:
+            return self._seq
+
+    def rebuild(
+        self,
+        alerts: Iterable[Any],
+        annotations: Dict[str, Any],
+        cases: Iterable[Dict[str, Any]],
+        since: Optional[int] = None,
+    ) -> None:
+        """Ersetzt alle Zähler durch einen vollständigen Backfill aus den Quellen.
+
+        `since` ist die `snapshot_marker()`-Marke vom Beginn des Ladens der Quellen.
+        Nur danach live verbuchte Alerts, Dispositionen und Eventzeiten werden in den
+        Backfill übernommen; ältere Einträge stammen aus einem früheren Stand und
+        würden sonst Alerts außerhalb der Quellen wieder einschleusen.
+        """
+        if since is None:
+            since = self.snapshot_marker()
+        fresh = KpiAggregates(self.retention_days, self.max_tracked_alerts)
+        for a in alerts:
+            aid = getattr(a, "alert_id", None)
+            fresh.record_alert(aid, getattr(a, "timestamp", None), getattr(a, "address", None))
+            ann = annotations.get(aid)
+            if ann is not None:
+                fresh.record_disposition(aid, getattr(ann, "disposition", None))
+                fresh.record_event_time(aid, getattr(ann, "event_time", None))
+        for c in cases:
+            try:
+                created = datetime.fromisoformat(c["created_at"]) if c.get("created_at") else None
+                closed = datetime.fromisoformat(c["closed_at"]) if c.get("closed_at") else None
+            except Exception:
+                continue
+            fresh.record_case_closed(created, closed)
+        with self._lock:
+            # Während des Backfills live verbuchte Änderungen übernehmen (inkl. MTTD)
+            for aid, entry in self._alerts.items():
+                if entry.seq <= since:
+                    continue
+                if aid not in fresh._alerts:
+                    fresh.record_alert(aid, entry.timestamp, entry.address)
+                merged = fresh._alerts.get(aid)
+                if merged is None:
+                    continue
+                if merged.disposition != entry.disposition:
+                    fresh.record_disposition(aid, entry.disposition)
+                if entry.detection_hours is not None:
+                    fresh._set_detection(merged, entry.detection_hours)
+            for entry in fresh._alerts.values():
+                entry.seq = 0
+            self._buckets = fresh._buckets
+            self._alerts = fresh._alerts
+            self._address_seen = fresh._address_seen
+            self.primed = True
+            self.prune()
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        cutoff = _bucket_of((now or datetime.utcnow()) - timedelta(days=self.retention_days))
+        with self._lock:
+            stale = [k for k in self._buckets if k < cutoff]
+            for k in stale:
+                del self._buckets[k]
+            for a in [a for a, k in self._address_seen.items() if k < cutoff]:
+                del self._address_seen[a]
+            return len(stale)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self._alerts.clear()
+            self._address_seen.clear()
+            self.primed = False
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _set_detection(self, entry: _AlertEntry, hours: Optional[float]) -> None:
+        bucket = self._bucket(entry.bucket)
+        if entry.detection_hours is not None:
+            bucket.mttd_hours_sum -= entry.detection_hours
+            bucket.mttd_count -= 1
+        entry.detection_hours = hours
+        if hours is not None:
+            bucket.mttd_hours_sum += hours
+            bucket.mttd_count += 1
+
+    def _bucket(self, key: int) -> _Bucket:
+        b = self._buckets.get(key)
+        if b is None:
+            b = self._buckets[key] = _Bucket()
+        return b
+
+    @staticmethod
+    def _apply_disposition(bucket: _Bucket, disposition: Optional[str], delta: int) -> None:
+        if disposition == "false_positive":
+            bucket.false_positives += delta
+        elif disposition == "true_positive":
+            bucket.true_positives += delta
+
+
+def median_of(counts: Counter) -> float:
+    """Median über ein Wert->Anzahl-Histogramm (Mittel der beiden Mitten bei gerader Anzahl)."""
+    n = sum(counts.values())
+    if n <= 0:
+        return 0.0
+    targets: List[int] = [(n - 1) // 2, n // 2]
+    found: List[float] = []
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        while targets and targets[0] < seen:
+            targets.pop(0)
+            found.append(float(value))
+        if not targets:
+            break
+    return sum(found) / len(found)
+
+
+kpi_aggregates = KpiAggregates()
@@ -12,6 +12,7 @@ except Exception:
     case_service = None  # type: ignore
 from app.repos.sanctions_repository import sanctions_repository
 from app.db.redis_client import redis_client
+from app.services.kpi_aggregates import kpi_aggregates, median_of
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,9 @@ class KpiService:
         return f"kpis:{days}:{sla_hours}"
 
     async def get_kpis(self, *, days: int, sla_hours: int) -> KpiResult:
+        # Inkrementelle Buckets (nach Backfill durch den KpiWorker): reine Range-Summe
+        if kpi_aggregates.primed:
+            return await self._kpis_from_aggregates(days=days, sla_hours=sla_hours)
         # Try cache first
         try:
             cached = await redis_client.cache_get(self._cache_key(days=days, sla_hours=sla_hours))
@@ -172,5 +176,59 @@ class KpiService:
 
         return result
 
+    async def _kpis_from_aggregates(self, *, days: int, sla_hours: int) -> KpiResult:
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        win = kpi_aggregates.window(cutoff)
+
+        sanctions_hits = 0
+        try:
+            sanctions_hits = await sanctions_repository.count_distinct_hits(sorted(win.addresses))
+        except Exception:
+            sanctions_hits = 0
+
+        labeled = win.false_positives + win.true_positives
+        if win.alerts > 0 and labeled > 0:
+            fpr = win.false_positives / labeled
+        else:
+            try:
+                supp_stats = alert_service.get_suppression_statistics()
+                false_positives = int(supp_stats.get("total_suppressions", 0))
+            except Exception:
+                false_positives = 0
+            fpr = (false_positives / win.alerts) if win.alerts > 0 else 0.0
+
+        total_closed = sum(win.closed_durations.values())
+        sla_seconds = float(sla_hours) * 3600.0
+        breaches = sum(n for secs, n in win.closed_durations.items() if secs > sla_seconds)
+        mttr_hours = median_of(win.closed_durations) / 3600.0
+
+        return KpiResult(
+            fpr=float(fpr),
+            mttr=float(mttr_hours),
+            mttd=(win.mttd_hours_sum / win.mttd_count) if win.mttd_count > 0 else 0.0,
+            sla_breach_rate=(breaches / total_closed) if total_closed > 0 else 0.0,
+            sanctions_hits=int(sanctions_hits),
+        )
+
+    async def rebuild_aggregates(self, *, max_alerts: int = 100000, max_cases: int = 10000) -> None:
+        """Backfill der KPI-Buckets aus Alert-Historie, Annotationen und Cases."""
+        since = kpi_aggregates.snapshot_marker()
+        try:
+            alerts = alert_service.get_recent_alerts(limit=max_alerts)
+        except Exception:
+            alerts = []
+        annotations: Dict[str, Any] = {}
+        try:
+            annotations = alert_annotation_service.get_annotations_map([a.alert_id for a in alerts])
+        except Exception as e:
+            logger.warning(f"Failed loading alert annotations: {e}")
+        cases: List[Dict[str, Any]] = []
+        try:
+            if case_service is not None:
+                cases = case_service.query_cases(limit=max_cases, offset=0).get("cases", [])
+        except Exception as e:
+            logger.warning(f"Failed loading cases for KPI backfill: {e}")
+        kpi_aggregates.rebuild(alerts, annotations, cases, since=since)
+
 
 kpi_service = KpiService()
@@ -12,15 +12,29 @@ Screent eine Wallet-Adresse gleichzeitig über alle Chains mit:
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Set
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 import hashlib
 import json
 
 logger = logging.getLogger(__name__)
 
+# Abhängige Services (Modul-Attribute, damit sie sich in Tests ersetzen lassen)
+try:
+    from app.services.compliance_service import service as compliance_service
+    from app.analytics.exposure_service import exposure_service
+    from app.services.multi_chain import multi_chain_engine
+except Exception as _import_error:  # pragma: no cover
+    logger.error(f"Universal Screening dependencies unavailable: {_import_error}")
+    compliance_service = None
+    exposure_service = None
+    multi_chain_engine = None
+
 # ML Risk Prediction (optional)
 try:
     from app.ml.risk_predictor import get_risk_predictor, RiskFeatures
@@ -158,22 +172,234 @@ class UniversalScreeningResult:
         }
 
 
+def _address_key(address: str) -> str:
+    """EVM-Adressen case-insensitiv, Base58/Bech32 (BTC, Solana, ...) unverändert"""
+    address = (address or "").strip()
+    return address.lower() if address[:2].lower() == "0x" else address
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Timestamp aus datetime, Unix-Sekunden/-Millisekunden oder ISO-String"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        if not value.isdigit():
+            return datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+        value = int(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value / 1000 if value > 1e12 else value, tz=timezone.utc)
+    return None
+
+
+def _summarize_activity(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Activity-Summary (Counterparties, Volumen, Zeitspanne) in einem Durchlauf"""
+    counterparties: Set[str] = set()
+    total_value = 0.0
+    first_seen: Optional[datetime] = None
+    last_activity: Optional[datetime] = None
+
+    for tx in txs:
+        sender, receiver = tx.get("from"), tx.get("to")
+        if sender:
+            counterparties.add(sender.lower())
+        if receiver:
+            counterparties.add(receiver.lower())
+        value = tx.get("value")
+        if value:
+            try:
+                total_value += float(value)
+            except (TypeError, ValueError):
+                pass
+        raw_ts = tx.get("timestamp")
+        if raw_ts:
+            try:
+                ts = _parse_timestamp(raw_ts)
+                if ts is None:
+                    continue
+                if first_seen is None or ts < first_seen:
+                    first_seen = ts
+                if last_activity is None or ts > last_activity:
+                    last_activity = ts
+            except (TypeError, ValueError, OverflowError, OSError):
+                pass
+
+    return {
+        "tx_count": len(txs),
+        "counterparties": len(counterparties),
+        "total_value_usd": total_value,  # Vereinfacht, sollte Preis-Conversion nutzen
+        "first_seen": first_seen,
+        "last_activity": last_activity,
+    }
+
+
+class ChainActivityCache:
+    """
+    TTL-Cache für Activity-Summaries pro (Chain, Adresse)
+
+    - Gleichzeitige Anfragen für denselben Schlüssel teilen sich einen Fetch
+    - Ingest neuer Transaktionen invalidiert betroffene Einträge (invalidate)
+    - Ein während des Fetches invalidierter Schlüssel wird nicht gecacht
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("UNIVERSAL_SCREENING_ACTIVITY_TTL_SECONDS", "300")
+        )
+        self.max_entries = max_entries or int(os.getenv("UNIVERSAL_SCREENING_ACTIVITY_CACHE_MAX", "50000"))
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(chain_id: str, address: str) -> Tuple[str, str]:
+        return (chain_id or "").lower(), _address_key(address)
+
+    def get(self, chain_id: str, address: str) -> Optional[Dict[str, Any]]:
+        key = self._key(chain_id, address)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, chain_id: str, address: str, summary: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        key = self._key(chain_id, address)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, summary)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        chain_id: str,
+        address: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Summary aus dem Cache, sonst über fetch() laden (ein Fetch pro Schlüssel)"""
+        cached = self.get(chain_id, address)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        key = self._key(chain_id, address)
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.hits += 1
+            return await asyncio.shield(shared)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            summary = await fetch()
+            if self._inflight.get(key) is future:
+                self.put(chain_id, address, summary)
+            future.set_result(summary)
+            return summary
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # als abgerufen markieren, falls niemand wartet
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def invalidate(self, chain_id: Optional[str], addresses: Iterable[str]) -> int:
+        """Einträge der Adressen verwerfen (chain_id=None: auf allen Chains)"""
+        targets = {_address_key(a) for a in addresses or [] if a}
+        if not targets:
+            return 0
+        if chain_id:
+            chain = chain_id.lower()
+            keys = [(chain, a) for a in targets]
+        else:
+            keys = [k for k in list(self._entries) + list(self._inflight) if k[1] in targets]
+        dropped = 0
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                dropped += 1
+            self._inflight.pop(key, None)
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+@dataclass
+class _ComplianceView:
+    """Normalisierte Sicht auf ein Compliance-Ergebnis (risk_score 0.0 - 1.0)"""
+    is_sanctioned: bool
+    risk_score: float
+    labels: List[str]
+    sanctions_list: Optional[str] = None
+    program: str = "Unknown"
+
+    @classmethod
+    def from_result(cls, result: Any) -> Optional["_ComplianceView"]:
+        if result is None:
+            return None
+        # ScreeningResult des Compliance-Service kennt categories/watchlisted und Scores 0-100
+        labels = getattr(result, "labels", None)
+        if labels is None:
+            labels = getattr(result, "categories", None) or []
+        try:
+            risk = float(getattr(result, "risk_score", 0.0) or 0.0)
+        except (TypeError, ValueError):
+            risk = 0.0
+        return cls(
+            is_sanctioned=getattr(result, "is_sanctioned", False) is True,
+            risk_score=risk / 100.0 if risk > 1.0 else risk,
+            labels=list(labels),
+            sanctions_list=getattr(result, "sanctions_list", None),
+            program=getattr(result, "program", "Unknown"),
+        )
+
+
+@dataclass
+class _AddressProfile:
+    """Chain-unabhängige Teile eines Screenings, einmal pro Adresse und Request"""
+    exposure_result: Any
+    exposure_dict: Dict[str, Any]
+    exposure_summary: Dict[str, Any]
+    exposure_evidence: List[AttributionEvidence]
+
+
 class UniversalScreeningService:
     """Universal Wallet Screening Service (TRM Labs-Style)"""
-    
+
     def __init__(self):
         self.supported_chains: List[str] = []
         self._initialized = False
-        
+        self.activity_cache = ChainActivityCache()
+        self.per_chain_concurrency = int(os.getenv("UNIVERSAL_SCREENING_PER_CHAIN_CONCURRENCY", "8"))
+        self.bulk_concurrency = int(os.getenv("UNIVERSAL_SCREENING_BULK_CONCURRENCY", "32"))
+
     async def initialize(self):
         """Initialisiere Service und lade unterstützte Chains"""
         if self._initialized:
             return
             
         try:
-            # Importiere Multi-Chain Engine
-            from app.services.multi_chain import multi_chain_engine
-            
             # Lade alle unterstützten Chains
             chains = multi_chain_engine.adapter_factory.get_supported_chains()
             self.supported_chains = [chain.chain_id for chain in chains]
@@ -193,21 +419,12 @@ class UniversalScreeningService:
         chains: Optional[List[str]] = None,
         max_concurrent: int = 10,
     ) -> UniversalScreeningResult:
-        # Metrics imported lazily to avoid circular imports
-        try:
-            from app.monitoring.metrics import (
-                universal_screening_requests,
-                universal_screening_duration,
-                universal_screening_chains_screened,
-                universal_screening_risk_score
-            )
-            import time
-            _start = time.time()
-        except:
-            _start = None
         """
         Screent eine Adresse über alle (oder spezifizierte) Chains gleichzeitig.
         
+        Chain-unabhängige Teile (Exposure, daraus abgeleitete Evidence) werden
+        einmal pro Request berechnet, Activity-Summaries kommen aus dem TTL-Cache.
+        
         Args:
             address: Wallet-Adresse zum Screenen
             chains: Optional Liste spezifischer Chains (None = alle)
@@ -223,13 +440,16 @@ class UniversalScreeningService:
         # Bestimme zu screenende Chains
         target_chains = chains if chains else self.supported_chains
         
+        # Chain-unabhängiges Profil einmal pro Request
+        profile = await self._build_address_profile(address)
+        
         # Parallel Screening über alle Chains
         semaphore = asyncio.Semaphore(max_concurrent)
         
         async def screen_single_chain(chain_id: str) -> Optional[ChainScreeningResult]:
             async with semaphore:
                 try:
-                    return await self._screen_chain(address, chain_id)
+                    return await self._screen_chain(address, chain_id, profile=profile)
                 except Exception as e:
                     logger.warning(f"Chain {chain_id} screening failed: {e}")
                     return None
@@ -238,85 +458,146 @@ class UniversalScreeningService:
         tasks = [screen_single_chain(chain) for chain in target_chains]
         chain_results_list = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Filtere erfolgreiche Results
+        return self._finish(address, target_chains, chain_results_list, start_time)
+    
+    async def screen_addresses_universal(
+        self,
+        addresses: List[str],
+        chains: Optional[List[str]] = None,
+        per_chain_concurrency: Optional[int] = None,
+        max_concurrent_addresses: Optional[int] = None,
+    ) -> Dict[str, UniversalScreeningResult]:
+        """
+        Bulk-Screening (Portfolio) vieler Adressen über alle (oder spezifizierte) Chains.
+        
+        Upstream-Fetches werden pro Chain begrenzt (RPC-/Indexer-Rate-Limits),
+        Cache-Treffer laufen ohne Limit durch. Doppelte Adressen werden einmal
+        gescreent.
+        
+        Args:
+            addresses: Wallet-Adressen
+            chains: Optional Liste spezifischer Chains (None = alle)
+            per_chain_concurrency: Max gleichzeitige Activity-Fetches pro Chain
+            max_concurrent_addresses: Max gleichzeitig gescreente Adressen
+            
+        Returns:
+            Dict Adresse -> UniversalScreeningResult (Eingabereihenfolge)
+        """
+        await self.initialize()
+        target_chains = chains if chains else self.supported_chains
+        unique = list(dict.fromkeys(a.strip() for a in addresses if a and a.strip()))
+        
+        chain_limits = {
+            chain_id: asyncio.Semaphore(max(1, per_chain_concurrency or self.per_chain_concurrency))
+            for chain_id in target_chains
+        }
+        address_limit = asyncio.Semaphore(max(1, max_concurrent_addresses or self.bulk_concurrency))
+        
+        async def screen_one(address: str) -> Optional[UniversalScreeningResult]:
+            async with address_limit:
+                start_time = asyncio.get_event_loop().time()
+                try:
+                    profile = await self._build_address_profile(address)
+                    chain_results_list = await asyncio.gather(
+                        *[
+                            self._screen_chain(address, chain_id, profile=profile, fetch_limit=chain_limits[chain_id])
+                            for chain_id in target_chains
+                        ],
+                        return_exceptions=True,
+                    )
+                    return self._finish(address, target_chains, chain_results_list, start_time)
+                except Exception as e:
+                    logger.warning(f"Bulk screening failed for {address}: {e}")
+                    return None
+        
+        results = await asyncio.gather(*[screen_one(address) for address in unique])
+        return {address: result for address, result in zip(unique, results) if result is not None}
+    
+    def _finish(
+        self,
+        address: str,
+        target_chains: List[str],
+        chain_results_list: List[Any],
+        start_time: float,
+    ) -> UniversalScreeningResult:
+        """Filtert erfolgreiche Chain-Results und aggregiert"""
         chain_results: Dict[str, ChainScreeningResult] = {}
         for chain_id, result in zip(target_chains, chain_results_list):
             if isinstance(result, ChainScreeningResult):
                 chain_results[chain_id] = result
+            elif isinstance(result, Exception):
+                logger.warning(f"Chain {chain_id} screening failed: {result}")
         
-        # Aggregiere Results
-        aggregate_result = self._aggregate_results(
+        return self._aggregate_results(
             address=address,
             chain_results=chain_results,
             screened_chains=target_chains,
             start_time=start_time,
         )
+    
+    async def _build_address_profile(self, address: str) -> _AddressProfile:
+        """Exposure und daraus abgeleitete Evidence (unabhängig von der Chain)"""
+        exposure_result = None
+        if exposure_service is not None:
+            try:
+                exposure_result = await exposure_service.calculate(address=address, max_hops=3)
+            except Exception as e:
+                logger.debug(f"Exposure analysis failed for {address}: {e}")
         
-        return aggregate_result
+        exposure_dict = exposure_result.to_dict() if hasattr(exposure_result, 'to_dict') else {}
+        return _AddressProfile(
+            exposure_result=exposure_result,
+            exposure_dict=exposure_dict,
+            exposure_summary=self._create_exposure_summary(exposure_result, exposure_dict),
+            exposure_evidence=self._exposure_evidence(exposure_dict),
+        )
     
     async def _screen_chain(
         self,
         address: str,
         chain_id: str,
+        profile: Optional[_AddressProfile] = None,
+        fetch_limit: Optional[asyncio.Semaphore] = None,
     ) -> ChainScreeningResult:
         """Screent eine Adresse auf einer spezifischen Chain"""
         
-        # Importiere benötigte Services
-        try:
-            from app.services.compliance_service import service as compliance_service
-            from app.analytics.exposure_service import exposure_service
-            from app.services.multi_chain import multi_chain_engine
-        except Exception as e:
-            logger.error(f"Import error in _screen_chain: {e}")
-            # Erstelle minimales Ergebnis
+        if compliance_service is None or multi_chain_engine is None:
             return self._create_minimal_result(address, chain_id)
+        if profile is None:
+            profile = await self._build_address_profile(address)
         
-        # 1. Compliance Screening (Sanctions, Labels)
+        # 1. Compliance Screening (Watchlist ist pro Chain geführt, Service cached selbst)
         compliance_result = None
         try:
-            compliance_result = compliance_service.screen(chain_id, address)
+            compliance_result = _ComplianceView.from_result(compliance_service.screen(chain_id, address))
         except Exception as e:
             logger.debug(f"Compliance screening failed for {chain_id}: {e}")
         
-        # 2. Exposure Analysis (Direct + Indirect Risk)
-        exposure_result = None
-        try:
-            exposure_result = await exposure_service.calculate(
-                address=address,
-                max_hops=3,
-                context={"chain_id": chain_id}
-            )
-        except Exception as e:
-            logger.debug(f"Exposure analysis failed for {chain_id}: {e}")
+        # 2. Chain Activity Metadata (TTL-Cache)
+        activity_metadata = await self._get_chain_activity(chain_id, address, fetch_limit=fetch_limit)
         
-        # 3. Chain Activity Metadata
-        activity_metadata = await self._get_chain_activity(chain_id, address)
-        
-        # 4. Attribution Evidence sammeln (Glass Box)
+        # 3. Attribution Evidence sammeln (Glass Box)
         attribution_evidence = self._collect_attribution_evidence(
             compliance_result=compliance_result,
-            exposure_result=exposure_result,
             activity_metadata=activity_metadata,
+            exposure_evidence=profile.exposure_evidence,
         )
         
-        # 5. Risk Score berechnen
+        # 4. Risk Score berechnen
         risk_score = self._calculate_risk_score(
             compliance_result=compliance_result,
-            exposure_result=exposure_result,
+            exposure_dict=profile.exposure_dict,
             attribution_evidence=attribution_evidence,
         )
         
         risk_level = self._get_risk_level(risk_score)
         
-        # 6. Labels sammeln
+        # 5. Labels sammeln
         labels = self._collect_labels(
             compliance_result=compliance_result,
             attribution_evidence=attribution_evidence,
         )
         
-        # 7. Exposure Summary
-        exposure_summary = self._create_exposure_summary(exposure_result)
-        
         return ChainScreeningResult(
             chain_id=chain_id,
             address=address,
@@ -325,7 +606,7 @@ class UniversalScreeningService:
             is_sanctioned=bool(compliance_result and compliance_result.is_sanctioned),
             labels=labels,
             attribution_evidence=attribution_evidence,
-            exposure_summary=exposure_summary,
+            exposure_summary=dict(profile.exposure_summary),
             transaction_count=activity_metadata.get("tx_count", 0),
             first_seen=activity_metadata.get("first_seen"),
             last_activity=activity_metadata.get("last_activity"),
@@ -337,74 +618,42 @@ class UniversalScreeningService:
         self,
         chain_id: str,
         address: str,
+        fetch_limit: Optional[asyncio.Semaphore] = None,
     ) -> Dict[str, Any]:
-        """Holt Chain-Activity-Metadaten"""
+        """Holt Chain-Activity-Metadaten (gecacht; Fehler werden nicht gecacht)"""
+        
+        async def fetch() -> Dict[str, Any]:
+            if fetch_limit is None:
+                return await self._fetch_chain_activity(chain_id, address)
+            async with fetch_limit:
+                return await self._fetch_chain_activity(chain_id, address)
+        
         try:
-            from app.services.multi_chain import multi_chain_engine
-            
-            # Versuche Transaktionen zu holen (limitiert für Performance)
-            txs = await multi_chain_engine.get_address_transactions_paged(
-                chain_id=chain_id,
-                address=address,
-                limit=100,
-            )
-            
-            if not txs:
-                return {"tx_count": 0, "counterparties": 0, "total_value_usd": 0.0}
-            
-            # Extrahiere Metriken
-            counterparties = set()
-            total_value = 0.0
-            
-            for tx in txs:
-                # Sammle Counterparties
-                if tx.get("from"):
-                    counterparties.add(tx["from"].lower())
-                if tx.get("to"):
-                    counterparties.add(tx["to"].lower())
-                
-                # Summiere Values (vereinfacht)
-                if tx.get("value"):
-                    try:
-                        total_value += float(tx["value"])
-                    except:
-                        pass
-            
-            # Timestamps
-            first_seen = None
-            last_activity = None
-            
-            if txs:
-                timestamps = []
-                for tx in txs:
-                    if tx.get("timestamp"):
-                        try:
-                            ts = datetime.fromisoformat(tx["timestamp"].replace("Z", "+00:00"))
-                            timestamps.append(ts)
-                        except:
-                            pass
-                
-                if timestamps:
-                    first_seen = min(timestamps)
-                    last_activity = max(timestamps)
-            
-            return {
-                "tx_count": len(txs),
-                "counterparties": len(counterparties),
-                "total_value_usd": total_value,  # Vereinfacht, sollte Preis-Conversion nutzen
-                "first_seen": first_seen,
-                "last_activity": last_activity,
-            }
-            
+            return await self.activity_cache.get_or_fetch(chain_id, address, fetch)
         except Exception as e:
             logger.debug(f"Failed to get chain activity for {chain_id}/{address}: {e}")
             return {"tx_count": 0, "counterparties": 0, "total_value_usd": 0.0}
     
+    async def _fetch_chain_activity(self, chain_id: str, address: str) -> Dict[str, Any]:
+        # Versuche Transaktionen zu holen (limitiert für Performance)
+        txs = await multi_chain_engine.get_address_transactions_paged(
+            chain_id=chain_id,
+            address=address,
+            limit=100,
+        )
+        if not txs:
+            return {"tx_count": 0, "counterparties": 0, "total_value_usd": 0.0}
+        return _summarize_activity(txs)
+    
+    def invalidate_activity(self, chain_id: Optional[str], addresses: Iterable[str]) -> int:
+        """Ingest-Hook: gecachte Activity-Summaries der Adressen verwerfen"""
+        return self.activity_cache.invalidate(chain_id, addresses)
+    
     def _collect_attribution_evidence(
         self,
-        compliance_result: Any,
-        exposure_result: Any,
+        compliance_result: Optional[_ComplianceView],
         activity_metadata: Dict[str, Any],
+        exposure_evidence: List[AttributionEvidence],
     ) -> List[AttributionEvidence]:
         """Sammelt Attribution Evidence (Glass Box)"""
         evidence_list = []
@@ -419,13 +668,13 @@ class UniversalScreeningService:
                 timestamp=datetime.utcnow(),
                 metadata={
                     "list_name": compliance_result.sanctions_list or "OFAC",
-                    "program": getattr(compliance_result, "program", "Unknown"),
+                    "program": compliance_result.program,
                 },
                 verification_method="direct_match",
             ))
         
         # 2. Labels als Evidence
-        if compliance_result and hasattr(compliance_result, 'labels') and compliance_result.labels:
+        if compliance_result and compliance_result.labels:
             for label in compliance_result.labels[:5]:  # Top 5
                 evidence_list.append(AttributionEvidence(
                     source=AttributionSource.EXCHANGE_LABEL,
@@ -455,31 +704,36 @@ class UniversalScreeningService:
                 verification_method="transaction_history_analysis",
             ))
         
-        # 4. Exposure-based Evidence
-        if exposure_result:
-            exposure_dict = exposure_result.to_dict() if hasattr(exposure_result, 'to_dict') else {}
-            direct_exposure = exposure_dict.get("direct_exposure", {})
-            
-            if direct_exposure:
-                # Hohe Direct Exposure = Evidence
-                for category, score in direct_exposure.items():
-                    if score > 0.5:
-                        evidence_list.append(AttributionEvidence(
-                            source=AttributionSource.THREAT_INTEL,
-                            confidence=score,
-                            label=f"Direct Exposure: {category}",
-                            evidence_type="exposure_analysis",
-                            timestamp=datetime.utcnow(),
-                            metadata={"category": category, "score": score},
-                            verification_method="graph_analysis",
-                        ))
+        # 4. Exposure-based Evidence (einmal pro Adresse berechnet)
+        evidence_list.extend(exposure_evidence)
         
         return evidence_list
     
+    @staticmethod
+    def _category_scores(value: Any) -> Dict[str, float]:
+        """Exposure-Kategorien -> Score; andere Formate (z.B. bool) zählen nicht"""
+        return value if isinstance(value, dict) else {}
+    
+    def _exposure_evidence(self, exposure_dict: Dict[str, Any]) -> List[AttributionEvidence]:
+        """Hohe Direct Exposure als Evidence"""
+        evidence_list = []
+        for category, score in self._category_scores(exposure_dict.get("direct_exposure")).items():
+            if score > 0.5:
+                evidence_list.append(AttributionEvidence(
+                    source=AttributionSource.THREAT_INTEL,
+                    confidence=score,
+                    label=f"Direct Exposure: {category}",
+                    evidence_type="exposure_analysis",
+                    timestamp=datetime.utcnow(),
+                    metadata={"category": category, "score": score},
+                    verification_method="graph_analysis",
+                ))
+        return evidence_list
+    
     def _calculate_risk_score(
         self,
-        compliance_result: Any,
-        exposure_result: Any,
+        compliance_result: Optional[_ComplianceView],
+        exposure_dict: Dict[str, Any],
         attribution_evidence: List[AttributionEvidence],
     ) -> float:
         """Berechnet aggregierten Risk Score (0.0 - 1.0)"""
@@ -492,24 +746,19 @@ class UniversalScreeningService:
             return 1.0
         
         # 2. Compliance Risk Score
-        if compliance_result and hasattr(compliance_result, 'risk_score'):
-            risk_score = max(risk_score, float(compliance_result.risk_score))
+        if compliance_result:
+            risk_score = max(risk_score, compliance_result.risk_score)
         
         # 3. Exposure Risk
-        if exposure_result:
-            exposure_dict = exposure_result.to_dict() if hasattr(exposure_result, 'to_dict') else {}
-            
-            # Direct Exposure (höheres Gewicht)
-            direct = exposure_dict.get("direct_exposure", {})
-            if direct:
-                max_direct = max(direct.values()) if direct else 0
-                risk_score = max(risk_score, max_direct * 0.9)
-            
-            # Indirect Exposure (niedrigeres Gewicht)
-            indirect = exposure_dict.get("indirect_exposure", {})
-            if indirect:
-                max_indirect = max(indirect.values()) if indirect else 0
-                risk_score = max(risk_score, max_indirect * 0.6)
+        # Direct Exposure (höheres Gewicht)
+        direct = self._category_scores(exposure_dict.get("direct_exposure"))
+        if direct:
+            risk_score = max(risk_score, max(direct.values()) * 0.9)
+        
+        # Indirect Exposure (niedrigeres Gewicht)
+        indirect = self._category_scores(exposure_dict.get("indirect_exposure"))
+        if indirect:
+            risk_score = max(risk_score, max(indirect.values()) * 0.6)
         
         # 4. Attribution Evidence Confidence
         if attribution_evidence:
@@ -541,14 +790,14 @@ class UniversalScreeningService:
     
     def _collect_labels(
         self,
-        compliance_result: Any,
+        compliance_result: Optional[_ComplianceView],
         attribution_evidence: List[AttributionEvidence],
     ) -> List[str]:
         """Sammelt alle Labels"""
         labels = set()
         
-        if compliance_result and hasattr(compliance_result, 'labels'):
-            labels.update(compliance_result.labels or [])
+        if compliance_result:
+            labels.update(compliance_result.labels)
         
         # Aus Attribution Evidence
         for evidence in attribution_evidence:
@@ -557,7 +806,11 @@ class UniversalScreeningService:
         
         return list(labels)
     
-    def _create_exposure_summary(self, exposure_result: Any) -> Dict[str, Any]:
+    def _create_exposure_summary(
+        self,
+        exposure_result: Any,
+        exposure_dict: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """Erstellt Exposure Summary"""
         if not exposure_result:
             return {
@@ -566,7 +819,8 @@ class UniversalScreeningService:
                 "total_exposure_score": 0.0,
             }
         
-        exposure_dict = exposure_result.to_dict() if hasattr(exposure_result, 'to_dict') else {}
+        if exposure_dict is None:
+            exposure_dict = exposure_result.to_dict() if hasattr(exposure_result, 'to_dict') else {}
         
         return {
             "direct_exposure": exposure_dict.get("direct_exposure", {}),
@@ -10,12 +10,16 @@ Features:
 - Logged in PostgreSQL für Audit
 """
 
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import json
 import logging
+import time
 from app.config import settings
 from app.db.redis_client import redis_client
-from app.db.postgres_client import postgres_client
+from app.db.postgres import postgres_client
 from app.services.partner_service import partner_service
 
 logger = logging.getLogger(__name__)
@@ -54,6 +58,164 @@ PLAN_QUOTAS = {
 }
 
 
+# TTL der Usage-Keys in Redis (35 Tage, überlebt den Monatswechsel)
+USAGE_KEY_TTL_SECONDS = 60 * 60 * 24 * 35
+
+# Wie lange ein via INCRBY gelieferter Monatsstand für check_quota gilt
+USAGE_TOTAL_CACHE_TTL = 5.0
+USAGE_TOTAL_CACHE_MAX = 10_000
+
+
+# ============================================================================
+# GEPUFFERTER AUDIT-WRITER
+# ============================================================================
+
+# Sentinel: reiht stop() hinter allen offenen Zeilen ein, der Writer beendet sich danach
+_STOP = object()
+
+class UsageAuditWriter:
+    """
+    Puffert Usage-Audit-Zeilen und schreibt sie gebündelt nach PostgreSQL
+    
+    - Bounded Queue: bei Überlauf wird die Zeile verworfen (Redis bleibt
+      Source of Truth, das Audit-Log ist best-effort)
+    - Flush bei `batch_size` Zeilen oder spätestens nach `flush_interval` Sekunden
+    - Ein `executemany` pro Batch statt eines INSERT pro Request
+    - Partner-Provisionen werden pro (user, feature) im Batch aggregiert
+    """
+    
+    INSERT_SQL = """
+        INSERT INTO usage_logs (user_id, feature, tokens, metadata, created_at)
+        VALUES ($1, $2, $3, $4, $5)
+    """
+    
+    def __init__(
+        self,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {"enqueued": 0, "dropped": 0, "flushed": 0, "batches": 0, "errors": 0}
+    
+    def enqueue(
+        self,
+        user_id: str,
+        feature: str,
+        tokens: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Reiht eine Audit-Zeile ein (non-blocking). False wenn verworfen."""
+        self._ensure_started()
+        assert self._queue is not None
+        row = (str(user_id), feature, int(tokens), json.dumps(metadata or {}), datetime.utcnow())
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["enqueued"] += 1
+        return True
+    
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self) -> None:
+        assert self._queue is not None
+        self._stopping = False
+        while not self._stopping:
+            batch = await self._collect_batch()
+            if self._stopping:
+                # Stop-Sentinel gesehen: Rest der Queue mitnehmen
+                batch.extend(self._drain())
+            for i in range(0, len(batch), self.batch_size):
+                await self._flush(batch[i:i + self.batch_size])
+    
+    async def _collect_batch(self) -> List[Tuple]:
+        """Wartet auf die erste Zeile und sammelt dann bis Batch-Size, Timeout oder Stop."""
+        assert self._queue is not None
+        batch: List[Tuple] = []
+        item = await self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while item is not _STOP:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return batch
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return batch
+        self._stopping = True
+        return batch
+    
+    def _drain(self) -> List[Tuple]:
+        rows: List[Tuple] = []
+        if self._queue is None:
+            return rows
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return rows
+            if item is not _STOP:
+                rows.append(item)
+    
+    async def _flush(self, batch: List[Tuple]) -> None:
+        try:
+            await self._write_rows(batch)
+            self.stats["flushed"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Failed to log {len(batch)} usage rows to PostgreSQL: {e}")
+            # Nicht kritisch - Redis ist Source of Truth
+        
+        # Partner nutzungsbasierte Provision (best-effort, aggregiert)
+        commissions: Dict[Tuple[str, str], int] = defaultdict(int)
+        for user_id, feature, tokens, _meta, _ts in batch:
+            commissions[(user_id, feature)] += tokens
+        for (user_id, feature), tokens in commissions.items():
+            try:
+                await partner_service.record_commission_on_usage(user_id=user_id, feature=feature, tokens=tokens)
+            except Exception:
+                pass
+    
+    async def _write_rows(self, rows: List[Tuple]) -> None:
+        pool = getattr(postgres_client, "pool", None)
+        if pool is None:
+            return
+        async with pool.acquire() as conn:
+            await conn.executemany(self.INSERT_SQL, rows)
+    
+    async def stop(self) -> None:
+        """
+        Stoppt den Writer und flusht alle noch gepufferten Zeilen.
+        
+        Kein cancel(): ein laufender Collect/Flush würde seine bereits aus der
+        Queue genommenen Zeilen verlieren. Stattdessen reiht ein Sentinel hinter
+        allen offenen Zeilen ein, und der Writer beendet sich nach dem Flush.
+        """
+        task = self._task
+        if task is not None and not task.done():
+            assert self._queue is not None
+            await self._queue.put(_STOP)
+            await task
+        self._task = None
+        # Writer lief nicht (mehr): Reste direkt schreiben
+        rows = self._drain()
+        for i in range(0, len(rows), self.batch_size):
+            await self._flush(rows[i:i + self.batch_size])
+
+
 # ============================================================================
 # USAGE-TRACKING-SERVICE
 # ============================================================================
@@ -72,7 +234,56 @@ class UsageTrackingService:
     
     def __init__(self):
         self.redis = redis_client
-        self.db = postgres_client
+        self.audit_writer = UsageAuditWriter()
+        # user_id -> (month, total, monotonic_ts); LRU-begrenzt
+        self._totals: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+    
+    async def _client(self):
+        """Roher Redis-Client (None wenn Redis nicht verfügbar)."""
+        await self.redis._ensure_connected()
+        return self.redis.client
+    
+    @staticmethod
+    def _month_key(user_id: str, month: str) -> str:
+        return f"usage:{user_id}:{month}"
+    
+    def _remember_total(self, user_id: str, month: str, total: int) -> None:
+        self._totals[user_id] = (month, total, time.monotonic())
+        self._totals.move_to_end(user_id)
+        while len(self._totals) > USAGE_TOTAL_CACHE_MAX:
+            self._totals.popitem(last=False)
+    
+    def _cached_total(self, user_id: str, month: str) -> Optional[int]:
+        entry = self._totals.get(user_id)
+        if entry is None:
+            return None
+        cached_month, total, ts = entry
+        if cached_month != month or time.monotonic() - ts > USAGE_TOTAL_CACHE_TTL:
+            return None
+        return total
+    
+    async def _increment_usage(self, user_id: str, feature: str, tokens: int) -> int:
+        """
+        Erhöht Monats- und Feature-Zähler atomar in einem Round-Trip
+        
+        Returns:
+            Neuer Monatsstand (Tokens)
+        """
+        client = await self._client()
+        if client is None:
+            return 0
+        month = datetime.utcnow().strftime('%Y-%m')
+        month_key = self._month_key(user_id, month)
+        feature_key = f"{month_key}:{feature}"
+        pipe = client.pipeline(transaction=True)
+        pipe.incrby(month_key, tokens)
+        pipe.expire(month_key, USAGE_KEY_TTL_SECONDS)
+        pipe.incr(feature_key)
+        pipe.expire(feature_key, USAGE_KEY_TTL_SECONDS)
+        results = await pipe.execute()
+        new_usage = int(results[0])
+        self._remember_total(user_id, month, new_usage)
+        return new_usage
     
     async def track_api_call(
         self,
@@ -83,6 +294,11 @@ class UsageTrackingService:
         """
         Tracked einen API-Call und berechnet Token-Cost
         
+        Monats- und Feature-Zähler werden in einer einzigen MULTI/EXEC-Pipeline
+        (INCRBY + INCR + EXPIRE) erhöht; kein GET/SET-Race mehr bei parallelen
+        Requests. Audit-Log und Partner-Provision laufen über den gepufferten
+        Background-Writer und blockieren den Request-Pfad nicht.
+        
         Args:
             user_id: User-ID
             feature: Feature-Name (z.B. 'trace_start')
@@ -97,31 +313,10 @@ class UsageTrackingService:
         """
         try:
             tokens = TOKEN_COSTS.get(feature, 1)
+            new_usage = await self._increment_usage(user_id, feature, tokens)
             
-            # Aktuellen Usage aus Redis holen
-            month_key = f"usage:{user_id}:{datetime.utcnow().strftime('%Y-%m')}"
-            current_usage = int(await self.redis.get(month_key) or 0)
-            
-            # Add tokens
-            new_usage = current_usage + tokens
-            await self.redis.set(month_key, new_usage)
-            await self.redis.expire(month_key, 60 * 60 * 24 * 35)  # 35 Tage TTL
-            
-            # Feature-spezifisches Tracking
-            feature_key = f"usage:{user_id}:{datetime.utcnow().strftime('%Y-%m')}:{feature}"
-            await self.redis.incr(feature_key)
-            await self.redis.expire(feature_key, 60 * 60 * 24 * 35)
-            
-            # PostgreSQL für Audit (async in background)
-            try:
-                await self._log_to_postgres(user_id, feature, tokens, metadata)
-            except Exception as e:
-                logger.warning(f"Failed to log to PostgreSQL: {e}")
-            # Partner nutzungsbasierte Provision (best-effort)
-            try:
-                await partner_service.record_commission_on_usage(user_id=user_id, feature=feature, tokens=tokens)
-            except Exception:
-                pass
+            # PostgreSQL-Audit + Partner-Provision (gepuffert, Batch-Flush)
+            self.audit_writer.enqueue(user_id, feature, tokens, metadata)
             
             return {
                 "tokens_used": tokens,
@@ -142,6 +337,9 @@ class UsageTrackingService:
         """
         Prüft ob User noch Quota hat
         
+        Nutzt den zuletzt von `track_api_call` gelieferten Monatsstand, solange
+        dieser jünger als USAGE_TOTAL_CACHE_TTL ist; nur sonst ein Redis-GET.
+        
         Args:
             user_id: User-ID
             plan: Plan-Name (z.B. 'pro')
@@ -156,9 +354,14 @@ class UsageTrackingService:
             if quota == -1:
                 return True
             
-            # Check aktuellen Usage
-            month_key = f"usage:{user_id}:{datetime.utcnow().strftime('%Y-%m')}"
-            current_usage = int(await self.redis.get(month_key) or 0)
+            month = datetime.utcnow().strftime('%Y-%m')
+            current_usage = self._cached_total(user_id, month)
+            if current_usage is None:
+                client = await self._client()
+                if client is None:
+                    return True
+                current_usage = int(await client.get(self._month_key(user_id, month)) or 0)
+                self._remember_total(user_id, month, current_usage)
             
             return current_usage < quota
         
@@ -188,11 +391,14 @@ class UsageTrackingService:
             
             breakdown = {}
             total = 0
+            client = await self._client()
+            if client is None:
+                return {"total": 0}
             
             # Scan alle Feature-Keys
             cursor = 0
             while True:
-                cursor, keys = await self.redis.scan(cursor, match=pattern, count=100)
+                cursor, keys = await client.scan(cursor, match=pattern, count=100)
                 
                 for key in keys:
                     key_str = key.decode() if isinstance(key, bytes) else key
@@ -201,7 +407,7 @@ class UsageTrackingService:
                     # Format: usage:user_id:YYYY-MM:feature
                     if len(parts) == 4:
                         feature = parts[3]
-                        count = int(await self.redis.get(key) or 0)
+                        count = int(await client.get(key) or 0)
                         tokens = count * TOKEN_COSTS.get(feature, 1)
                         breakdown[feature] = tokens
                         total += tokens
@@ -233,8 +439,9 @@ class UsageTrackingService:
             }
         """
         try:
-            month_key = f"usage:{user_id}:{datetime.utcnow().strftime('%Y-%m')}"
-            current_usage = int(await self.redis.get(month_key) or 0)
+            month = datetime.utcnow().strftime('%Y-%m')
+            client = await self._client()
+            current_usage = int(await client.get(self._month_key(user_id, month)) or 0) if client is not None else 0
             
             quota = PLAN_QUOTAS.get(plan, 100)
             
@@ -273,14 +480,19 @@ class UsageTrackingService:
             # Alle Keys für diesen User & Monat
             pattern = f"usage:{user_id}:{month}:*"
             
+            self._totals.pop(user_id, None)
+            client = await self._client()
+            if client is None:
+                return
+            
             cursor = 0
-            deleted = 0
+            deleted = await client.delete(self._month_key(user_id, month))
             
             while True:
-                cursor, keys = await self.redis.scan(cursor, match=pattern, count=100)
+                cursor, keys = await client.scan(cursor, match=pattern, count=100)
                 
                 if keys:
-                    await self.redis.delete(*keys)
+                    await client.delete(*keys)
                     deleted += len(keys)
                 
                 if cursor == 0:
@@ -290,37 +502,6 @@ class UsageTrackingService:
         
         except Exception as e:
             logger.error(f"Error resetting monthly quota: {e}")
-    
-    async def _log_to_postgres(
-        self,
-        user_id: str,
-        feature: str,
-        tokens: int,
-        metadata: Optional[Dict]
-    ):
-        """
-        Logged Usage in PostgreSQL für Audit
-        
-        Args:
-            user_id: User-ID
-            feature: Feature-Name
-            tokens: Token-Count
-            metadata: Metadata
-        """
-        try:
-            query = """
-                INSERT INTO usage_logs (user_id, feature, tokens, metadata, created_at)
-                VALUES ($1, $2, $3, $4, NOW())
-            """
-            
-            import json
-            metadata_json = json.dumps(metadata or {})
-            
-            await self.db.execute(query, user_id, feature, tokens, metadata_json)
-        
-        except Exception as e:
-            logger.warning(f"Failed to log to PostgreSQL: {e}")
-            # Nicht kritisch - Redis ist Source of Truth
 
 
 # ============================================================================
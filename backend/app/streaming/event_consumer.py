@@ -418,6 +418,16 @@ class EventConsumer:
             await neo4j_client.store_event(event)
         except Exception as e:
             logger.warning(f"Neo4j storage failed: {e}")
+        self._invalidate_screening_activity(event)
+
+    @staticmethod
+    def _invalidate_screening_activity(event: CanonicalEvent):
+        """New transactions make cached universal-screening activity summaries stale"""
+        try:
+            from app.services.universal_screening import universal_screening_service
+            universal_screening_service.invalidate_activity(event.chain, [event.from_address, event.to_address])
+        except Exception as e:
+            logger.debug(f"Screening activity invalidation skipped: {e}")
     
     async def _send_to_dlq(self, message, error: str):
         """Send failed message to DLQ"""
@@ -1,28 +1,139 @@
 """
 WebSocket Connection Manager
 Real-Time Trace Updates
+
+Fan-out model:
+- Every message is serialized once per broadcast, not once per socket
+- Each connection owns a bounded outbound queue drained by its own writer
+  task, so a slow client never delays the others
+- When a queue is full the slow-consumer policy decides: drop the oldest
+  message, coalesce by key (latest state wins) or disconnect the client
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, Set, Optional, Any
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
 from fastapi import WebSocket
 
+try:
+    from app import metrics
+except Exception:  # pragma: no cover
+    metrics = None
+
 logger = logging.getLogger(__name__)
 
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+def serialize_message(message: Any) -> str:
+    """Serialize like Starlette's send_json (compact, non-ASCII kept)."""
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class _Connection:
+    """Outbound side of one WebSocket: bounded queue plus writer task."""
+
+    __slots__ = ("websocket", "manager", "queue", "pending", "wake", "task", "closed", "sent", "dropped", "coalesced")
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.manager = manager
+        # Entries are [key, text]; `pending` maps coalesce keys to queued entries
+        self.queue: Deque[List[Any]] = deque()
+        self.pending: Dict[str, List[Any]] = {}
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(self._writer())
+
+    def offer(self, text: str, key: Optional[str] = None) -> bool:
+        """Queue a pre-serialized message. Returns False if the client must be dropped."""
+        if self.closed:
+            return True
+        policy = self.manager.slow_consumer_policy
+        if key is not None and policy == "coalesce":
+            entry = self.pending.get(key)
+            if entry is not None:
+                entry[1] = text
+                self.coalesced += 1
+                self.manager._observe_slow("coalesced")
+                return True
+        if len(self.queue) >= self.manager.max_queue:
+            if policy == "disconnect":
+                self.manager._observe_slow("disconnected")
+                return False
+            old = self.queue.popleft()
+            if old[0] is not None and self.pending.get(old[0]) is old:
+                del self.pending[old[0]]
+            self.dropped += 1
+            self.manager._observe_slow("dropped")
+        entry = [key, text]
+        self.queue.append(entry)
+        if key is not None:
+            self.pending[key] = entry
+        self.wake.set()
+        return True
+
+    async def _writer(self) -> None:
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self.wake.clear()
+                    await self.wake.wait()
+                    continue
+                entry = self.queue.popleft()
+                key, text = entry
+                if key is not None and self.pending.get(key) is entry:
+                    del self.pending[key]
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=self.manager.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"WebSocket writer stopped: {e}")
+            self.manager.disconnect(self.websocket)
+
+    def close(self) -> None:
+        self.closed = True
+        self.queue.clear()
+        self.pending.clear()
+        task, self.task = self.task, None
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+
 
 class ConnectionManager:
     """
     Manages WebSocket connections for real-time updates
-    
+
     **Features:**
     - Trace progress updates
     - Real-time alerts
     - System notifications
     - Room-based subscriptions
     - Multi-room support per client
+    - Serialize-once fan-out with per-connection queues and slow-consumer policy
     """
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        max_queue: Optional[int] = None,
+        slow_consumer_policy: Optional[str] = None,
+        send_timeout: Optional[float] = None,
+    ):
         # Active connections by trace_id
         self.active_connections: Dict[str, Set[WebSocket]] = {}
         # All connections
@@ -31,18 +142,30 @@ class ConnectionManager:
         self.rooms: Dict[str, Set[WebSocket]] = {}
         # Client metadata (WebSocket -> metadata dict)
         self.client_metadata: Dict[WebSocket, Dict] = {}
-    
+        # Outbound queues/writers (WebSocket -> _Connection)
+        self._outbound: Dict[WebSocket, _Connection] = {}
+
+        self.max_queue = max(1, max_queue or int(os.getenv("WS_OUTBOUND_QUEUE_SIZE", "256")))
+        policy = slow_consumer_policy or os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+        if policy not in SLOW_CONSUMER_POLICIES:
+            logger.warning(f"Unknown slow-consumer policy {policy!r}, using drop_oldest")
+            policy = "drop_oldest"
+        self.slow_consumer_policy = policy
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT", "10"))
+        self.stats = {"messages": 0, "deliveries": 0, "dropped": 0, "coalesced": 0, "disconnected": 0}
+
     async def connect(self, websocket: WebSocket, trace_id: Optional[str] = None):
         """
         Accept new WebSocket connection
-        
+
         Args:
             websocket: WebSocket connection
             trace_id: Optional trace ID to subscribe to
         """
         await websocket.accept()
         self.all_connections.add(websocket)
-        
+        self._outbound_for(websocket)
+
         if trace_id:
             if trace_id not in self.active_connections:
                 self.active_connections[trace_id] = set()
@@ -51,23 +174,29 @@ class ConnectionManager:
             logger.info(f"WebSocket connected for trace {trace_id}")
         else:
             logger.info("WebSocket connected (global)")
-    
+
     def disconnect(self, websocket: WebSocket, trace_id: Optional[str] = None):
         """
         Remove WebSocket connection
-        
+
         Args:
             websocket: WebSocket connection
             trace_id: Optional trace ID
         """
         self.all_connections.discard(websocket)
-        
+
         if trace_id and trace_id in self.active_connections:
             self.active_connections[trace_id].discard(websocket)
-            
+
             # Clean up empty sets
             if not self.active_connections[trace_id]:
                 del self.active_connections[trace_id]
+        elif trace_id is None:
+            for tid, clients in list(self.active_connections.items()):
+                if websocket in clients:
+                    clients.discard(websocket)
+                    if not clients:
+                        self.active_connections.pop(tid, None)
 
         # Remove metadata and from rooms
         self.client_metadata.pop(websocket, None)
@@ -76,43 +205,92 @@ class ConnectionManager:
                 clients.discard(websocket)
                 if not clients:
                     self.rooms.pop(room, None)
-        
+
+        conn = self._outbound.pop(websocket, None)
+        if conn is not None:
+            conn.close()
+
         logger.info("WebSocket disconnected")
-    
+
+    # -----------------------------
+    # Fan-out
+    # -----------------------------
+    def _outbound_for(self, websocket: WebSocket) -> _Connection:
+        conn = self._outbound.get(websocket)
+        if conn is None:
+            conn = self._outbound[websocket] = _Connection(websocket, self)
+            conn.start()
+        return conn
+
+    def _fanout(self, targets: Iterable[WebSocket], message: Any, key: Optional[str] = None) -> int:
+        """Serialize once and enqueue for every target without awaiting any socket."""
+        start = time.perf_counter()
+        text = serialize_message(message)
+        slow: List[WebSocket] = []
+        delivered = 0
+        for websocket in list(targets):
+            if self._outbound_for(websocket).offer(text, key):
+                delivered += 1
+            else:
+                slow.append(websocket)
+        for websocket in slow:
+            self._close_slow(websocket)
+        self.stats["messages"] += 1
+        self.stats["deliveries"] += delivered
+        metric = getattr(metrics, "WEBSOCKET_FANOUT_LATENCY", None)
+        if metric is not None:
+            try:
+                metric.observe(time.perf_counter() - start)
+            except Exception:
+                pass
+        return delivered
+
+    def _close_slow(self, websocket: WebSocket) -> None:
+        self.disconnect(websocket)
+
+        async def _close():
+            try:
+                await websocket.close(code=1013)
+            except Exception:
+                pass
+
+        try:
+            asyncio.get_running_loop().create_task(_close())
+        except RuntimeError:
+            pass
+
+    def _observe_slow(self, action: str) -> None:
+        self.stats[action] += 1
+        metric = getattr(metrics, "WEBSOCKET_SLOW_CONSUMER_EVENTS", None)
+        if metric is not None:
+            try:
+                metric.labels(action=action).inc()
+            except Exception:
+                pass
+
     async def send_trace_update(self, trace_id: str, data: Dict):
         """
         Send update to all connections subscribed to a trace
-        
+
         Args:
             trace_id: Trace ID
             data: Update data
         """
         if trace_id not in self.active_connections:
             return
-        
+
         message = {
             "type": "trace_update",
             "trace_id": trace_id,
             "data": data
         }
-        
-        # Send to all subscribed connections
-        disconnected = set()
-        for connection in self.active_connections[trace_id]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending to WebSocket: {e}")
-                disconnected.add(connection)
-        
-        # Clean up disconnected
-        for conn in disconnected:
-            self.disconnect(conn, trace_id)
-    
+        # Progress updates supersede each other: coalescible per trace
+        self._fanout(self.active_connections[trace_id], message, key=f"trace:{trace_id}")
+
     async def send_alert(self, data: Dict):
         """
         Send alert to all connected clients
-        
+
         Args:
             data: Alert data
         """
@@ -120,66 +298,54 @@ class ConnectionManager:
             "type": "alert",
             "data": data
         }
-        
-        disconnected = set()
-        for connection in self.all_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending alert: {e}")
-                disconnected.add(connection)
-        
-        # Clean up
-        for conn in disconnected:
-            self.disconnect(conn)
-    
-    async def broadcast(self, message: Dict):
+        self._fanout(self.all_connections, message)
+
+    async def broadcast(self, message: Dict, key: Optional[str] = None):
         """
         Broadcast message to all connections
-        
+
         Args:
             message: Message to broadcast
+            key: Optional coalesce key (latest message per key wins for slow clients)
         """
-        disconnected = set()
-        for connection in self.all_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting: {e}")
-                disconnected.add(connection)
-        
-        for conn in disconnected:
-            self.disconnect(conn)
-    
+        self._fanout(self.all_connections, message, key)
+
+    async def send_personal_message(self, message: Dict, websocket: WebSocket):
+        """Send a message to a single connection through its outbound queue."""
+        # Already closed as slow consumer: don't resurrect a writer for it
+        if websocket not in self.all_connections:
+            return
+        self._fanout((websocket,), message)
+
     async def join_room(self, websocket: WebSocket, room_name: str):
         """
         Subscribe client to a room
-        
+
         Args:
             websocket: WebSocket connection
             room_name: Room identifier (e.g., "alerts", "high_risk", "bridge_events")
         """
         if room_name not in self.rooms:
             self.rooms[room_name] = set()
-        
+
         self.rooms[room_name].add(websocket)
         logger.info(f"Client joined room: {room_name}")
 
     async def leave_room(self, websocket: WebSocket, room_name: str):
         """
         Unsubscribe client from a room
-        
+
         Args:
             websocket: WebSocket connection
             room_name: Room identifier
         """
         if room_name in self.rooms:
             self.rooms[room_name].discard(websocket)
-            
+
             # Clean up empty rooms
             if not self.rooms[room_name]:
                 del self.rooms[room_name]
-            
+
             logger.info(f"Client left room: {room_name}")
 
     def set_client_metadata(self, websocket: WebSocket, metadata: Dict[str, Any]) -> None:
@@ -189,42 +355,42 @@ class ConnectionManager:
     def get_client_metadata(self, websocket: WebSocket) -> Dict[str, Any]:
         return self.client_metadata.get(websocket, {})
 
-    
-    async def send_to_room(self, room_name: str, message: Dict):
+
+    async def send_to_room(self, room_name: str, message: Dict, key: Optional[str] = None):
         """
         Send message to all clients in a room
-        
+
         Args:
             room_name: Room identifier
             message: Message to send
+            key: Optional coalesce key
         """
         if room_name not in self.rooms:
             return
-        
-        disconnected = set()
-        for connection in self.rooms[room_name]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending to room {room_name}: {e}")
-                disconnected.add(connection)
-        
-        # Clean up disconnected
-        for conn in disconnected:
-            self.leave_room(conn, room_name)
+        self._fanout(self.rooms[room_name], message, key)
 
     async def send_collaboration_event(self, case_id: str, message: Dict[str, Any]):
         """Broadcast collaboration event to all participants of a case."""
         room_name = self.collab_room(case_id)
-        await self.send_to_room(room_name, message)
+        # Cursor/selection positions only matter in their latest state
+        key = None
+        user = (message.get("payload") or {}).get("user_id") if isinstance(message.get("payload"), dict) else None
+        if message.get("type") in ("collab.cursor", "collab.selection") and user is not None:
+            key = f"{message['type']}:{user}"
+        await self.send_to_room(room_name, message, key)
 
     def collab_room(self, case_id: str) -> str:
         return f"collab:{case_id}"
-    
+
+    async def close(self) -> None:
+        """Stop all writer tasks (shutdown)."""
+        for websocket in list(self._outbound):
+            self.disconnect(websocket)
+
     def get_stats(self) -> Dict:
         """
         Get connection statistics
-        
+
         Returns:
             Statistics dict
         """
@@ -232,9 +398,15 @@ class ConnectionManager:
             "total_connections": len(self.all_connections),
             "trace_subscriptions": len(self.active_connections),
             "rooms": {
-                room: len(clients) 
+                room: len(clients)
                 for room, clients in self.rooms.items()
-            }
+            },
+            "outbound": {
+                "policy": self.slow_consumer_policy,
+                "max_queue": self.max_queue,
+                "queued": sum(len(c.queue) for c in self._outbound.values()),
+                **self.stats,
+            },
         }
 
 
@@ -1,15 +1,29 @@
 import asyncio
-import os
 import logging
-from datetime import timedelta
-from app.db.postgres import postgres_client
+from typing import List, Optional
+from app.workers.retention import ChunkedRetention, RetentionPolicy, RetentionReport
 
 logger = logging.getLogger(__name__)
 
+# web_events wie bisher (365 Tage); alerts/usage_logs nur per Env aktiviert
+DEFAULT_POLICIES: List[RetentionPolicy] = [
+    RetentionPolicy(table="web_events", ts_column="ts", days_env="ANALYTICS_RETENTION_DAYS", default_days=365),
+    RetentionPolicy(table="alerts", ts_column="created_at", days_env="ALERTS_RETENTION_DAYS"),
+    RetentionPolicy(table="usage_logs", ts_column="created_at", days_env="USAGE_RETENTION_DAYS"),
+]
+
 class AnalyticsRetentionWorker:
-    def __init__(self, interval_seconds: int = 3600):
+    def __init__(
+        self,
+        interval_seconds: int = 3600,
+        policies: Optional[List[RetentionPolicy]] = None,
+        retention: Optional[ChunkedRetention] = None,
+    ):
         self._running = False
         self._interval = interval_seconds
+        self.policies = list(policies) if policies is not None else list(DEFAULT_POLICIES)
+        self.retention = retention or ChunkedRetention()
+        self.last_reports: List[RetentionReport] = []
 
     async def start(self):
         self._running = True
@@ -21,22 +35,21 @@ class AnalyticsRetentionWorker:
                 logger.error(f"Retention worker error: {e}")
             await asyncio.sleep(self._interval)
 
-    async def _run_once(self):
-        if not getattr(postgres_client, "pool", None):
-            return
-        try:
-            days = int(os.getenv("ANALYTICS_RETENTION_DAYS", "365"))
-        except Exception:
-            days = 365
-        if days <= 0:
-            return
-        async with postgres_client.acquire() as conn:
-            q = """
-            DELETE FROM web_events
-            WHERE ts < NOW() - ($1::text || ' days')::interval
-            """
-            res = await conn.execute(q, str(days))
-            logger.info(f"Analytics retention: {res}")
+    async def _run_once(self) -> List[RetentionReport]:
+        if not getattr(self.retention.db, "pool", None):
+            return []
+        active = [p for p in self.policies if p.retention_days() > 0]
+        if not active:
+            return []
+        self.last_reports = await self.retention.run_all(active)
+        return self.last_reports
+
+    def status(self) -> dict:
+        return {
+            "running": self._running,
+            "interval_seconds": self._interval,
+            "last_reports": [r.to_dict() for r in self.last_reports],
+        }
 
     def stop(self):
         self._running = False
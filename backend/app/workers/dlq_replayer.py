@@ -3,7 +3,12 @@ DLQ Replayer Worker
 
 - Scannt DLQ-Topic nach Nachrichten mit Filtern (Topic, Key, Zeitbereich)
 - Replayt gefilterte Nachrichten auf ursprüngliches Topic
-- Throttle: Rate-Limiting für Replay
+- Partitionen werden parallel gelesen (DLQ_REPLAY_CONCURRENCY)
+- Asynchrones Produce mit Delivery-Callbacks, ein Flush pro Batch
+- Throttle: Token Bucket (Nachrichten/s, 0 = unbegrenzt)
+- Filter nur auf Headern, Key und Timestamp – Payloads werden nicht dekodiert
+- Checkpoints pro Partition (DLQ_REPLAY_CHECKPOINT_PATH): ein unterbrochener
+  Replay setzt beim nächsten Lauf mit denselben Filtern dort wieder auf
 - Metriken: Replay-Counter, Fehler
 
 Startbeispiel:
@@ -13,13 +18,16 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import hashlib
 import json
 import logging
+import os
 import sys
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from confluent_kafka import Consumer, Producer, KafkaError, KafkaException
+from confluent_kafka import Consumer, Producer, KafkaError, KafkaException, TopicPartition, OFFSET_BEGINNING
 
 from app.config import settings
 from app.observability.metrics import DLQ_REPLAY_TOTAL, DLQ_REPLAY_ERRORS
@@ -27,146 +35,363 @@ from app.observability.metrics import DLQ_REPLAY_TOTAL, DLQ_REPLAY_ERRORS
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="[DLQ-REPLAYER] %(asctime)s %(levelname)s %(message)s")
 
+_WORKER_LABEL = "dlq-replayer"
+
+
+def _header(headers: Optional[List[Tuple[str, Any]]], name: str) -> Optional[str]:
+    for k, v in headers or []:
+        if k == name:
+            return v.decode("utf-8", "ignore") if isinstance(v, bytes) else str(v)
+    return None
+
+
+class _TokenBucket:
+    """Token Bucket für die Replay-Rate; rate <= 0 deaktiviert das Limit"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self._ts = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._ts) * self.rate)
+                self._ts = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class _ReplayCheckpoint:
+    """
+    Persistiert den nächsten zu lesenden Offset pro Partition.
+
+    Eine JSON-Datei für alle Replays, Schlüssel ist die Replay-ID (Hash aus
+    DLQ-Topic und Filtern). Geschrieben wird atomar per os.replace.
+    """
+
+    def __init__(self, path: str, replay_id: str):
+        self.path = path
+        self.replay_id = replay_id
+        self.offsets: Dict[int, int] = {}
+
+    def _read_all(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Checkpoint file unreadable ({self.path}): {e}")
+            return {}
+
+    def load(self) -> Dict[int, int]:
+        entry = self._read_all().get(self.replay_id) or {}
+        self.offsets = {int(p): int(o) for p, o in (entry.get("offsets") or {}).items()}
+        return dict(self.offsets)
+
+    def update(self, partition: int, next_offset: int) -> None:
+        self.offsets[partition] = next_offset
+        data = self._read_all()
+        data[self.replay_id] = {
+            "offsets": {str(p): o for p, o in sorted(self.offsets.items())},
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error(f"Checkpoint write failed ({self.path}): {e}")
+
+    def clear(self) -> None:
+        self.offsets = {}
+        data = self._read_all()
+        if data.pop(self.replay_id, None) is not None:
+            try:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+            except Exception as e:
+                logger.error(f"Checkpoint reset failed ({self.path}): {e}")
+
 
 class DLQReplayer:
-    def __init__(self, throttle: int = 10):
+    def __init__(
+        self,
+        throttle: int = 10,
+        producer: Any = None,
+        consumer_factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        checkpoint_path: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ):
         self.throttle = throttle
         self.dlq_topic = getattr(settings, "KAFKA_DLQ_TOPIC", "dlq.events")
-        self.producer = Producer({
+        self.producer = producer if producer is not None else Producer({
             "bootstrap.servers": settings.KAFKA_BOOTSTRAP_SERVERS,
         })
-    
+        self.consumer_factory = consumer_factory or Consumer
+        self.checkpoint_path = checkpoint_path or os.getenv(
+            "DLQ_REPLAY_CHECKPOINT_PATH", "/tmp/dlq_replay_checkpoints.json"
+        )
+        self.concurrency = max(1, int(concurrency or os.getenv("DLQ_REPLAY_CONCURRENCY", "8")))
+        self.batch_size = max(1, int(os.getenv("DLQ_REPLAY_BATCH_SIZE", "500")))
+        self._delivered = 0
+        self._delivery_errors = 0
+
     def _matches_filter(self, msg, filter_topic: Optional[str], filter_key: Optional[str], since: Optional[datetime], until: Optional[datetime]) -> bool:
+        since_ms = int(since.timestamp() * 1000) if since else None
+        until_ms = int(until.timestamp() * 1000) if until else None
+        key_bytes = filter_key.encode("utf-8") if filter_key else None
+        return self._matches(msg, filter_topic, key_bytes, since_ms, until_ms) is not None
+
+    @staticmethod
+    def _matches(
+        msg,
+        filter_topic: Optional[str],
+        key_bytes: Optional[bytes],
+        since_ms: Optional[int],
+        until_ms: Optional[int],
+    ) -> Optional[str]:
+        """Liefert das Ziel-Topic, wenn die Nachricht passt (ohne Payload-Dekodierung)"""
+        try:
+            # Time filter (Broker-Timestamp in ms)
+            if since_ms is not None or until_ms is not None:
+                ts = msg.timestamp()[1]
+                if since_ms is not None and ts < since_ms:
+                    return None
+                if until_ms is not None and ts > until_ms:
+                    return None
+            # Key filter (Bytes-Vergleich)
+            if key_bytes is not None and msg.key() != key_bytes:
+                return None
+            original_topic = _header(msg.headers(), "original_topic")
+        except Exception:
+            return None
         # Topic filter
-        if filter_topic:
-            try:
-                headers = msg.headers() or []
-                original_topic = None
-                for k, v in headers:
-                    if k == "original_topic":
-                        original_topic = v.decode("utf-8") if isinstance(v, bytes) else str(v)
-                        break
-                if original_topic != filter_topic:
-                    return False
-            except Exception:
-                return False
-        
-        # Key filter
-        if filter_key:
-            try:
-                msg_key = msg.key().decode("utf-8") if msg.key() else None
-                if msg_key != filter_key:
-                    return False
-            except Exception:
-                return False
-        
-        # Time filter
-        if since or until:
+        if filter_topic and original_topic != filter_topic:
+            return None
+        return original_topic
+
+    def _on_delivery(self, err, msg) -> None:
+        """Delivery-Callback des Producers (läuft in poll/flush)"""
+        if err:
+            self._delivery_errors += 1
+            logger.error(f"Replay delivery failed: {err}")
+        else:
+            self._delivered += 1
+
+    def _produce(self, topic: str, msg, failed: Optional[List[int]] = None) -> None:
+        """Produziert eine Nachricht; fehlgeschlagene Zustellungen landen mit ihrem DLQ-Offset in `failed`"""
+        offset = msg.offset()
+
+        def on_delivery(err, delivered) -> None:
+            self._on_delivery(err, delivered)
+            if err and failed is not None:
+                failed.append(offset)
+
+        while True:
             try:
-                timestamp = msg.timestamp()[1] / 1000  # milliseconds to seconds
-                msg_time = datetime.fromtimestamp(timestamp)
-                if since and msg_time < since:
-                    return False
-                if until and msg_time > until:
-                    return False
-            except Exception:
-                return False
-        
-        return True
-    
-    async def replay_filtered(
-        self,
-        filter_topic: Optional[str] = None,
-        filter_key: Optional[str] = None,
-        since: Optional[datetime] = None,
-        until: Optional[datetime] = None,
-        dry_run: bool = False,
-        max_messages: int = 1000
-    ) -> Dict[str, Any]:
-        """Scan DLQ and replay filtered messages"""
-        
-        conf = {
+                self.producer.produce(
+                    topic=topic,
+                    key=msg.key(),
+                    value=msg.value(),
+                    headers=msg.headers(),
+                    on_delivery=on_delivery,
+                )
+                self.producer.poll(0)
+                return
+            except BufferError:
+                # Lokale Queue voll: Delivery-Callbacks abarbeiten lassen
+                self.producer.poll(0.1)
+
+    def _partitions(self) -> List[int]:
+        probe = self.consumer_factory(self._consumer_conf())
+        try:
+            metadata = probe.list_topics(self.dlq_topic, timeout=10)
+            topic = metadata.topics.get(self.dlq_topic)
+            if topic is None or getattr(topic, "error", None) is not None:
+                return []
+            return sorted(topic.partitions.keys())
+        finally:
+            probe.close()
+
+    @staticmethod
+    def _consumer_conf() -> Dict[str, Any]:
+        return {
             "bootstrap.servers": settings.KAFKA_BOOTSTRAP_SERVERS,
-            "group.id": f"dlq-replayer-{datetime.now().isoformat()}",
+            "group.id": "dlq-replayer",
             "auto.offset.reset": "earliest",
             "enable.auto.commit": False,
             "enable.partition.eof": True,
             "session.timeout.ms": 10000,
         }
-        
-        consumer = Consumer(conf)
-        consumer.subscribe([self.dlq_topic])
-        logger.info(f"Scanning DLQ topic: {self.dlq_topic}")
-        
-        replayed = 0
-        errors = 0
-        scanned = 0
-        
+
+    @staticmethod
+    def replay_id(dlq_topic: str, filter_topic: Optional[str], filter_key: Optional[str],
+                  since: Optional[datetime], until: Optional[datetime]) -> str:
+        raw = json.dumps(
+            [dlq_topic, filter_topic, filter_key, since.isoformat() if since else None,
+             until.isoformat() if until else None]
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    async def _replay_partition(
+        self,
+        partition: int,
+        start_offset: int,
+        state: Dict[str, Any],
+        checkpoint: Optional[_ReplayCheckpoint],
+        bucket: _TokenBucket,
+        match: Callable[[Any], Optional[str]],
+        dry_run: bool,
+    ) -> None:
+        consumer = self.consumer_factory(self._consumer_conf())
+        consumer.assign([TopicPartition(self.dlq_topic, partition, start_offset)])
         try:
-            while scanned < max_messages:
-                msg = consumer.poll(1.0)
-                if msg is None:
+            while state["budget"] > 0:
+                want = min(self.batch_size, state["budget"])
+                msgs = await asyncio.to_thread(consumer.consume, want, 1.0)
+                if not msgs:
                     break
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                last_offset = None
+                failed: List[int] = []
+                done = False
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            done = True
+                            continue
+                        logger.error(f"Poll error on partition {partition}: {msg.error()}")
+                        state["errors"] += 1
+                        continue
+                    if state["budget"] <= 0:
+                        break
+                    state["budget"] -= 1
+                    state["scanned"] += 1
+                    last_offset = msg.offset()
+
+                    original_topic = match(msg)
+                    if original_topic is None:
+                        # Filter passt nicht oder original_topic-Header fehlt
+                        state["skipped"] += 1
+                        continue
+                    if dry_run:
+                        logger.info(f"DRY-RUN: Would replay message to {original_topic} (partition {partition}, offset {msg.offset()})")
                         continue
-                    logger.error(f"Poll error: {msg.error()}")
-                    errors += 1
-                    continue
-                
-                scanned += 1
-                
-                if not self._matches_filter(msg, filter_topic, filter_key, since, until):
-                    continue
-                
-                # Extract original topic from headers
-                original_topic = None
-                try:
-                    headers = msg.headers() or []
-                    for k, v in headers:
-                        if k == "original_topic":
-                            original_topic = v.decode("utf-8") if isinstance(v, bytes) else str(v)
-                            break
-                except Exception:
-                    pass
-                
-                if not original_topic:
-                    logger.warning(f"No original_topic header found, skipping message at offset {msg.offset()}")
-                    continue
-                
-                if dry_run:
-                    logger.info(f"DRY-RUN: Would replay message to {original_topic} (offset {msg.offset()})")
-                else:
+                    await bucket.acquire()
                     try:
-                        # Replay to original topic
-                        self.producer.produce(
-                            topic=original_topic,
-                            key=msg.key(),
-                            value=msg.value(),
-                            headers=msg.headers(),
-                        )
-                        self.producer.flush(5)
-                        replayed += 1
-                        logger.info(f"Replayed message to {original_topic} (offset {msg.offset()})")
-                        
-                        # Throttle
-                        await asyncio.sleep(1.0 / self.throttle)
-                        
-                        DLQ_REPLAY_TOTAL.inc()
+                        self._produce(original_topic, msg, failed)
+                        state["produced"] += 1
                     except Exception as e:
                         logger.error(f"Replay failed: {e}")
-                        errors += 1
-                        DLQ_REPLAY_ERRORS.inc()
-        
+                        state["errors"] += 1
+                        failed.append(msg.offset())
+                if last_offset is not None and not dry_run:
+                    # Erst nach zugestellten Nachrichten weitersetzen
+                    remaining = await asyncio.to_thread(self.producer.flush, 30)
+                    if remaining:
+                        logger.error(f"{remaining} replayed messages not delivered, checkpoint not advanced")
+                        break
+                    if failed:
+                        # Nur bis vor den ersten Fehler weitersetzen; der Rest des Batches
+                        # wird beim nächsten Lauf erneut versucht (at-least-once)
+                        first_failed = min(failed)
+                        logger.error(
+                            f"{len(failed)} replayed messages failed on partition {partition}, "
+                            f"checkpoint held at offset {first_failed}"
+                        )
+                        if checkpoint is not None:
+                            checkpoint.update(partition, first_failed)
+                        break
+                    if checkpoint is not None:
+                        checkpoint.update(partition, last_offset + 1)
+                if done:
+                    break
         finally:
-            consumer.close()
-            self.producer.flush()
-        
+            await asyncio.to_thread(consumer.close)
+
+    async def replay_filtered(
+        self,
+        filter_topic: Optional[str] = None,
+        filter_key: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        dry_run: bool = False,
+        max_messages: int = 1000,
+        resume: bool = True,
+    ) -> Dict[str, Any]:
+        """Scan DLQ partitions in parallel and replay filtered messages"""
+        since_ms = int(since.timestamp() * 1000) if since else None
+        until_ms = int(until.timestamp() * 1000) if until else None
+        key_bytes = filter_key.encode("utf-8") if filter_key else None
+
+        def match(msg) -> Optional[str]:
+            return self._matches(msg, filter_topic, key_bytes, since_ms, until_ms)
+
+        replay_id = self.replay_id(self.dlq_topic, filter_topic, filter_key, since, until)
+        checkpoint = None if dry_run else _ReplayCheckpoint(self.checkpoint_path, replay_id)
+        start: Dict[int, int] = {}
+        if checkpoint is not None:
+            if resume:
+                start = checkpoint.load()
+            else:
+                checkpoint.clear()
+
+        partitions = await asyncio.to_thread(self._partitions)
+        logger.info(
+            f"Scanning DLQ topic: {self.dlq_topic} partitions={len(partitions)} replay_id={replay_id}"
+            + (f" resuming={start}" if start else "")
+        )
+
+        state: Dict[str, Any] = {"budget": max_messages, "scanned": 0, "skipped": 0, "produced": 0, "errors": 0}
+        self._delivered = 0
+        self._delivery_errors = 0
+        bucket = _TokenBucket(self.throttle)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def _run(partition: int) -> None:
+            async with slots:
+                await self._replay_partition(
+                    partition, start.get(partition, OFFSET_BEGINNING), state, checkpoint, bucket, match, dry_run
+                )
+
+        try:
+            results = await asyncio.gather(*(_run(p) for p in partitions), return_exceptions=True)
+            for partition, res in zip(partitions, results):
+                if isinstance(res, BaseException):
+                    logger.error(f"Replay of partition {partition} failed: {res}")
+                    state["errors"] += 1
+        finally:
+            await asyncio.to_thread(self.producer.flush)
+
+        errors = state["errors"] + self._delivery_errors
+        try:
+            if self._delivered:
+                DLQ_REPLAY_TOTAL.labels(worker=_WORKER_LABEL).inc(self._delivered)
+            if errors:
+                DLQ_REPLAY_ERRORS.labels(worker=_WORKER_LABEL).inc(errors)
+        except Exception:
+            pass
+
         return {
-            "scanned": scanned,
-            "replayed": replayed,
+            "scanned": state["scanned"],
+            "replayed": self._delivered,
+            "skipped": state["skipped"],
             "errors": errors,
-            "dry_run": dry_run
+            "dry_run": dry_run,
+            "partitions": len(partitions),
+            "replay_id": replay_id,
+            "resumed": bool(start),
         }
 
 
@@ -176,16 +401,18 @@ def main():
     parser.add_argument("--filter-key", help="Filter by message key")
     parser.add_argument("--since", help="Filter since date (YYYY-MM-DD)")
     parser.add_argument("--until", help="Filter until date (YYYY-MM-DD)")
-    parser.add_argument("--throttle", type=int, default=10, help="Replay rate per second")
+    parser.add_argument("--throttle", type=int, default=10, help="Replay rate per second (0 = unlimited)")
     parser.add_argument("--max-messages", type=int, default=1000, help="Max messages to scan")
+    parser.add_argument("--concurrency", type=int, default=None, help="Partitions replayed in parallel")
+    parser.add_argument("--restart", action="store_true", help="Ignore checkpoint and start from the beginning")
     parser.add_argument("--dry-run", action="store_true", help="Dry run mode")
     args = parser.parse_args()
-    
+
     since = datetime.fromisoformat(args.since) if args.since else None
     until = datetime.fromisoformat(args.until) if args.until else None
-    
-    replayer = DLQReplayer(throttle=args.throttle)
-    
+
+    replayer = DLQReplayer(throttle=args.throttle, concurrency=args.concurrency)
+
     async def run():
         result = await replayer.replay_filtered(
             filter_topic=args.filter_topic,
@@ -193,10 +420,11 @@ def main():
             since=since,
             until=until,
             dry_run=args.dry_run,
-            max_messages=args.max_messages
+            max_messages=args.max_messages,
+            resume=not args.restart,
         )
         print(json.dumps(result, indent=2))
-    
+
     asyncio.run(run())
 
 
@@ -5,23 +5,31 @@ Konsumiert Enrichment-Requests und fügt Labels, Risk Scores hinzu.
 - Topic: enrich.requests
 - Verarbeitet Adressen/Transaktionen
 - Published Results zu enrich.results
+- Sammelt Nachrichten in Micro-Batches (ENRICH_BATCH_MAX_MESSAGES,
+  ENRICH_BATCH_WINDOW_MS), dedupliziert die Adressen des Fensters und
+  reichert sie mit Bulk-Lookups an (Labels, Risk, Compliance)
+- Results werden gesammelt produziert und einmal pro Batch geflusht,
+  Offsets danach pro Partition committed
 """
 from __future__ import annotations
 
 import asyncio
 import argparse
 import logging
+import os
 import sys
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from datetime import datetime
 
 try:
-    from confluent_kafka import Consumer, KafkaError  # type: ignore
+    from confluent_kafka import Consumer, KafkaError, TopicPartition  # type: ignore
     _KAFKA_AVAILABLE = True
 except Exception:
     Consumer = None  # type: ignore
     KafkaError = None  # type: ignore
+    TopicPartition = None  # type: ignore
     _KAFKA_AVAILABLE = False
 
 from app.config import settings
@@ -29,7 +37,12 @@ from app.messaging.kafka_client import KafkaProducerClient
 from app.enrichment.labels_service import labels_service
 from app.ml.risk_scorer import risk_scorer
 from app.services.compliance_service import service as compliance_service
-from app.observability.metrics import KAFKA_CONSUMER_ERRORS, KAFKA_COMMITS_TOTAL
+from app.observability.metrics import (
+    KAFKA_CONSUMER_ERRORS,
+    KAFKA_COMMITS_TOTAL,
+    KAFKA_EVENTS_CONSUMED,
+    KAFKA_PROCESSING_DURATION,
+)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -37,6 +50,9 @@ logging.basicConfig(
     format="[ENRICH_CONSUMER] %(asctime)s %(levelname)s %(message)s"
 )
 
+# Maximal angereicherte Adressen pro "batch"-Request
+MAX_ADDRESSES_PER_REQUEST = 100
+
 
 class EnrichmentConsumerWorker:
     """Worker für Enrichment Processing"""
@@ -56,13 +72,14 @@ class EnrichmentConsumerWorker:
             "session.timeout.ms": 30000,
         }
         
-        import os
         if _KAFKA_AVAILABLE and not (os.getenv("TEST_MODE") == "1" or os.getenv("PYTEST_CURRENT_TEST")):
             self.consumer = Consumer(self.config)  # type: ignore
         else:
             self.consumer = None  # type: ignore
         self.producer = KafkaProducerClient()
         self.running = False
+        self.processed_count = 0
+        self.error_count = 0
         # Retry/Backoff Settings
         try:
             self.max_retries = int(getattr(settings, "KAFKA_MAX_PROCESS_RETRIES", 3))
@@ -76,230 +93,355 @@ class EnrichmentConsumerWorker:
             self.backoff_cap = float(getattr(settings, "KAFKA_RETRY_BACKOFF_CAP", 2.0))
         except Exception:
             self.backoff_cap = 2.0
+        # Micro-Batching: bis zu N Nachrichten oder bis das Fenster abläuft
+        self.batch_max_messages = max(1, int(os.getenv("ENRICH_BATCH_MAX_MESSAGES", "500")))
+        self.batch_window = max(0.0, float(os.getenv("ENRICH_BATCH_WINDOW_MS", "200")) / 1000.0)
     
-    async def _enrich_address(self, address: str, chain: str = "ethereum") -> Dict[str, Any]:
+    async def _enrich_addresses(
+        self, keys: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Dict[str, Any]]:
         """
-        Enriches address with labels, risk score, compliance data
+        Reichert (chain, address)-Paare gebündelt an
+        
+        Jede Adresse wird pro Aufruf nur einmal nachgeschlagen: ein
+        Bulk-Lookup für die Labels, dessen Ergebnis auch die Label-Features
+        des Risk Scorings speist, und ein gebündeltes Compliance-Screening.
+        Die übrigen Risk-Features bleiben Aggregat-Queries pro Adresse
+        (siehe ``RiskScorer.batch_score``).
         
-        Args:
-            address: Blockchain address
-            chain: Chain name
-            
         Returns:
-            Enrichment data
+            Mapping (chain, address) -> Enrichment
         """
+        unique = list(dict.fromkeys((chain or "ethereum", address) for chain, address in keys if address))
+        addresses = list(dict.fromkeys(address for _chain, address in unique))
+        if not addresses:
+            return {}
+        
+        labels_map: Optional[Dict[str, Any]] = None
+        risk_map: Dict[str, Any] = {}
+        screenings: Dict[Tuple[str, str], Any] = {}
+        try:
+            labels_map = await labels_service.bulk_get_labels(addresses)
+        except Exception as e:
+            logger.warning(f"Labels service error for {len(addresses)} addresses: {e}")
+        try:
+            risk_map = await risk_scorer.batch_score(addresses, labels=labels_map)
+        except Exception as e:
+            logger.warning(f"Risk scoring error for {len(addresses)} addresses: {e}")
         try:
-            enrichment = {
+            screenings = compliance_service.screen_many(unique)
+        except Exception as e:
+            logger.warning(f"Compliance screening error for {len(unique)} addresses: {e}")
+        labels_map = labels_map or {}
+        
+        enriched_at = datetime.utcnow().isoformat()
+        out: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for chain, address in unique:
+            enrichment: Dict[str, Any] = {
                 "address": address,
                 "chain": chain,
-                "enriched_at": datetime.utcnow().isoformat(),
-                "labels": [],
+                "enriched_at": enriched_at,
+                "labels": list(labels_map.get(address.lower()) or []),
                 "risk_score": 0,
                 "risk_level": "LOW",
                 "compliance": {}
             }
-            
-            # 1. Get Labels
-            try:
-                labels = await labels_service.get_labels(address)
-                enrichment["labels"] = labels
-            except Exception as e:
-                logger.warning(f"Labels service error for {address}: {e}")
-            
-            # 2. Calculate Risk Score
-            try:
-                # Mock transaction data for risk scoring
-                mock_tx_data = {
-                    "address": address,
-                    "labels": enrichment["labels"],
-                    "transaction_count": 0,  # Would be fetched from DB
-                    "total_volume": 0.0
-                }
-                risk_result = await risk_scorer.score_address(mock_tx_data)
+            risk_result = risk_map.get(address)
+            if risk_result:
                 enrichment["risk_score"] = risk_result.get("risk_score", 0)
                 enrichment["risk_level"] = risk_result.get("risk_level", "LOW")
                 enrichment["risk_factors"] = risk_result.get("factors", [])
-            except Exception as e:
-                logger.warning(f"Risk scoring error for {address}: {e}")
-            
-            # 3. Compliance Screening
-            try:
-                screening = compliance_service.screen(chain, address)
+            screening = screenings.get((chain, address))
+            if screening is not None:
                 enrichment["compliance"] = {
                     "risk_score": screening.risk_score,
                     "categories": screening.categories,
                     "reasons": screening.reasons,
                     "watchlisted": screening.watchlisted
                 }
-            except Exception as e:
-                logger.warning(f"Compliance screening error for {address}: {e}")
-            
-            return enrichment
+            out[(chain, address)] = enrichment
+        return out
+    
+    async def _enrich_address(self, address: str, chain: str = "ethereum") -> Dict[str, Any]:
+        """
+        Enriches address with labels, risk score, compliance data
+        
+        Args:
+            address: Blockchain address
+            chain: Chain name
             
+        Returns:
+            Enrichment data
+        """
+        try:
+            enriched = await self._enrich_addresses([(chain, address)])
+            return enriched[(chain or "ethereum", address)]
         except Exception as e:
             logger.error(f"Error enriching address {address}: {e}")
             return {"address": address, "error": str(e)}
     
-    async def _process_enrichment_request(self, message: dict) -> Optional[dict]:
+    @staticmethod
+    def _request_keys(message: dict) -> List[Tuple[str, str]]:
+        """(chain, address)-Paare, die ein Request anreichern lässt"""
+        request_type = message.get("type", "address")
+        chain = message.get("chain", "ethereum") or "ethereum"
+        if request_type == "address":
+            address = message.get("address")
+            return [(chain, address)] if address else []
+        if request_type == "batch":
+            return [(chain, a) for a in (message.get("addresses") or [])[:MAX_ADDRESSES_PER_REQUEST] if a]
+        return []
+    
+    async def _process_enrichment_batch(self, messages: List[dict]) -> List[Optional[dict]]:
         """
-        Verarbeitet Enrichment-Request
+        Verarbeitet mehrere Enrichment-Requests mit einem gemeinsamen Lookup
         
         Args:
-            message: Enrichment Request
+            messages: Enrichment Requests
             
         Returns:
-            Enrichment Result
+            Enrichment Results in Request-Reihenfolge (None bei unbekanntem Typ)
         """
-        try:
+        keys = [key for message in messages for key in self._request_keys(message)]
+        enriched = await self._enrich_addresses(keys)
+        
+        def _lookup(chain: str, address: str) -> Dict[str, Any]:
+            found = enriched.get((chain, address))
+            return dict(found) if found is not None else {"address": address, "error": "not enriched"}
+        
+        results: List[Optional[dict]] = []
+        for message in messages:
             request_type = message.get("type", "address")
             request_id = message.get("request_id")
             
-            logger.info(f"Processing enrichment request: {request_id} type={request_type}")
-            
             if request_type == "address":
-                address = message.get("address")
-                chain = message.get("chain", "ethereum")
-                
-                enrichment = await self._enrich_address(address, chain)
+                request_keys = self._request_keys(message)
+                if not request_keys:
+                    results.append(None)
+                    continue
+                enrichment = _lookup(*request_keys[0])
                 enrichment["request_id"] = request_id
                 enrichment["request_type"] = request_type
-                
-                return enrichment
+                results.append(enrichment)
             
             elif request_type == "batch":
-                # Batch processing
-                addresses = message.get("addresses", [])
-                chain = message.get("chain", "ethereum")
-                
-                results = []
-                for addr in addresses[:100]:  # Limit to 100 per request
-                    enrichment = await self._enrich_address(addr, chain)
-                    results.append(enrichment)
-                
-                return {
+                results.append({
                     "request_id": request_id,
                     "request_type": "batch",
-                    "results": results,
+                    "results": [_lookup(c, a) for c, a in self._request_keys(message)],
                     "enriched_at": datetime.utcnow().isoformat()
-                }
+                })
             
             else:
                 logger.warning(f"Unknown request type: {request_type}")
-                return None
-                
+                results.append(None)
+        return results
+    
+    async def _process_enrichment_request(self, message: dict) -> Optional[dict]:
+        """
+        Verarbeitet Enrichment-Request
+        
+        Args:
+            message: Enrichment Request
+            
+        Returns:
+            Enrichment Result
+        """
+        try:
+            logger.info(
+                f"Processing enrichment request: {message.get('request_id')} type={message.get('type', 'address')}"
+            )
+            return (await self._process_enrichment_batch([message]))[0]
         except Exception as e:
             logger.error(f"Error processing enrichment request: {e}", exc_info=True)
             return None
     
-    def _consume_once(self) -> bool:
-        """Konsumiert eine Nachricht"""
-        if self.consumer is None:
-            return False
-        msg = self.consumer.poll(1.0)  # type: ignore[union-attr]
+    async def _process_with_retry(self, messages: List[dict]) -> List[Optional[dict]]:
+        """Batch-Verarbeitung; fehlgeschlagene Requests werden mit Backoff erneut versucht"""
+        results: List[Optional[dict]] = [None] * len(messages)
+        pending = list(range(len(messages)))
+        attempt = 0
+        while pending and attempt <= self.max_retries:
+            attempt += 1
+            try:
+                batch = await self._process_enrichment_batch([messages[i] for i in pending])
+                for i, result in zip(pending, batch):
+                    results[i] = result
+            except Exception as pe:
+                logger.error(f"_process_enrichment_batch exception (attempt {attempt}/{self.max_retries}): {pe}")
+            pending = [i for i in pending if not results[i]]
+            if pending and attempt <= self.max_retries:
+                await asyncio.sleep(min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1))))
+        return results
+    
+    def _publish_result(self, result: dict) -> None:
+        """Produziert das Ergebnis (raw JSON) ohne Flush; geflusht wird pro Batch"""
+        if getattr(self.producer, "producer", None) is None:
+            return
+        payload = json.dumps(result, default=str).encode("utf-8")
+        key = (result.get("request_id") or "").encode("utf-8", "ignore")
+        for attempt in range(6):
+            try:
+                self.producer.producer.produce(  # type: ignore[union-attr]
+                    topic=self.results_topic,
+                    key=key,
+                    value=payload,
+                    callback=self.producer._delivery_report,  # type: ignore[attr-defined]
+                )
+                return
+            except BufferError:
+                if attempt == 5:
+                    raise
+                # Lokale Queue voll: Delivery Callbacks abarbeiten lassen
+                self.producer.producer.poll(0.1)  # type: ignore[union-attr]
+    
+    async def _commit(self, msgs: list) -> None:
+        """Committed pro Partition den Offset nach der höchsten Nachricht des Batches"""
+        highest: Dict[Tuple[str, int], int] = {}
+        for msg in msgs:
+            tp = (msg.topic(), msg.partition())
+            highest[tp] = max(highest.get(tp, -1), msg.offset())
+        if not highest:
+            return
+        try:
+            if TopicPartition is not None:
+                offsets = [TopicPartition(t, p, o + 1) for (t, p), o in highest.items()]
+            else:  # pragma: no cover
+                offsets = [(t, p, o + 1) for (t, p), o in highest.items()]
+            await asyncio.to_thread(self.consumer.commit, offsets=offsets, asynchronous=False)  # type: ignore[union-attr]
+            KAFKA_COMMITS_TOTAL.labels(topic=self.topic).inc()
+        except Exception as e:
+            logger.error(f"Offset commit failed: {e}")
+    
+    def _poll_batch(self) -> list:
+        """Sammelt Nachrichten bis batch_max_messages oder bis das Fenster abläuft"""
+        consume = getattr(self.consumer, "consume", None)
+        msgs: list = []
+        deadline = 0.0
+        while len(msgs) < self.batch_max_messages:
+            # Erste Nachricht bis zu 1s abwarten, danach nur noch das Restfenster
+            timeout = 1.0 if not msgs else max(0.0, deadline - time.monotonic())
+            if consume is not None:
+                got = consume(self.batch_max_messages - len(msgs), timeout)
+            else:
+                msg = self.consumer.poll(timeout)  # type: ignore[union-attr]
+                got = [msg] if msg is not None else []
+            for msg in got or []:
+                if msg is None:
+                    continue
+                if msg.error():
+                    if KafkaError is not None and msg.error().code() == KafkaError._PARTITION_EOF:  # type: ignore[union-attr]
+                        continue
+                    logger.error(f"Consumer error: {msg.error()}")
+                    try:
+                        KAFKA_CONSUMER_ERRORS.inc()
+                    except Exception:
+                        pass
+                    continue
+                if not msgs:
+                    deadline = time.monotonic() + self.batch_window
+                msgs.append(msg)
+            if not msgs:
+                break
+            if time.monotonic() >= deadline:
+                break
+        return msgs
+    
+    async def _consume_batch(self) -> int:
+        """Konsumiert, verarbeitet, published und committed einen Micro-Batch"""
+        msgs = await asyncio.to_thread(self._poll_batch)
+        if not msgs:
+            return 0
+        start_ts = time.time()
+        parsed: List[Tuple[Any, dict]] = []
+        for msg in msgs:
+            try:
+                message = json.loads(msg.value().decode("utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError) as e:
+                # Commit um stuck messages zu vermeiden
+                logger.error(f"Invalid JSON in message: {e}")
+                continue
+            if isinstance(message, dict):
+                parsed.append((msg, message))
+            else:
+                logger.error(f"Invalid enrichment request (no object) at offset {msg.offset()}")
         
-        if msg is None:
-            return False
+        results = await self._process_with_retry([message for _msg, message in parsed])
         
-        if msg.error():
-            if KafkaError is not None and msg.error().code() == KafkaError._PARTITION_EOF:  # type: ignore[union-attr]
-                return False
-            logger.error(f"Consumer error: {msg.error()}")
+        failed = []
+        for (msg, _message), result in zip(parsed, results):
+            if not result:
+                failed.append(msg)
+                continue
             try:
-                KAFKA_CONSUMER_ERRORS.inc()
-            except:
-                pass
-            return False
-        
+                self._publish_result(result)
+                self.processed_count += 1
+            except Exception as pub_e:
+                logger.warning(f"Publish enrichment result failed: {pub_e}")
+        if failed:
+            # Final failure: route to DLQ, Offsets werden trotzdem freigegeben
+            await asyncio.to_thread(
+                self._send_to_dlq_many, failed, f"processing_failed_after_{self.max_retries}_retries"
+            )
+            self.error_count += len(failed)
         try:
-            # Parse message
-            value = msg.value().decode('utf-8')
-            message = json.loads(value)
-
-            # Process enrichment request with retry/backoff
-            loop = asyncio.get_event_loop()
-            attempt = 0
-            result = None
-            while attempt <= self.max_retries:
-                attempt += 1
-                try:
-                    result = loop.run_until_complete(self._process_enrichment_request(message))
-                    if result:
-                        break
-                except Exception as pe:
-                    logger.error(f"_process_enrichment_request exception (attempt {attempt}/{self.max_retries}): {pe}")
-                    result = None
-                if not result and attempt <= self.max_retries:
-                    import time as _t
-                    delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
-                    _t.sleep(delay)
-
-            if result:
-                # Publish result
-                try:
-                    self.producer.send_event(
-                        event=result,
-                        topic=self.results_topic,
-                        key=result.get("request_id")
-                    )
-                except Exception as pub_e:
-                    logger.warning(f"Publish enrichment result failed: {pub_e}")
-                # Commit offset
-                self.consumer.commit(message=msg, asynchronous=False)  # type: ignore[union-attr]
-                try:
-                    KAFKA_COMMITS_TOTAL.labels(topic=self.topic).inc()
-                except:
-                    pass
-                return True
-            else:
-                # Final failure: route to DLQ and commit
-                try:
-                    self._send_to_dlq(msg, reason=f"processing_failed_after_{self.max_retries}_retries")
-                except Exception as dlq_e:
-                    logger.error(f"DLQ routing failed: {dlq_e}")
-                try:
-                    self.consumer.commit(message=msg, asynchronous=False)  # type: ignore[union-attr]
-                    KAFKA_COMMITS_TOTAL.labels(topic=self.topic).inc()
-                except Exception:
-                    pass
-                return False
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in message: {e}")
-            self.consumer.commit(message=msg, asynchronous=False)  # type: ignore[union-attr]
-            return False
+            await asyncio.to_thread(self.producer.flush)
         except Exception as e:
-            logger.error(f"Error processing message: {e}", exc_info=True)
-            try:
-                KAFKA_CONSUMER_ERRORS.inc()
-            except:
-                pass
-            self.consumer.commit(message=msg, asynchronous=False)
+            logger.warning(f"Flushing enrichment results failed: {e}")
+        await self._commit(msgs)
+        try:
+            KAFKA_EVENTS_CONSUMED.labels(topic=self.topic).inc(len(parsed) - len(failed))
+            KAFKA_PROCESSING_DURATION.labels(topic=self.topic).observe(max(0.0, time.time() - start_ts))
+        except Exception:
+            pass
+        return len(msgs)
+    
+    def _consume_once(self) -> bool:
+        """Konsumiert einen Micro-Batch (synchroner Einstieg für Tools/Tests)"""
+        if self.consumer is None:
             return False
+        return asyncio.run(self._consume_batch()) > 0
     
-    def run(self):
-        """Startet Consumer Loop"""
+    async def run_async(self):
+        """Async Consumer Loop über Micro-Batches"""
         if self.consumer is None:
             logger.info("Enrichment consumer disabled (TEST_MODE or Kafka not available)")
             return
         self.consumer.subscribe([self.topic])  # type: ignore[union-attr]
         self.running = True
-        logger.info(f"Enrichment consumer started: topic={self.topic} group={self.group_id}")
-        
+        logger.info(
+            f"Enrichment consumer started: topic={self.topic} group={self.group_id} "
+            f"batch={self.batch_max_messages} window={self.batch_window * 1000:.0f}ms"
+        )
         try:
             while self.running:
-                self._consume_once()
-        except KeyboardInterrupt:
-            logger.info("Stopping enrichment consumer...")
+                await self._consume_batch()
         finally:
             if self.consumer is not None:
-                self.consumer.close()  # type: ignore[union-attr]
-            self.producer.flush()
+                await asyncio.to_thread(self.consumer.close)  # type: ignore[union-attr]
+            await asyncio.to_thread(self.producer.flush)
+    
+    def run(self):
+        """Startet Consumer Loop"""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            logger.info("Stopping enrichment consumer...")
     
     def stop(self):
         """Stoppt Consumer"""
         self.running = False
 
-    def _send_to_dlq(self, msg, reason: str) -> None:
+    def _send_to_dlq_many(self, msgs: list, reason: str) -> None:
+        """Sendet mehrere Original-Nachrichten in das DLQ-Topic, ein Flush am Ende."""
+        for msg in msgs:
+            self._send_to_dlq(msg, reason, flush=False)
+        try:
+            self.producer.flush(5)  # type: ignore[union-attr]
+        except Exception:
+            pass
+
+    def _send_to_dlq(self, msg, reason: str, flush: bool = True) -> None:
         """Sendet die Original-Nachricht in das DLQ-Topic mit Reason-Header."""
         try:
             if getattr(self.producer, "producer", None) is None:
@@ -313,10 +455,11 @@ class EnrichmentConsumerWorker:
                 callback=getattr(self.producer, "_delivery_report", None),  # type: ignore[attr-defined]
             )
             # Flush via producer client if verfügbar
-            try:
-                self.producer.flush(5)  # type: ignore[union-attr]
-            except Exception:
-                pass
+            if flush:
+                try:
+                    self.producer.flush(5)  # type: ignore[union-attr]
+                except Exception:
+                    pass
         except Exception as e:
             logger.error(f"Failed to send to DLQ: {e}")
 
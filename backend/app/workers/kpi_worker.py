@@ -1,13 +1,17 @@
 """KPI Background Worker
-Periodisch KPIs berechnen und im Redis-Cache vorwärmen.
+Backfill und periodischer Abgleich der inkrementellen KPI-Buckets.
+Laufende Alerts, Dispositionen und Case-Schließungen werden direkt an der
+Quelle verbucht; die Buckets liegen aber pro Prozess im Speicher. Der
+Abgleich (Default 60s, KPI_RECONCILE_INTERVAL) übernimmt Ereignisse anderer
+API-Worker/Replicas, z.B. dort geschlossene Cases.
 Start: via lifespan in app.main
 """
 from __future__ import annotations
 import asyncio
 import logging
 import os
-from typing import Iterable, Tuple
 
+from app.services.kpi_aggregates import kpi_aggregates
 from app.services.kpi_service import kpi_service
 from app.db.redis_client import redis_client
 
@@ -15,15 +19,15 @@ logger = logging.getLogger(__name__)
 
 
 class KpiWorker:
-    def __init__(self, presets: Iterable[Tuple[int, int]] | None = None, interval_seconds: int = 60):
-        # presets: Liste von (days, sla_hours)
-        self.presets = list(presets or [(30, 48), (7, 48)])
+    def __init__(self, interval_seconds: int | None = None):
+        if interval_seconds is None:
+            interval_seconds = int(os.getenv("KPI_RECONCILE_INTERVAL", "60"))
         self.interval = max(15, int(interval_seconds))
         self._stopping = asyncio.Event()
 
     async def start(self):
         """Startet den Loop bis stop() aufgerufen wird."""
-        logger.info("KPI worker started (interval=%ss, presets=%s)", self.interval, self.presets)
+        logger.info("KPI worker started (reconcile interval=%ss)", self.interval)
         # Redis-Verbindung optional herstellen
         try:
             await redis_client._ensure_connected()  # type: ignore[attr-defined]
@@ -31,12 +35,10 @@ class KpiWorker:
             pass
         while not self._stopping.is_set():
             try:
-                # Presets nacheinander berechnen (wird im Service gecached)
-                for days, sla in self.presets:
-                    try:
-                        await kpi_service.get_kpis(days=days, sla_hours=sla)
-                    except Exception as e:
-                        logger.warning("KPI precompute failed for (%s,%s): %s", days, sla, e)
+                try:
+                    await kpi_service.rebuild_aggregates()
+                except Exception as e:
+                    logger.warning("KPI aggregate rebuild failed: %s", e)
                 await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
             except asyncio.TimeoutError:
                 # weiterlaufen
@@ -44,6 +46,8 @@ class KpiWorker:
             except Exception as e:
                 logger.error("KPI worker loop error: %s", e)
                 await asyncio.sleep(0.5)
+        # Ohne Worker kein Abgleich mehr: get_kpis fällt auf die Quellen zurück
+        kpi_aggregates.reset()
         logger.info("KPI worker stopped")
 
     def stop(self):
@@ -53,9 +57,9 @@ class KpiWorker:
 _kpi_worker: KpiWorker | None = None
 
 
-def start_kpi_worker(presets: Iterable[Tuple[int, int]] | None = None, interval_seconds: int = 60):
+def start_kpi_worker(interval_seconds: int | None = None):
     global _kpi_worker
-    _kpi_worker = KpiWorker(presets=presets, interval_seconds=interval_seconds)
+    _kpi_worker = KpiWorker(interval_seconds=interval_seconds)
     return _kpi_worker
 
 
@@ -0,0 +1,234 @@
+"""
+Chunked Retention für Append-only-Tabellen
+
+- Löscht abgelaufene Zeilen in begrenzten Chunks, sortiert nach Zeitstempel
+  (nutzt den Index auf der Zeitspalte, kurze Transaktionen, wenig WAL pro Statement)
+- Partitionierte Tabellen: vollständig abgelaufene Zeit-Partitionen werden
+  per DROP TABLE entfernt, nur der Rest wird chunkweise gelöscht
+- Pausen zwischen Chunks, Laufzeitbudget pro Zyklus
+- Fortschritt als RetentionReport (+ Logs/Metriken)
+
+Neue Tabellen werden über eine weitere RetentionPolicy angebunden.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from app.db.postgres import postgres_client
+
+try:
+    from app import metrics  # type: ignore
+except Exception:  # pragma: no cover
+    metrics = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+_PARTITIONS_QUERY = """
+SELECT n.nspname AS schema, c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE i.inhparent = $1::regclass
+"""
+
+
+@dataclass
+class RetentionPolicy:
+    """Aufbewahrungsregel für eine Tabelle mit Zeitspalte"""
+
+    table: str
+    ts_column: str
+    days_env: str
+    default_days: int = 0  # 0 = deaktiviert
+    chunk_size: Optional[int] = None
+
+    def __post_init__(self):
+        for ident in (self.table, self.ts_column):
+            if not _IDENT.match(ident):
+                raise ValueError(f"Invalid identifier for retention policy: {ident!r}")
+
+    def retention_days(self) -> int:
+        try:
+            return int(os.getenv(self.days_env, str(self.default_days)))
+        except Exception:
+            return self.default_days
+
+
+@dataclass
+class RetentionReport:
+    """Fortschritt eines Retention-Laufs für eine Tabelle"""
+
+    table: str
+    cutoff: Optional[datetime] = None
+    rows_deleted: int = 0
+    chunks: int = 0
+    partitions_dropped: List[str] = field(default_factory=list)
+    duration_seconds: float = 0.0
+    complete: bool = False
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "table": self.table,
+            "cutoff": self.cutoff.isoformat() if self.cutoff else None,
+            "rows_deleted": self.rows_deleted,
+            "chunks": self.chunks,
+            "partitions_dropped": list(self.partitions_dropped),
+            "duration_seconds": round(self.duration_seconds, 3),
+            "complete": self.complete,
+            "error": self.error,
+        }
+
+
+def _deleted_count(status: Any) -> int:
+    """asyncpg liefert den Command-Status als String, z.B. 'DELETE 5000'"""
+    try:
+        return int(str(status).rsplit(" ", 1)[-1])
+    except Exception:
+        return 0
+
+
+def _upper_bound(bound: Optional[str]) -> Optional[datetime]:
+    """Obere Grenze einer Range-Partition (FOR VALUES FROM (...) TO (...))"""
+    m = _UPPER_BOUND.search(bound or "")
+    if not m:
+        return None  # DEFAULT, MAXVALUE oder keine Zeit-Range
+    try:
+        upper = datetime.fromisoformat(m.group(1))
+    except ValueError:
+        return None
+    return upper if upper.tzinfo else upper.replace(tzinfo=timezone.utc)
+
+
+class ChunkedRetention:
+    """Führt RetentionPolicies chunkweise mit Pausen und Laufzeitbudget aus"""
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        pause_seconds: Optional[float] = None,
+        max_runtime_seconds: Optional[float] = None,
+        db: Any = None,
+    ):
+        self.chunk_size = max(1, int(chunk_size or os.getenv("RETENTION_CHUNK_SIZE", "5000")))
+        self.pause_seconds = (
+            pause_seconds if pause_seconds is not None
+            else max(0.0, float(os.getenv("RETENTION_CHUNK_PAUSE_MS", "100")) / 1000.0)
+        )
+        self.max_runtime_seconds = (
+            max_runtime_seconds if max_runtime_seconds is not None
+            else float(os.getenv("RETENTION_MAX_RUNTIME_SECONDS", "300"))
+        )
+        self.db = db or postgres_client
+
+    async def _drop_expired_partitions(self, policy: RetentionPolicy, cutoff: datetime, report: RetentionReport,
+                                       deadline: float) -> None:
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch(_PARTITIONS_QUERY, policy.table)
+        for row in sorted(rows or [], key=lambda r: _upper_bound(r["bound"]) or cutoff):
+            upper = _upper_bound(row["bound"])
+            if upper is None or upper > cutoff:
+                continue
+            if time.monotonic() >= deadline:
+                return
+            name = f"{row['schema']}.{row['name']}"
+            if not _IDENT.match(name):
+                continue
+            async with self.db.acquire() as conn:
+                await conn.execute(f"DROP TABLE IF EXISTS {name}")
+            report.partitions_dropped.append(name)
+            logger.info(f"Retention {policy.table}: dropped partition {name} (upper bound {upper.isoformat()})")
+            try:
+                if metrics is not None:
+                    metrics.RETENTION_PARTITIONS_DROPPED.labels(table=policy.table).inc()
+            except Exception:
+                pass
+
+    async def _is_partitioned(self, policy: RetentionPolicy) -> bool:
+        async with self.db.acquire() as conn:
+            return bool(await conn.fetchval(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = $1::regclass)",
+                policy.table,
+            ))
+
+    async def run(self, policy: RetentionPolicy, now: Optional[datetime] = None,
+                  deadline: Optional[float] = None) -> RetentionReport:
+        """Ein Retention-Zyklus für eine Tabelle; bricht beim Laufzeitbudget ab"""
+        report = RetentionReport(table=policy.table)
+        days = policy.retention_days()
+        if days <= 0:
+            report.complete = True
+            return report
+        start = time.monotonic()
+        if deadline is None:
+            deadline = start + self.max_runtime_seconds
+        # Cutoff einmal pro Zyklus festlegen, damit er zwischen Chunks nicht wandert
+        report.cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+        chunk_size = policy.chunk_size or self.chunk_size
+        # ctid ist nur pro Partition eindeutig: ohne das äußere Zeit-Prädikat könnte
+        # eine noch gültige Zeile einer anderen Partition mit gleicher ctid mitgelöscht werden
+        delete_chunk = f"""
+        DELETE FROM {policy.table}
+        WHERE ctid = ANY(ARRAY(
+            SELECT ctid FROM {policy.table}
+            WHERE {policy.ts_column} < $1
+            ORDER BY {policy.ts_column}
+            LIMIT $2
+        ))
+        AND {policy.ts_column} < $1
+        """
+        try:
+            if await self._is_partitioned(policy):
+                await self._drop_expired_partitions(policy, report.cutoff, report, deadline)
+            while time.monotonic() < deadline:
+                async with self.db.acquire() as conn:
+                    deleted = _deleted_count(await conn.execute(delete_chunk, report.cutoff, chunk_size))
+                report.chunks += 1
+                report.rows_deleted += deleted
+                try:
+                    if metrics is not None and deleted:
+                        metrics.RETENTION_ROWS_DELETED.labels(table=policy.table).inc(deleted)
+                except Exception:
+                    pass
+                if deleted < chunk_size:
+                    report.complete = True
+                    break
+                logger.debug(f"Retention {policy.table}: {report.rows_deleted} rows deleted so far")
+                if self.pause_seconds:
+                    await asyncio.sleep(self.pause_seconds)
+        except Exception as e:
+            report.error = str(e)
+            logger.error(f"Retention {policy.table} failed: {e}")
+        report.duration_seconds = time.monotonic() - start
+        try:
+            if metrics is not None:
+                metrics.RETENTION_CYCLE_DURATION.labels(table=policy.table).observe(report.duration_seconds)
+        except Exception:
+            pass
+        logger.info(
+            f"Retention {policy.table}: deleted {report.rows_deleted} rows in {report.chunks} chunks, "
+            f"dropped {len(report.partitions_dropped)} partitions, {report.duration_seconds:.1f}s"
+            + ("" if report.complete else " (incomplete, continues next cycle)")
+        )
+        return report
+
+    async def run_all(self, policies: List[RetentionPolicy], now: Optional[datetime] = None) -> List[RetentionReport]:
+        """Alle Policies nacheinander mit gemeinsamem Laufzeitbudget"""
+        deadline = time.monotonic() + self.max_runtime_seconds
+        reports: List[RetentionReport] = []
+        for policy in policies:
+            if time.monotonic() >= deadline:
+                reports.append(RetentionReport(table=policy.table))
+                continue
+            reports.append(await self.run(policy, now=now, deadline=deadline))
+        return reports
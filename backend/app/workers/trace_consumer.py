@@ -3,27 +3,32 @@ Trace Request Consumer Worker
 
 Konsumiert Trace-Anfragen vom Kafka Topic und führt sie aus.
 - Topic: trace.requests
-- Verarbeitet Trace-Requests asynchron
-- Speichert Ergebnisse in Neo4j
+- Verarbeitet mehrere Trace-Requests nebenläufig (TRACE_CONSUMER_CONCURRENCY)
+- Speichert Ergebnisse in Neo4j per UNWIND-Batches (TRACE_PERSIST_BATCH_SIZE)
 - Published Results zu trace.results
+- Offsets werden erst nach erfolgreicher Persistierung committed, pro
+  Partition nur bis zum ersten noch offenen Offset
 """
 from __future__ import annotations
 
 import asyncio
 import argparse
 import logging
+import os
 import sys
 import json
-from typing import Optional
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 try:
-    from confluent_kafka import Consumer, KafkaError, KafkaException  # type: ignore
+    from confluent_kafka import Consumer, KafkaError, KafkaException, TopicPartition  # type: ignore
     _KAFKA_AVAILABLE = True
 except Exception:
     Consumer = None  # type: ignore
     KafkaError = None  # type: ignore
     KafkaException = Exception  # type: ignore
+    TopicPartition = None  # type: ignore
     _KAFKA_AVAILABLE = False
 
 from app.config import settings
@@ -45,6 +50,73 @@ logging.basicConfig(
     format="[TRACE_CONSUMER] %(asctime)s %(levelname)s %(message)s"
 )
 
+_TRACE_NODE_QUERY = """
+MERGE (t:Trace {trace_id: $trace_id})
+SET t.source = $source,
+    t.direction = $direction,
+    t.max_depth = $max_depth,
+    t.taint_model = $taint_model,
+    t.total_nodes = $total_nodes,
+    t.total_edges = $total_edges,
+    t.created_at = datetime($created_at)
+"""
+
+_TRACE_ADDRESSES_QUERY = """
+MATCH (t:Trace {trace_id: $trace_id})
+UNWIND $rows AS row
+MERGE (a:Address {address: row.address})
+SET a.taint_received = row.taint,
+    a.risk_level = row.risk_level,
+    a.labels = row.labels
+MERGE (t)-[:INCLUDES]->(a)
+"""
+
+_TRACE_EDGES_QUERY = """
+UNWIND $rows AS row
+MATCH (from:Address {address: row.from_addr})
+MATCH (to:Address {address: row.to_addr})
+MERGE (from)-[tx:TRANSACTION {tx_hash: row.tx_hash}]->(to)
+SET tx.value = row.value,
+    tx.taint = row.taint,
+    tx.timestamp = datetime(row.timestamp)
+"""
+
+
+class _OffsetTracker:
+    """
+    Verfolgt offene Offsets pro Partition.
+
+    Bei nebenläufiger Verarbeitung darf pro Partition nur bis vor den
+    kleinsten noch offenen Offset committed werden.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, int], Set[int]] = {}
+        self._highest: Dict[Tuple[str, int], int] = {}
+        self._committed: Dict[Tuple[str, int], int] = {}
+
+    def add(self, tp: Tuple[str, int], offset: int) -> None:
+        self._pending.setdefault(tp, set()).add(offset)
+
+    def complete(self, tp: Tuple[str, int], offset: int) -> Optional[int]:
+        """Markiert offset als erledigt; liefert den neuen Commit-Offset oder None"""
+        pending = self._pending.get(tp)
+        if pending is None or offset not in pending:
+            return None
+        pending.discard(offset)
+        self._highest[tp] = max(self._highest.get(tp, -1), offset)
+        commit = min(pending) if pending else self._highest[tp] + 1
+        if not pending:
+            del self._pending[tp]
+        if commit <= self._committed.get(tp, -1):
+            return None
+        self._committed[tp] = commit
+        return commit
+
+    @property
+    def in_flight(self) -> int:
+        return sum(len(p) for p in self._pending.values())
+
 
 class TraceConsumerWorker:
     """Worker für Trace Request Processing"""
@@ -64,7 +136,6 @@ class TraceConsumerWorker:
             "session.timeout.ms": 30000,
         }
         
-        import os
         if _KAFKA_AVAILABLE and not (os.getenv("TEST_MODE") == "1" or os.getenv("PYTEST_CURRENT_TEST")):
             self.consumer = Consumer(self.config)  # type: ignore
         else:
@@ -88,6 +159,11 @@ class TraceConsumerWorker:
             self.backoff_cap = float(getattr(settings, "KAFKA_RETRY_BACKOFF_CAP", 2.0))
         except Exception:
             self.backoff_cap = 2.0
+        # Nebenläufigkeit und Batch-Größe der Persistierung
+        self.concurrency = max(1, int(os.getenv("TRACE_CONSUMER_CONCURRENCY", "4")))
+        self.persist_batch_size = max(1, int(os.getenv("TRACE_PERSIST_BATCH_SIZE", "1000")))
+        self._offsets = _OffsetTracker()
+        self._tasks: Set[asyncio.Task] = set()
     
     async def _process_trace_request(self, message: dict) -> Optional[dict]:
         """
@@ -141,9 +217,6 @@ class TraceConsumerWorker:
             result_dict["trace_id"] = trace_id
             result_dict["processed_at"] = datetime.utcnow().isoformat()
             
-            # Save to Neo4j (background)
-            asyncio.create_task(self._save_trace_to_neo4j(trace_id, result_dict))
-            
             logger.info(f"Trace {trace_id} completed: {len(result_dict.get('nodes', []))} nodes")
             
             return result_dict
@@ -152,198 +225,266 @@ class TraceConsumerWorker:
             logger.error(f"Error processing trace request: {e}", exc_info=True)
             return None
 
-    def _send_heartbeat_sync(self, status: str = "running"):
-        """Sendet einen Heartbeat synchron über den aktuellen Event Loop."""
+    async def _send_heartbeat(self, status: str = "running"):
+        """Sendet einen Heartbeat mit aktuellen Zählern"""
         try:
-            loop = asyncio.get_event_loop()
-            coro = redis_client.set_worker_heartbeat(
+            await redis_client.set_worker_heartbeat(
                 name="trace_consumer",
                 payload={
                     "status": status,
                     "last_heartbeat": datetime.utcnow().isoformat(),
                     "processed_count": self.processed_count,
                     "error_count": self.error_count,
+                    "in_flight": self._offsets.in_flight,
                 },
                 ttl=30,
             )
-            loop.run_until_complete(coro)
-        except Exception as e:
-            logger.error(f"Failed to send heartbeat sync: {e}")
-    
-    async def _save_trace_to_neo4j(self, trace_id: str, result: dict):
-        """Speichert Trace-Ergebnis in Neo4j"""
-        try:
-            async with neo4j_client.get_session() as session:
-                # Create Trace node
-                await session.run(
-                    """
-                    MERGE (t:Trace {trace_id: $trace_id})
-                    SET t.source = $source,
-                        t.direction = $direction,
-                        t.max_depth = $max_depth,
-                        t.taint_model = $taint_model,
-                        t.total_nodes = $total_nodes,
-                        t.total_edges = $total_edges,
-                        t.created_at = datetime($created_at)
-                    """,
-                    trace_id=trace_id,
-                    source=result.get("source_address"),
-                    direction=result.get("direction"),
-                    max_depth=result.get("max_depth"),
-                    taint_model=result.get("taint_model"),
-                    total_nodes=len(result.get("nodes", [])),
-                    total_edges=len(result.get("edges", [])),
-                    created_at=result.get("processed_at")
-                )
-                
-                # Create Address nodes and relationships
-                for node in result.get("nodes", []):
-                    await session.run(
-                        """
-                        MERGE (a:Address {address: $address})
-                        SET a.taint_received = $taint,
-                            a.risk_level = $risk_level,
-                            a.labels = $labels
-                        WITH a
-                        MATCH (t:Trace {trace_id: $trace_id})
-                        MERGE (t)-[:INCLUDES]->(a)
-                        """,
-                        address=node["address"].lower(),
-                        taint=node.get("taint_received", 0.0),
-                        risk_level=node.get("risk_level", "LOW"),
-                        labels=node.get("labels", []),
-                        trace_id=trace_id
-                    )
-                
-                # Create transaction relationships
-                for edge in result.get("edges", []):
-                    await session.run(
-                        """
-                        MATCH (from:Address {address: $from_addr})
-                        MATCH (to:Address {address: $to_addr})
-                        MERGE (from)-[tx:TRANSACTION {tx_hash: $tx_hash}]->(to)
-                        SET tx.value = $value,
-                            tx.taint = $taint,
-                            tx.timestamp = datetime($timestamp)
-                        """,
-                        from_addr=edge["from"].lower(),
-                        to_addr=edge["to"].lower(),
-                        tx_hash=edge.get("tx_hash", "unknown"),
-                        value=edge.get("value", 0.0),
-                        taint=edge.get("taint", 0.0),
-                        timestamp=edge.get("timestamp", datetime.utcnow().isoformat())
-                    )
-                
-                logger.info(f"Saved trace {trace_id} to Neo4j")
-                
         except Exception as e:
-            logger.error(f"Error saving trace to Neo4j: {e}")
+            logger.error(f"Failed to send heartbeat: {e}")
     
-    def _consume_once(self) -> bool:
-        """Konsumiert eine Nachricht"""
-        if self.consumer is None:
-            return False
-        msg = self.consumer.poll(1.0)  # type: ignore[union-attr]
-        
-        if msg is None:
-            return False
+    def _persist_rows(self, result: dict) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Bereitet Knoten- und Kanten-Zeilen für die UNWIND-Queries vor"""
+        now = datetime.utcnow().isoformat()
+        nodes = [
+            {
+                "address": node["address"].lower(),
+                "taint": node.get("taint_received", 0.0),
+                "risk_level": node.get("risk_level", "LOW"),
+                "labels": node.get("labels", []),
+            }
+            for node in result.get("nodes", [])
+        ]
+        edges = [
+            {
+                "from_addr": edge["from"].lower(),
+                "to_addr": edge["to"].lower(),
+                "tx_hash": edge.get("tx_hash", "unknown"),
+                "value": edge.get("value", 0.0),
+                "taint": edge.get("taint", 0.0),
+                "timestamp": edge.get("timestamp") or now,
+            }
+            for edge in result.get("edges", [])
+        ]
+        return nodes, edges
+
+    async def _save_trace_to_neo4j(self, trace_id: str, result: dict) -> None:
+        """
+        Speichert Trace-Ergebnis in Neo4j
         
-        if msg.error():
-            if KafkaError is not None and msg.error().code() == KafkaError._PARTITION_EOF:  # type: ignore[union-attr]
-                return False
-            logger.error(f"Consumer error: {msg.error()}")
+        Ein MERGE für den Trace-Knoten, danach Adressen und Kanten in
+        UNWIND-Batches (persist_batch_size Zeilen pro Round Trip).
+        Fehler werden weitergereicht, damit der Offset nicht committed wird.
+        """
+        nodes, edges = self._persist_rows(result)
+        size = self.persist_batch_size
+        async with neo4j_client.get_session() as session:
+            # Create Trace node
+            await session.run(
+                _TRACE_NODE_QUERY,
+                trace_id=trace_id,
+                source=result.get("source_address"),
+                direction=result.get("direction"),
+                max_depth=result.get("max_depth"),
+                taint_model=result.get("taint_model"),
+                total_nodes=len(nodes),
+                total_edges=len(edges),
+                created_at=result.get("processed_at"),
+            )
+            # Address nodes (alle vor den Kanten, die sie per MATCH brauchen)
+            for i in range(0, len(nodes), size):
+                await session.run(_TRACE_ADDRESSES_QUERY, trace_id=trace_id, rows=nodes[i:i + size])
+            # Transaction relationships
+            for i in range(0, len(edges), size):
+                await session.run(_TRACE_EDGES_QUERY, rows=edges[i:i + size])
+
+        logger.info(f"Saved trace {trace_id} to Neo4j ({len(nodes)} nodes, {len(edges)} edges)")
+        if edges:
+            await self._invalidate_hot_paths({a for e in edges for a in (e["from_addr"], e["to_addr"])})
+
+    @staticmethod
+    async def _invalidate_hot_paths(addresses) -> None:
+        """Neue Kanten invalidieren materialisierte Graph-v2-Pfade (prozessübergreifend via Redis)"""
+        try:
+            from app.services.graph_engine_v2 import graph_engine_v2
+            await graph_engine_v2.publish_invalidation(list(addresses))
+        except Exception as e:  # pragma: no cover
+            logger.debug(f"Hot path invalidation skipped: {e}")
+
+    async def _handle_trace(self, message: dict) -> Optional[dict]:
+        """Trace ausführen und persistieren, mit Retry/Backoff (nicht blockierend)"""
+        attempt = 0
+        while attempt <= self.max_retries:
+            attempt += 1
             try:
-                KAFKA_CONSUMER_ERRORS.inc()
-            except Exception as e:
-                logger.error(f"Failed to increment consumer errors: {e}")
-            self._send_heartbeat_sync(status="error")
-            return False
-        
+                result = await self._process_trace_request(message)
+                if result:
+                    await self._save_trace_to_neo4j(result["trace_id"], result)
+                    return result
+            except Exception as pe:
+                logger.error(f"Trace processing failed (attempt {attempt}/{self.max_retries}): {pe}")
+            if attempt <= self.max_retries:
+                delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+                await asyncio.sleep(delay)
+        return None
+
+    def _publish_result(self, result: dict) -> None:
+        """Published das Ergebnis (best-effort, raw JSON)"""
         try:
-            # Parse message
-            value = msg.value().decode('utf-8')
-            message = json.loads(value)
-
-            # Process trace request with retry/backoff
-            import time as _t
-            _start_ts = _t.time()
-            loop = asyncio.get_event_loop()
-            attempt = 0
-            result = None
-            while attempt <= self.max_retries:
-                attempt += 1
-                try:
-                    result = loop.run_until_complete(self._process_trace_request(message))
-                    if result:
-                        break
-                except Exception as pe:
-                    logger.error(f"_process_trace_request exception (attempt {attempt}/{self.max_retries}): {pe}")
-                    result = None
-                if not result and attempt <= self.max_retries:
-                    import time as _t
-                    delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
-                    _t.sleep(delay)
+            if getattr(self.producer, "producer", None) is not None:
+                payload = json.dumps(result, default=str).encode("utf-8")
+                self.producer.producer.produce(  # type: ignore[union-attr]
+                    topic=self.results_topic,
+                    key=(result.get("trace_id") or "").encode("utf-8", "ignore"),
+                    value=payload,
+                    callback=self.producer._delivery_report,  # type: ignore[attr-defined]
+                )
+                self.producer.producer.poll(0)  # type: ignore[union-attr]
+        except Exception as pub_e:
+            logger.warning(f"Publish trace result failed: {pub_e}")
+
+    async def _commit(self, msg) -> None:
+        """Committed bis vor den kleinsten offenen Offset der Partition"""
+        commit_offset = self._offsets.complete((msg.topic(), msg.partition()), msg.offset())
+        if commit_offset is None:
+            return
+        try:
+            if TopicPartition is not None:
+                offsets = [TopicPartition(msg.topic(), msg.partition(), commit_offset)]
+            else:  # pragma: no cover
+                offsets = [(msg.topic(), msg.partition(), commit_offset)]
+            await asyncio.to_thread(self.consumer.commit, offsets=offsets, asynchronous=False)  # type: ignore[union-attr]
+            KAFKA_COMMITS_TOTAL.labels(topic=self.topic).inc()
+        except Exception as e:
+            logger.error(f"Offset commit failed: {e}")
 
+    async def _handle_message(self, msg) -> bool:
+        """Verarbeitet eine Nachricht vollständig; Offset erst danach freigeben"""
+        start_ts = time.time()
+        ok = False
+        try:
+            message = json.loads(msg.value().decode("utf-8"))
+            result = await self._handle_trace(message)
             if result:
-                # Publish result (best-effort, raw JSON)
-                try:
-                    if getattr(self.producer, "producer", None) is not None:
-                        payload = json.dumps(result).encode("utf-8")
-                        self.producer.producer.produce(  # type: ignore[union-attr]
-                            topic=self.results_topic,
-                            key=(result.get("trace_id") or "").encode("utf-8", "ignore"),
-                            value=payload,
-                            callback=self.producer._delivery_report,  # type: ignore[attr-defined]
-                        )
-                        self.producer.producer.poll(0)  # type: ignore[union-attr]
-                except Exception as pub_e:
-                    logger.warning(f"Publish trace result failed: {pub_e}")
-
-                # Commit offset
-                self.consumer.commit(message=msg, asynchronous=False)  # type: ignore[union-attr]
+                self._publish_result(result)
+                self.processed_count += 1
+                ok = True
                 try:
-                    KAFKA_COMMITS_TOTAL.labels(topic=self.topic).inc()
                     KAFKA_EVENTS_CONSUMED.labels(topic=self.topic).inc()
-                    KAFKA_PROCESSING_DURATION.labels(topic=self.topic).observe(max(0.0, _t.time() - _start_ts))
+                    KAFKA_PROCESSING_DURATION.labels(topic=self.topic).observe(max(0.0, time.time() - start_ts))
                 except Exception as e:
                     logger.error(f"Failed to observe processing duration: {e}")
-                # Erfolgreich verarbeitet
-                self.processed_count += 1
-                return True
             else:
-                # Final failure: route to DLQ and commit
-                try:
-                    self._send_to_dlq(msg, reason=f"processing_failed_after_{self.max_retries}_retries")
-                except Exception as dlq_e:
-                    logger.error(f"DLQ routing failed: {dlq_e}")
-                try:
-                    self.consumer.commit(message=msg, asynchronous=False)  # type: ignore[union-attr]
-                    KAFKA_COMMITS_TOTAL.labels(topic=self.topic).inc()
-                except Exception as e:
-                    logger.error(f"Failed to increment commits total: {e}")
+                # Final failure: route to DLQ (Offset wird danach freigegeben)
+                await asyncio.to_thread(
+                    self._send_to_dlq, msg, f"processing_failed_after_{self.max_retries}_retries"
+                )
                 self.error_count += 1
-                return False
-            
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in message: {e}")
             # Commit um stuck messages zu vermeiden
-            self.consumer.commit(message=msg, asynchronous=False)  # type: ignore[union-attr]
-            return False
+            logger.error(f"Invalid JSON in message: {e}")
         except Exception as e:
             logger.error(f"Error processing message: {e}", exc_info=True)
             try:
                 KAFKA_CONSUMER_ERRORS.inc()
-            except Exception as e:
-                logger.error(f"Failed to increment consumer errors: {e}")
-            # Route to DLQ und commit
-            try:
-                self._send_to_dlq(msg, reason=str(e))
-            except Exception as e:
-                logger.error(f"Failed to send to DLQ: {e}")
-            self.consumer.commit(message=msg, asynchronous=False)
+            except Exception as me:
+                logger.error(f"Failed to increment consumer errors: {me}")
+            await asyncio.to_thread(self._send_to_dlq, msg, str(e))
             self.error_count += 1
+        await self._commit(msg)
+        return ok
+
+    async def _poll(self, max_messages: int) -> list:
+        """Holt bis zu max_messages Nachrichten, ohne den Event Loop zu blockieren"""
+        consume = getattr(self.consumer, "consume", None)
+        if consume is not None:
+            msgs = await asyncio.to_thread(consume, max_messages, 1.0)
+        else:
+            msg = await asyncio.to_thread(self.consumer.poll, 1.0)  # type: ignore[union-attr]
+            msgs = [msg] if msg is not None else []
+        valid = []
+        for msg in msgs or []:
+            if msg is None:
+                continue
+            if msg.error():
+                if KafkaError is not None and msg.error().code() == KafkaError._PARTITION_EOF:  # type: ignore[union-attr]
+                    continue
+                logger.error(f"Consumer error: {msg.error()}")
+                try:
+                    KAFKA_CONSUMER_ERRORS.inc()
+                except Exception as e:
+                    logger.error(f"Failed to increment consumer errors: {e}")
+                await self._send_heartbeat(status="error")
+                continue
+            valid.append(msg)
+        return valid
+
+    async def _consume_batch(self, slots: asyncio.Semaphore) -> int:
+        """Startet Tasks für so viele Nachrichten, wie Slots frei sind"""
+        await slots.acquire()
+        free = 1
+        while free < self.concurrency and not slots.locked():
+            await slots.acquire()
+            free += 1
+        try:
+            msgs = await self._poll(free)
+        except Exception:
+            for _ in range(free):
+                slots.release()
+            raise
+        for _ in range(free - len(msgs)):
+            slots.release()
+        for msg in msgs:
+            self._offsets.add((msg.topic(), msg.partition()), msg.offset())
+            task = asyncio.create_task(self._handle_message(msg))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _t: slots.release())
+        return len(msgs)
+
+    def _consume_once(self) -> bool:
+        """Konsumiert genau eine Nachricht (synchroner Einstieg für Tools/Tests)"""
+        if self.consumer is None:
             return False
 
+        async def _once() -> bool:
+            msgs = await self._poll(1)
+            if not msgs:
+                return False
+            msg = msgs[0]
+            self._offsets.add((msg.topic(), msg.partition()), msg.offset())
+            return await self._handle_message(msg)
+
+        return asyncio.run(_once())
+
+    async def run_async(self):
+        """Async Consumer Loop mit begrenzter Nebenläufigkeit"""
+        if self.consumer is None:
+            logger.info("Trace consumer disabled (TEST_MODE or Kafka not available)")
+            return
+        self.consumer.subscribe([self.topic])  # type: ignore[union-attr]
+        self.running = True
+        slots = asyncio.Semaphore(self.concurrency)
+        logger.info(
+            f"Trace consumer started: topic={self.topic} group={self.group_id} concurrency={self.concurrency}"
+        )
+        try:
+            while self.running:
+                await self._consume_batch(slots)
+                # Heartbeat alle 5 Sekunden
+                now = time.time()
+                if now - self._last_hb_ts > 5.0:
+                    await self._send_heartbeat(status="running")
+                    self._last_hb_ts = now
+        finally:
+            # Laufende Traces abschließen, damit ihre Offsets committed werden
+            if self._tasks:
+                await asyncio.gather(*list(self._tasks), return_exceptions=True)
+            if self.consumer is not None:
+                await asyncio.to_thread(self.consumer.close)  # type: ignore[union-attr]
+            await asyncio.to_thread(self.producer.flush)
+            # Finaler Heartbeat
+            await self._send_heartbeat(status="stopped")
+
     def _send_to_dlq(self, msg, reason: str) -> None:
         """Sendet die Original-Nachricht in das DLQ-Topic mit Reason-Header."""
         try:
@@ -363,30 +504,10 @@ class TraceConsumerWorker:
     
     def run(self):
         """Startet Consumer Loop"""
-        if self.consumer is None:
-            logger.info("Trace consumer disabled (TEST_MODE or Kafka not available)")
-            return
-        self.consumer.subscribe([self.topic])  # type: ignore[union-attr]
-        self.running = True
-        logger.info(f"Trace consumer started: topic={self.topic} group={self.group_id}")
-        
         try:
-            while self.running:
-                self._consume_once()
-                # Heartbeat alle 5 Sekunden
-                import time as _t
-                now = _t.time()
-                if now - self._last_hb_ts > 5.0:
-                    self._send_heartbeat_sync(status="running")
-                    self._last_hb_ts = now
+            asyncio.run(self.run_async())
         except KeyboardInterrupt:
             logger.info("Stopping trace consumer...")
-        finally:
-            if self.consumer is not None:
-                self.consumer.close()  # type: ignore[union-attr]
-        self.producer.flush()
-        # Finaler Heartbeat
-        self._send_heartbeat_sync(status="stopped")
     
     def stop(self):
         """Stoppt Consumer"""
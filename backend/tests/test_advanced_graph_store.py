@@ -0,0 +1,214 @@
+"""
+Advanced Graph Analytics: geteilter Graph-Store
+===============================================
+
+- Ein Query pro Anfrage mit Chain-Filter statt eines (ungefilterten) Queries pro Chain
+- Überlappende Anfragen laden nur fehlende Adressen nach
+- Store ist größenbegrenzt, verdrängte Adressen werden neu geladen
+- Louvain und Zentralität laufen außerhalb des Event-Loops
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import networkx as nx
+import pytest
+
+from app.analytics import advanced_graph_analytics as analytics_module
+from app.analytics.advanced_graph_analytics import AdvancedGraphAnalytics, AnalyticsGraphStore
+
+
+def _addr(cluster, i):
+    return f"0x{cluster:020x}{i:020x}"
+
+
+def _edges(clusters=5, size=20, seed=7):
+    """Cluster-Graph auf ethereum, einige Kanten zusätzlich auf polygon"""
+    rng = random.Random(seed)
+    edges = []
+    for c in range(clusters):
+        for n in range(size * 3):
+            a, b = rng.sample(range(size), 2)
+            edges.append({"a": _addr(c, a), "b": _addr(c, b), "tx": f"0x{c}-{n}", "value": 1.0, "chain": "ethereum"})
+        edges.append({"a": _addr(c, 0), "b": _addr((c + 1) % clusters, 0), "tx": f"0xlink{c}", "value": 1.0,
+                      "chain": "polygon"})
+    return edges
+
+
+class _FakeNeo4j:
+    """Beantwortet den Kanten-Query aus einer Liste, zählt Queries und geladene Adressen"""
+
+    def __init__(self, edges, delay=0.0):
+        self.edges = edges
+        self.delay = delay
+        self.queries = []
+
+    async def execute_read(self, query, params):
+        self.queries.append(params)
+        await asyncio.sleep(self.delay)
+        wanted = set(params["addresses"])
+        chains = params.get("chains")
+        rows = []
+        for e in self.edges:
+            if chains is not None and e["chain"] not in chains:
+                continue
+            # ungerichtetes Pattern: jede Kante einmal pro verankertem Endpunkt
+            for anchor, other in ((e["a"], e["b"]), (e["b"], e["a"])):
+                if anchor in wanted:
+                    rows.append({"from_addr": anchor, "to_addr": other, "tx_hash": e["tx"],
+                                 "value": e["value"], "timestamp": None, "chain": e["chain"]})
+        return rows
+
+
+@pytest.fixture
+def neo4j(monkeypatch):
+    fake = _FakeNeo4j(_edges())
+    monkeypatch.setattr(analytics_module, "neo4j_client", fake)
+    monkeypatch.setattr(analytics_module, "NEO4J_AVAILABLE", True)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_single_filtered_query_without_duplicate_edges(neo4j):
+    analytics = AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore(), workers=0)
+    cluster0 = [_addr(0, i) for i in range(20)]
+
+    graph = await analytics._build_transaction_graph(cluster0, ["ethereum", "polygon"])
+    assert len(neo4j.queries) == 1 and neo4j.queries[0]["chains"] == ["ethereum", "polygon"]
+
+    expected = nx.Graph()
+    for e in neo4j.edges:
+        if e["a"] in cluster0 or e["b"] in cluster0:
+            if expected.has_edge(e["a"], e["b"]):
+                expected[e["a"]][e["b"]]["weight"] += e["value"]
+            else:
+                expected.add_edge(e["a"], e["b"], weight=e["value"])
+    assert {frozenset(e) for e in graph.edges} == {frozenset(e) for e in expected.edges}
+    assert all(graph[u][v]["weight"] == expected[u][v]["weight"] for u, v in graph.edges)
+
+    # Chain-Filter: nur ethereum -> keine Cluster-übergreifenden polygon-Kanten
+    eth_only = await analytics._build_transaction_graph(cluster0, ["Ethereum"])
+    assert len(neo4j.queries) == 1
+    assert all(graph.nodes[n]["chain"] == "ethereum" for n in eth_only.nodes)
+    assert _addr(1, 0) in graph and _addr(1, 0) not in eth_only
+
+
+@pytest.mark.asyncio
+async def test_overlapping_requests_fetch_only_missing_addresses(neo4j):
+    analytics = AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore(), workers=0)
+    first = [_addr(c, i) for c in (0, 1) for i in range(20)]
+    second = [_addr(c, i) for c in (1, 2) for i in range(20)]
+
+    louvain_first = await analytics.detect_communities_louvain(first)
+    louvain_second = await analytics.detect_communities_louvain(second)
+    repeat = await analytics.calculate_centrality_measures(second, measures=["degree", "closeness"])
+
+    assert [len(q["addresses"]) for q in neo4j.queries] == [40, 20]
+    assert analytics.graph_store.stats()["fetches"] == 2
+    assert louvain_first["total_nodes"] >= 40 and louvain_second["modularity"] > 0.3
+    assert set(repeat["top_addresses"]) == {"degree", "closeness"}
+
+    # identisch zu einem frisch aufgebauten Store
+    fresh = AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore(), workers=0)
+    assert (await fresh.detect_communities_louvain(second))["communities"] == louvain_second["communities"]
+
+
+@pytest.mark.asyncio
+async def test_store_is_bounded_and_refetches_evicted_addresses(neo4j):
+    store = AnalyticsGraphStore(max_edges=100)
+    analytics = AdvancedGraphAnalytics(graph_store=store, workers=0)
+
+    for c in range(5):
+        await analytics._build_transaction_graph([_addr(c, i) for i in range(20)], ["ethereum"])
+    assert store.stats()["edges"] <= 100 and store.stats()["evictions"] > 0
+    assert store.missing([_addr(0, i) for i in range(20)], ["ethereum"])
+
+    queries = len(neo4j.queries)
+    graph = await analytics._build_transaction_graph([_addr(0, i) for i in range(20)], ["ethereum"])
+    assert len(neo4j.queries) == queries + 1 and len(graph.nodes) == 20
+
+
+@pytest.mark.asyncio
+async def test_graph_algorithms_run_off_the_event_loop(neo4j, monkeypatch):
+    analytics = AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore(), workers=0)
+    threads = []
+    louvain, centrality = analytics_module._louvain, analytics_module._centrality
+
+    def record(fn):
+        def wrapper(*args):
+            threads.append(threading.get_ident())
+            return fn(*args)
+        return wrapper
+
+    monkeypatch.setattr(analytics_module, "_louvain", record(louvain))
+    monkeypatch.setattr(analytics_module, "_centrality", record(centrality))
+    addresses = [_addr(0, i) for i in range(20)]
+    await analytics.detect_communities_louvain(addresses)
+    await analytics.calculate_centrality_measures(addresses)
+
+    assert len(threads) == 2 and threading.get_ident() not in threads
+
+    monkeypatch.undo()  # Wrapper lassen sich nicht an den Process-Pool übergeben
+    monkeypatch.setattr(analytics_module, "NEO4J_AVAILABLE", True)
+    pooled = AdvancedGraphAnalytics(graph_store=analytics.graph_store, workers=1)
+    try:
+        result = await pooled.detect_communities_louvain(addresses)
+    finally:
+        pooled.shutdown()
+    assert sum(c["size"] for c in result["communities"]) == result["total_nodes"] == 22  # + 2 polygon-Nachbarn
+
+
+def test_worker_count_from_env_honours_explicit_zero(monkeypatch):
+    monkeypatch.setenv("GRAPH_ANALYTICS_WORKERS", "0")
+    assert AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore()).workers == 0
+    monkeypatch.setenv("GRAPH_ANALYTICS_WORKERS", "3")
+    assert AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore()).workers == 3
+    monkeypatch.delenv("GRAPH_ANALYTICS_WORKERS")
+    assert AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore()).workers >= 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_repeat_analytics_on_overlapping_investigations(monkeypatch):
+    """Benchmark: 10 überlappende Untersuchungen (je 3 von 12 Clustern, 20 ms pro Query)"""
+    fake = _FakeNeo4j(_edges(clusters=12, size=80), delay=0.02)
+    monkeypatch.setattr(analytics_module, "neo4j_client", fake)
+    monkeypatch.setattr(analytics_module, "NEO4J_AVAILABLE", True)
+    rng = random.Random(1)
+    investigations = [[_addr(c, i) for c in rng.sample(range(12), 3) for i in range(80)] for _ in range(10)]
+    chains = ["ethereum", "polygon", "bsc"]
+
+    async def old_fetch(addresses):
+        # altes Verhalten: derselbe ungefilterte Query einmal pro Chain
+        rows = []
+        for _chain in chains:
+            rows.extend(await fake.execute_read("", {"addresses": addresses, "chains": None}))
+        return rows
+
+    t0 = time.perf_counter()
+    for addresses in investigations:
+        await old_fetch(addresses)
+    old_time, old_rows = time.perf_counter() - t0, len(fake.queries)
+
+    fake.queries.clear()
+    analytics = AdvancedGraphAnalytics(graph_store=AnalyticsGraphStore(), workers=0)
+    t0 = time.perf_counter()
+    for addresses in investigations:
+        await analytics._build_transaction_graph(addresses, chains)
+    new_time, new_queries = time.perf_counter() - t0, len(fake.queries)
+    t0 = time.perf_counter()
+    for addresses in investigations:
+        await analytics._build_transaction_graph(addresses, chains)
+    warm_time = time.perf_counter() - t0
+
+    print("\n📊 Graph analytics, 10 overlapping investigations (240 addresses each):")
+    print(f"   per-chain queries: {old_time * 1000:7.1f} ms, {old_rows} queries")
+    print(f"   shared store:      {new_time * 1000:7.1f} ms, {len(fake.queries)} queries "
+          f"({analytics.graph_store.stats()['addresses_fetched']} addresses fetched)")
+    print(f"   repeat (warm):     {warm_time * 1000:7.1f} ms")
+
+    # Query-Zahlen statt Laufzeitverhältnisse: die Latenz steckt in den Queries
+    assert old_rows == 30 and new_queries <= 10 and len(fake.queries) == new_queries
+    assert analytics.graph_store.stats()["addresses_fetched"] <= 12 * 80
@@ -0,0 +1,156 @@
+"""
+Concurrent, ordered process_event_batch
+=======================================
+
+- I/O in der Regel-Auswertung serialisiert den Batch nicht mehr
+- Events derselben Entity laufen in Eingangsreihenfolge
+- Label-/Risk-Lookups werden pro Adresse und Batch nur einmal ausgeführt
+- Ergebnisse pro Event und Batch-Metriken
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("TEST_MODE", "1")
+
+from app.services.alert_engine import Alert, AlertEngine, AlertRule, AlertSeverity, AlertType
+
+
+class _SlowRule(AlertRule):
+    """Simuliert I/O in der Regel und protokolliert die Auswertungsreihenfolge."""
+
+    def __init__(self, delay=0.05):
+        super().__init__("slow_io", "Slow IO")
+        self.delay = delay
+        self.seen = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def evaluate(self, event):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        self.seen.append((event.get("address"), event["seq"]))
+        if not event.get("alert"):
+            return None
+        return Alert(
+            alert_type=AlertType.LARGE_TRANSFER,
+            severity=AlertSeverity.MEDIUM,
+            title=f"io {event['seq']}",
+            description="",
+            address=event.get("address"),
+            tx_hash=f"0x{event['seq']:064x}",
+        )
+
+
+def _engine(rule):
+    engine = AlertEngine()
+    engine.rules = [rule]
+    engine.policy_rules = {}
+    engine.enable_dedup = False
+    engine._testing_mode = False
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_concurrently_but_ordered_per_entity(monkeypatch):
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+    rule = _SlowRule(delay=0.05)
+    engine = _engine(rule)
+    events = [{"address": f"0x{i % 10:040x}", "seq": i, "test_mode": True} for i in range(40)]
+
+    start = time.perf_counter()
+    result = await engine.process_event_batch_detailed(events, concurrency=8)
+    elapsed = time.perf_counter() - start
+
+    # sequentiell wären es 40 × 50 ms = 2 s; 10 Entities à 4 Events → ~4 Runden
+    assert elapsed < 0.8
+    assert rule.max_in_flight <= 8
+    for addr in {e["address"] for e in events}:
+        seqs = [seq for a, seq in rule.seen if a == addr]
+        assert seqs == sorted(seqs)
+    assert result["metrics"]["entity_groups"] == 10
+    assert result["metrics"]["events"] == 40
+    assert result["metrics"]["events_per_second"] > 40
+
+
+@pytest.mark.asyncio
+async def test_transitively_linked_events_share_a_group():
+    engine = _engine(_SlowRule(delay=0))
+    events = [
+        {"from": "0xA", "to": "0xB"},
+        {"address": "0xb"},
+        {"to_address": "0xC", "from_address": "0xa"},
+        {"address": "0xd"},
+        {},
+    ]
+    groups = engine._group_events_by_entity(events)
+    assert groups == [[0, 1, 2], [3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_per_event_results_and_entity_limit_in_input_order():
+    engine = _engine(_SlowRule(delay=0))
+    engine.max_rules_per_entity = 2
+    events = [{"address": "0xaaa", "seq": i, "alert": True, "test_mode": True} for i in range(4)]
+    events.append({"address": "0xbbb", "seq": 4, "alert": False, "test_mode": True})
+
+    result = await engine.process_event_batch_detailed(events, concurrency=4)
+
+    assert [a.title for a in result["alerts"]] == ["io 0", "io 1"]
+    assert [len(r["alert_ids"]) for r in result["results"]] == [1, 1, 0, 0, 0]
+    assert result["results"][4]["entity"] == "0xbbb"
+    assert engine.last_batch_metrics["alerts"] == 2
+    assert len(await engine.process_event_batch(events)) == 2
+
+
+@pytest.mark.asyncio
+async def test_label_and_risk_lookups_are_coalesced(monkeypatch):
+    from app.enrichment.labels_service import labels_service
+    from app.services import risk_service as risk_module
+
+    label_calls, risk_calls = [], []
+
+    async def bulk_get_labels(addresses):
+        label_calls.append(sorted(addresses))
+        return {a: ["exchange"] for a in addresses}
+
+    class _Score:
+        score = 80
+
+    async def score_address(chain, address):
+        risk_calls.append((chain, address))
+        await asyncio.sleep(0.01)
+        return _Score()
+
+    monkeypatch.setattr(labels_service, "bulk_get_labels", bulk_get_labels)
+    monkeypatch.setattr(risk_module.service, "score_address", score_address)
+
+    rule = _SlowRule(delay=0)
+    engine = _engine(rule)
+    seen_events = []
+    orig = rule.evaluate
+
+    async def evaluate(event):
+        seen_events.append(event)
+        return await orig(event)
+
+    rule.evaluate = evaluate
+    events = [{"address": f"0x{i % 3}", "seq": i, "test_mode": True} for i in range(12)]
+    events.append({"address": "0x0", "seq": 12, "labels": ["given"], "risk_score": 0.1, "test_mode": True})
+
+    result = await engine.process_event_batch_detailed(events, enrich=True)
+
+    assert label_calls == [["0x0", "0x1", "0x2"]]
+    assert sorted(risk_calls) == [("ethereum", "0x0"), ("ethereum", "0x1"), ("ethereum", "0x2")]
+    assert result["metrics"]["lookups"] == 6
+    assert result["metrics"]["lookups_coalesced"] == 18
+    enriched = {e["seq"]: e for e in seen_events}
+    assert enriched[0]["labels"] == ["exchange"] and enriched[0]["risk_score"] == 0.8
+    assert enriched[12]["labels"] == ["given"] and enriched[12]["risk_score"] == 0.1
+    # Eingabe-Events bleiben unverändert
+    assert "labels" not in events[0]
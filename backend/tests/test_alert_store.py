@@ -0,0 +1,116 @@
+"""
+Indexed Alert Store
+===================
+
+- Recent-N neueste zuerst, Filter über Severity/Typ/Entity-Index
+- Lookup/Ack über Hash-Map, Retention evictet die ältesten
+- Out-of-order-Timestamps werden einsortiert
+- Benchmark: Dashboard-Polling bleibt bei 100k+ Alerts flach
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.alert_engine import Alert, AlertEngine, AlertSeverity, AlertType
+from app.services.alert_store import AlertStore
+
+_BASE = datetime(2024, 1, 1)
+_SEVERITIES = [AlertSeverity.LOW, AlertSeverity.MEDIUM, AlertSeverity.HIGH, AlertSeverity.CRITICAL]
+
+
+def _alert(i, severity=None, alert_type=AlertType.HIGH_RISK_ADDRESS, address=None, ts=None):
+    alert = Alert(
+        alert_type=alert_type,
+        severity=severity or _SEVERITIES[i % 4],
+        title=f"a{i}",
+        description="",
+        address=address or f"0x{i % 50:040x}",
+    )
+    alert.timestamp = ts or _BASE + timedelta(seconds=i)
+    return alert
+
+
+def test_recent_and_index_filters():
+    store = AlertStore()
+    alerts = [_alert(i) for i in range(100)]
+    for a in alerts:
+        store.append(a)
+
+    assert [a.title for a in store.recent(3)] == ["a99", "a98", "a97"]
+    critical = store.recent(5, severity=AlertSeverity.CRITICAL)
+    assert [a.title for a in critical] == ["a99", "a95", "a91", "a87", "a83"]
+    by_entity = store.recent(10, entity=f"0x{7:040X}")
+    assert [a.title for a in by_entity] == ["a57", "a7"]
+    assert store.recent(1, alert_type="high_risk_address")[0].title == "a99"
+    assert store.count_by_severity() == {"low": 25, "medium": 25, "high": 25, "critical": 25}
+
+
+def test_ack_lookup_and_retention_eviction():
+    store = AlertStore(max_records=10)
+    alerts = [_alert(i) for i in range(25)]
+    for a in alerts:
+        store.append(a)
+
+    assert len(store) == 10
+    assert store.get(alerts[0].alert_id) is None
+    assert store.get(alerts[24].alert_id) is alerts[24]
+    assert store.acknowledge(alerts[20].alert_id)
+    assert not store.acknowledge(alerts[0].alert_id)
+    assert store.unacknowledged == 9
+    assert sum(store.count_by_severity().values()) == 10
+    assert store.stats()["entities"] == 10
+
+
+def test_out_of_order_timestamps_are_sorted_in():
+    store = AlertStore()
+    for i in (0, 1, 3, 4):
+        store.append(_alert(i))
+    late = _alert(2, severity=AlertSeverity.HIGH)
+    store.append(late)
+
+    assert [a.title for a in store] == ["a0", "a1", "a2", "a3", "a4"]
+    assert [a.title for a in store.since(_BASE + timedelta(seconds=1))] == ["a2", "a3", "a4"]
+    store.evict_to(2)
+    assert [a.title for a in store] == ["a3", "a4"]
+    assert store.recent(5, severity=AlertSeverity.HIGH) == []
+
+
+def test_engine_uses_store_for_recent_ack_and_retention():
+    engine = AlertEngine()
+    engine._max_alert_records = 50
+    alerts = [_alert(i) for i in range(80)]
+    for a in alerts:
+        engine._store_alert(a)
+    engine._prune_retention()
+
+    assert len(engine.alerts) == 50
+    assert engine.get_recent_alerts(limit=2)[0] is alerts[-1]
+    assert engine.acknowledge_alert(alerts[-1].alert_id)
+    stats = engine.get_alert_stats()
+    assert stats["total_alerts"] == 50 and stats["unacknowledged"] == 49
+
+
+@pytest.mark.benchmark
+def test_dashboard_polling_stays_flat_with_large_history():
+    """Benchmark: recent-50 + severity filter + ack bei 10k vs 200k Alerts"""
+    polls = 2000
+    costs = {}
+    for size in (10_000, 200_000):
+        store = AlertStore(max_records=size)
+        alerts = [_alert(i) for i in range(size)]
+        for a in alerts:
+            store.append(a)
+        start = time.perf_counter()
+        for i in range(polls):
+            store.recent(50)
+            store.recent(50, severity=AlertSeverity.CRITICAL)
+            store.acknowledge(alerts[-1 - i].alert_id)
+        costs[size] = (time.perf_counter() - start) / polls * 1e6
+
+    print("\n📊 Alert store dashboard poll cost:")
+    for size, us in costs.items():
+        print(f"   {size:>9,} alerts: {us:.1f} µs/poll")
+
+    assert costs[200_000] < costs[10_000] * 3
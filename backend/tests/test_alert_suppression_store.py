@@ -0,0 +1,182 @@
+"""
+Alert Suppression Store
+=======================
+
+- Dedup-Fenster mit/ohne Refresh, harte LRU-Grenzen
+- Zeit-gebucketete Zähler (Sliding Window über Fenstergrenzen)
+- Redis-Store teilt Zustand zwischen zwei "Workern", auch clear_dedup/reset
+- Benchmark: konstante Kosten pro Event bei Millionen Fingerprints
+"""
+
+import asyncio
+import fnmatch
+import time
+
+import pytest
+
+from app.services.alert_suppression_store import (
+    InMemorySuppressionStore,
+    RedisSuppressionStore,
+    SuppressionStore,
+)
+
+
+def test_dedup_window_and_refresh():
+    store = InMemorySuppressionStore()
+    assert store.dedup_hit_sync("fp", 10, now=100.0) is False
+    assert store.dedup_hit_sync("fp", 10, refresh=False, now=105.0) is True
+    # ohne Refresh läuft das ursprüngliche Fenster ab
+    assert store.dedup_hit_sync("fp", 10, refresh=False, now=111.0) is False
+    assert store.dedup_hit_sync("fp", 10, now=120.0) is True
+    assert store.dedup_hit_sync("fp", 10, now=129.0) is True
+    assert store.dedup_hit_sync("fp", 10, now=140.0) is False
+
+
+def test_hard_size_caps_evict_oldest():
+    store = InMemorySuppressionStore(max_fingerprints=100, max_keys=50)
+    for i in range(1000):
+        store.dedup_hit_sync(f"fp{i}", 300, now=1.0)
+        store.incr_sync([f"k{i}"], now=1.0)
+        store.touch_sync(f"t{i}", now=1.0)
+    stats = store.stats()
+    assert stats["fingerprints"] == 100
+    assert stats["counter_keys"] == 50
+    assert stats["silence_keys"] == 50
+    # jüngste Einträge bleiben erhalten
+    assert store.dedup_hit_sync("fp999", 300, now=2.0) is True
+    assert store.dedup_hit_sync("fp0", 300, now=2.0) is False
+
+
+def test_sliding_window_counts_across_buckets():
+    store = InMemorySuppressionStore()
+    for _ in range(6):
+        store.incr_sync(["rule:x"], windows=(60,), now=60 * 10 + 30)
+    assert store.counts_sync("rule:x", (60,), now=60 * 10 + 59) == [6]
+    # Halb ins nächste Fenster: vorheriges zählt zur Hälfte
+    assert store.counts_sync("rule:x", (60,), now=60 * 11 + 30) == [3]
+    store.incr_sync(["rule:x"], windows=(60,), now=60 * 11 + 30)
+    assert store.counts_sync("rule:x", (60,), now=60 * 11 + 30) == [4]
+    # Zwei Fenster später ist alles verfallen
+    assert store.counts_sync("rule:x", (60,), now=60 * 13) == [0]
+
+
+class _FakeRedis:
+    """Minimaler async Redis-Ersatz (SET NX/EX, EXPIRE, GET, MGET, INCR-Pipeline, SCAN/DEL)."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def expire(self, key, ttl):
+        return key in self.data
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def scan_iter(self, match="*", count=None):
+        for key in [k for k in self.data if fnmatch.fnmatchcase(k, match)]:
+            yield key
+
+    async def delete(self, *keys):
+        return sum(1 for k in keys if self.data.pop(k, None) is not None)
+
+    def pipeline(self, transaction=False):
+        redis = self
+
+        class _Pipe:
+            def __init__(self):
+                self.ops = []
+
+            def incr(self, key):
+                self.ops.append(key)
+
+            def expire(self, key, ttl):
+                pass
+
+            async def execute(self):
+                for key in self.ops:
+                    redis.data[key] = str(int(redis.data.get(key, 0)) + 1)
+
+        return _Pipe()
+
+
+@pytest.mark.asyncio
+async def test_redis_store_shares_state_between_workers():
+    redis = _FakeRedis()
+    worker_a = RedisSuppressionStore(redis_client=redis)
+    worker_b = RedisSuppressionStore(redis_client=redis)
+
+    assert await worker_a.dedup_hit("fp", 300) is False
+    assert await worker_b.dedup_hit("fp", 300) is True
+
+    await worker_a.incr(["alerts"])
+    await worker_b.incr(["alerts"])
+    per_minute, per_hour = await worker_a.counts("alerts")
+    assert per_minute >= 2 and per_hour >= 2
+
+    await worker_b.touch("rule:large_transfer")
+    assert await worker_a.last_seen("rule:large_transfer") is not None
+
+    # clear_dedup() löscht nur die Dedup-Schlüssel, für alle Worker
+    await worker_b.dedup_hit("fp2", 300)
+    worker_a.clear_dedup()
+    assert await worker_a.dedup_hit("fp", 300) is False
+    assert await worker_b.dedup_hit("fp2", 300) is False
+    assert (await worker_b.counts("alerts"))[1] >= 2
+
+    # reset() verwirft den gesamten geteilten Zustand, auch ohne laufenden Loop vorgemerkt
+    await asyncio.to_thread(worker_a.reset)
+    assert await worker_a.dedup_hit("fp", 300) is False
+    assert await worker_b.last_seen("rule:large_transfer") is None
+    assert await worker_b.counts("alerts") == [0.0, 0.0]
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SuppressionStore()
+
+
+@pytest.mark.asyncio
+async def test_redis_store_falls_back_without_client():
+    class _Disconnected:
+        client = None
+
+        async def _ensure_connected(self):
+            return None
+
+    store = RedisSuppressionStore(redis_client=_Disconnected())
+    assert await store.dedup_hit("fp", 300) is False
+    assert await store.dedup_hit("fp", 300) is True
+    assert store.stats()["fallback"]["fingerprints"] == 1
+
+
+@pytest.mark.benchmark
+def test_per_event_cost_is_flat_with_millions_of_fingerprints():
+    """Benchmark: Dedup + Rate-Limit-Check + Zählen pro Event bei 10k vs 1M Fingerprints"""
+    events = 50_000
+    costs = {}
+    for prefill in (10_000, 1_000_000):
+        store = InMemorySuppressionStore(max_fingerprints=2_000_000)
+        now = 1_000.0
+        for i in range(prefill):
+            store.dedup_hit_sync(f"fp-{i}", 300, now=now)
+        start = time.perf_counter()
+        for i in range(events):
+            store.dedup_hit_sync(f"new-{i}", 300, now=now)
+            store.counts_sync("alerts", now=now)
+            store.incr_sync(("alerts", f"entity:{i % 5000}"), now=now)
+        costs[prefill] = (time.perf_counter() - start) / events * 1e6
+
+    print("\n📊 Suppression store per-event cost:")
+    for prefill, us in costs.items():
+        print(f"   {prefill:>9,} fingerprints: {us:.2f} µs/event")
+
+    assert costs[1_000_000] < costs[10_000] * 3
@@ -0,0 +1,237 @@
+"""
+Alert Webhook Delivery
+======================
+
+- dispatch_alert wartet nicht auf langsame Webhook-Empfänger
+- Keep-Alive-Pool und Concurrency-Limit pro Ziel
+- Batching für Empfänger, die Listen annehmen
+- Fehlschläge gehen in den persistenten Spool und werden nach Backoff zugestellt
+- Ziele mit eigenen Einstellungen per JSON; Spool über Prozesse hinweg gelockt
+- stop() verliert weder Überlauf-Spools noch angefangene Batches
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("TEST_MODE", "1")
+
+import app.services.alert_engine as alert_engine_module
+from app.services.alert_engine import Alert, AlertEngine, AlertSeverity, AlertType
+from app.services.alert_webhook_delivery import WebhookDeliveryService, parse_destinations
+
+
+class _SlowStub:
+    """Minimaler HTTP/1.1-Server (Keep-Alive) mit fester Antwortverzögerung."""
+
+    def __init__(self, delay=0.0, status=200):
+        self.delay = delay
+        self.status = status
+        self.bodies = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/hook"
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                body = await reader.readexactly(length)
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(self.delay)
+                self.in_flight -= 1
+                self.bodies.append(json.loads(body))
+                writer.write(
+                    f"HTTP/1.1 {self.status} X\r\nContent-Length: 0\r\nConnection: keep-alive\r\n\r\n".encode()
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+
+def _alert(i):
+    return Alert(
+        alert_type=AlertType.HIGH_RISK_ADDRESS,
+        severity=AlertSeverity.HIGH,
+        title=f"Alert {i}",
+        description="webhook test",
+        address=f"0x{i:040x}",
+    )
+
+
+@pytest.mark.asyncio
+async def test_dispatch_latency_independent_of_webhook_rtt(tmp_path, monkeypatch):
+    delivery = WebhookDeliveryService(spool_path=str(tmp_path / "spool.jsonl"), concurrency=4)
+    monkeypatch.setattr(alert_engine_module, "webhook_delivery", delivery)
+    engine = AlertEngine()
+
+    async with _SlowStub(delay=0.3) as stub:
+        monkeypatch.setattr(alert_engine_module.settings, "ALERT_WEBHOOK_URLS", stub.url)
+        start = time.perf_counter()
+        for i in range(20):
+            await engine.dispatch_alert(_alert(i))
+        elapsed = time.perf_counter() - start
+
+        # 20 Alerts × 300 ms RTT wären inline ≥ 6 s
+        assert elapsed < 0.3
+        await _wait_for(lambda: len(stub.bodies) == 20)
+        assert stub.max_in_flight <= 4
+        assert stub.connections <= 4
+        await delivery.stop()
+
+    assert delivery.stats["delivered"] == 20
+    assert not os.path.exists(delivery.spool_path)
+
+
+@pytest.mark.asyncio
+async def test_batched_destination_receives_lists(tmp_path):
+    delivery = WebhookDeliveryService(spool_path=str(tmp_path / "spool.jsonl"), batch_linger=0.1)
+    async with _SlowStub() as stub:
+        dest = {"url": stub.url, "batch_size": 10, "concurrency": 1}
+        for i in range(25):
+            assert delivery.enqueue([dest], {"i": i}) == 1
+        await _wait_for(lambda: sum(len(b) for b in stub.bodies) == 25)
+        await delivery.stop()
+
+    assert all(isinstance(b, list) for b in stub.bodies)
+    assert [len(b) for b in stub.bodies] == [10, 10, 5]
+    assert [p["i"] for b in stub.bodies for p in b] == list(range(25))
+
+
+@pytest.mark.asyncio
+async def test_failures_are_spooled_and_retried_with_backoff(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    delivery = WebhookDeliveryService(spool_path=spool, base_backoff=0.2, replay_interval=0.05)
+    async with _SlowStub(status=503) as stub:
+        delivery.enqueue([stub.url], {"alert": 1})
+        await _wait_for(lambda: delivery.stats["spooled"] == 1)
+        with open(spool, encoding="utf-8") as f:
+            entry = json.loads(f.readline())
+        assert entry["attempts"] == 1 and entry["due"] > time.time()
+
+        # Empfänger erholt sich: Replayer stellt nach dem Backoff zu
+        stub.status = 200
+        await _wait_for(lambda: delivery.stats["delivered"] == 1)
+        await delivery.stop()
+
+    assert len(stub.bodies) == 2
+    assert open(spool, encoding="utf-8").read() == ""
+
+
+@pytest.mark.asyncio
+async def test_spool_survives_restart_and_gives_up_after_max_attempts(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    async with _SlowStub(status=500) as stub:
+        first = WebhookDeliveryService(spool_path=spool, base_backoff=0.01)
+        first.enqueue([stub.url], {"alert": 1})
+        await _wait_for(lambda: first.stats["spooled"] == 1)
+        await first.stop()
+
+        second = WebhookDeliveryService(spool_path=spool, base_backoff=0.01, max_attempts=3, replay_interval=0.02)
+        await second.start()
+        await _wait_for(lambda: second.stats["dead"] == 1)
+        await second.stop()
+
+    assert len(stub.bodies) == 3
+
+
+def _spooled_payloads(spool):
+    with open(spool, encoding="utf-8") as f:
+        return sorted(json.loads(line)["payload"]["i"] for line in f)
+
+
+@pytest.mark.asyncio
+async def test_stop_awaits_overflow_spools(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    delivery = WebhookDeliveryService(spool_path=spool, max_queue=2, concurrency=1)
+    url = "http://127.0.0.1:9/hook"
+    for i in range(10):
+        delivery.enqueue([url], {"i": i})
+    assert len(delivery._spool_tasks) == 8
+
+    await delivery.stop()
+
+    assert not delivery._spool_tasks
+    assert _spooled_payloads(spool) == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_partial_batch_is_spooled_even_if_queue_is_full(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    delivery = WebhookDeliveryService(spool_path=spool, batch_linger=5.0)
+    dest = {"url": "http://127.0.0.1:9/hook", "batch_size": 5, "concurrency": 1}
+    delivery.enqueue([dest], {"i": 0})
+    await asyncio.sleep(0.05)  # Worker hält {"i": 0} und wartet auf weitere Einträge
+
+    def full(entry):
+        raise asyncio.QueueFull
+
+    delivery.configure(dest).queue.put_nowait = full  # inzwischen von enqueue() gefüllt
+    await delivery.stop()
+
+    assert _spooled_payloads(spool) == [0]
+
+
+def test_destinations_accept_json_with_per_destination_settings():
+    spec = '[{"url": "https://siem/hook", "batch_size": 50, "concurrency": 2}, "https://other/hook", {"x": 1}]'
+    destinations = parse_destinations(spec)
+    assert destinations == [{"url": "https://siem/hook", "batch_size": 50, "concurrency": 2}, "https://other/hook"]
+    assert parse_destinations("https://a/hook, https://b/hook") == ["https://a/hook", "https://b/hook"]
+    assert parse_destinations("[not json") == []
+
+    dest = WebhookDeliveryService(spool_path="unused").configure(destinations[0])
+    assert (dest.batch_size, dest.concurrency) == (50, 2)
+
+
+@pytest.mark.asyncio
+async def test_spool_is_shared_between_processes_and_not_reread_needlessly(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    # zwei Instanzen = zwei Worker-Prozesse auf demselben Spool
+    a, b = WebhookDeliveryService(spool_path=spool), WebhookDeliveryService(spool_path=spool)
+    later = time.time() + 3600
+    await a._spool([{"url": "https://x/hook", "payload": {"i": i}, "attempts": 1, "due": later} for i in range(3)])
+    assert a._take_due(time.time()) == []
+
+    def locked():
+        raise AssertionError("spool re-read although nothing changed or became due")
+
+    a._spool_file_lock = locked
+    assert a._take_due(time.time()) == []  # nichts fällig, nichts geändert -> kein Lesen
+
+    await b._spool([{"url": "https://x/hook", "payload": {"i": 3}, "attempts": 1, "due": 0.0}])
+    del a._spool_file_lock
+    due = a._take_due(time.time())
+    assert [e["payload"]["i"] for e in due] == [3]
+    assert b._take_due(time.time()) == []
+    assert [e["payload"]["i"] for e in a._take_due(later + 1)] == [0, 1, 2]
+    assert os.path.exists(spool + ".lock")
@@ -0,0 +1,205 @@
+"""
+Analytics Retention (chunked)
+=============================
+
+- Löschen in begrenzten Chunks, ältester Zeitstempel zuerst
+- Laufzeitbudget: unvollständiger Zyklus setzt im nächsten fort
+- Partitionierte Tabellen: abgelaufene Partitionen werden gedroppt
+- ctid ist nur pro Partition eindeutig: gültige Zeilen mit gleicher ctid bleiben erhalten
+- Derselbe Mechanismus für weitere Tabellen (alerts, usage_logs)
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.workers.analytics_retention import AnalyticsRetentionWorker
+from app.workers.retention import ChunkedRetention, RetentionPolicy
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class _FakeConn:
+    def __init__(self, db):
+        self.db = db
+
+    async def execute(self, query, *args):
+        self.db.statements.append(query)
+        if query.startswith("DROP TABLE"):
+            name = query.split()[-1]
+            dropped = self.db.dropped_rows(name)
+            self.db.partitions = [p for p in self.db.partitions if f"{p['schema']}.{p['name']}" != name]
+            self.db.rows[self.db.table] = [ts for ts in self.db.rows[self.db.table] if ts not in dropped]
+            return "DROP TABLE"
+        table = query.split("DELETE FROM", 1)[1].split()[0]
+        cutoff, limit = args
+        rows = sorted(self.db.rows.get(table, []))
+        doomed = [ts for ts in rows if ts < cutoff][:limit]
+        self.db.rows[table] = rows[len(doomed):]
+        self.db.chunk_sizes.append(len(doomed))
+        return f"DELETE {len(doomed)}"
+
+    async def fetchval(self, query, *args):
+        return bool(self.db.partitions)
+
+    async def fetch(self, query, *args):
+        return list(self.db.partitions)
+
+
+class _FakeDB:
+    """Postgres-Stand-in: Tabellen als Listen von Zeitstempeln"""
+
+    def __init__(self, rows, partitions=None, table="web_events"):
+        self.pool = object()
+        self.rows = rows
+        self.table = table
+        self.partitions = partitions or []
+        self.statements = []
+        self.chunk_sizes = []
+
+    def dropped_rows(self, name):
+        for p in self.partitions:
+            if f"{p['schema']}.{p['name']}" == name:
+                return {ts for ts in self.rows[self.table] if p["lo"] <= ts < p["hi"]}
+        return set()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield _FakeConn(self)
+
+
+def _timestamps(days_back, count, now=NOW):
+    return [now - timedelta(days=days_back, seconds=i) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_deletes_in_bounded_chunks_oldest_first(monkeypatch):
+    monkeypatch.setenv("ANALYTICS_RETENTION_DAYS", "30")
+    db = _FakeDB({"web_events": _timestamps(100, 2500) + _timestamps(5, 100)})
+    retention = ChunkedRetention(chunk_size=1000, pause_seconds=0, max_runtime_seconds=10, db=db)
+    policy = RetentionPolicy(table="web_events", ts_column="ts", days_env="ANALYTICS_RETENTION_DAYS")
+
+    report = await retention.run(policy, now=NOW)
+
+    assert report.complete and report.rows_deleted == 2500 and report.chunks == 3
+    assert db.chunk_sizes == [1000, 1000, 500]
+    assert len(db.rows["web_events"]) == 100
+    assert "ORDER BY ts" in db.statements[0] and "LIMIT $2" in db.statements[0]
+    assert report.to_dict()["cutoff"] == (NOW - timedelta(days=30)).isoformat()
+
+
+@pytest.mark.asyncio
+async def test_runtime_budget_stops_cycle_and_next_cycle_continues(monkeypatch):
+    monkeypatch.setenv("ANALYTICS_RETENTION_DAYS", "30")
+    db = _FakeDB({"web_events": _timestamps(100, 5000)})
+    retention = ChunkedRetention(chunk_size=100, pause_seconds=0.01, max_runtime_seconds=0.05, db=db)
+    worker = AnalyticsRetentionWorker(
+        policies=[RetentionPolicy(table="web_events", ts_column="ts", days_env="ANALYTICS_RETENTION_DAYS")],
+        retention=retention,
+    )
+
+    first = (await worker._run_once())[0]
+    assert not first.complete and 0 < first.rows_deleted < 5000
+    assert max(db.chunk_sizes) == 100
+
+    retention.max_runtime_seconds = 30
+    retention.pause_seconds = 0
+    second = (await worker._run_once())[0]
+    assert second.complete and first.rows_deleted + second.rows_deleted == 5000
+    assert worker.status()["last_reports"][0]["complete"] is True
+
+
+@pytest.mark.asyncio
+async def test_expired_partitions_are_dropped_before_chunked_delete(monkeypatch):
+    monkeypatch.setenv("ANALYTICS_RETENTION_DAYS", "30")
+    cutoff = NOW - timedelta(days=30)
+    old_lo, old_hi = cutoff - timedelta(days=60), cutoff - timedelta(days=30)
+    mid_lo, mid_hi = old_hi, cutoff + timedelta(days=1)
+    rows = _timestamps(75, 400) + _timestamps(31, 50) + _timestamps(2, 10)
+    partitions = [
+        {"schema": "public", "name": "web_events_old", "lo": old_lo, "hi": old_hi,
+         "bound": f"FOR VALUES FROM ('{old_lo.isoformat(sep=' ')}') TO ('{old_hi.isoformat(sep=' ')}')"},
+        {"schema": "public", "name": "web_events_mid", "lo": mid_lo, "hi": mid_hi,
+         "bound": f"FOR VALUES FROM ('{mid_lo.isoformat(sep=' ')}') TO ('{mid_hi.isoformat(sep=' ')}')"},
+        {"schema": "public", "name": "web_events_default", "lo": mid_hi, "hi": NOW, "bound": "DEFAULT"},
+    ]
+    db = _FakeDB({"web_events": rows}, partitions=partitions)
+    retention = ChunkedRetention(chunk_size=1000, pause_seconds=0, max_runtime_seconds=10, db=db)
+
+    report = await retention.run(
+        RetentionPolicy(table="web_events", ts_column="ts", days_env="ANALYTICS_RETENTION_DAYS"), now=NOW
+    )
+
+    assert report.partitions_dropped == ["public.web_events_old"]
+    assert report.rows_deleted == 50  # Rest aus der teilweise abgelaufenen Partition
+    assert len(db.rows["web_events"]) == 10
+    assert db.statements[0] == "DROP TABLE IF EXISTS public.web_events_old"
+
+
+class _CtidConn:
+    """Wertet das Chunk-DELETE wie Postgres auf einer partitionierten Tabelle aus:
+    Zeilen sind (partition, ctid, ts), ctid wiederholt sich über Partitionen"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetchval(self, query, *args):
+        return True
+
+    async def fetch(self, query, *args):
+        return []
+
+    async def execute(self, query, *args):
+        cutoff, limit = args
+        outer = query.split("ARRAY(", 1)[0] + query.rsplit("))", 1)[1]
+        expired = sorted((r for r in self.rows if r[2] < cutoff), key=lambda r: r[2])[:limit]
+        ctids = {r[1] for r in expired}
+        doomed = [r for r in self.rows if r[1] in ctids and ("ts < $1" not in outer or r[2] < cutoff)]
+        for r in doomed:
+            self.rows.remove(r)
+        return f"DELETE {len(doomed)}"
+
+
+@pytest.mark.asyncio
+async def test_chunked_delete_keeps_live_rows_sharing_a_ctid(monkeypatch):
+    monkeypatch.setenv("ANALYTICS_RETENTION_DAYS", "30")
+    expired, live = _timestamps(45, 3), _timestamps(2, 3)
+    rows = [("web_events_2025_11", (0, i + 1), ts) for i, ts in enumerate(expired)]
+    rows += [("web_events_2025_12", (0, i + 1), ts) for i, ts in enumerate(live)]
+
+    @asynccontextmanager
+    async def acquire():
+        yield _CtidConn(rows)
+
+    db = _FakeDB({})
+    db.acquire = acquire
+    retention = ChunkedRetention(chunk_size=10, pause_seconds=0, max_runtime_seconds=10, db=db)
+
+    report = await retention.run(
+        RetentionPolicy(table="web_events", ts_column="ts", days_env="ANALYTICS_RETENTION_DAYS"), now=NOW
+    )
+
+    assert report.complete and report.rows_deleted == 3
+    assert sorted(r[2] for r in rows) == sorted(live)
+
+
+@pytest.mark.asyncio
+async def test_other_append_only_tables_are_opt_in(monkeypatch):
+    monkeypatch.setenv("ANALYTICS_RETENTION_DAYS", "30")
+    monkeypatch.delenv("ALERTS_RETENTION_DAYS", raising=False)
+    monkeypatch.setenv("USAGE_RETENTION_DAYS", "90")
+    now = datetime.now(timezone.utc)
+    db = _FakeDB({
+        "web_events": _timestamps(60, 10, now),
+        "alerts": _timestamps(400, 10, now),
+        "usage_logs": _timestamps(120, 7, now) + _timestamps(10, 3, now),
+    })
+    worker = AnalyticsRetentionWorker(retention=ChunkedRetention(pause_seconds=0, max_runtime_seconds=10, db=db))
+
+    reports = {r.table: r for r in await worker._run_once()}
+
+    assert set(reports) == {"web_events", "usage_logs"}
+    assert reports["usage_logs"].rows_deleted == 7 and len(db.rows["alerts"]) == 10
+    with pytest.raises(ValueError):
+        RetentionPolicy(table="web_events; DROP TABLE users", ts_column="ts", days_env="X")
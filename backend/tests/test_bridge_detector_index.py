@@ -0,0 +1,158 @@
+"""
+Bridge Detector: Index-Lookup, Batch, Hot Reload
+================================================
+
+- (chain, contract) und (chain, topic0) werden über kompilierte Dicts aufgelöst
+- detect_bridges liefert dieselben Ergebnisse wie detect_bridge, in Event-Reihenfolge
+- Hot Reload aus JSON tauscht den Index; Änderungen an BRIDGES werden erkannt
+- Kosten pro Event bleiben bei wachsender Bridge-Anzahl konstant
+"""
+
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.bridge import bridge_detector as detector_module
+from app.bridge.bridge_detector import BridgeDetector, BridgeRegistry, BridgeSignature
+from app.schemas.canonical_event import CanonicalEvent
+
+WORMHOLE_TOPIC = "0x6eb224fb001ed210e379b335e35efe88672a8ce935d981a6896b27ffdf52a3b2"
+
+
+def _event(i, to_address="0x456def", topic=None, chain="ethereum", **extra):
+    fields = dict(
+        event_id=f"ev{i}", chain=chain, block_number=1, block_timestamp=datetime(2026, 1, 1),
+        tx_hash=f"0x{i:064x}", tx_index=0, from_address="0x123abc", to_address=to_address,
+        value=Decimal("1"), status=1, event_type="transfer", source="rpc",
+        idempotency_key=f"k{i}", metadata={"logs": [{"topics": [topic]}]} if topic else {},
+    )
+    return CanonicalEvent(**{**fields, **extra})
+
+
+def _synthetic(n):
+    return [
+        BridgeSignature(
+            bridge_name=f"Bridge {i}", chain="ethereum",
+            contract_addresses={f"0x{i:040x}"}, event_signatures={f"0x{i:064x}"},
+            pattern_type="lock_mint", metadata={},
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def restore_registry():
+    original = BridgeRegistry.BRIDGES
+    yield
+    BridgeRegistry.reload(original)
+
+
+@pytest.fixture(autouse=True)
+def no_persistence(monkeypatch):
+    async def _noop(**kwargs):
+        return None
+    monkeypatch.setattr(detector_module, "persist_bridge_link", _noop)
+
+
+@pytest.mark.asyncio
+async def test_index_lookups_and_batch_match_single_detection():
+    detector = BridgeDetector()
+    events = [
+        _event(0, to_address="0x3EE18B2214AFF97000D974CF647E7C347E8FA585"),  # Wormhole (case-insensitive)
+        _event(1),  # keine Bridge
+        _event(2, topic=WORMHOLE_TOPIC.upper().replace("0X", "0x")),  # via topic0
+        _event(3, topic=WORMHOLE_TOPIC, chain="polygon"),  # topic nur auf ethereum registriert
+        _event(4, event_type="bridge", metadata={"bridge_program": "wormhole"}),
+    ]
+
+    batch = await detector.detect_bridges(events)
+    single = [await detector.detect_bridge(e) for e in events]
+
+    assert [r and r["bridge_name"] for r in batch] == ["Wormhole", None, "Wormhole", None, "wormhole"]
+    assert [r and r["bridge_name"] for r in single] == [r and r["bridge_name"] for r in batch]
+    assert batch[4]["detected_via"] == "metadata"
+    assert [s.bridge_name for s in BridgeRegistry.get_signatures_by_topic(WORMHOLE_TOPIC, "ETHEREUM")] == ["Wormhole"]
+
+
+def test_hot_reload_from_file_and_in_place_changes(tmp_path, monkeypatch, restore_registry):
+    path = tmp_path / "bridges.json"
+    path.write_text(json.dumps([{
+        "bridge_name": "NewBridge", "chain": "Base",
+        "contract_addresses": ["0xABCDEF0000000000000000000000000000000001"],
+        "event_signatures": ["0xFEED"], "pattern_type": "burn_unlock",
+    }]))
+    monkeypatch.setenv("BRIDGE_SIGNATURES_PATH", str(path))
+
+    assert BridgeRegistry.reload_from_file() == 1
+    assert BridgeRegistry.get_signature_by_address("0xabcdef0000000000000000000000000000000001", "base").bridge_name == "NewBridge"
+    assert BridgeRegistry.get_signature_by_address("0x3ee18b2214aff97000d974cf647e7c347e8fa585", "ethereum") is None
+    assert BridgeRegistry.get_signatures_by_topic("0xfeed", "base")[0].pattern_type == "burn_unlock"
+
+    # Direkte Erweiterung von BRIDGES invalidiert den Index
+    BridgeRegistry.BRIDGES.append(_synthetic(1)[0])
+    assert BridgeRegistry.get_signature_by_address(f"0x{0:040x}", "ethereum").bridge_name == "Bridge 0"
+
+
+class _CountingDict(dict):
+    """Dict, das get()-Lookups zählt"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.lookups = 0
+
+    def get(self, key, default=None):
+        self.lookups += 1
+        return super().get(key, default)
+
+
+@pytest.mark.benchmark
+def test_per_event_cost_constant_in_bridge_count(restore_registry):
+    """Benchmark: Lookup-Kosten pro Event bei 12 vs. 5000 Bridges (Index vs. linearer Scan)"""
+    detector = BridgeDetector()
+    events = [_event(i, topic=f"0x{(i * 7919) % 10**6:064x}") for i in range(2000)]
+
+    compared = {"n": 0}
+
+    def linear(event):
+        chain = event.chain.lower()
+        for address in (event.to_address, event.from_address):
+            for sig in BridgeRegistry.BRIDGES:
+                compared["n"] += 1
+                if sig.chain.lower() == chain and address.lower() in sig.contract_addresses:
+                    return sig
+        for log in event.metadata.get("logs", []):
+            for sig in BridgeRegistry.BRIDGES:
+                compared["n"] += 1
+                if sig.chain.lower() == chain and log["topics"][0].lower() in {s.lower() for s in sig.event_signatures}:
+                    return sig
+        return None
+
+    def per_event_us(fn, sample):
+        t0 = time.perf_counter()
+        for event in sample:
+            fn(event)
+        return (time.perf_counter() - t0) / len(sample) * 1e6
+
+    rows = []
+    for n in (12, 5000):
+        BridgeRegistry.reload(_synthetic(n))
+        index = BridgeRegistry.index()
+        index.by_address, index.by_topic = _CountingDict(index.by_address), _CountingDict(index.by_topic)
+        indexed = per_event_us(detector._match, events)
+        lookups = (index.by_address.lookups + index.by_topic.lookups) / len(events)
+        compared["n"] = 0
+        scan = per_event_us(linear, events[:200])
+        rows.append((n, indexed, lookups, scan, compared["n"] / 200))
+
+    print("\n📊 Bridge lookup per event:")
+    for n, indexed, lookups, scan, comparisons in rows:
+        print(f"   {n:>5} bridges: index {indexed:7.2f} µs ({lookups:.1f} dict lookups), "
+              f"linear scan {scan:9.2f} µs ({comparisons:,.0f} signature checks)")
+
+    # Operationen zählen statt Zeiten vergleichen: der Index-Pfad hängt nicht von der Bridge-Anzahl ab
+    (_, _, small_lookups, _, small_checks), (_, _, large_lookups, _, large_checks) = rows
+    assert small_lookups == large_lookups <= 3
+    assert large_checks > small_checks * 100
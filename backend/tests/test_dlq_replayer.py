@@ -0,0 +1,263 @@
+"""
+DLQ Replayer
+============
+
+- Filter auf Headern, Key und Timestamp ohne Zugriff auf die Payload
+- Checkpoints pro Partition: ein abgebrochener Replay setzt dort wieder auf
+- Fehlgeschlagene Zustellungen halten den Checkpoint vor dem ersten Fehler
+- Token Bucket begrenzt die Rate statt Sleep pro Nachricht
+- Benchmark: parallele Partitionen + Flush pro Batch vs. Flush pro Nachricht
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from confluent_kafka import KafkaError
+
+from app.workers.dlq_replayer import DLQReplayer
+
+DLQ = "dlq.events"
+
+
+class _Msg:
+    def __init__(self, partition, offset, topic="ingest.events", key=b"k", ts_ms=1_700_000_000_000):
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._ts = ts_ms
+        self._headers = [("reason", b"boom"), ("original_topic", topic.encode())] if topic else [("reason", b"boom")]
+        self.value_reads = 0
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        self.value_reads += 1
+        return b'{"payload": true}'
+
+    def headers(self):
+        return self._headers
+
+    def timestamp(self):
+        return (1, self._ts)
+
+    def error(self):
+        return None
+
+
+class _Eof:
+    def error(self):
+        return SimpleNamespace(code=lambda: KafkaError._PARTITION_EOF)
+
+
+class _FakeConsumer:
+    """Liest aus einem gemeinsamen Fake-Broker; fetch_latency pro consume()-Aufruf"""
+
+    def __init__(self, broker, fetch_latency):
+        self.broker = broker
+        self.fetch_latency = fetch_latency
+        self.partition = None
+        self.position = 0
+
+    def list_topics(self, topic, timeout=None):
+        partitions = {p: None for p in self.broker}
+        return SimpleNamespace(topics={DLQ: SimpleNamespace(partitions=partitions, error=None)})
+
+    def assign(self, tps):
+        tp = tps[0]
+        self.partition = tp.partition
+        self.position = max(0, tp.offset)
+
+    def consume(self, num_messages, timeout):
+        time.sleep(self.fetch_latency)
+        log = self.broker[self.partition]
+        batch = log[self.position:self.position + num_messages]
+        self.position += len(batch)
+        if self.position >= len(log) and len(batch) < num_messages:
+            batch = batch + [_Eof()]
+        return batch
+
+    def close(self):
+        pass
+
+
+class _FakeProducer:
+    """Bestätigt Deliveries erst in flush(); ack_latency pro flush()-Aufruf"""
+
+    def __init__(self, ack_latency=0.0):
+        self.ack_latency = ack_latency
+        self.pending = []
+        self.delivered = []
+        self.flushes = 0
+
+    def produce(self, topic, key, value, headers=None, on_delivery=None):
+        self.pending.append(((topic, key, value), on_delivery))
+
+    def poll(self, timeout=0):
+        return 0
+
+    def flush(self, timeout=None):
+        self.flushes += 1
+        time.sleep(self.ack_latency)
+        pending, self.pending = self.pending, []
+        for record, callback in pending:
+            self.delivered.append(record)
+            if callback:
+                callback(None, record)
+        return 0
+
+
+def _broker(partitions, per_partition):
+    return {
+        p: [_Msg(p, o, key=f"{p}:{o}".encode()) for o in range(per_partition)]
+        for p in range(partitions)
+    }
+
+
+def _replayer(tmp_path, broker, producer, fetch_latency=0.0, throttle=0, concurrency=8):
+    replayer = DLQReplayer(
+        throttle=throttle,
+        producer=producer,
+        consumer_factory=lambda conf: _FakeConsumer(broker, fetch_latency),
+        checkpoint_path=str(tmp_path / "checkpoints.json"),
+        concurrency=concurrency,
+    )
+    replayer.dlq_topic = DLQ
+    return replayer
+
+
+def test_filters_use_headers_key_and_timestamp_only():
+    msg = _Msg(0, 0, key=b"abc", ts_ms=int(datetime(2024, 6, 1).timestamp() * 1000))
+    match = DLQReplayer._matches
+    since = int(datetime(2024, 1, 1).timestamp() * 1000)
+    until = int(datetime(2024, 12, 31).timestamp() * 1000)
+
+    assert match(msg, "ingest.events", b"abc", since, until) == "ingest.events"
+    assert match(msg, "other.events", None, None, None) is None
+    assert match(msg, None, b"xyz", None, None) is None
+    assert match(msg, None, None, until, None) is None
+    assert match(_Msg(0, 1, topic=None), None, None, None, None) is None
+    assert msg.value_reads == 0
+
+
+@pytest.mark.asyncio
+async def test_interrupted_replay_resumes_from_checkpoint(tmp_path):
+    broker = _broker(partitions=3, per_partition=200)
+    broker[1][5] = _Msg(1, 5, topic="other.events", key=b"1:5")
+    producer = _FakeProducer()
+    replayer = _replayer(tmp_path, broker, producer)
+    replayer.batch_size = 50
+
+    first = await replayer.replay_filtered(filter_topic="ingest.events", max_messages=250)
+    assert first["scanned"] == 250 and first["resumed"] is False
+
+    second = await replayer.replay_filtered(filter_topic="ingest.events", max_messages=10_000)
+    assert second["resumed"] is True and second["replay_id"] == first["replay_id"]
+    assert first["scanned"] + second["scanned"] == 600
+    assert first["replayed"] + second["replayed"] == 599
+    keys = [key for _topic, key, _value in producer.delivered]
+    assert len(keys) == len(set(keys)) == 599
+    assert first["skipped"] + second["skipped"] == 1
+
+    # Andere Filter -> eigener Checkpoint; --restart ignoriert den vorhandenen
+    restarted = await replayer.replay_filtered(filter_topic="ingest.events", max_messages=10_000, resume=False)
+    assert restarted["resumed"] is False and restarted["scanned"] == 600
+
+
+class _FlakyProducer(_FakeProducer):
+    """Meldet für die angegebenen Keys einen Delivery-Fehler"""
+
+    def __init__(self, failing_keys):
+        super().__init__()
+        self.failing_keys = set(failing_keys)
+
+    def flush(self, timeout=None):
+        pending, self.pending = self.pending, []
+        for record, callback in pending:
+            err = "broker unavailable" if record[1] in self.failing_keys else None
+            if not err:
+                self.delivered.append(record)
+            callback(err, record)
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_failed_deliveries_hold_checkpoint_at_first_failed_offset(tmp_path):
+    broker = _broker(partitions=2, per_partition=100)
+    flaky = _FlakyProducer({b"0:30", b"0:70"})
+    replayer = _replayer(tmp_path, broker, flaky)
+    replayer.batch_size = 50
+
+    first = await replayer.replay_filtered(max_messages=10_000)
+    assert first["errors"] == 1  # Partition 0 stoppt nach dem ersten fehlerhaften Batch
+    assert replayer.replay_id(DLQ, None, None, None, None) == first["replay_id"]
+
+    healthy = _FakeProducer()
+    replayer.producer = healthy
+    second = await replayer.replay_filtered(max_messages=10_000)
+    keys = {key for _topic, key, _value in healthy.delivered}
+    assert second["resumed"] is True and second["errors"] == 0
+    assert {b"0:30", b"0:70"} <= keys and b"0:29" not in keys
+    assert not any(key.startswith(b"1:") for key in keys)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate_and_dry_run_produces_nothing(tmp_path):
+    broker = _broker(partitions=2, per_partition=75)
+    producer = _FakeProducer()
+    replayer = _replayer(tmp_path, broker, producer, throttle=100)
+
+    dry = await replayer.replay_filtered(dry_run=True, max_messages=10_000)
+    assert dry["scanned"] == 150 and dry["replayed"] == 0 and not producer.delivered
+
+    start = time.perf_counter()
+    result = await replayer.replay_filtered(max_messages=10_000)
+    elapsed = time.perf_counter() - start
+    # Burst von 100, danach 50 Nachrichten mit 100/s; nur die Untergrenze ist lastunabhängig
+    assert result["replayed"] == 150
+    assert elapsed > 0.4
+
+
+async def _legacy_replay(broker, producer, fetch_latency):
+    """Bisheriges Modell: eine Partition nach der anderen, poll + flush pro Nachricht"""
+    for partition in sorted(broker):
+        for msg in broker[partition]:
+            time.sleep(fetch_latency / 50)  # poll() aus dem Prefetch-Puffer
+            producer.produce(topic="ingest.events", key=msg.key(), value=msg.value(), headers=msg.headers())
+            producer.flush(5)
+            await asyncio.sleep(0)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_replay_throughput_vs_flush_per_message(tmp_path):
+    """Benchmark: 8 Partitionen x 250 Nachrichten, 5 ms Fetch, 1 ms Broker-Ack"""
+    broker = _broker(partitions=8, per_partition=250)
+    total = 8 * 250
+
+    legacy_producer = _FakeProducer(ack_latency=0.001)
+    start = time.perf_counter()
+    await _legacy_replay(broker, legacy_producer, fetch_latency=0.005)
+    legacy_rate = total / (time.perf_counter() - start)
+
+    producer = _FakeProducer(ack_latency=0.001)
+    replayer = _replayer(tmp_path, broker, producer, fetch_latency=0.005)
+    start = time.perf_counter()
+    result = await replayer.replay_filtered(max_messages=total)
+    rate = total / (time.perf_counter() - start)
+
+    print(f"\n📊 DLQ replay, {total} messages over 8 partitions:")
+    print(f"   flush per message:         {legacy_rate:>8.0f} msg/s ({legacy_producer.flushes} flushes)")
+    print(f"   parallel, flush per batch: {rate:>8.0f} msg/s ({producer.flushes} flushes)")
+
+    assert result["replayed"] == total and len(producer.delivered) == total
+    assert legacy_producer.flushes == total and producer.flushes < total / 50
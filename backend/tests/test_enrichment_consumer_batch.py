@@ -0,0 +1,258 @@
+"""
+Enrichment Consumer (Micro-Batches)
+===================================
+
+- Adressen eines Fensters werden dedupliziert und per Bulk-Lookup angereichert
+- Risk Scoring nutzt die Labels aus dem Bulk-Lookup statt eines Lookups pro Adresse
+- Compliance-Screening läuft gebündelt über alle Paare des Fensters
+- Results werden gesammelt produziert, ein Flush und ein Commit pro Batch
+- Unbekannte Request-Typen landen nach den Retries in der DLQ
+- Benchmark: Adressen/s gegenüber Anreicherung pro Nachricht
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+import app.workers.enrichment_consumer as enrichment_consumer
+from app.workers.enrichment_consumer import EnrichmentConsumerWorker
+
+
+class _Msg:
+    def __init__(self, partition, offset, payload):
+        self._partition = partition
+        self._offset = offset
+        self._value = json.dumps(payload).encode()
+
+    def topic(self):
+        return "enrich.requests"
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return None
+
+    def value(self):
+        return self._value
+
+    def error(self):
+        return None
+
+
+class _FakeConsumer:
+    def __init__(self, messages):
+        self.queue = list(messages)
+        self.commits = []
+
+    def subscribe(self, topics):
+        pass
+
+    def consume(self, num_messages, timeout):
+        if not self.queue:
+            time.sleep(min(timeout, 0.001))
+        batch, self.queue = self.queue[:num_messages], self.queue[num_messages:]
+        return batch
+
+    def commit(self, offsets=None, asynchronous=False):
+        self.commits.append(sorted((tp.partition, tp.offset) for tp in offsets))
+
+    def close(self):
+        pass
+
+    def committed(self, partition):
+        return max((o for c in self.commits for p, o in c if p == partition), default=None)
+
+
+class _FakeKafkaProducer:
+    def __init__(self):
+        self.produced = []
+        self.flushes = 0
+
+    def produce(self, topic, key, value, callback=None, headers=None):
+        self.produced.append((topic, key, value, headers))
+
+    def poll(self, timeout):
+        return 0
+
+    def flush(self, timeout=30):
+        self.flushes += 1
+        return 0
+
+
+class _Services:
+    """Bulk-Lookups mit fester Latenz pro Aufruf, zeichnet Aufrufe auf"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.label_calls = []
+        self.risk_calls = []
+        self.risk_labels = []
+
+    async def bulk_get_labels(self, addresses):
+        self.label_calls.append(list(addresses))
+        await asyncio.sleep(self.latency)
+        return {a.lower(): (["exchange"] if a.endswith("e") else []) for a in addresses}
+
+    async def batch_score(self, addresses, labels=None):
+        self.risk_calls.append(list(addresses))
+        self.risk_labels.append(labels)
+        await asyncio.sleep(self.latency)
+        return {a: {"risk_score": 0.5, "risk_level": "medium", "factors": []} for a in addresses}
+
+
+def _worker(monkeypatch, services):
+    monkeypatch.setattr(enrichment_consumer.labels_service, "bulk_get_labels", services.bulk_get_labels)
+    monkeypatch.setattr(enrichment_consumer.risk_scorer, "batch_score", services.batch_score)
+    worker = EnrichmentConsumerWorker(group_id="test")
+    worker.producer.producer = _FakeKafkaProducer()
+    worker.backoff_base = 0.001
+    worker.batch_window = 0.02
+    return worker
+
+
+async def _run_until_committed(worker, consumer, expected):
+    worker.consumer = consumer
+    task = asyncio.create_task(worker.run_async())
+    start = time.perf_counter()
+    while any(consumer.committed(p) != off for p, off in expected.items()):
+        assert time.perf_counter() - start < 30, consumer.commits
+        await asyncio.sleep(0.002)
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    await task
+    return elapsed
+
+
+@pytest.mark.asyncio
+async def test_window_dedupes_addresses_and_flushes_once(monkeypatch):
+    services = _Services()
+    worker = _worker(monkeypatch, services)
+    messages = [
+        _Msg(0, 0, {"request_id": "r0", "type": "address", "address": "0xAe"}),
+        _Msg(1, 0, {"request_id": "r1", "type": "address", "address": "0xAe"}),
+        _Msg(0, 1, {"request_id": "r2", "type": "batch", "addresses": ["0xAe", "0xB", "0xB"]}),
+        _Msg(1, 1, {"request_id": "r3", "type": "batch", "addresses": [f"0x{i}" for i in range(150)]}),
+    ]
+    consumer = _FakeConsumer(messages)
+    worker.consumer = consumer
+
+    assert await worker._consume_batch() == 4
+
+    # Ein Bulk-Lookup für alle eindeutigen Adressen des Fensters
+    assert len(services.label_calls) == 1 and len(services.risk_calls) == 1
+    assert len(services.label_calls[0]) == len(set(services.label_calls[0])) == 102
+    assert services.risk_labels[0]["0xae"] == ["exchange"]
+    kafka = worker.producer.producer
+    results = {json.loads(v)["request_id"]: json.loads(v) for _t, _k, v, _h in kafka.produced}
+    assert kafka.flushes == 1
+    assert results["r0"]["labels"] == ["exchange"] and results["r0"]["risk_level"] == "medium"
+    assert results["r1"]["address"] == "0xAe" and results["r1"]["compliance"]["risk_score"] == 10
+    assert [r["address"] for r in results["r2"]["results"]] == ["0xAe", "0xB", "0xB"]
+    assert len(results["r3"]["results"]) == 100
+    assert consumer.commits == [[(0, 2), (1, 2)]]
+
+
+@pytest.mark.asyncio
+async def test_risk_batch_reuses_bulk_labels_and_screens_once(monkeypatch):
+    from app.ml import feature_engineering
+    from app.ml.risk_scorer import RiskScorer
+    from app.services.compliance_service import ComplianceService
+
+    single_lookups = []
+
+    async def get_labels(address, chain="ethereum"):
+        single_lookups.append(address)
+        return []
+
+    async def bulk_get_labels(addresses):
+        single_lookups.append(tuple(addresses))
+        return {a.lower(): ["mixer"] for a in addresses}
+
+    monkeypatch.setattr(feature_engineering.labels_service, "get_labels", get_labels)
+    monkeypatch.setattr(feature_engineering.labels_service, "bulk_get_labels", bulk_get_labels)
+    addresses = ["0xA1", "0xB2", "0xA1"]
+
+    # Vom Aufrufer geladene Labels: kein weiterer Label-Lookup
+    scores = await RiskScorer().batch_score(addresses, labels={"0xa1": ["sanctions"], "0xb2": []})
+    assert set(scores) == {"0xA1", "0xB2"} and single_lookups == []
+
+    # Ohne Labels: genau ein Bulk-Lookup statt eines Aufrufs pro Adresse
+    await RiskScorer().batch_score(addresses)
+    assert single_lookups == [("0xA1", "0xB2")]
+
+    service = ComplianceService()
+    screened = []
+    original = service.screen
+    monkeypatch.setattr(service, "screen", lambda c, a: screened.append(a) or original(c, a))
+    pairs = [("ethereum", "0xdAC17F958D2ee523a2206206994597C13D831ec7"), ("ethereum", "0x1"), ("ethereum", "0x1")]
+    first = service.screen_many(pairs)
+    assert first[pairs[0]].watchlisted and first[pairs[1]].risk_score == 10
+    assert screened == [pairs[0][1], "0x1"]
+    # Zweiter Durchlauf kommt vollständig aus dem Cache
+    assert service.screen_many(pairs) == first and len(screened) == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_request_goes_to_dlq_after_retries(monkeypatch):
+    services = _Services()
+    worker = _worker(monkeypatch, services)
+    worker.max_retries = 2
+    broken = _Msg(0, 2, {})
+    broken._value = b"{kaputt"
+    consumer = _FakeConsumer([
+        _Msg(0, 0, {"request_id": "ok", "address": "0x1"}),
+        _Msg(0, 1, {"request_id": "bad", "type": "nope"}),
+        broken,
+    ])
+    worker.consumer = consumer
+
+    await worker._consume_batch()
+
+    topics = [t for t, _k, _v, _h in worker.producer.producer.produced]
+    assert topics.count(worker.results_topic) == 1
+    assert topics.count("dlq.events") == 1
+    assert worker.processed_count == 1 and worker.error_count == 1
+    assert consumer.commits == [[(0, 3)]]
+    # Single-Request-Pfad bleibt kompatibel
+    single = await worker._process_enrichment_request({"request_id": "x", "address": "0x2"})
+    assert single["request_id"] == "x" and single["risk_score"] == 0.5
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_batched_enrichment_throughput_vs_per_message(monkeypatch):
+    """Benchmark: 600 Requests über 4 Partitionen, 300 eindeutige Adressen, 3 ms pro Lookup"""
+    n, pool = 600, 300
+    payloads = [{"request_id": f"r{i}", "address": f"0x{i % pool:040x}"} for i in range(n)]
+
+    # Bisheriges Modell: Nachricht für Nachricht, eigener Lookup und Flush je Request
+    services = _Services(latency=0.003)
+    worker = _worker(monkeypatch, services)
+    start = time.perf_counter()
+    for payload in payloads:
+        result = await worker._process_enrichment_request(payload)
+        worker._publish_result(result)
+        worker.producer.flush()
+    per_message = n / (time.perf_counter() - start)
+
+    services = _Services(latency=0.003)
+    worker = _worker(monkeypatch, services)
+    messages = [_Msg(i % 4, i // 4, p) for i, p in enumerate(payloads)]
+    elapsed = await _run_until_committed(worker, _FakeConsumer(messages), {p: n // 4 for p in range(4)})
+    batched = n / elapsed
+    lookups = sum(len(c) for c in services.label_calls)
+
+    print(f"\n📊 Enrichment consumer, {n} requests / {pool} unique addresses, 3 ms per bulk lookup:")
+    print(f"   per message: {per_message:>8.0f} addresses/s")
+    print(f"   micro-batch: {batched:>8.0f} addresses/s ({len(services.label_calls)} bulk calls, "
+          f"{lookups} addresses looked up)")
+
+    assert len(worker.producer.producer.produced) == n
+    assert lookups <= pool * 2
+    assert batched > per_message * 10
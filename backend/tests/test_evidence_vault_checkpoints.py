@@ -0,0 +1,278 @@
+"""
+Evidence Vault Checkpointed Verification
+========================================
+
+- Signierte Checkpoints: Folgeläufe prüfen nur neue Records
+- Manipulation nach/vor dem Checkpoint wird erkannt
+- DB-Pfad streamt über einen Cursor in Chunks
+- Signaturprüfung im Prozess-Pool liefert Ergebnisse in Job-Reihenfolge
+- Chain-of-Custody-Report prüft immer ab Genesis
+- EVIDENCE_VERIFY_WORKERS=0 schaltet den Pool ab, ein kaputter Pool wird beendet
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+os.environ.setdefault("TEST_MODE", "1")
+
+import app.services.evidence_vault as ev
+from app.services.evidence_vault import EvidenceVault
+
+
+async def _filled_vault(tmp_path, n, max_batch=8):
+    vault = EvidenceVault(file_fallback_path=str(tmp_path / "vault.jsonl"), max_batch=max_batch)
+    await asyncio.gather(*[vault.append("e", {"i": i}) for i in range(n)])
+    await vault.flush()
+    return vault
+
+
+def _rewrite_line(path, index, **changes):
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    rec = json.loads(lines[index])
+    rec.update(changes)
+    lines[index] = json.dumps(rec) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+@pytest.mark.asyncio
+async def test_second_run_resumes_after_checkpoint(tmp_path):
+    vault = await _filled_vault(tmp_path, 20)
+
+    first = await vault.verify_chain_integrity()
+    assert first["chain_valid"], first["integrity_issues"][:3]
+    assert first["checkpoints"]["file"]["saved"]
+    assert first["checkpoints"]["file"]["resumed_from_line"] is None
+
+    await asyncio.gather(*[vault.append("e", {"i": i}) for i in range(20, 25)])
+    second = await vault.verify_chain_integrity()
+    assert second["chain_valid"], second["integrity_issues"][:3]
+    assert second["checkpoints"]["file"]["resumed_from_line"] == 20
+    assert second["checkpoints"]["file"]["verified_records"] == 5
+    assert second["total_records"] == 25
+    assert second["verified_signatures"] == 25
+
+    # Nichts Neues: kein weiterer Checkpoint, Summen bleiben
+    third = await vault.verify_chain_integrity()
+    assert third["checkpoints"]["file"]["verified_records"] == 0
+    assert third["total_records"] == 25
+
+
+@pytest.mark.asyncio
+async def test_tampering_after_checkpoint_is_detected(tmp_path):
+    vault = await _filled_vault(tmp_path, 10)
+    assert (await vault.verify_chain_integrity())["chain_valid"]
+    await asyncio.gather(*[vault.append("e", {"i": i}) for i in range(10, 15)])
+
+    _rewrite_line(vault.file_fallback_path, 12, payload={"i": "forged"})
+    result = await vault.verify_chain_integrity()
+    assert not result["chain_valid"]
+    assert any("line 12" in issue for issue in result["integrity_issues"])
+
+
+@pytest.mark.asyncio
+async def test_tampered_checkpoint_record_forces_full_verification(tmp_path):
+    vault = await _filled_vault(tmp_path, 10)
+    assert (await vault.verify_chain_integrity())["chain_valid"]
+
+    _rewrite_line(vault.file_fallback_path, 9, hash="f" * 64)
+    result = await vault.verify_chain_integrity()
+    assert result["checkpoints"]["file"]["resumed_from_line"] is None
+    assert not result["chain_valid"]
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_from_foreign_key_is_ignored(tmp_path):
+    vault = await _filled_vault(tmp_path, 5)
+    assert (await vault.verify_chain_integrity())["checkpoints"]["file"]["saved"]
+
+    other = EvidenceVault(file_fallback_path=vault.file_fallback_path)
+    result = await other.verify_chain_integrity()
+    assert result["chain_valid"]
+    assert result["checkpoints"]["file"]["resumed_from_line"] is None
+    assert result["checkpoints"]["file"]["verified_records"] == 5
+
+
+@pytest.mark.asyncio
+async def test_chain_of_custody_report_verifies_from_genesis(tmp_path):
+    vault = await _filled_vault(tmp_path, 10)
+    assert (await vault.verify_chain_integrity())["checkpoints"]["file"]["saved"]
+
+    # Manipulation vor dem Checkpoint: inkrementell unsichtbar, im Report nicht
+    with open(vault.file_fallback_path, "rb") as f:
+        lines = f.readlines()
+    forged = lines[2].replace(b'"i": 2', b'"i": 7')  # gleiche Länge: Checkpoint-Offset bleibt gültig
+    assert forged != lines[2]
+    lines[2] = forged
+    with open(vault.file_fallback_path, "wb") as f:
+        f.writelines(lines)
+    incremental = await vault.verify_chain_integrity()
+    assert incremental["chain_valid"] and incremental["checkpoints"]["file"]["verified_records"] == 0
+
+    report = await vault.generate_chain_of_custody_report()
+    verification = report["integrity_verification"]
+    assert not verification["chain_valid"]
+    assert verification["checkpoints"]["file"]["resumed_from_line"] is None
+    assert any("line 2" in issue for issue in verification["integrity_issues"])
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+        self.fetch_sizes = []
+
+    async def fetch(self, n):
+        self.fetch_sizes.append(n)
+        out, self._rows = self._rows[:n], self._rows[n:]
+        return out
+
+
+class _FakeConn:
+    def __init__(self, chain, batches):
+        self.chain = chain
+        self.batches = batches
+        self.checkpoints = []
+        self.cursors = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def cursor(self, query, start_seq):
+        assert "seq > $1" in query
+        cur = _FakeCursor([r for r in self.chain if r["seq"] > start_seq])
+        self.cursors.append(cur)
+        return cur
+
+    async def fetch(self, query, ids):
+        assert "evidence_batches" in query
+        return [self.batches[i] for i in ids if i in self.batches]
+
+    async def fetchrow(self, query, *args):
+        if "evidence_checkpoints" in query:
+            return self.checkpoints[-1] if self.checkpoints else None
+        return next(({"hash": r["hash"]} for r in self.chain if r["seq"] == args[0]), None)
+
+    async def execute(self, query, *args):
+        assert "INSERT INTO evidence_checkpoints" in query
+        keys = ("last_seq", "last_hash", "total_records", "verified_signatures", "ts", "digital_signature", "public_key")
+        self.checkpoints.append({"checkpoint_id": len(self.checkpoints) + 1, **dict(zip(keys, args))})
+
+
+class _FakePostgres:
+    pool = True
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+@pytest.mark.asyncio
+async def test_db_verification_streams_in_chunks_and_checkpoints(tmp_path, monkeypatch):
+    source = await _filled_vault(tmp_path, 30, max_batch=7)
+    with open(source.file_fallback_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    # File-Records in die DB-Form (evidence_chain + evidence_batches) überführen
+    batch_ids, batches, chain = {}, {}, []
+    for seq, rec in enumerate(records, start=1):
+        bid = batch_ids.setdefault(rec["merkle_root"], len(batch_ids) + 1)
+        batches[bid] = {"batch_id": bid, **EvidenceVault._file_batch_info(rec)}
+        chain.append({
+            "seq": seq,
+            "event_type": rec["event_type"],
+            "hash": rec["hash"],
+            "payload": rec["payload"],
+            "ts": datetime.fromisoformat(rec["ts"]),
+            "batch_id": bid,
+            "merkle_proof": json.dumps(rec["merkle_proof"]),
+            "digital_signature": None,
+            "public_key": None,
+        })
+
+    conn = _FakeConn(chain, batches)
+    monkeypatch.setattr(ev, "postgres_client", _FakePostgres(conn))
+    vault = EvidenceVault(file_fallback_path=str(tmp_path / "db" / "none.jsonl"), max_batch=8)
+    vault.private_key, vault.public_key = source.private_key, source.public_key
+    vault.verify_chunk = 8
+
+    result = await vault.verify_chain_integrity()
+    assert result["chain_valid"], result["integrity_issues"][:3]
+    assert result["total_records"] == 30 and result["verified_signatures"] == 30
+    assert conn.cursors[-1].fetch_sizes == [8, 8, 8, 8, 8]
+    assert conn.checkpoints[-1]["last_seq"] == 30
+
+    # Nach dem Checkpoint werden nur neue Records gelesen
+    result = await vault.verify_chain_integrity()
+    assert result["checkpoints"]["db"]["resumed_from_seq"] == 30
+    assert result["checkpoints"]["db"]["verified_records"] == 0
+    assert result["total_records"] == 30
+
+    chain[3]["payload"] = {"i": "forged"}
+    result = await vault.verify_chain_integrity(full=True)
+    assert not result["chain_valid"]
+    assert any("seq 4" in issue for issue in result["integrity_issues"])
+
+
+@pytest.mark.asyncio
+async def test_parallel_signature_verification_keeps_job_order(monkeypatch):
+    monkeypatch.setenv("EVIDENCE_VERIFY_WORKERS", "2")
+    monkeypatch.setattr(ev, "_verify_pool", None)
+    private_key, public_key = ev._generate_rsa_keypair()
+    jobs = []
+    for i in range(ev._PARALLEL_VERIFY_MIN + 6):
+        data = f"record-{i}".encode()
+        sig = ev._sign_data(private_key, data)
+        jobs.append((public_key, data if i % 5 else b"tampered", sig))
+    try:
+        results = await ev._verify_signatures(jobs)
+    finally:
+        if ev._verify_pool is not None:
+            ev._verify_pool.shutdown()
+    assert results == [bool(i % 5) for i in range(len(jobs))]
+
+
+def test_verify_workers_zero_disables_pool(monkeypatch):
+    monkeypatch.setattr(ev, "_verify_pool", None)
+    monkeypatch.setenv("EVIDENCE_VERIFY_WORKERS", "0")
+    assert ev._get_verify_pool() is None
+    monkeypatch.delenv("EVIDENCE_VERIFY_WORKERS")
+    try:
+        pool = ev._get_verify_pool()
+        assert pool is None or ev._verify_workers <= 2
+    finally:
+        ev.shutdown_verify_pool()
+    assert ev._verify_pool is None
+
+
+@pytest.mark.asyncio
+async def test_broken_verify_pool_is_shut_down_and_falls_back(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    class _BrokenPool:
+        shut_down = False
+
+        def submit(self, fn, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken = _BrokenPool()
+    monkeypatch.setattr(ev, "_verify_pool", broken)
+    monkeypatch.setattr(ev, "_verify_workers", 2)
+    private_key, public_key = ev._generate_rsa_keypair()
+    data = b"record"
+    jobs = [(public_key, data, ev._sign_data(private_key, data))] * ev._PARALLEL_VERIFY_MIN
+
+    assert await ev._verify_signatures(jobs) == [True] * len(jobs)
+    assert broken.shut_down and ev._verify_pool is None
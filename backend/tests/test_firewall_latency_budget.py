@@ -0,0 +1,189 @@
+"""
+🧪 TESTS für das Latenz-Budget der AI Firewall
+==============================================
+
+- Sanctions-Treffer (günstiger Layer) blockiert, ohne teure Layer zu starten
+- Eindeutiges Ergebnis eines teuren Layers bricht die übrigen ab
+- Layer-Timeouts, Verdict-Cache pro Adresse, p50/p99 pro Layer
+- Sanctions ist fail-closed: Timeout/Fehler blockieren und werden nicht gecacht
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services.ai_firewall_core import (
+    AIFirewallCore,
+    ActionType,
+    ThreatDetection,
+    ThreatLevel,
+    Transaction,
+)
+
+
+def _tx(to_address="0x2222222222222222222222222222222222222222", **kw):
+    return Transaction(
+        tx_hash="0xbudget",
+        chain="ethereum",
+        from_address="0x1111111111111111111111111111111111111111",
+        to_address=to_address,
+        value=0.1,
+        value_usd=200,
+        timestamp=datetime(2024, 1, 1, 12, 0),
+        **kw,
+    )
+
+
+def _detection(level, threat):
+    return ThreatDetection(
+        threat_level=level,
+        confidence=1.0,
+        threat_types=[threat],
+        evidence=[],
+        ai_models_used=["test"],
+        detection_time_ms=0.0,
+        recommended_action=ActionType.BLOCK,
+        block_reason=threat,
+    )
+
+
+def _firewall(monkeypatch, **layers):
+    """Firewall mit ersetzten Layern; ruft Zähler pro Layer mit."""
+    fw = AIFirewallCore()
+    calls = {}
+    method_names = {
+        "ai_threat": "_layer_2_ai_threat_detection",
+        "contract_scan": "_layer_4_smart_contract_scan",
+        "network": "_layer_5_network_analysis",
+        "sanctions": "_layer_6_sanctions_compliance",
+    }
+    for name, impl in layers.items():
+        async def layer(tx, _name=name, _impl=impl):
+            calls[_name] = calls.get(_name, 0) + 1
+            return await _impl(fw, tx)
+        monkeypatch.setattr(fw, method_names[name], layer)
+    return fw, calls
+
+
+async def _safe(fw, tx):
+    return fw._create_safe_detection(tx, "ok")
+
+
+async def _slow(fw, tx):
+    await asyncio.sleep(5)
+    return fw._create_safe_detection(tx, "slow")
+
+
+async def _sanctioned(fw, tx):
+    return _detection(ThreatLevel.CRITICAL, "sanctioned_address")
+
+
+@pytest.mark.asyncio
+async def test_sanctions_hit_skips_expensive_layers(monkeypatch):
+    fw, calls = _firewall(
+        monkeypatch, sanctions=_sanctioned, ai_threat=_slow, contract_scan=_slow, network=_slow
+    )
+    start = time.perf_counter()
+    allowed, detection = await fw.intercept_transaction("u", _tx(), "0x1111")
+    elapsed = time.perf_counter() - start
+
+    assert allowed is False
+    assert detection.threat_level == ThreatLevel.CRITICAL
+    assert elapsed < 1.0
+    assert "ai_threat" not in calls and "network" not in calls
+
+
+@pytest.mark.asyncio
+async def test_decisive_expensive_layer_cancels_outstanding(monkeypatch):
+    async def critical_contract(fw, tx):
+        await asyncio.sleep(0.01)
+        return _detection(ThreatLevel.CRITICAL, "malicious_contract")
+
+    fw, calls = _firewall(
+        monkeypatch, sanctions=_safe, ai_threat=_slow, contract_scan=critical_contract, network=_safe
+    )
+    fw.layer_timeouts_ms["ai_threat"] = 10_000
+    start = time.perf_counter()
+    allowed, detection = await fw.intercept_transaction("u", _tx(), "0x1111")
+
+    assert allowed is False
+    assert time.perf_counter() - start < 1.0
+    assert fw.get_layer_latency()["ai_threat"]["outcomes"] == {"cancelled": 1}
+
+
+@pytest.mark.asyncio
+async def test_layer_timeout_drops_layer_without_blocking(monkeypatch):
+    fw, _ = _firewall(monkeypatch, sanctions=_safe, ai_threat=_slow, contract_scan=_safe, network=_safe)
+    fw.layer_timeouts_ms["ai_threat"] = 20
+    allowed, detection = await fw.intercept_transaction("u", _tx(), "0x1111")
+
+    assert allowed is True
+    assert fw.get_layer_latency()["ai_threat"]["outcomes"] == {"timeout": 1}
+
+
+@pytest.mark.asyncio
+async def test_sanctions_timeout_or_error_blocks_and_is_not_cached(monkeypatch):
+    async def broken(fw, tx):
+        raise ConnectionError("sanctions db down")
+
+    fw, calls = _firewall(monkeypatch, sanctions=_slow, ai_threat=_slow, contract_scan=_safe, network=_safe)
+    fw.layer_timeouts_ms["sanctions"] = 20
+    allowed, detection = await fw.intercept_transaction("u", _tx(), "0x1111")
+
+    assert allowed is False and detection.threat_level == ThreatLevel.CRITICAL
+    assert "sanctions_check_unavailable" in detection.threat_types
+    assert "ai_threat" not in calls and not fw.threat_cache
+
+    fw, calls = _firewall(monkeypatch, sanctions=broken, ai_threat=_safe, contract_scan=_safe, network=_safe)
+    for _ in range(2):
+        allowed, detection = await fw.intercept_transaction("u", _tx(), "0x1111")
+        assert allowed is False and "timeout" not in detection.block_reason
+    assert calls["sanctions"] == 2
+    assert fw.get_layer_latency()["sanctions"]["outcomes"] == {"error": 2}
+
+
+@pytest.mark.asyncio
+async def test_sanctions_service_error_is_not_treated_as_clean(monkeypatch):
+    fw = AIFirewallCore()
+
+    async def unavailable(address):
+        raise TimeoutError("upstream")
+
+    async def screened(address):
+        return {"is_sanctioned": address.endswith("dead"), "address": address, "entities": []}
+
+    monkeypatch.setattr(fw.sanctions_service, "is_sanctioned", unavailable)
+    with pytest.raises(TimeoutError):
+        await fw._layer_6_sanctions_compliance(_tx())
+
+    monkeypatch.setattr(fw.sanctions_service, "is_sanctioned", screened)
+    assert (await fw._layer_6_sanctions_compliance(_tx())).threat_level == ThreatLevel.SAFE
+    hit = await fw._layer_6_sanctions_compliance(_tx(to_address="0x" + "0" * 36 + "dead"))
+    assert hit.threat_level == ThreatLevel.CRITICAL
+
+
+@pytest.mark.asyncio
+async def test_address_verdicts_are_cached(monkeypatch):
+    fw, calls = _firewall(monkeypatch, sanctions=_safe, ai_threat=_safe, contract_scan=_safe, network=_safe)
+    for _ in range(3):
+        await fw.intercept_transaction("u", _tx(), "0x1111")
+    await fw.intercept_transaction("u", _tx(to_address="0x3333333333333333333333333333333333333333"), "0x1111")
+
+    assert calls["sanctions"] == 2
+    assert calls["network"] == 2
+    assert calls["ai_threat"] == 4
+    assert fw.get_layer_latency()["sanctions"]["outcomes"] == {"ok": 2, "cache_hit": 2}
+
+
+@pytest.mark.asyncio
+async def test_layer_quantiles_in_stats(monkeypatch):
+    fw, _ = _firewall(monkeypatch, ai_threat=_safe, contract_scan=_safe, network=_safe, sanctions=_safe)
+    for i in range(20):
+        await fw.intercept_transaction("u", _tx(to_address=f"0x{i:040x}"), "0x1111")
+
+    latency = fw.get_stats()["layer_latency_ms"]
+    for layer in ("instant", "sanctions", "ai_threat", "network"):
+        assert latency[layer]["samples"] == 20
+        assert 0 <= latency[layer]["p50"] <= latency[layer]["p99"]
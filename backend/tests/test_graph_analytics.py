@@ -123,10 +123,13 @@ class TestPatternDetector:
         mock_result = AsyncMock()
         mock_result.__aiter__.return_value = [
             {
-                "addresses": ["0xa", "0xb", "0xc", "0xa"],
-                "values": [1.0, 0.9, 0.8],
-                "total_value": 2.7,
-                "circle_length": 3
+                "address": None,
+                "degree": 0,
+                "edges": [
+                    {"from": "0xa", "to": "0xb", "value": 1.0, "timestamp": "2024-01-01T00:00:00Z", "tx_hash": "0x1"},
+                    {"from": "0xb", "to": "0xc", "value": 0.9, "timestamp": "2024-01-01T01:00:00Z", "tx_hash": "0x2"},
+                    {"from": "0xc", "to": "0xa", "value": 0.8, "timestamp": "2024-01-01T02:00:00Z", "tx_hash": "0x3"},
+                ],
             }
         ]
         mock_session.run.return_value = mock_result
@@ -141,7 +144,12 @@ class TestPatternDetector:
             assert "detected" in result
             assert len(result["detected"]) == 1
             assert result["detected"][0]["length"] == 3
+            assert result["detected"][0]["addresses"] == ["0xa", "0xb", "0xc", "0xa"]
+            assert result["detected"][0]["total_value"] == pytest.approx(2.7)
             assert "risk_score" in result["detected"][0]
+            # Parametrisiert statt f-String
+            query, params = mock_session.run.call_args[0]
+            assert "$min_value" in query and params["min_value"] == 0.0
     
     def test_calculate_circle_risk(self, detector):
         """Test Circle Risk Calculation"""
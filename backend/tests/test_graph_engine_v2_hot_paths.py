@@ -0,0 +1,215 @@
+"""
+Graph Engine v2 Hot Paths
+=========================
+
+- Abfragehäufigkeit pro Paar, Hintergrund-Materialisierung heißer Paare
+- Treffer werden ohne Suche beantwortet, Hit-Rate und Staleness sind sichtbar
+- Neue Kanten in der explorierten Region invalidieren gezielt
+- Invalidierungen anderer Prozesse kommen über Redis (Version + Adress-Log) an
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import graph_engine_v2 as engine_module
+from app.services.graph_engine_v2 import CostFunction, GraphEngineV2, PathConstraint, _Adjacency
+
+
+class _LineGraph:
+    """Zwei getrennte Ketten a0..a5 und b0..b5; zählt Neo4j-Batches"""
+
+    def __init__(self):
+        self.adj = {}
+        for prefix in ("a", "b"):
+            for i in range(5):
+                self.add_edge(f"{prefix}{i}", f"{prefix}{i + 1}")
+        self.batches = 0
+
+    def add_edge(self, u, v):
+        self.adj.setdefault(u, []).append(v)
+        self.adj.setdefault(v, []).append(u)
+
+    async def query(self, addresses, constraints):
+        self.batches += 1
+        return {
+            a: _Adjacency("ethereum", 0.0, [
+                {"address": b, "chain": "ethereum", "from_chain": "ethereum", "amount": 1.0,
+                 "tx_hash": f"{a}-{b}", "timestamp": None, "age_days": 0, "fee": 0.0,
+                 "risk_score": 0.0, "tags": []}
+                for b in self.adj.get(a, [])
+            ])
+            for a in addresses
+        }
+
+
+def _engine(graph, min_frequency=3):
+    engine = GraphEngineV2()
+    engine.enabled = True
+    engine.hot_path_min_frequency = min_frequency
+    engine._query_neighbors_batch = graph.query
+    return engine
+
+
+async def _find(engine, source, target):
+    return await engine.find_paths_bidirectional(source, target, PathConstraint(), CostFunction(), max_paths=2)
+
+
+@pytest.mark.asyncio
+async def test_hot_pairs_are_materialized_and_served_from_cache():
+    graph = _LineGraph()
+    engine = _engine(graph)
+
+    for _ in range(3):
+        await _find(engine, "a0", "a5")
+    await _find(engine, "b0", "b5")
+    assert await engine.materialize_hot_paths() == 0  # a0->a5 per Write-Through schon materialisiert
+
+    batches = graph.batches
+    result = await _find(engine, "a0", "a5")
+    assert graph.batches == batches
+    assert result.stats["materialized"] is True
+    assert [e["to_address"] for e in result.paths[0]["path"]] == ["a1", "a2", "a3", "a4", "a5"]
+
+    stats = engine.get_hot_path_stats()
+    assert stats["entries"] == 1 and stats["hot_pairs"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 4
+    assert stats["hit_rate"] == pytest.approx(0.2)
+
+    # Cold pair wird erst materialisiert, wenn es heiß ist
+    for _ in range(2):
+        await _find(engine, "b0", "b5")
+    engine._hot_paths_cache.clear()
+    engine._hot_path_index.clear()
+    assert await engine.materialize_hot_paths() == 2
+
+
+@pytest.mark.asyncio
+async def test_ingested_edges_invalidate_only_touched_regions():
+    graph = _LineGraph()
+    engine = _engine(graph, min_frequency=1)
+    await _find(engine, "a0", "a5")
+    await _find(engine, "b0", "b5")
+    assert engine.get_hot_path_stats()["entries"] == 2
+
+    # Abkürzung a1 - a4: betrifft nur den a-Pfad
+    graph.add_edge("a1", "a4")
+    assert engine.invalidate_addresses(["A1", "a4"]) == 1
+    assert engine.invalidate_addresses(["zz"]) == 0
+    assert engine.get_hot_path_stats()["invalidations"] == 1
+
+    result = await _find(engine, "a0", "a5")
+    assert "materialized" not in result.stats
+    assert [e["to_address"] for e in result.paths[0]["path"]] == ["a1", "a4", "a5"]
+    assert (await _find(engine, "b0", "b5")).stats["materialized"] is True
+
+
+@pytest.mark.asyncio
+async def test_staleness_ttl_and_background_materializer():
+    graph = _LineGraph()
+    engine = _engine(graph, min_frequency=2)
+    for _ in range(2):
+        await _find(engine, "a0", "a3")
+    entry = next(iter(engine._hot_paths_cache.values()))
+    entry["materialized_at"] -= 100
+    assert engine.get_hot_path_stats()["max_age_s"] >= 100
+
+    engine.hot_path_ttl = 50
+    result = await _find(engine, "a0", "a3")
+    assert "materialized" not in result.stats
+    assert engine.get_hot_path_stats()["stale"] == 1
+
+    engine._hot_paths_cache.clear()
+    engine._hot_path_index.clear()
+    await engine.start_hot_path_materializer(interval=0.01)
+    for _ in range(50):
+        if engine._hot_paths_cache:
+            break
+        await asyncio.sleep(0.01)
+    await engine.stop_hot_path_materializer()
+    assert engine.get_hot_path_stats()["entries"] == 1
+    assert engine._materializer_task is None
+
+
+class _FakeRedis:
+    """Gemeinsamer Redis-Stand für mehrere Engines (= Prozesse); eval emuliert das Publish-Skript"""
+
+    def __init__(self):
+        self.values = {}
+        self.zsets = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def eval(self, script, numkeys, *args):
+        version_key, log_key, floor_key = args[:numkeys]
+        *addresses, limit = args[numkeys:]
+        version = self.values[version_key] = int(self.values.get(version_key, 0)) + 1
+        log = self.zsets.setdefault(log_key, {})
+        log.update({a: version for a in addresses})
+        overflow = sorted(log.items(), key=lambda kv: kv[1])[: max(0, len(log) - int(limit))]
+        if overflow:
+            self.values[floor_key] = overflow[-1][1]
+            for member, _score in overflow:
+                del log[member]
+        return version
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def zrangebyscore(self, key, lo, hi):
+        lo = float(lo[1:]) if str(lo).startswith("(") else float(lo)
+        self.ops.append(lambda: [m.encode() for m, v in self.redis.zsets.get(key, {}).items() if lo < v <= float(hi)])
+
+    def get(self, key):
+        self.ops.append(lambda: self.redis.values.get(key))
+
+    async def execute(self):
+        return [op() for op in self.ops]
+
+
+@pytest.mark.asyncio
+async def test_invalidations_from_another_process_reach_the_cache(monkeypatch):
+    redis = _FakeRedis()
+
+    async def ensure_connected():
+        return None
+
+    monkeypatch.setattr(engine_module.redis_client, "client", redis, raising=False)
+    monkeypatch.setattr(engine_module.redis_client, "_ensure_connected", ensure_connected)
+    graph = _LineGraph()
+    api, consumer = _engine(graph, min_frequency=1), _engine(graph)
+    await _find(api, "a0", "a5")
+    await _find(api, "b0", "b5")
+    assert (await _find(api, "a0", "a5")).stats["materialized"] is True
+
+    # Trace-Consumer (eigener Prozess) ingestiert eine Abkürzung
+    graph.add_edge("a1", "a4")
+    await consumer.publish_invalidation(["A1", "a4"])
+
+    result = await _find(api, "a0", "a5")
+    assert "materialized" not in result.stats
+    assert [e["to_address"] for e in result.paths[0]["path"]] == ["a1", "a4", "a5"]
+    assert (await _find(api, "b0", "b5")).stats["materialized"] is True
+
+    # Log über den Stand der API-Instanz hinaus getrimmt -> alles verwerfen
+    monkeypatch.setattr(engine_module, "HOT_PATH_INVALIDATION_LOG", 2)
+    for i in range(3):
+        await consumer.publish_invalidation([f"x{i}"])
+    assert "materialized" not in (await _find(api, "b0", "b5")).stats
+
+
+@pytest.mark.asyncio
+async def test_materialize_threshold_override_is_not_persisted():
+    graph = _LineGraph()
+    engine = _engine(graph, min_frequency=5)
+    await _find(engine, "a0", "a3")
+
+    assert await engine.materialize_hot_paths(min_frequency=1) == 1
+    assert engine.hot_path_min_frequency == 5
@@ -0,0 +1,179 @@
+"""
+Intel Feeds: inkrementelle Ingestion
+====================================
+
+- Conditional GET (ETag / Last-Modified) über einen geteilten Client
+- Unveränderter Body (gleicher Hash) wird nicht geparst
+- Nur neue/geänderte Einträge gehen in bulk_upsert
+- Zustand pro Quelle wird persistiert und erst nach erfolgreichem Upsert übernommen
+"""
+
+import hashlib
+import json
+import time
+
+import httpx
+import pytest
+
+from app.intel import feeds
+from app.intel.feeds import FeedIngestor, FeedSource
+
+
+def _scams(n, changed=()):
+    return {"result": [
+        {"name": f"scam {i}{' v2' if i in changed else ''}", "category": "phishing",
+         "addresses": [f"0x{i:040x}"]}
+        for i in range(n)
+    ]}
+
+
+class _FixtureServer:
+    """Lokaler Feed-Server (httpx.MockTransport); ETag und Last-Modified optional"""
+
+    def __init__(self, payload, etag=True, last_modified=False):
+        self.set(payload)
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = 0
+        self.bytes_sent = 0
+        self.down = False
+
+    def set(self, payload):
+        self.body = json.dumps(payload).encode()
+        self.tag = '"%s"' % hashlib.md5(self.body).hexdigest()
+
+    def handler(self, request):
+        self.requests += 1
+        if self.down:
+            return httpx.Response(500)
+        body, tag = self.body, self.tag
+        headers = {}
+        if self.etag:
+            headers["ETag"] = tag
+            if request.headers.get("If-None-Match") == tag:
+                return httpx.Response(304, headers=headers)
+        if self.last_modified:
+            headers["Last-Modified"] = "Wed, 01 Jan 2026 00:00:00 GMT"
+            if request.headers.get("If-Modified-Since") == headers["Last-Modified"]:
+                return httpx.Response(304, headers=headers)
+        self.bytes_sent += len(body)
+        return httpx.Response(200, content=body, headers=headers)
+
+
+class _Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, items):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append(list(items))
+        return len(items), 0
+
+
+def _ingestor(server, upsert, parse_calls=None, **kwargs):
+    def parse(data):
+        if parse_calls is not None:
+            parse_calls.append(1)
+        return feeds.parse_cryptoscamdb(data)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(server.handler))
+    sources = [FeedSource("cryptoscamdb", url="http://feeds.local/scams", parse=parse),
+               FeedSource("exchange_hacks", fetch=feeds.fetch_exchange_hacks)]
+    return FeedIngestor(sources=sources, client=client, upsert=upsert, **kwargs), client
+
+
+@pytest.mark.asyncio
+async def test_etag_not_modified_and_diff_upserts_only_changes():
+    server = _FixtureServer(_scams(50))
+    upsert = _Recorder()
+    parse_calls = []
+    ingestor, client = _ingestor(server, upsert, parse_calls)
+    async with client:
+        first = await ingestor.run_once()
+        second = await ingestor.run_once()
+        server.set(_scams(52, changed={3}))
+        third = await ingestor.run_once()
+
+    assert first["changed"] == 56 and first["sources_changed"] == ["cryptoscamdb", "exchange_hacks"]
+    assert second["changed"] == 0 and second["sources_unchanged"] == ["cryptoscamdb", "exchange_hacks"]
+    assert len(parse_calls) == 2 and server.requests == 3
+    assert server.bytes_sent == len(json.dumps(_scams(50)).encode()) + len(server.body)
+    assert [len(b) for b in upsert.batches] == [56, 3]
+    assert sorted(i["address"] for i in upsert.batches[1]) == [f"0x{i:040x}" for i in (3, 50, 51)]
+    assert third["total_fetched"] == 58 and third["chains"] == ["bitcoin", "ethereum"]
+
+
+@pytest.mark.asyncio
+async def test_content_hash_skips_parse_without_validators(tmp_path):
+    server = _FixtureServer(_scams(20), etag=False)
+    parse_calls = []
+    state_path = str(tmp_path / "feeds_state.json")
+    ingestor, client = _ingestor(server, _Recorder(), parse_calls, state_path=state_path)
+    async with client:
+        await ingestor.run_once()
+        second = await ingestor.run_once()
+    assert second["sources_unchanged"] == ["cryptoscamdb", "exchange_hacks"] and len(parse_calls) == 1
+
+    # Neuer Prozess: Zustand aus der Datei, Last-Modified wird mitgeschickt
+    server.last_modified = True
+    upsert = _Recorder()
+    restarted, client = _ingestor(server, upsert, parse_calls, state_path=state_path)
+    async with client:
+        third = await restarted.run_once()
+        fourth = await restarted.run_once()
+    assert third["changed"] == 0 and upsert.batches == [] and len(parse_calls) == 1
+    assert fourth["sources_unchanged"] == ["cryptoscamdb", "exchange_hacks"]
+    assert server.requests == 4 and server.bytes_sent == 3 * len(json.dumps(_scams(20)).encode())
+
+
+@pytest.mark.asyncio
+async def test_failed_upsert_or_fetch_keeps_previous_state():
+    server = _FixtureServer(_scams(10))
+    failing = _Recorder(fail=True)
+    ingestor, client = _ingestor(server, failing)
+    async with client:
+        first = await ingestor.run_once()
+        assert "db_error" in first and ingestor.state == {}
+
+        ingestor.upsert = _Recorder()
+        retry = await ingestor.run_once()
+        assert retry["changed"] == 16 and len(ingestor.upsert.batches[0]) == 16
+
+        server.down = True
+        broken = await ingestor.run_once()
+    assert "cryptoscamdb" in broken["errors"] and broken["removed"] == 0
+    assert len(ingestor.state["cryptoscamdb"].entries) == 10
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_unchanged_runs_do_near_zero_work():
+    """Benchmark: Erstlauf vs. unveränderte Läufe (ETag bzw. nur Content-Hash) bei 20k Einträgen"""
+    rows = []
+    for label, server in (("etag", _FixtureServer(_scams(20_000))),
+                          ("hash only", _FixtureServer(_scams(20_000), etag=False))):
+        upsert = _Recorder()
+        ingestor, client = _ingestor(server, upsert)
+        async with client:
+            t0 = time.perf_counter()
+            await ingestor.run_once()
+            full = time.perf_counter() - t0
+            sent = server.bytes_sent
+            t0 = time.perf_counter()
+            for _ in range(5):
+                await ingestor.run_once()
+            unchanged = (time.perf_counter() - t0) / 5
+        rows.append((label, full, unchanged, sent, (server.bytes_sent - sent) / 5, upsert))
+
+    print("\n📊 Intel feed ingestion, 20k entries:")
+    for label, full, unchanged, sent, resent, upsert in rows:
+        print(f"   {label:>9}: first run {full * 1000:7.1f} ms ({sent / 1e6:.1f} MB), "
+              f"unchanged run {unchanged * 1000:6.2f} ms ({resent / 1e6:.1f} MB), "
+              f"upserted {sum(len(b) for b in upsert.batches)}")
+
+    etag, hash_only = rows
+    assert etag[2] < etag[1] / 20 and etag[4] == 0
+    assert hash_only[2] < hash_only[1] / 3
+    assert all(len(r[5].batches) == 1 for r in rows)
@@ -0,0 +1,149 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+
+os.environ["TEST_MODE"] = "1"
+
+from app.services.kpi_aggregates import KpiAggregates, kpi_aggregates, median_of
+from app.services.kpi_service import kpi_service
+
+
+def test_window_sums_buckets_and_tracks_disposition_changes():
+    agg = KpiAggregates()
+    now = datetime.utcnow()
+    agg.record_alert("a1", now - timedelta(hours=1), "0xabc")
+    agg.record_alert("a2", now - timedelta(hours=2), "0xdef")
+    agg.record_alert("old", now - timedelta(days=10), "0xold")
+
+    agg.record_disposition("a1", "false_positive")
+    agg.record_disposition("a2", "false_positive")
+    agg.record_disposition("a2", "true_positive")
+    agg.record_event_time("a1", now - timedelta(hours=5))
+    agg.record_event_time("a2", now - timedelta(hours=4))
+
+    win = agg.window(now - timedelta(days=7))
+    assert win.alerts == 2
+    assert (win.false_positives, win.true_positives) == (1, 1)
+    assert win.addresses == {"0xabc", "0xdef"}
+    assert win.mttd_count == 2
+    assert abs(win.mttd_hours_sum / win.mttd_count - 3.0) < 0.01
+
+    assert agg.window(now - timedelta(days=30)).alerts == 3
+
+
+def test_case_closures_support_any_sla_and_median():
+    agg = KpiAggregates()
+    now = datetime.utcnow()
+    agg.record_case_closed(now - timedelta(hours=80), now - timedelta(hours=56))
+    agg.record_case_closed(now - timedelta(hours=78), now - timedelta(hours=6))
+
+    win = agg.window(now - timedelta(days=7))
+    assert median_of(win.closed_durations) / 3600.0 == pytest.approx(48.0)
+    assert sum(n for s, n in win.closed_durations.items() if s > 48 * 3600) == 1
+    assert sum(n for s, n in win.closed_durations.items() if s > 12 * 3600) == 2
+
+
+def test_rebuild_merges_only_events_after_the_snapshot_marker():
+    agg = KpiAggregates()
+    now = datetime.utcnow()
+    agg.record_alert("stale", now - timedelta(hours=2), "0xstale")  # nicht mehr in den Quellen
+    agg.record_alert("a1", now - timedelta(hours=1), "0xabc")
+
+    since = agg.snapshot_marker()
+    # live verbucht, während die Quellen geladen werden
+    agg.record_alert("live", now, "0xlive")
+    agg.record_event_time("live", now - timedelta(hours=2))
+    agg.record_disposition("a1", "true_positive")
+
+    class A:
+        def __init__(self, alert_id, ts, address):
+            self.alert_id, self.timestamp, self.address = alert_id, ts, address
+
+    agg.rebuild([A("a1", now - timedelta(hours=1), "0xabc")], {}, [], since=since)
+
+    win = agg.window(now - timedelta(days=1))
+    assert win.alerts == 2 and win.addresses == {"0xabc", "0xlive"}
+    assert win.true_positives == 1
+    assert win.mttd_count == 1 and win.mttd_hours_sum == pytest.approx(2.0)
+
+    # zweiter Backfill ohne neue Ereignisse übernimmt nichts mehr aus dem Live-Stand
+    agg.rebuild([A("a1", now - timedelta(hours=1), "0xabc")], {}, [])
+    assert agg.window(now - timedelta(days=1)).alerts == 1
+
+
+@pytest.mark.asyncio
+async def test_get_kpis_reads_from_primed_buckets(monkeypatch):
+    now = datetime.utcnow()
+
+    class DummyAlert:
+        def __init__(self, alert_id, ts, address=None):
+            self.alert_id = alert_id
+            self.timestamp = ts
+            self.address = address
+
+    class Ann:
+        def __init__(self, disp=None, ev=None):
+            self.disposition = disp
+            self.event_time = ev
+
+    alerts = [
+        DummyAlert("k1", now - timedelta(hours=1), address="0xabc"),
+        DummyAlert("k2", now - timedelta(hours=1), address="0xdef"),
+    ]
+    annotations = {
+        "k1": Ann("false_positive", now - timedelta(hours=5)),
+        "k2": Ann("true_positive", now - timedelta(hours=3)),
+    }
+    cases = [
+        {"created_at": (now - timedelta(hours=80)).isoformat(), "closed_at": (now - timedelta(hours=56)).isoformat()},
+        {"created_at": (now - timedelta(hours=78)).isoformat(), "closed_at": (now - timedelta(hours=6)).isoformat()},
+    ]
+
+    async def _count_hits(addresses):
+        return len({a for a in addresses if a})
+
+    monkeypatch.setattr("app.services.kpi_service.sanctions_repository.count_distinct_hits", _count_hits)
+    # Nach dem Backfill darf get_kpis die Quellen nicht mehr lesen
+    monkeypatch.setattr(
+        "app.services.kpi_service.alert_service.get_recent_alerts",
+        lambda limit=10000: pytest.fail("get_kpis must not reload alerts"),
+    )
+
+    try:
+        kpi_aggregates.rebuild(alerts, annotations, cases)
+        kpi_aggregates.record_alert("k3", now, "0xabc")
+        kpi_aggregates.record_disposition("k3", "false_positive")
+
+        res = await kpi_service.get_kpis(days=7, sla_hours=48)
+    finally:
+        kpi_aggregates.reset()
+
+    assert res.sanctions_hits == 2
+    assert res.fpr == pytest.approx(2 / 3)
+    assert 2.5 <= res.mttd <= 3.5
+    assert 47.5 <= res.mttr <= 48.5
+    assert 0.49 <= res.sla_breach_rate <= 0.51
+
+
+def test_window_addresses_come_from_newest_bucket_index():
+    agg = KpiAggregates(retention_days=30)
+    now = datetime.utcnow()
+    for h in range(0, 24 * 20, 6):
+        agg.record_alert(f"r{h}", now - timedelta(hours=h), "0xrepeat")
+    agg.record_alert("o1", now - timedelta(days=10), "0xolder")
+
+    assert agg.window(now - timedelta(days=1)).addresses == {"0xrepeat"}
+    assert agg.window(now - timedelta(days=15)).addresses == {"0xrepeat", "0xolder"}
+    assert len(agg._address_seen) == 2  # ein Eintrag pro Adresse, nicht pro Bucket
+
+    agg.prune(now + timedelta(days=25))
+    assert agg._address_seen == {"0xrepeat": agg._address_seen["0xrepeat"]}
+
+
+def test_kpi_worker_reconciles_every_minute_by_default(monkeypatch):
+    from app.workers.kpi_worker import KpiWorker
+
+    monkeypatch.delenv("KPI_RECONCILE_INTERVAL", raising=False)
+    assert KpiWorker().interval == 60
+    monkeypatch.setenv("KPI_RECONCILE_INTERVAL", "300")
+    assert KpiWorker().interval == 300
@@ -0,0 +1,236 @@
+"""
+Middleware Pipeline (pure ASGI)
+===============================
+
+- Hooks laufen in fester Reihenfolge mit gemeinsamem RequestContext
+- Header-Präzedenz wie beim bisherigen Middleware-Stack (innere Hooks zuerst)
+- Short-Circuit, Fehlerbehandlung und Streaming ohne Pufferung
+- Benchmark: requests/s und p99 gegenüber BaseHTTPMiddleware-Stack
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.error_handler import ErrorMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.org_access import OrgAccessMiddleware
+from app.middleware.pipeline import MiddlewarePipeline, PipelineHook, ProcessTimeHook, RequestContext
+from app.middleware.prometheus_http import PrometheusHTTPMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.request_size_limit import RequestSizeLimitMiddleware
+from app.middleware.security import GDPRComplianceMiddleware
+from app.middleware.security_headers import SecurityHeadersMiddleware
+
+
+class _Recorder(PipelineHook):
+    def __init__(self, name, log, block=False):
+        super().__init__()
+        self.name = name
+        self.log = log
+        self.block = block
+
+    async def before_request(self, ctx):
+        self.log.append(f"{self.name}:before")
+        ctx.request.state.seen_by = self.name
+        if self.block:
+            return JSONResponse({"blocked": self.name}, status_code=403)
+        return None
+
+    def on_response_start(self, ctx, headers):
+        self.log.append(f"{self.name}:start")
+        headers["X-Layer"] = self.name
+
+    async def after_response(self, ctx):
+        self.log.append(f"{self.name}:after:{ctx.status_code}")
+
+
+def _app(hooks):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return {"ok": True, "seen_by": getattr(request.state, "seen_by", None)}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("kaputt")
+
+    @app.get("/stream")
+    async def stream():
+        async def gen():
+            for i in range(3):
+                yield f"chunk{i};".encode()
+        return StreamingResponse(gen(), media_type="text/plain")
+
+    app.add_middleware(MiddlewarePipeline, hooks=hooks)
+    return app
+
+
+async def _get(app, path):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path)
+
+
+@pytest.mark.asyncio
+async def test_hook_order_header_precedence_and_shared_state():
+    log = []
+    app = _app([_Recorder("outer", log), _Recorder("inner", log)])
+    r = await _get(app, "/ping")
+
+    assert r.json() == {"ok": True, "seen_by": "inner"}
+    # inner setzt zuerst, outer überschreibt – wie verschachtelte Middlewares
+    assert r.headers["X-Layer"] == "outer"
+    assert log == [
+        "outer:before", "inner:before",
+        "inner:start", "outer:start",
+        "inner:after:200", "outer:after:200",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_short_circuit_skips_inner_hooks_and_own_response_hooks():
+    log = []
+    app = _app([_Recorder("outer", log), _Recorder("gate", log, block=True), _Recorder("inner", log)])
+    r = await _get(app, "/ping")
+
+    assert r.status_code == 403 and r.json() == {"blocked": "gate"}
+    assert r.headers["X-Layer"] == "outer"
+    assert log == ["outer:before", "gate:before", "outer:start", "outer:after:403"]
+
+
+@pytest.mark.asyncio
+async def test_errors_are_mapped_and_streaming_passes_through():
+    prom = PrometheusHTTPMiddleware()
+    app = _app([ProcessTimeHook(), prom, ErrorMiddleware(), SecurityHeadersMiddleware()])
+
+    r = await _get(app, "/boom")
+    assert r.status_code == 500 and r.json()["code"] == "internal_error"
+    assert r.headers["X-Frame-Options"] == "DENY" and float(r.headers["X-Process-Time"]) >= 0
+
+    messages, requested = [], []
+
+    async def receive():
+        if requested:
+            await asyncio.Event().wait()  # kein Disconnect während des Streamings
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/stream", "raw_path": b"/stream", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"test")], "client": ("127.0.0.1", 1234), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    bodies = [m["body"] for m in messages if m["type"] == "http.response.body" and m.get("body")]
+    assert bodies == [b"chunk0;", b"chunk1;", b"chunk2;"]
+    assert scope["route"].path == "/stream"
+
+
+@pytest.mark.asyncio
+async def test_existing_middlewares_still_work_standalone():
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, max_bytes=10)
+
+    @app.post("/echo")
+    async def echo():
+        return {"ok": True}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.post("/echo", content=b"x" * 5)).status_code == 200
+        r = await client.post("/echo", content=b"x" * 50)
+    assert r.status_code == 413 and r.json()["max_bytes"] == 10
+
+
+class _LegacyLayer(BaseHTTPMiddleware):
+    """Bisheriges Modell: jeder Hook als eigene BaseHTTPMiddleware-Schicht"""
+
+    def __init__(self, app, hook):
+        super().__init__(app)
+        self.hook = hook
+
+    async def dispatch(self, request, call_next):
+        ctx = RequestContext(request.scope)
+        blocked = await self.hook.before_request(ctx)
+        if blocked is not None:
+            return blocked
+        response = await call_next(request)
+        ctx.status_code = response.status_code
+        self.hook.on_response_start(ctx, response.headers)
+        await self.hook.after_response(ctx)
+        return response
+
+
+def _production_hooks():
+    rate_limit = RateLimitMiddleware(enable_rate_limit=True)
+    rate_limit.role_limits["anonymous"] = 10**9
+    return [
+        ProcessTimeHook(),
+        IdempotencyMiddleware(),
+        rate_limit,
+        OrgAccessMiddleware(),
+        GDPRComplianceMiddleware(),
+        PrometheusHTTPMiddleware(),
+        ErrorMiddleware(),
+        RequestSizeLimitMiddleware(),
+        SecurityHeadersMiddleware(),
+    ]
+
+
+def _trivial_app():
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def _measure(app, n=1500, concurrency=8):
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(100):
+            await client.get("/ping")
+
+        async def worker(count):
+            for _ in range(count):
+                t0 = time.perf_counter()
+                r = await client.get("/ping")
+                latencies.append(time.perf_counter() - t0)
+                assert r.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[int(len(latencies) * 0.99) - 1]
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_pipeline_throughput_vs_base_http_stack():
+    """Benchmark: 9 Middlewares als BaseHTTPMiddleware-Stack vs. eine ASGI-Pipeline"""
+    legacy = _trivial_app()
+    for hook in reversed(_production_hooks()):
+        legacy.add_middleware(_LegacyLayer, hook=hook)
+    pipeline = _trivial_app()
+    pipeline.add_middleware(MiddlewarePipeline, hooks=_production_hooks())
+
+    results = {"BaseHTTPMiddleware stack": await _measure(legacy), "ASGI pipeline": await _measure(pipeline)}
+
+    print("\n📊 Middleware overhead, trivial endpoint (1500 requests, 8 concurrent):")
+    for label, (rps, p99) in results.items():
+        print(f"   {label:<26} {rps:>7.0f} req/s   p99 {p99 * 1000:.2f} ms")
+
+    (legacy_rps, legacy_p99), (pipe_rps, pipe_p99) = results.values()
+    assert pipe_rps > legacy_rps * 1.2
+    assert pipe_p99 < legacy_p99
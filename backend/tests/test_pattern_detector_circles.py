@@ -0,0 +1,238 @@
+"""
+Circle Detection (in-memory)
+============================
+
+- Enumeration entspricht der bisherigen Cypher-Semantik (einfache Kreise,
+  Wert-Filter pro Kante, parallele Kanten getrennt)
+- Zeitlich geordnete Kreise (temporal) und Seed-Filter
+- Ego-Subgraph wird levelweise und parametrisiert geladen
+- Benchmark: Hub-Adressen bleiben im Zeitbudget
+"""
+
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.analytics.pattern_detector import PatternDetector, _enumerate_cycles
+
+
+def _random_edges(n_nodes=12, n_edges=40, seed=3):
+    rng = random.Random(seed)
+    edges = []
+    for i in range(n_edges):
+        a, b = rng.sample(range(n_nodes), 2)
+        edges.append((f"0x{a:02d}", f"0x{b:02d}", round(rng.uniform(0.1, 2.0), 2), float(rng.randrange(100)), f"tx{i}", None))
+    # parallele Kante
+    edges.append((edges[0][0], edges[0][1], 5.0, 50.0, "tx-par", None))
+    return edges
+
+
+def _reference_cycles(edges, min_len, max_len, min_value=0.0):
+    """Naive Enumeration aller einfachen Kreise (Semantik des alten Cypher-Queries)"""
+    out = {}
+    for i, e in enumerate(edges):
+        if e[2] >= min_value and e[0] != e[1]:
+            out.setdefault(e[0], []).append(i)
+    found = set()
+
+    def dfs(start, node, path, visited):
+        for i in out.get(node, []):
+            v = edges[i][1]
+            if v == start and min_len <= len(path) + 1 <= max_len:
+                cycle = tuple(path + [i])
+                pivot = cycle.index(min(cycle))
+                found.add(cycle[pivot:] + cycle[:pivot])
+            elif v not in visited and len(path) + 1 < max_len:
+                dfs(start, v, path + [i], visited | {v})
+
+    for start in out:
+        dfs(start, start, [], {start})
+    return found
+
+
+def _time_respecting(edges, cycle):
+    times = [edges[i][3] for i in cycle]
+    return any(all(times[(r + k) % len(times)] <= times[(r + k + 1) % len(times)] for k in range(len(times) - 1))
+               for r in range(len(times)))
+
+
+def _keys(cycles, edges):
+    index = {(e[0], e[1], e[4]): i for i, e in enumerate(edges)}
+    keys = set()
+    for c in cycles:
+        cycle = tuple(index[(c["addresses"][k], c["addresses"][k + 1], c["tx_hashes"][k])] for k in range(c["length"]))
+        pivot = cycle.index(min(cycle))
+        keys.add(cycle[pivot:] + cycle[:pivot])
+    return keys
+
+
+def test_enumeration_matches_reference_semantics():
+    edges = _random_edges()
+    expected = _reference_cycles(edges, 2, 6)
+    cycles, info = _enumerate_cycles(edges, 2, 6, temporal=False, max_results=100_000, seeds=None)
+    assert len(expected) > 20
+    assert _keys(cycles, edges) == expected
+    assert info["found"] == len(expected) and not info["truncated"]
+    assert [c["total_value"] for c in cycles] == sorted((c["total_value"] for c in cycles), reverse=True)
+    for c in cycles:
+        assert c["addresses"][0] == c["addresses"][-1] and len(c["values"]) == c["length"]
+
+
+def test_temporal_cycles_are_the_time_respecting_subset():
+    edges = _random_edges(seed=9)
+    expected = {c for c in _reference_cycles(edges, 2, 7) if _time_respecting(edges, c)}
+    cycles, _ = _enumerate_cycles(edges, 2, 7, temporal=True, max_results=100_000, seeds=None)
+    assert expected and _keys(cycles, edges) == expected
+    for c in cycles:
+        assert c["addresses"][0] == edges[[e[4] for e in edges].index(c["tx_hashes"][0])][0]
+
+
+def test_seed_filter_and_top_k():
+    edges = _random_edges()
+    seed = edges[0][0]
+    expected = {c for c in _reference_cycles(edges, 2, 6) if any(edges[i][0] == seed for i in c)}
+    cycles, info = _enumerate_cycles(edges, 2, 6, temporal=False, max_results=100_000, seeds={seed})
+    assert _keys(cycles, edges) == expected
+
+    top, _ = _enumerate_cycles(edges, 2, 6, temporal=False, max_results=3, seeds={seed})
+    assert [c["total_value"] for c in top] == [c["total_value"] for c in cycles[:3]]
+
+
+class _FakeNeo4j:
+    """Beantwortet die parametrisierten Subgraph-Queries aus einer Kantenliste"""
+
+    def __init__(self, edges):
+        self.by_address = {}
+        for e in edges:
+            self.by_address.setdefault(e[0], []).append(e)
+            if e[1] != e[0]:
+                self.by_address.setdefault(e[1], []).append(e)
+        self.calls = []
+
+    @asynccontextmanager
+    async def get_session(self):
+        yield self
+
+    async def run(self, query, params):
+        self.calls.append((query, params))
+        if "INCLUDES" in query:
+            return _Rows([{"address": "0x00"}])
+        rows = []
+        for addr in params.get("addresses", []):
+            rels = [e for e in self.by_address.get(addr, []) if e[2] >= params["min_value"]]
+            rels.sort(key=lambda e: -e[2])
+            rows.append({
+                "address": addr,
+                "degree": len(rels),
+                "edges": [
+                    {"from": e[0], "to": e[1], "value": e[2], "timestamp": e[3], "tx_hash": e[4]}
+                    for e in rels[:params["fanout"]]
+                ],
+            })
+        return _Rows(rows)
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        self._it = iter(self.rows)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.asyncio
+async def test_detect_circles_fetches_bounded_ego_subgraph():
+    edges = _random_edges()
+    fake = _FakeNeo4j(edges)
+    detector = PatternDetector()
+    detector.client = fake
+
+    result = await detector.detect_circles(trace_id="t-1", min_circle_length=2, max_circle_length=6, temporal=False)
+
+    expected = {c for c in _reference_cycles(edges, 2, 6) if any(edges[i][0] == "0x00" for i in c)}
+    assert _keys(result["detected"], edges) == expected
+    level_calls = [p for q, p in fake.calls if "UNWIND" in q]
+    assert len(level_calls) <= 3  # Radius (6 + 1) // 2
+    assert level_calls[0]["addresses"] == ["0x00"]
+    assert all("trace_id" not in q for q, _p in fake.calls[1:])
+    assert result["statistics"]["truncated"] is False
+
+
+@pytest.mark.asyncio
+async def test_odd_length_circle_through_seed_is_found():
+    # Dreieck: die Schlusskante 0xb -> 0xc liegt zwischen zwei Knoten im Abstand 1
+    edges = [("0xa", "0xb", 1.0, 1.0, "t1", None), ("0xb", "0xc", 1.0, 2.0, "t2", None),
+             ("0xc", "0xa", 1.0, 3.0, "t3", None)]
+    fake = _FakeNeo4j(edges)
+    detector = PatternDetector()
+    detector.client = fake
+
+    result = await detector.detect_circles(address="0xa", min_circle_length=3, max_circle_length=3)
+
+    assert result["count"] == 1 and result["detected"][0]["addresses"] == ["0xa", "0xb", "0xc", "0xa"]
+    assert len([q for q, _p in fake.calls if "UNWIND" in q]) == 2
+
+
+class _TickClock:
+    """Logische Uhr: jeder monotonic()-Aufruf rückt um `tick` Sekunden vor"""
+
+    def __init__(self, tick):
+        self.tick = tick
+        self.calls = 0
+
+    def monotonic(self):
+        self.calls += 1
+        return self.calls * self.tick
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_hub_address_stays_within_time_budget(monkeypatch):
+    """Benchmark: dichter Hub (5k Kanten) – Latenz durch Fanout-Cap und Zeitbudget begrenzt"""
+    rng = random.Random(5)
+    hub = "0xhub"
+    edges = []
+    for i in range(2500):
+        edges.append((hub, f"0x{i}", 1.0, float(i), f"out{i}", None))
+        edges.append((f"0x{rng.randrange(2500)}", hub, 1.0, float(i + 1), f"in{i}", None))
+    for i in range(5000):
+        edges.append((f"0x{rng.randrange(2500)}", f"0x{rng.randrange(2500)}", 1.0, float(rng.randrange(5000)), f"x{i}", None))
+
+    detector = PatternDetector()
+    detector.client = _FakeNeo4j(edges)
+    timings = []
+    for budget in (0.25, 0.5, 1.0):
+        start = time.perf_counter()
+        result = await detector.detect_circles(
+            address=hub, min_circle_length=3, max_circle_length=10, time_budget_s=budget, max_fanout=500
+        )
+        timings.append((budget, time.perf_counter() - start, result["statistics"]))
+
+    print("\n📊 Circle detection on a 5k-edge hub (max length 10):")
+    for budget, elapsed, stats in timings:
+        print(
+            f"   budget {budget:.2f}s: {elapsed * 1000:.0f} ms, {stats['subgraph_edges']} edges, "
+            f"{stats['cycles_found']} cycles, truncated={stats['truncated_reason']}"
+        )
+
+    assert all(stats["truncated"] for _b, _e, stats in timings)
+
+    # Budget-Einhaltung mit logischer Uhr prüfen (jeder Aufruf = 10 ms), unabhängig von der Maschinenlast
+    for budget in (0.25, 0.5, 1.0):
+        clock = _TickClock(tick=0.01)
+        monkeypatch.setattr(sys.modules[PatternDetector.__module__], "time", clock)
+        result = await detector.detect_circles(
+            address=hub, min_circle_length=3, max_circle_length=10, time_budget_s=budget, max_fanout=500
+        )
+        assert result["statistics"]["elapsed_ms"] <= budget * 1000 + 20
+        assert clock.calls * clock.tick <= budget + 0.03
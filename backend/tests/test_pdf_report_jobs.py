@@ -0,0 +1,222 @@
+"""
+PDF-Reports: Off-Loop-Rendering, Cache, Jobs
+============================================
+
+- Cache-Key aus Trace-Daten + Template-Version, berechnet außerhalb des Event-Loops
+- Identische Reports werden einmal gerendert (Cache + geteiltes In-Flight-Rendering)
+- Job-Queue mit Status-Polling (queued/running/done/failed) und Begrenzung
+- Große Transaktionstabellen werden seitenweise gerendert
+- Event-Loop bleibt während des Renderns reaktionsfähig
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.reports import pdf_generator as pdf_module
+from app.reports.pdf_generator import PDFReportGenerator, report_cache_key
+from app.reports.report_jobs import JOB_DONE, JOB_FAILED, ReportJobQueue, ReportQueueFull
+
+pytestmark = pytest.mark.skipif(not pdf_module.REPORTLAB_AVAILABLE, reason="reportlab not installed")
+
+
+def _trace(n_edges):
+    return {
+        "source_address": "0x742d35Cc6634C0532925a3b844Bc454e4438f44e",
+        "direction": "forward",
+        "taint_model": "proportional",
+        "max_depth": 5,
+        "nodes": [{"address": f"0x{i:040x}", "taint_received": 0.5, "risk_level": "HIGH", "labels": ["Mixer"]}
+                  for i in range(5)],
+        "edges": [{"from": f"0x{i:040x}", "to": f"0x{i + 1:040x}", "value": 1.25, "taint": 0.5}
+                  for i in range(n_edges)],
+    }
+
+
+def _page_count(pdf_bytes):
+    return pdf_bytes.count(b"/Type /Page\n") or pdf_bytes.count(b"/Type /Page ")
+
+
+class _CountingRender:
+    """Render-Funktion für den Thread-Modus, zählt Aufrufe"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, report_id):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError("render failed")
+        return f"report {report_id}".encode(), {"report_id": report_id}
+
+
+def test_cache_key_covers_data_findings_and_template_version(monkeypatch):
+    data = _trace(3)
+    key = report_cache_key("t1", data)
+
+    assert key == report_cache_key("t1", {k: data[k] for k in reversed(list(data))})
+    assert key != report_cache_key("t2", data)
+    assert key != report_cache_key("t1", data, {"summary": "x"})
+    assert key != report_cache_key("t1", {**data, "max_depth": 6})
+    monkeypatch.setattr(pdf_module, "TEMPLATE_VERSION", "next")
+    assert key != report_cache_key("t1", data)
+
+
+@pytest.mark.asyncio
+async def test_cache_key_is_hashed_off_the_event_loop(monkeypatch):
+    queue = ReportJobQueue(workers=0, max_pending=4)
+    monkeypatch.setattr(pdf_module, "report_jobs", queue)
+    monkeypatch.setattr(pdf_module, "_render_trace_report", lambda trace_id, *_: (b"pdf", {"report_id": trace_id}))
+    threads = []
+    original = pdf_module.report_cache_key
+
+    def recording_key(*args):
+        threads.append(threading.get_ident())
+        return original(*args)
+
+    monkeypatch.setattr(pdf_module, "report_cache_key", recording_key)
+    generator = PDFReportGenerator()
+    data = _trace(50)
+
+    await generator.generate_trace_report("t1", data)
+    job = await generator.submit_trace_report("t1", data)
+
+    assert len(threads) == 2 and threading.get_ident() not in threads
+    assert job.cached is True and job.cache_key == original("t1", data)
+
+
+@pytest.mark.asyncio
+async def test_identical_reports_render_once_and_are_cached():
+    queue = ReportJobQueue(workers=0, max_pending=4)
+    render = _CountingRender(delay=0.1)
+
+    results = await asyncio.gather(*[queue.render("k1", render, "t1") for _ in range(5)])
+    again = await queue.render("k1", render, "t1")
+
+    assert render.calls == 1
+    assert all(r == results[0] for r in results) and again == results[0]
+    assert queue.stats()["pending"] == 0 and queue.cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_status_polling_failures_and_bound():
+    queue = ReportJobQueue(workers=0, max_pending=1)
+    job = queue.submit("t1", "k1", _CountingRender(delay=0.05), "t1")
+    assert queue.status(job.job_id)["status"] in ("queued", "running")
+    assert queue.result(job.job_id) is None
+
+    with pytest.raises(ReportQueueFull):
+        queue.submit("t2", "k2", _CountingRender(), "t2")
+
+    while queue.status(job.job_id)["status"] not in (JOB_DONE, JOB_FAILED):
+        await asyncio.sleep(0.01)
+    assert queue.status(job.job_id)["status"] == JOB_DONE
+    assert queue.result(job.job_id)[0] == b"report t1"
+
+    hit = queue.submit("t1", "k1", _CountingRender(), "t1")
+    assert hit.status == JOB_DONE and hit.cached is True
+
+    failed = queue.submit("t3", "k3", _CountingRender(fail=True), "t3")
+    while queue.status(failed.job_id)["status"] not in (JOB_DONE, JOB_FAILED):
+        await asyncio.sleep(0.01)
+    assert queue.status(failed.job_id)["error"] == "render failed"
+    assert queue.status("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_generator_uses_process_pool_and_chunks_large_tables(monkeypatch):
+    queue = ReportJobQueue(workers=1, max_pending=4)
+    monkeypatch.setattr(pdf_module, "report_jobs", queue)
+    generator = PDFReportGenerator()
+    try:
+        small_pdf, manifest = await generator.generate_trace_report("t-small", _trace(10))
+        large_pdf, _ = await generator.generate_trace_report("t-large", _trace(400))
+        cached_pdf, _ = await generator.generate_trace_report("t-large", _trace(400))
+    finally:
+        queue.shutdown()
+
+    assert large_pdf.startswith(b"%PDF") and cached_pdf is large_pdf
+    assert manifest["report_id"] == "t-small" and manifest["metadata"]["template_version"] == pdf_module.TEMPLATE_VERSION
+    # 400 Zeilen à PAGE_ROWS pro Seite statt einer abgeschnittenen Tabelle
+    assert _page_count(large_pdf) - _page_count(small_pdf) >= 400 // pdf_module.PAGE_ROWS - 1
+
+
+def test_transaction_rows_are_capped_with_note(monkeypatch):
+    monkeypatch.setattr(pdf_module, "MAX_TRANSACTION_ROWS", 100)
+    generator = PDFReportGenerator()
+
+    flowables = generator._build_transaction_details(_trace(250))
+    tables = [f for f in flowables if isinstance(f, pdf_module.Table)]
+
+    assert [len(t._cellvalues) - 1 for t in tables] == [40, 40, 20]
+    assert "Showing 100 of 250 transactions" in flowables[-2].text
+
+
+def test_worker_count_from_env_honours_explicit_zero(monkeypatch):
+    monkeypatch.setenv("REPORT_RENDER_WORKERS", "0")
+    assert ReportJobQueue().workers == 0
+    monkeypatch.setenv("REPORT_RENDER_WORKERS", "3")
+    assert ReportJobQueue().workers == 3
+    monkeypatch.delenv("REPORT_RENDER_WORKERS")
+    assert ReportJobQueue().workers >= 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_event_loop_latency_while_rendering():
+    """Benchmark: max. Event-Loop-Verzögerung beim Rendern eines großen Reports (inline vs. Pool)"""
+    data = _trace(3000)
+
+    async def max_gap(coro):
+        gaps, stop = [], asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        started, ticks = time.perf_counter(), len(gaps)
+        await coro
+        elapsed, ticks = time.perf_counter() - started, len(gaps) - ticks
+        stop.set()
+        await tick
+        return max(gaps), elapsed, ticks
+
+    async def inline():
+        # altes Verhalten: Rendering direkt im Coroutine-Kontext
+        PDFReportGenerator().render_trace_report("bench", data)
+
+    queue = ReportJobQueue(workers=1, max_pending=4)
+    try:
+        await queue.render("warmup", pdf_module._render_trace_report, "warmup", _trace(1))
+        inline_gap, inline_time, inline_ticks = await max_gap(inline())
+        pool_gap, pool_time, pool_ticks = await max_gap(
+            queue.render(report_cache_key("bench", data), pdf_module._render_trace_report, "bench", data)
+        )
+        cached_gap, cached_time, _ = await max_gap(
+            queue.render(report_cache_key("bench", data), pdf_module._render_trace_report, "bench", data)
+        )
+    finally:
+        queue.shutdown()
+
+    print("\n📊 PDF report (3000 transactions), max event-loop stall:")
+    print(f"   inline:  {inline_gap * 1000:8.1f} ms stall, {inline_time:.2f}s render")
+    print(f"   pool:    {pool_gap * 1000:8.1f} ms stall, {pool_time:.2f}s render")
+    print(f"   cached:  {cached_gap * 1000:8.1f} ms stall, {cached_time * 1000:.1f} ms")
+
+    # Zählbar statt Zeitverhältnisse: inline kommt der Ticker nicht zum Zug, mit Pool läuft er weiter;
+    # der zweite Render ist ein Cache-Treffer
+    assert inline_ticks <= 1 and pool_ticks >= 2
+    assert queue.stats()["cache"]["hits"] == 1 and queue.stats()["cache"]["misses"] == 2
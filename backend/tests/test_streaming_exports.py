@@ -0,0 +1,138 @@
+"""
+Streaming Exports (CSV/JSON)
+============================
+
+- Generator-Exporter liefern denselben Inhalt wie die String-APIs
+- Graph-Format (Knotenliste mit id, source/target) wird unterstützt
+- StreamingResponse mit optionalem gzip on the fly
+- Speicherbedarf bleibt unabhängig von der Exportgröße begrenzt
+"""
+
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.cases.models import Entity
+from app.cases.service import CaseService
+from app.exports.csv_exporter import csv_exporter
+from app.exports.json_exporter import json_exporter
+from app.exports.streaming import CHUNK_SIZE, streaming_export
+
+
+def _trace(n_edges):
+    return {
+        "trace_id": "t1",
+        "nodes": {f"0x{i:040x}": {"taint_received": 0.5, "hop_distance": 1, "labels": ["a", "b"]} for i in range(3)},
+        "edges": [
+            {"from_address": "0xa", "to_address": "0xb", "tx_hash": f"0x{i:064x}", "value": 1.5,
+             "taint_value": 0.25, "timestamp": "2026-01-01T00:00:00", "hop": 1}
+            for i in range(n_edges)
+        ],
+    }
+
+
+def _edge_stream(n):
+    """Kanten als Generator, damit nur die Exportseite Speicher belegt"""
+    for i in range(n):
+        yield {"source": "0xa", "target": "0xb", "tx": f"0x{i:064x}", "value": 1.0, "taint": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_csv_stream_matches_string_export_and_accepts_graph_format():
+    data = _trace(5000)
+    chunks = list(csv_exporter.iter_trace(data))
+    text = await csv_exporter.export_trace(data)
+
+    assert "".join(chunks) == text and len(chunks) > 3
+    assert max(len(c) for c in chunks) < CHUNK_SIZE + 1024
+    nodes_part, edges_part = text.split("\n# EDGES\n")
+    edges = list(csv.reader(io.StringIO(edges_part)))
+    assert edges[0][:3] == ["From", "To", "TX Hash"] and len(edges) == 5001
+    assert list(csv.reader(io.StringIO(nodes_part.split("# NODES\n")[1])))[1][4] == "a, b"
+
+    graph = {"nodes": [{"id": "0xa", "labels": ["x"], "taint": 0.7}], "edges": list(_edge_stream(2))}
+    rows = list(csv.reader(io.StringIO("".join(csv_exporter.iter_trace(graph)))))
+    assert rows[2][:2] == ["0xa", "0.7"] and rows[-1][:3] == ["0xa", "0xb", f"0x{1:064x}"]
+
+
+@pytest.mark.asyncio
+async def test_json_streams_are_valid_json():
+    data = _trace(3000)
+    exported = json.loads(await json_exporter.export_trace(data))
+    assert exported["export_format"] == "json" and exported["trace_data"] == data
+
+    graph = json.loads("".join(json_exporter.iter_graph({"nodes": [{"id": "0xa"}], "edges": _edge_stream(3)})))
+    assert graph["nodes"][0]["id"] == "0xa" and len(graph["links"]) == 3
+    assert json.loads("".join(json_exporter.iter_trace({})))["trace_data"] == {}
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_with_gzip_and_case_csv():
+    svc = CaseService()
+    svc._entities_by_case["c1"] = [Entity(address=f"0x{i}", chain="ethereum", labels={"tag": "l"}) for i in range(3)]
+    app = FastAPI()
+
+    @app.get("/trace.csv")
+    async def trace_csv(compression: str = "none"):
+        return streaming_export(csv_exporter.iter_trace(_trace(20000)), "text/csv", "trace.csv", compression)
+
+    @app.get("/case.csv")
+    async def case_csv():
+        return streaming_export(svc.iter_csv("c1", "entities"), "text/csv", "case.csv", "gzip")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        plain = await client.get("/trace.csv")
+        zipped = await client.get("/trace.csv", params={"compression": "gzip"}, headers={"Accept-Encoding": "identity"})
+        async with client.stream("GET", "/case.csv") as r:
+            raw = b"".join([chunk async for chunk in r.aiter_raw()])
+
+    assert "content-length" not in plain.headers
+    assert plain.headers["content-disposition"] == 'attachment; filename="trace.csv"'
+    assert zipped.headers["content-encoding"] == "gzip"
+    # httpx dekomprimiert transparent
+    assert zipped.text == plain.text == await csv_exporter.export_trace(_trace(20000))
+    case_rows = list(csv.reader(io.StringIO(gzip.decompress(raw).decode())))
+    assert case_rows[0] == ["address", "chain", "labels"] and case_rows[3] == ["0x2", "ethereum", '{"tag": "l"}']
+    assert svc.export_csv("c1")["entities_csv"] == gzip.decompress(raw).decode()
+
+
+def _peak_while_streaming(chunks):
+    tracemalloc.start()
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, total
+
+
+@pytest.mark.benchmark
+def test_export_memory_bounded_regardless_of_size():
+    """Benchmark: Peak-Speicher beim Streamen von 10k vs. 200k Kanten (CSV, JSON, CSV+gzip)"""
+    from app.exports.streaming import iter_gzip
+
+    results = []
+    for n in (10_000, 200_000):
+        csv_peak, csv_bytes = _peak_while_streaming(csv_exporter.iter_trace({"nodes": [], "edges": _edge_stream(n)}))
+        json_peak, _ = _peak_while_streaming(json_exporter.iter_graph({"nodes": [], "edges": _edge_stream(n)}))
+        gz_peak, gz_bytes = _peak_while_streaming(
+            iter_gzip(csv_exporter.iter_trace({"nodes": [], "edges": _edge_stream(n)}))
+        )
+        results.append((n, csv_bytes, csv_peak, json_peak, gz_peak, gz_bytes))
+
+    print("\n📊 Streaming export peak memory (tracemalloc):")
+    for n, csv_bytes, csv_peak, json_peak, gz_peak, gz_bytes in results:
+        print(f"   {n:>7} edges: output {csv_bytes / 1e6:6.1f} MB csv / {gz_bytes / 1e6:5.1f} MB gz, "
+              f"peak csv {csv_peak / 1e6:.2f} MB, json {json_peak / 1e6:.2f} MB, csv+gzip {gz_peak / 1e6:.2f} MB")
+
+    small, large = results
+    assert large[1] > small[1] * 15
+    for peak_small, peak_large in zip(small[2:5], large[2:5]):
+        assert peak_large < 2_000_000
+        assert peak_large < peak_small * 1.5 + 200_000
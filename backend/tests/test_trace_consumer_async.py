@@ -0,0 +1,229 @@
+"""
+Trace Consumer (async, gebatcht)
+================================
+
+- Offsets werden pro Partition nur bis zum kleinsten offenen Offset committed
+- Persistierung per UNWIND-Batches statt einem Round Trip pro Knoten/Kante
+- Fehlgeschlagene Persistierung wird wiederholt, Commit erst danach
+- Benchmark: Traces/Minute und parallel laufende Traces skalieren mit der Nebenläufigkeit
+"""
+
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+import app.workers.trace_consumer as trace_consumer
+from app.workers.trace_consumer import TraceConsumerWorker, _OffsetTracker
+
+
+class _Msg:
+    def __init__(self, partition, offset, payload):
+        self._partition = partition
+        self._offset = offset
+        self._value = json.dumps(payload).encode()
+
+    def topic(self):
+        return "trace.requests"
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return None
+
+    def value(self):
+        return self._value
+
+    def error(self):
+        return None
+
+
+class _FakeConsumer:
+    """Kafka-Stand-in: Round-Robin über Partitionen, zeichnet Commits auf"""
+
+    def __init__(self, messages):
+        self.queue = list(messages)
+        self.commits = []
+
+    def subscribe(self, topics):
+        pass
+
+    def consume(self, num_messages, timeout):
+        if not self.queue:
+            time.sleep(0.001)
+        batch, self.queue = self.queue[:num_messages], self.queue[num_messages:]
+        return batch
+
+    def commit(self, offsets=None, asynchronous=False):
+        for tp in offsets:
+            self.commits.append((tp.partition, tp.offset))
+
+    def close(self):
+        pass
+
+    def committed(self, partition):
+        return max((o for p, o in self.commits if p == partition), default=None)
+
+
+class _FakeNeo4j:
+    """Neo4j-Stand-in mit fester Latenz pro Round Trip"""
+
+    def __init__(self, latency=0.0, fail_first=0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = []
+
+    @asynccontextmanager
+    async def get_session(self):
+        yield self
+
+    async def run(self, query, **params):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise RuntimeError("neo4j unavailable")
+        await asyncio.sleep(self.latency)
+        self.calls.append((query, params))
+
+
+class _Result:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def model_dump(self):
+        return dict(self.payload)
+
+
+def _trace_result(address, n_nodes, n_edges):
+    nodes = [{"address": f"0xN{i}", "taint_received": 0.1} for i in range(n_nodes)]
+    edges = [
+        {"from": f"0xN{i % n_nodes}", "to": f"0xN{(i + 1) % n_nodes}", "tx_hash": f"0x{i}", "value": 1.0}
+        for i in range(n_edges)
+    ]
+    return {"source_address": address, "direction": "forward", "nodes": nodes, "edges": edges}
+
+
+def _worker(monkeypatch, neo4j, trace_latency=0.0, n_nodes=10, n_edges=20, concurrency=4):
+    monkeypatch.setattr(trace_consumer, "neo4j_client", neo4j)
+    worker = TraceConsumerWorker(group_id="test")
+    worker.concurrency = concurrency
+    worker.backoff_base = 0.001
+
+    async def _trace(address, direction, max_depth, taint_model):
+        await asyncio.sleep(trace_latency)
+        return _Result(_trace_result(address, n_nodes, n_edges))
+
+    worker.tracer.trace = _trace
+    return worker
+
+
+async def _run_until_committed(worker, consumer, expected):
+    worker.consumer = consumer
+    task = asyncio.create_task(worker.run_async())
+    start = time.perf_counter()
+    while any(consumer.committed(p) != off for p, off in expected.items()):
+        assert time.perf_counter() - start < 30, consumer.commits
+        await asyncio.sleep(0.002)
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    await task
+    return elapsed
+
+
+def test_offset_tracker_commits_only_contiguous_prefix():
+    tracker = _OffsetTracker()
+    for off in (10, 11, 12):
+        tracker.add(("t", 0), off)
+    tracker.add(("t", 1), 5)
+
+    assert tracker.complete(("t", 0), 11) == 10  # 10 noch offen -> kein Fortschritt über 10
+    assert tracker.complete(("t", 0), 11) is None
+    assert tracker.complete(("t", 0), 10) == 12
+    assert tracker.complete(("t", 1), 5) == 6
+    assert tracker.complete(("t", 0), 12) == 13
+    assert tracker.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_persistence_uses_unwind_batches(monkeypatch):
+    neo4j = _FakeNeo4j()
+    worker = _worker(monkeypatch, neo4j)
+    worker.persist_batch_size = 1000
+    invalidated = []
+
+    async def record_invalidation(addresses):
+        invalidated.extend(addresses)
+
+    monkeypatch.setattr(TraceConsumerWorker, "_invalidate_hot_paths", staticmethod(record_invalidation))
+
+    result = _trace_result("0xSRC", 2500, 5000)
+    result.update(trace_id="t-1", processed_at="2026-01-01T00:00:00")
+    await worker._save_trace_to_neo4j("t-1", result)
+
+    kinds = [("UNWIND" in q, len(p.get("rows", []))) for q, p in neo4j.calls]
+    assert kinds[0] == (False, 0)
+    assert kinds[1:] == [(True, 1000), (True, 1000), (True, 500)] + [(True, 1000)] * 5
+    assert "INCLUDES" in neo4j.calls[1][0] and "TRANSACTION" in neo4j.calls[-1][0]
+    assert neo4j.calls[4][1]["rows"][0]["from_addr"] == "0xn0"
+    assert set(invalidated) == {f"0xn{i}" for i in range(2500)}
+
+
+@pytest.mark.asyncio
+async def test_offsets_committed_only_after_persistence(monkeypatch):
+    neo4j = _FakeNeo4j(fail_first=1)
+    worker = _worker(monkeypatch, neo4j)
+    messages = [_Msg(0, off, {"trace_id": f"t{off}", "address": "0xA"}) for off in range(3)]
+    consumer = _FakeConsumer(messages)
+
+    await _run_until_committed(worker, consumer, {0: 3})
+
+    # Ein Fehlversuch, danach alle drei Traces persistiert
+    persisted = {p["trace_id"] for q, p in neo4j.calls if "MERGE (t:Trace" in q}
+    assert persisted == {"t0", "t1", "t2"}
+    assert worker.processed_count == 3 and worker.error_count == 0
+    assert all(off <= 3 for _p, off in consumer.commits)
+    assert [off for _p, off in consumer.commits] == sorted(off for _p, off in consumer.commits)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_trace_throughput_scales_with_concurrency(monkeypatch):
+    """Benchmark: 48 Traces (4 Partitionen), 40 ms Trace-I/O, 2 ms pro Neo4j-Round-Trip"""
+    n_nodes, n_edges, batch = 500, 1500, 1000
+    rows = []
+    for concurrency in (1, 4, 16):
+        neo4j = _FakeNeo4j(latency=0.002)
+        worker = _worker(monkeypatch, neo4j, trace_latency=0.04, n_nodes=n_nodes, n_edges=n_edges,
+                         concurrency=concurrency)
+        worker.persist_batch_size = batch
+        trace, active = worker.tracer.trace, {"now": 0, "peak": 0}
+
+        async def counted(**kwargs):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            try:
+                return await trace(**kwargs)
+            finally:
+                active["now"] -= 1
+
+        worker.tracer.trace = counted
+        messages = [_Msg(i % 4, i // 4, {"trace_id": f"t{i}", "address": f"0x{i}"}) for i in range(48)]
+        elapsed = await _run_until_committed(worker, _FakeConsumer(messages), {p: 12 for p in range(4)})
+        rows.append((concurrency, 48 / elapsed * 60, len(neo4j.calls) / 48, active["peak"]))
+
+    per_row_trips = 1 + n_nodes + n_edges
+    print(f"\n📊 Trace consumer, {n_nodes} nodes / {n_edges} edges per trace:")
+    for concurrency, per_minute, trips, peak in rows:
+        print(f"   concurrency {concurrency:>2}: {per_minute:>6.0f} traces/min, {peak:>2} traces in flight, "
+              f"{trips:.0f} Neo4j round trips/trace (per-row writes: {per_row_trips})")
+
+    # Parallelität exakt über die Zahl laufender Traces, Durchsatz mit großzügiger Marge
+    # (ideal 4x bzw. 16x; die 40 ms Trace-I/O dominieren, CPU-Last im Gesamtlauf kostet wenig)
+    assert [peak for *_rest, peak in rows] == [1, 4, 16]
+    assert all(trips < per_row_trips / 100 for _c, _pm, trips, _p in rows)
+    assert rows[1][1] > rows[0][1] * 1.5 and rows[2][1] > rows[0][1] * 2
@@ -0,0 +1,196 @@
+"""
+Universal Screening: geteilte Fetches, Activity-Cache, Bulk
+===========================================================
+
+- Exposure (chain-unabhängig) einmal pro Adresse und Request
+- Activity-Summaries pro (Chain, Adresse) mit TTL gecacht, Ingest invalidiert
+- Bulk-Screening dedupliziert Adressen und begrenzt Fetches pro Chain
+- Compliance-Ergebnisse des Services (Score 0-100, categories) werden normalisiert
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import universal_screening as us_module
+from app.services.compliance_service import ComplianceService
+from app.services.universal_screening import (
+    ChainActivityCache,
+    RiskLevel,
+    UniversalScreeningService,
+    _summarize_activity,
+)
+
+CHAINS = ["ethereum", "polygon", "arbitrum"]
+
+
+class _FakeEngine:
+    """Multi-Chain-Engine mit Latenz; zählt Fetches und parallele Requests pro Chain"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = defaultdict(int)
+        self.active = defaultdict(int)
+        self.peak = defaultdict(int)
+
+    async def get_address_transactions_paged(self, chain_id, address, limit=100):
+        self.calls[chain_id] += 1
+        self.active[chain_id] += 1
+        self.peak[chain_id] = max(self.peak[chain_id], self.active[chain_id])
+        try:
+            await asyncio.sleep(self.delay)
+            return [
+                {"from": address, "to": f"0x{i:040x}", "value": "2", "timestamp": 1767225600 + i * 60}
+                for i in range(5)
+            ]
+        finally:
+            self.active[chain_id] -= 1
+
+
+class _FakeExposure:
+    def __init__(self):
+        self.calls = 0
+
+    async def calculate(self, address, max_hops=None, context=None):
+        self.calls += 1
+        return None
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    engine, exposure = _FakeEngine(), _FakeExposure()
+    monkeypatch.setattr(us_module, "multi_chain_engine", engine)
+    monkeypatch.setattr(us_module, "exposure_service", exposure)
+    monkeypatch.setattr(us_module, "compliance_service", ComplianceService())
+    return engine, exposure
+
+
+def _service(ttl=300.0):
+    service = UniversalScreeningService()
+    service.activity_cache = ChainActivityCache(ttl_seconds=ttl)
+    service.supported_chains = list(CHAINS)
+    service._initialized = True
+    return service
+
+
+@pytest.mark.asyncio
+async def test_shared_profile_activity_cache_and_invalidation(fakes):
+    engine, exposure = fakes
+    service = _service()
+    address = "0xAbC0000000000000000000000000000000000001"
+
+    first = await service.screen_address_universal(address)
+    second = await service.screen_address_universal(address.lower())
+
+    assert exposure.calls == 2  # einmal pro Request, nicht pro Chain
+    assert dict(engine.calls) == {chain: 1 for chain in CHAINS}
+    assert first.screened_chains == CHAINS and second.total_transactions == 15
+    result = first.chain_results["ethereum"]
+    # ScreeningResult des Compliance-Service: Score 10/100, keine Sanktion
+    assert result.risk_score == pytest.approx(0.1) and result.risk_level == RiskLevel.LOW
+    assert result.counterparties == 6 and result.total_value_usd == 10.0
+    assert result.first_seen == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    assert service.invalidate_activity("Polygon", [address]) == 1
+    await service.screen_address_universal(address)
+    assert engine.calls == {"ethereum": 1, "polygon": 2, "arbitrum": 1}
+    assert service.activity_cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_or_invalidated_fetches_are_not_cached():
+    cache = ChainActivityCache(ttl_seconds=60)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        await release.wait()
+        return {"tx_count": 1}
+
+    async def broken():
+        raise RuntimeError("rpc down")
+
+    task = asyncio.create_task(cache.get_or_fetch("ethereum", "0xA", slow))
+    await started.wait()
+    shared = asyncio.create_task(cache.get_or_fetch("ethereum", "0xa", slow))
+    await asyncio.sleep(0)
+    cache.invalidate("ethereum", ["0xA"])  # Ingest während des Fetches
+    release.set()
+    assert (await task) == (await shared) == {"tx_count": 1}
+    assert cache.get("ethereum", "0xa") is None
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch("ethereum", "0xb", broken)
+    assert cache.get("ethereum", "0xb") is None and cache.stats()["entries"] == 0
+
+
+def test_activity_summary_parses_mixed_timestamps():
+    summary = _summarize_activity([
+        {"from": "0xA", "to": "0xb", "value": "1.5", "timestamp": "2026-01-02T00:00:00Z"},
+        {"from": "0xa", "to": "0xc", "value": None, "timestamp": 1767225600},
+        {"from": "0xa", "to": "0xd", "value": "x", "timestamp": "1767398400000"},
+        {"from": "0xa", "to": None, "timestamp": "not a date"},
+    ])
+    assert summary["tx_count"] == 4 and summary["counterparties"] == 4
+    assert summary["total_value_usd"] == 1.5
+    assert summary["first_seen"] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert summary["last_activity"] == datetime(2026, 1, 3, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_bulk_screening_dedupes_and_limits_per_chain(fakes):
+    engine, exposure = fakes
+    engine.delay = 0.002
+    service = _service()
+    addresses = [f"0x{i:040x}" for i in range(60)]
+
+    results = await service.screen_addresses_universal(
+        addresses + addresses[:10] + ["", "  "], per_chain_concurrency=3, max_concurrent_addresses=20,
+    )
+
+    assert list(results) == addresses and exposure.calls == 60
+    assert dict(engine.calls) == {chain: 60 for chain in CHAINS}
+    assert all(engine.peak[chain] <= 3 for chain in CHAINS)
+    assert all(r.total_chains_checked == 3 and r.total_transactions == 15 for r in results.values())
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_portfolio_screening_throughput(fakes):
+    """Benchmark: 500 Adressen x 3 Chains (50 ms RPC), Einzel-Requests ohne Cache vs. Bulk (kalt/warm)"""
+    engine, exposure = fakes
+    engine.delay = 0.05
+    addresses = [f"0x{i:040x}" for i in range(500)]
+
+    async def per_address_uncached():
+        service = _service(ttl=0)
+        sem = asyncio.Semaphore(32)
+
+        async def one(address):
+            async with sem:
+                return await service.screen_address_universal(address)
+
+        return await asyncio.gather(*[one(a) for a in addresses])
+
+    rows = []
+    t0 = time.perf_counter()
+    await per_address_uncached()
+    rows.append(("per-address, no cache", time.perf_counter() - t0, sum(engine.calls.values())))
+
+    service = _service()
+    for label in ("bulk, cold cache", "bulk, warm cache"):
+        before = sum(engine.calls.values())
+        t0 = time.perf_counter()
+        results = await service.screen_addresses_universal(addresses, per_chain_concurrency=32)
+        rows.append((label, time.perf_counter() - t0, sum(engine.calls.values()) - before))
+
+    print("\n📊 Universal screening, 500 addresses x 3 chains:")
+    for label, elapsed, fetches in rows:
+        print(f"   {label:>22}: {elapsed * 1000:8.1f} ms, {fetches:5d} activity fetches")
+
+    # Fetch-Zahlen statt Laufzeitverhältnisse: warm kommt ohne RPC aus, kalt ohne Doppel-Fetches
+    assert len(results) == 500 and rows[0][2] == 1500 and rows[1][2] == 1500 and rows[2][2] == 0
+    assert all(engine.peak[chain] <= 32 for chain in CHAINS)
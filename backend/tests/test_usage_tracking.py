@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+
+from app.services import usage_tracking as ut
+from app.services.usage_tracking import UsageTrackingService, UsageAuditWriter
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def incrby(self, key, amount):
+        self.ops.append(("incrby", key, amount))
+
+    def incr(self, key):
+        self.ops.append(("incrby", key, 1))
+
+    def expire(self, key, ttl):
+        self.ops.append(("expire", key, ttl))
+
+    async def execute(self):
+        self.store.round_trips += 1
+        out = []
+        for op, key, arg in self.ops:
+            if op == "incrby":
+                self.store.data[key] = int(self.store.data.get(key, 0)) + arg
+                out.append(self.store.data[key])
+            else:
+                self.store.ttls[key] = arg
+                out.append(True)
+        return out
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    svc = UsageTrackingService()
+    fake = FakeRedis()
+
+    async def _client():
+        return fake
+
+    monkeypatch.setattr(svc, "_client", _client)
+    monkeypatch.setattr(svc.audit_writer, "enqueue", lambda *a, **k: True)
+    return svc, fake
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tracking_is_atomic_and_single_round_trip(service):
+    svc, fake = service
+    results = await asyncio.gather(*[svc.track_api_call("u1", "trace_start") for _ in range(50)])
+
+    totals = sorted(r["tokens_total"] for r in results)
+    assert totals == [10 * (i + 1) for i in range(50)]
+    assert fake.round_trips == 50
+    month_key = next(k for k in fake.data if k.count(":") == 2)
+    assert fake.data[month_key] == 500
+    assert fake.ttls[month_key] == ut.USAGE_KEY_TTL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_check_quota_uses_total_from_increment(service):
+    svc, fake = service
+    for _ in range(9):
+        await svc.track_api_call("u2", "trace_start")
+    trips = fake.round_trips
+
+    assert await svc.check_quota("u2", "community") is True
+    await svc.track_api_call("u2", "trace_start")
+    assert await svc.check_quota("u2", "community") is False
+    # Kein zusätzlicher GET für check_quota
+    assert fake.round_trips == trips + 1
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_flushes_in_batches(monkeypatch):
+    writer = UsageAuditWriter(batch_size=10, flush_interval=0.05)
+    batches = []
+
+    async def _write_rows(rows):
+        batches.append(list(rows))
+
+    commissions = []
+
+    async def _commission(user_id, feature, tokens):
+        commissions.append((user_id, feature, tokens))
+
+    monkeypatch.setattr(writer, "_write_rows", _write_rows)
+    monkeypatch.setattr(ut.partner_service, "record_commission_on_usage", _commission)
+
+    for _ in range(25):
+        writer.enqueue("u3", "graph_query", 3, {"endpoint": "/x"})
+    await asyncio.sleep(0.2)
+    await writer.stop()
+
+    assert sum(len(b) for b in batches) == 25
+    assert max(len(b) for b in batches) <= 10
+    assert len(batches) <= 4
+    assert sum(t for _, _, t in commissions) == 75
+    assert writer.stats["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_audit_writer_stop_loses_no_collected_rows(monkeypatch):
+    writer = UsageAuditWriter(batch_size=10, flush_interval=5.0)
+    written = []
+
+    async def _slow_write(rows):
+        await asyncio.sleep(0.02)  # Flush läuft noch, wenn stop() kommt
+        written.extend(rows)
+
+    async def _commission(user_id, feature, tokens):
+        pass
+
+    monkeypatch.setattr(writer, "_write_rows", _slow_write)
+    monkeypatch.setattr(ut.partner_service, "record_commission_on_usage", _commission)
+
+    for i in range(25):
+        writer.enqueue("u4", "graph_query", i, {})
+    await asyncio.sleep(0)  # Writer hat den ersten Batch aus der Queue genommen
+    await writer.stop()
+
+    assert sorted(tokens for _u, _f, tokens, _m, _ts in written) == list(range(25))
+    assert writer.stats["flushed"] == 25 and writer._task is None